@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from models import User, Role, AuditLog, DocumentType, ISOVersion, AssetType, AssetCategory, DepreciationPeriod, db
 from app.risks.models import Amenaza
+from app.risks.services.risk_recalculation_queue import RiskRecalculationQueue
 from app.forms.user_forms import UserCreateForm, UserEditForm, ChangePasswordForm, ResetPasswordForm, UserSearchForm
 from utils.decorators import role_required, audit_action
 from utils.audit_helper import log_user_changes, log_password_change, log_account_lock, log_account_unlock, get_user_activity
@@ -376,19 +377,8 @@ def delete_user(user_id):
     return redirect(url_for('admin.users'))
 
 
-@admin_bp.route('/audit-logs')
-@login_required
-@role_required('admin', 'ciso', 'auditor')
-def audit_logs():
-    """Ver logs de auditoría"""
-    page = request.args.get('page', 1, type=int)
-    per_page = 50
-
-    # Filtros
-    action_filter = request.args.get('action', '')
-    user_filter = request.args.get('user_id', type=int)
-    entity_filter = request.args.get('entity_type', '')
-
+def filter_audit_logs(action_filter, user_filter, entity_filter):
+    """Consulta de logs de auditoría con los filtros del listado"""
     query = AuditLog.query
 
     if action_filter:
@@ -400,29 +390,78 @@ def audit_logs():
     if entity_filter:
         query = query.filter_by(entity_type=entity_filter)
 
-    query = query.order_by(AuditLog.created_at.desc())
+    return query.order_by(AuditLog.created_at.desc())
 
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    logs = pagination.items
 
-    # Obtener acciones únicas para filtro
-    actions = db.session.query(AuditLog.action).distinct().all()
-    actions = [a[0] for a in actions]
+@admin_bp.route('/audit-logs')
+@login_required
+@role_required('admin', 'ciso', 'auditor')
+def audit_logs():
+    """Ver logs de auditoría (paginación por clave created_at/id)"""
+    from app.services.audit_log_service import AuditLogService
+
+    per_page = 50
+
+    # Filtros
+    action_filter = request.args.get('action', '')
+    user_filter = request.args.get('user_id', type=int)
+    entity_filter = request.args.get('entity_type', '')
+
+    query = filter_audit_logs(action_filter, user_filter, entity_filter)
 
-    # Obtener tipos de entidad únicos
-    entity_types = db.session.query(AuditLog.entity_type).distinct().all()
-    entity_types = [e[0] for e in entity_types if e[0]]
+    page = AuditLogService.keyset_page(
+        query,
+        before=request.args.get('before'),
+        after=request.args.get('after'),
+        per_page=per_page
+    )
+
+    # Acciones y tipos de entidad para los filtros
+    filter_values = AuditLogService.filter_values()
 
     return render_template('admin/audit_logs.html',
-                         logs=logs,
-                         pagination=pagination,
-                         actions=actions,
-                         entity_types=entity_types,
+                         logs=page['items'],
+                         older_cursor=page['older'],
+                         newer_cursor=page['newer'],
+                         actions=filter_values['action'],
+                         entity_types=filter_values['entity_type'],
                          action_filter=action_filter,
                          user_filter=user_filter,
                          entity_filter=entity_filter)
 
 
+@admin_bp.route('/audit-logs/export')
+@login_required
+@role_required('admin', 'ciso', 'auditor')
+def audit_logs_export():
+    """Exportar logs de auditoría filtrados a CSV (en streaming)"""
+    from app.services.export_service import ExportService
+
+    query = filter_audit_logs(
+        request.args.get('action', ''),
+        request.args.get('user_id', type=int),
+        request.args.get('entity_type', '')
+    )
+
+    headers = ['Fecha', 'Usuario', 'Acción', 'Tipo Entidad', 'ID Entidad',
+               'Descripción', 'Estado', 'Dirección IP', 'Error']
+
+    rows = ([
+        log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else '',
+        log.username or '',
+        log.action,
+        log.entity_type or '',
+        log.entity_id or '',
+        log.description or '',
+        log.status or '',
+        log.ip_address or '',
+        log.error_message or ''
+    ] for log in ExportService.iter_query(query))
+
+    filename = f"audit_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return ExportService.csv_response(rows, headers, filename)
+
+
 # ========================================================================
 # CONFIGURACIÓN DEL SISTEMA
 # ========================================================================
@@ -1362,6 +1401,10 @@ def create_control_amenaza():
             db.session.add(nueva_relacion)
             db.session.commit()
 
+            cola = RiskRecalculationQueue()
+            cola.marcar_amenaza(nueva_relacion.amenaza_id)
+            cola.procesar(usuario_id=current_user.id)
+
             amenaza = Amenaza.query.get(amenaza_id)
             flash(f'Relación creada: Control {control_codigo} mitiga amenaza {amenaza.codigo}', 'success')
             return redirect(url_for('admin.controles_amenazas'))
@@ -1408,6 +1451,10 @@ def edit_control_amenaza(id):
 
             db.session.commit()
 
+            cola = RiskRecalculationQueue()
+            cola.marcar_amenaza(relacion.amenaza_id)
+            cola.procesar(usuario_id=current_user.id)
+
             flash(f'Relación actualizada exitosamente', 'success')
             return redirect(url_for('admin.controles_amenazas'))
 
@@ -1443,10 +1490,15 @@ def delete_control_amenaza(id):
     try:
         control_codigo = relacion.control_codigo
         amenaza_codigo = relacion.amenaza.codigo
+        amenaza_id = relacion.amenaza_id
 
         db.session.delete(relacion)
         db.session.commit()
 
+        cola = RiskRecalculationQueue()
+        cola.marcar_amenaza(amenaza_id)
+        cola.procesar(usuario_id=current_user.id)
+
         flash(f'Relación eliminada: Control {control_codigo} - Amenaza {amenaza_codigo}', 'success')
 
     except Exception as e:
@@ -1544,6 +1596,10 @@ def create_amenaza_recurso():
             db.session.add(nueva_relacion)
             db.session.commit()
 
+            cola = RiskRecalculationQueue()
+            cola.marcar_aplicabilidad(nueva_relacion.amenaza_id, tipo_recurso, dimension_afectada)
+            cola.procesar(usuario_id=current_user.id)
+
             amenaza = Amenaza.query.get(amenaza_id)
             flash(f'Relación creada: Amenaza {amenaza.codigo} afecta {tipo_recurso}/{dimension_afectada}', 'success')
             return redirect(url_for('admin.amenazas_recursos'))
@@ -1583,6 +1639,10 @@ def edit_amenaza_recurso(id):
 
             db.session.commit()
 
+            cola = RiskRecalculationQueue()
+            cola.marcar_aplicabilidad(relacion.amenaza_id, relacion.tipo_recurso, relacion.dimension_afectada)
+            cola.procesar(usuario_id=current_user.id)
+
             flash(f'Relación actualizada exitosamente', 'success')
             return redirect(url_for('admin.amenazas_recursos'))
 
@@ -1615,12 +1675,17 @@ def delete_amenaza_recurso(id):
 
     try:
         amenaza_codigo = relacion.amenaza.codigo
+        amenaza_id = relacion.amenaza_id
         tipo_recurso = relacion.tipo_recurso
         dimension = relacion.dimension_afectada
 
         db.session.delete(relacion)
         db.session.commit()
 
+        cola = RiskRecalculationQueue()
+        cola.marcar_aplicabilidad(amenaza_id, tipo_recurso, dimension)
+        cola.procesar(usuario_id=current_user.id)
+
         flash(f'Relación eliminada: {amenaza_codigo} - {tipo_recurso}/{dimension}', 'success')
 
     except Exception as e:
@@ -1652,26 +1717,20 @@ def backups():
 @audit_action('backup_created')
 def create_backup():
     """Crear un nuevo backup del sistema"""
-    from app.services.backup_service import BackupService
+    from app.services.job_service import JobService
 
     description = request.form.get('description', 'Backup manual')
     include_files = request.form.get('include_files', 'true') == 'true'
+    incremental = request.form.get('incremental') == 'true'
 
-    try:
-        result = BackupService.create_backup(
-            description=description,
-            include_files=include_files
-        )
-
-        if result['success']:
-            flash(f'Backup creado exitosamente: {result["backup_name"]}', 'success')
-        else:
-            flash(f'Error al crear backup: {result.get("error")}', 'error')
-
-    except Exception as e:
-        flash(f'Error al crear backup: {str(e)}', 'error')
+    job = JobService.enqueue('backup_create', payload={
+        'description': description,
+        'include_files': include_files,
+        'incremental': incremental
+    }, user_id=current_user.id)
 
-    return redirect(url_for('admin.backups'))
+    flash(f'Creación de backup en curso (trabajo #{job.id})', 'info')
+    return redirect(url_for('admin.backups', job=job.id))
 
 
 @admin_bp.route('/backups/<backup_name>/download')
@@ -1726,8 +1785,8 @@ def delete_backup(backup_name):
 @audit_action('backup_restored')
 def restore_backup():
     """Restaurar sistema desde un backup"""
-    import threading
     from app.services.backup_service import BackupService
+    from app.services.job_service import JobService
 
     backup_name = request.form.get('backup_name')
     restore_files = request.form.get('restore_files', 'true') == 'true'
@@ -1736,52 +1795,19 @@ def restore_backup():
         flash('Debe seleccionar un backup', 'error')
         return redirect(url_for('admin.backups'))
 
-    def restore_in_background(backup_name, restore_files, app):
-        """Ejecutar restauración en segundo plano"""
-        with app.app_context():
-            try:
-                backup_dir = BackupService.get_backup_directory()
-                backup_path = backup_dir / backup_name
-
-                print(f"\n{'='*60}")
-                print(f"🔄 INICIANDO RESTAURACIÓN EN SEGUNDO PLANO")
-                print(f"   Backup: {backup_name}")
-                print(f"   Restaurar archivos: {restore_files}")
-                print(f"{'='*60}\n")
-
-                result = BackupService.restore_backup(
-                    backup_path=backup_path,
-                    restore_files=restore_files
-                )
-
-                print(f"\n{'='*60}")
-                if result['success']:
-                    print(f"✅ RESTAURACIÓN COMPLETADA EXITOSAMENTE")
-                    print(f"   Se recomienda reiniciar la aplicación")
-                else:
-                    print(f"❌ ERROR EN RESTAURACIÓN: {result.get('error')}")
-                print(f"{'='*60}\n")
-
-            except Exception as e:
-                print(f"\n{'='*60}")
-                print(f"❌ ERROR CRÍTICO EN RESTAURACIÓN: {str(e)}")
-                print(f"{'='*60}\n")
-                import traceback
-                traceback.print_exc()
-
-    # Iniciar restauración en segundo plano
-    from flask import current_app
-    thread = threading.Thread(
-        target=restore_in_background,
-        args=(backup_name, restore_files, current_app._get_current_object())
-    )
-    thread.daemon = True
-    thread.start()
+    if not (BackupService.get_backup_directory() / backup_name).exists():
+        flash('Backup no encontrado', 'error')
+        return redirect(url_for('admin.backups'))
+
+    job = JobService.enqueue('backup_restore', payload={
+        'backup_name': backup_name,
+        'restore_files': restore_files
+    }, user_id=current_user.id)
 
-    flash('🔄 Restauración iniciada en segundo plano. Revise los logs del contenedor para ver el progreso.', 'info')
+    flash(f'🔄 Restauración iniciada en segundo plano (trabajo #{job.id}).', 'info')
     flash('⚠️ Una vez completada, se recomienda reiniciar la aplicación.', 'warning')
 
-    return redirect(url_for('admin.backups'))
+    return redirect(url_for('admin.backups', job=job.id))
 
 
 @admin_bp.route('/backups/upload', methods=['POST'])
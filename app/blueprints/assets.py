@@ -630,46 +630,37 @@ def api_stats():
 @login_required
 def export():
     """Exportar inventario de activos a CSV"""
-    import csv
-    from io import StringIO
-    from flask import make_response
+    from sqlalchemy.orm import joinedload
+    from app.services.export_service import ExportService
 
-    # Crear CSV en memoria
-    si = StringIO()
-    writer = csv.writer(si)
-
-    # Cabeceras
-    writer.writerow([
+    headers = [
         'Código', 'Nombre', 'Categoría', 'Propietario', 'Clasificación',
         'Confidencialidad', 'Integridad', 'Disponibilidad', 'Valor',
         'Criticidad', 'Estado', 'Ubicación', 'Fecha Adquisición'
-    ])
-
-    # Datos
-    assets = Asset.query.order_by(Asset.asset_code).all()
-    for asset in assets:
-        writer.writerow([
-            asset.asset_code,
-            asset.name,
-            asset.category.value if asset.category else '',
-            asset.owner.name if asset.owner else '',
-            asset.classification.value if asset.classification else '',
-            asset.confidentiality_level.value if asset.confidentiality_level else '',
-            asset.integrity_level.value if asset.integrity_level else '',
-            asset.availability_level.value if asset.availability_level else '',
-            asset.business_value,
-            asset.criticality,
-            asset.status.value if asset.status else '',
-            asset.physical_location or '',
-            asset.acquisition_date.strftime('%Y-%m-%d') if asset.acquisition_date else ''
-        ])
+    ]
 
-    # Crear respuesta
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=inventario_activos.csv"
-    output.headers["Content-type"] = "text/csv; charset=utf-8"
+    # Lectura por lotes con el propietario cargado en la misma consulta
+    assets = ExportService.iter_query(
+        Asset.query.options(joinedload(Asset.owner)).order_by(Asset.asset_code)
+    )
 
-    return output
+    rows = ([
+        asset.asset_code,
+        asset.name,
+        asset.category.value if asset.category else '',
+        asset.owner.name if asset.owner else '',
+        asset.classification.value if asset.classification else '',
+        asset.confidentiality_level.value if asset.confidentiality_level else '',
+        asset.integrity_level.value if asset.integrity_level else '',
+        asset.availability_level.value if asset.availability_level else '',
+        asset.business_value,
+        asset.criticality,
+        asset.status.value if asset.status else '',
+        asset.physical_location or '',
+        asset.acquisition_date.strftime('%Y-%m-%d') if asset.acquisition_date else ''
+    ] for asset in assets)
+
+    return ExportService.csv_response(rows, headers, 'inventario_activos.csv')
 
 
 @assets_bp.route('/graph/test')
@@ -21,13 +21,11 @@ from app.services.audit_service import AuditService
 from app.services.finding_service import FindingService
 from app.services.corrective_action_service import CorrectiveActionService
 from app.services.audit_program_service import AuditProgramService
+from app.services.blob_storage_service import BlobStorageService
 from models import db, User, SOAControl
 
 audits_bp = Blueprint('audits', __name__)
 
-# Configuración de archivos permitidos
-UPLOAD_FOLDER_AUDITS = 'uploads/audits'
-
 # Inicializar servicios
 audit_service = AuditService()
 finding_service = FindingService()
@@ -987,6 +985,38 @@ def audit_findings(id):
         return redirect(url_for('audits.audit_detail', id=id))
 
 
+@audits_bp.route('/hallazgos/exportar')
+@login_required
+def findings_export():
+    """Exportar matriz de hallazgos (CSV o Excel) en streaming"""
+    from app.services.export_service import ExportService
+
+    filters = {
+        'audit_id': request.args.get('audit_id', type=int),
+        'status': FindingStatus[request.args['status']] if request.args.get('status') else None,
+        'finding_type': FindingType[request.args['type']] if request.args.get('type') else None,
+        'affected_control': request.args.get('control')
+    }
+    rows = finding_service.export_findings_matrix(filters)
+    fecha = datetime.utcnow().strftime('%Y%m%d')
+
+    if request.args.get('format') == 'excel':
+        try:
+            return ExportService.xlsx_response(
+                rows, FindingService.FINDINGS_MATRIX_HEADERS,
+                filename=f'matriz_hallazgos_{fecha}.xlsx',
+                title='Matriz de Hallazgos',
+                column_widths=[20, 18, 28, 50, 16, 20, 25, 14, 22, 14, 50, 10]
+            )
+        except ImportError:
+            flash('openpyxl no está instalado. Instale con: pip install openpyxl', 'error')
+            return redirect(url_for('audits.index'))
+
+    return ExportService.csv_response(
+        rows, FindingService.FINDINGS_MATRIX_HEADERS, f'matriz_hallazgos_{fecha}.csv'
+    )
+
+
 @audits_bp.route('/auditorias/<int:id>/hallazgos/nuevo', methods=['GET', 'POST'])
 @login_required
 def finding_create(id):
@@ -1539,25 +1569,15 @@ def audit_upload_document(id):
             flash('Nombre de archivo inválido', 'error')
             return redirect(url_for('audits.audit_detail', id=id))
 
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
-
-        # Crear carpeta específica para esta auditoría
-        audit_folder = os.path.join(UPLOAD_FOLDER_AUDITS, str(audit.id))
-        os.makedirs(audit_folder, exist_ok=True)
-
-        # Ruta completa del archivo
-        file_path = os.path.join(audit_folder, unique_filename)
-
-        # Guardar archivo
-        file.save(file_path)
+        # Guardar archivo en el almacén compartido
+        file_path = BlobStorageService.store(file, filename=filename)['file_path']
 
         document = AuditDocument(
             audit_id=id,
             document_type=document_type,
             title=title,
             description=description,
-            file_path=file_path,  # Guardar la ruta relativa
+            file_path=file_path,  # Guardar la ruta relativa del blob
             version=version,
             is_final=is_final,
             uploaded_by_id=current_user.id,
@@ -1590,7 +1610,7 @@ def audit_download_document(doc_id):
         return send_file(
             document.file_path,
             as_attachment=True,
-            download_name=os.path.basename(document.file_path)
+            download_name=f"{secure_filename(document.title) or 'documento'}{os.path.splitext(document.file_path)[1]}"
         )
 
     except Exception as e:
@@ -1613,9 +1633,8 @@ def audit_delete_document(doc_id):
                 flash('No se pueden eliminar documentos de una auditoría cerrada', 'error')
                 return redirect(url_for('audits.audit_detail', id=audit_id))
 
-        # Eliminar archivo físico
-        if document.file_path and os.path.exists(document.file_path):
-            os.remove(document.file_path)
+        # Liberar archivo (los blobs compartidos los elimina la recolección)
+        BlobStorageService.release(document.file_path)
 
         # Eliminar registro de base de datos
         db.session.delete(document)
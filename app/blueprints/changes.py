@@ -13,6 +13,7 @@ from app.models.change import (
 )
 from app.services.change_service import ChangeService
 from app.services.change_workflow import ChangeWorkflow
+from app.services.blob_storage_service import BlobStorageService
 from datetime import datetime, timedelta
 from sqlalchemy import or_, and_, func
 from werkzeug.utils import secure_filename
@@ -163,10 +164,6 @@ def new():
                 upload_success_count = 0
                 upload_error_count = 0
 
-                # Crear directorio si no existe
-                change_upload_dir = os.path.join(UPLOAD_FOLDER, str(change.id))
-                os.makedirs(change_upload_dir, exist_ok=True)
-
                 for file in uploaded_files:
                     if file and file.filename and allowed_file(file.filename):
                         try:
@@ -180,12 +177,9 @@ def new():
                                 upload_error_count += 1
                                 continue
 
-                            # Guardar archivo
+                            # Guardar archivo en el almacén compartido
                             filename = secure_filename(file.filename)
-                            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                            unique_filename = f"{timestamp}_{filename}"
-                            file_path = os.path.join(change_upload_dir, unique_filename)
-                            file.save(file_path)
+                            file_path = BlobStorageService.store(file)['file_path']
 
                             # Crear registro en BD
                             doc = ChangeDocument(
@@ -526,8 +520,7 @@ def delete(change_id):
         if change.documents:
             for doc in change.documents:
                 try:
-                    if os.path.exists(doc.file_path):
-                        os.remove(doc.file_path)
+                    BlobStorageService.release(doc.file_path)
                 except Exception as file_error:
                     print(f"Error eliminando archivo {doc.file_path}: {file_error}")
 
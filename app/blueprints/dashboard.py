@@ -1,16 +1,12 @@
 from flask import Blueprint, render_template, jsonify
 from flask_login import login_required, current_user
-from models import (Risk, Incident, NonConformity, SOAControl, Audit, SOAVersion,
-                    Document, Asset, Service, TrainingSession)
-from models import IncidentStatus, NCStatus
+from models import Incident, NonConformity, SOAControl, SOAVersion, Document, Asset
+from models import IncidentStatus
 from app.models.task import Task, PeriodicTaskStatus
-from app.models.change import Change, ChangeStatus
-from app.models.audit import (AuditProgram, AuditFinding as Finding,
-                              AuditCorrectiveAction as CorrectiveAction,
-                              FindingStatus, AuditActionStatus)
-from app.risks.models import Riesgo, TratamientoRiesgo
+from app.models.audit import AuditCorrectiveAction as CorrectiveAction, AuditActionStatus
+from app.risks.models import Riesgo
+from app.services.dashboard_metrics_service import DashboardMetricsService
 from datetime import datetime, timedelta, date
-from sqlalchemy import func, and_, or_, case, extract
 from collections import defaultdict
 
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -19,80 +15,29 @@ dashboard_bp = Blueprint('dashboard', __name__)
 @login_required
 def index():
     # Calculate KPIs and metrics for the dashboard
-    kpis = {}
-
-    # SOA Controls metrics
-    total_controls = SOAControl.query.count()
-    implemented_controls = SOAControl.query.filter_by(implementation_status='implemented').count()
-    kpis['soa_compliance'] = (implemented_controls / total_controls * 100) if total_controls > 0 else 0
-
-    # Risk metrics - usando tabla riesgos (sistema avanzado)
-    total_risks = Riesgo.query.count()
-    # Contar riesgos ALTO y MUY_ALTO
-    high_risks = Riesgo.query.filter(
-        Riesgo.clasificacion_efectiva.in_(['ALTO', 'MUY_ALTO'])
-    ).count()
-    kpis['high_risk_count'] = high_risks
-    kpis['total_risks'] = total_risks
-
-    # Incident metrics
-    open_incidents = Incident.query.filter(~Incident.status.in_([IncidentStatus.RESOLVED, IncidentStatus.CLOSED])).count()
-    total_incidents_month = Incident.query.filter(
-        Incident.created_at >= datetime.utcnow() - timedelta(days=30)
-    ).count()
-    kpis['open_incidents'] = open_incidents
-    kpis['incidents_this_month'] = total_incidents_month
-
-    # Non-conformities metrics
-    open_nonconformities = NonConformity.query.filter(
-        ~NonConformity.status.in_([NCStatus.CLOSED])
-    ).count()
-    overdue_nonconformities = NonConformity.query.filter(
-        NonConformity.target_closure_date < datetime.utcnow().date(),
-        NonConformity.status != NCStatus.CLOSED
-    ).count()
-    kpis['open_nonconformities'] = open_nonconformities
-    kpis['overdue_nonconformities'] = overdue_nonconformities
-
-    # Tasks metrics
-    overdue_tasks = Task.query.filter(
-        Task.due_date < datetime.utcnow(),
-        Task.status == PeriodicTaskStatus.VENCIDA
-    ).count()
-    pending_tasks = Task.query.filter(
-        Task.assigned_to_id == current_user.id,
-        Task.status.in_([PeriodicTaskStatus.PENDIENTE, PeriodicTaskStatus.EN_PROGRESO])
-    ).count()
-    kpis['overdue_tasks'] = overdue_tasks
-    kpis['my_pending_tasks'] = pending_tasks
-
-    # Document metrics
-    approved_documents = Document.query.filter_by(status='approved').count()
-    pending_review_documents = Document.query.filter_by(status='review').count()
-    kpis['approved_documents'] = approved_documents
-    kpis['pending_review_documents'] = pending_review_documents
-
-    # Change metrics
-    pending_changes = Change.query.filter(
-        Change.status.in_([
-            ChangeStatus.SUBMITTED,
-            ChangeStatus.UNDER_REVIEW,
-            ChangeStatus.PENDING_APPROVAL,
-            ChangeStatus.APPROVED,
-            ChangeStatus.SCHEDULED,
-            ChangeStatus.IN_PROGRESS
-        ])
-    ).count()
-
-    # Cambios aprobados/implementados este mes (usando updated_at como referencia)
-    first_day_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    approved_changes_month = Change.query.filter(
-        Change.status.in_([ChangeStatus.APPROVED, ChangeStatus.IMPLEMENTED, ChangeStatus.CLOSED]),
-        Change.updated_at >= first_day_month
-    ).count()
-
-    kpis['pending_changes'] = pending_changes
-    kpis['approved_changes_month'] = approved_changes_month
+    soa = DashboardMetricsService.soa()
+    risks = DashboardMetricsService.risks()
+    incidents = DashboardMetricsService.incidents()
+    nonconformities = DashboardMetricsService.nonconformities()
+    tasks = DashboardMetricsService.tasks(current_user.id)
+    documents = DashboardMetricsService.documents()
+    changes = DashboardMetricsService.changes()
+
+    kpis = {
+        'soa_compliance': (soa['implemented'] / soa['total'] * 100) if soa['total'] > 0 else 0,
+        'high_risk_count': risks['high'],
+        'total_risks': risks['total'],
+        'open_incidents': incidents['open'],
+        'incidents_this_month': incidents['last_30_days'],
+        'open_nonconformities': nonconformities['open'],
+        'overdue_nonconformities': nonconformities['overdue'],
+        'overdue_tasks': tasks['overdue'],
+        'my_pending_tasks': tasks['my_pending'],
+        'approved_documents': documents['approved'],
+        'pending_review_documents': documents['review'],
+        'pending_changes': changes['pending'],
+        'approved_changes_month': changes['approved_this_month']
+    }
 
     # Recent activity
     recent_incidents = Incident.query.order_by(Incident.created_at.desc()).limit(5).all()
@@ -547,62 +492,27 @@ def operational_metrics():
     API endpoint para métricas operativas clave
     """
     try:
-        metrics = {}
-
-        # 1. Tasa de completitud de tareas (%)
-        total_tasks = Task.query.count()
-        completed_tasks = Task.query.filter(
-            Task.status == PeriodicTaskStatus.COMPLETADA
-        ).count()
-        metrics['task_completion_rate'] = round(
-            (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2
-        )
-
-        # 2. Tasa de efectividad de NC (%)
-        total_nc_closed = NonConformity.query.filter(
-            NonConformity.status == NCStatus.CLOSED
-        ).count()
-        effective_nc = total_nc_closed
-        total_nc = NonConformity.query.count()
-        metrics['nc_effectiveness_rate'] = round(
-            (effective_nc / total_nc * 100) if total_nc > 0 else 0, 2
-        )
-
-        # 3. Tiempo promedio de respuesta a incidentes (en días)
-        resolved_incidents = Incident.query.filter(
-            Incident.status.in_([IncidentStatus.RESOLVED, IncidentStatus.CLOSED]),
-            Incident.resolution_date.isnot(None)
-        ).all()
-
-        if resolved_incidents:
-            total_response_time = sum([
-                (inc.resolution_date - inc.discovery_date).days
-                for inc in resolved_incidents
-                if inc.discovery_date
-            ])
-            metrics['avg_incident_response_days'] = round(
-                total_response_time / len(resolved_incidents), 2
+        tasks = DashboardMetricsService.tasks()
+        nonconformities = DashboardMetricsService.nonconformities()
+        incidents = DashboardMetricsService.incidents()
+        changes = DashboardMetricsService.changes()
+
+        metrics = {
+            # 1. Tasa de completitud de tareas (%)
+            'task_completion_rate': round(
+                (tasks['completed'] / tasks['total'] * 100) if tasks['total'] > 0 else 0, 2
+            ),
+            # 2. Tasa de efectividad de NC (%)
+            'nc_effectiveness_rate': round(
+                (nonconformities['closed'] / nonconformities['total'] * 100) if nonconformities['total'] > 0 else 0, 2
+            ),
+            # 3. Tiempo promedio de respuesta a incidentes (en días)
+            'avg_incident_response_days': incidents['avg_response_days'],
+            # 4. Tasa de éxito de cambios (%)
+            'change_success_rate': round(
+                (changes['successful'] / changes['finished'] * 100) if changes['finished'] > 0 else 0, 2
             )
-        else:
-            metrics['avg_incident_response_days'] = 0
-
-        # 4. Tasa de éxito de cambios (%)
-        total_changes = Change.query.filter(
-            Change.status.in_([
-                ChangeStatus.IMPLEMENTED,
-                ChangeStatus.CLOSED,
-                ChangeStatus.FAILED,
-                ChangeStatus.ROLLED_BACK
-            ])
-        ).count()
-
-        successful_changes = Change.query.filter(
-            Change.status.in_([ChangeStatus.IMPLEMENTED, ChangeStatus.CLOSED])
-        ).count()
-
-        metrics['change_success_rate'] = round(
-            (successful_changes / total_changes * 100) if total_changes > 0 else 0, 2
-        )
+        }
 
         return jsonify(metrics)
 
@@ -623,61 +533,26 @@ def risk_heatmap():
     API endpoint para mapa de calor de riesgos (impacto vs probabilidad)
     """
     try:
-        risks = Riesgo.query.all()
-        heatmap_data = []
-
-        for risk in risks:
-            # Construir nombre descriptivo del riesgo
-            risk_name = risk.codigo
-            if risk.activo and hasattr(risk.activo, 'nombre'):
-                risk_name = f"{risk.codigo} - {risk.activo.nombre}"
-            elif risk.amenaza and hasattr(risk.amenaza, 'nombre'):
-                risk_name = f"{risk.codigo} - {risk.amenaza.nombre}"
-
-            heatmap_data.append({
-                'id': risk.id,
-                'nombre': risk_name,
-                'probabilidad': float(risk.probabilidad_efectiva) if risk.probabilidad_efectiva else 0,
-                'impacto': float(risk.impacto_efectivo) if risk.impacto_efectivo else 0,
-                'nivel': float(risk.nivel_riesgo_efectivo) if risk.nivel_riesgo_efectivo else 0,
-                'clasificacion': risk.clasificacion_efectiva,
-                'tratamiento': risk.tratamientos[0].opcion_tratamiento if risk.tratamientos else None
-            })
+        from app.risks.services.risk_summary_service import RiskSummaryService
 
-        # Contar riesgos por celda de la matriz (escala 1-5)
+        # Conteos por celda (escala 1-5) leídos del resumen materializado
+        # 0-3 -> 1, 3-5 -> 2, 5-7 -> 3, 7-9 -> 4, 9-10 -> 5
         matrix = {}
         for i in range(1, 6):
             for j in range(1, 6):
-                matrix[f"{i},{j}"] = {'count': 0, 'risks': []}
-
-        for risk in heatmap_data:
-            # Escalar valores de 0-10 a 1-5
-            # 0-2 -> 1, 2-4 -> 2, 4-6 -> 3, 6-8 -> 4, 8-10 -> 5
-            impacto_scaled = max(1, min(5, int((risk['impacto'] / 2) + 0.5)))
-            prob_scaled = max(1, min(5, int((risk['probabilidad'] / 2) + 0.5)))
-
-            key = f"{impacto_scaled},{prob_scaled}"
-            if key in matrix:
-                matrix[key]['count'] += 1
-                matrix[key]['risks'].append({
-                    'id': risk['id'],
-                    'nombre': risk['nombre'],
-                    'nivel': risk['nivel'],
-                    'impacto_original': risk['impacto'],
-                    'probabilidad_original': risk['probabilidad']
-                })
+                matrix[f"{i},{j}"] = {'count': 0}
+
+        for (prob_scaled, impacto_scaled), count in RiskSummaryService.matriz().items():
+            # Los riesgos sin valor efectivo (celda 0) cuentan en la celda 1
+            key = f"{max(1, impacto_scaled)},{max(1, prob_scaled)}"
+            matrix[key]['count'] += count
+
+        risks = DashboardMetricsService.risks()
 
         return jsonify({
-            'risks': heatmap_data,
             'matrix': matrix,
-            'total_risks': len(risks),
-            'by_classification': {
-                'MUY_ALTO': len([r for r in heatmap_data if r['clasificacion'] == 'MUY_ALTO']),
-                'ALTO': len([r for r in heatmap_data if r['clasificacion'] == 'ALTO']),
-                'MEDIO': len([r for r in heatmap_data if r['clasificacion'] == 'MEDIO']),
-                'BAJO': len([r for r in heatmap_data if r['clasificacion'] == 'BAJO']),
-                'MUY_BAJO': len([r for r in heatmap_data if r['clasificacion'] == 'MUY_BAJO'])
-            }
+            'total_risks': risks['total'],
+            'by_classification': risks['by_classification']
         })
 
     except Exception as e:
@@ -693,58 +568,25 @@ def audit_metrics():
     API endpoint para métricas de auditoría
     """
     try:
-        metrics = {}
-        today = date.today()
-        current_year = today.year
-
-        # 1. Tasa de completitud de auditorías
-        total_audits = Audit.query.filter(
-            extract('year', Audit.start_date) == current_year
-        ).count()
-
-        completed_audits = Audit.query.filter(
-            extract('year', Audit.start_date) == current_year,
-            Audit.status.in_(['completed', 'closed'])
-        ).count()
-
-        metrics['audit_completion_rate'] = round(
-            (completed_audits / total_audits * 100) if total_audits > 0 else 0, 2
-        )
-
-        # 2. Cobertura ISO 27001 (% controles implementados)
-        total_iso_controls = SOAControl.query.filter_by(
-            applicability_status='aplicable'
-        ).count()
-
-        implemented_controls = SOAControl.query.filter_by(
-            applicability_status='aplicable',
-            implementation_status='implemented'
-        ).count()
-
-        metrics['iso_coverage_percentage'] = round(
-            (implemented_controls / total_iso_controls * 100) if total_iso_controls > 0 else 0, 2
-        )
-
-        # 3. Hallazgos abiertos
-        open_findings = Finding.query.filter(
-            Finding.status.in_([FindingStatus.OPEN, FindingStatus.ACTION_PLAN_PENDING,
-                               FindingStatus.ACTION_PLAN_APPROVED, FindingStatus.IN_TREATMENT])
-        ).count()
-        metrics['open_findings'] = open_findings
-
-        # 4. Acciones correctivas vencidas
-        overdue_actions = CorrectiveAction.query.filter(
-            CorrectiveAction.planned_completion_date < today,
-            CorrectiveAction.status.in_([AuditActionStatus.PENDING, AuditActionStatus.IN_PROGRESS])
-        ).count()
-        metrics['overdue_corrective_actions'] = overdue_actions
-
-        # 5. Hallazgos por nivel de riesgo
-        metrics['findings_by_severity'] = {
-            'critical': Finding.query.filter_by(risk_level='critical').count(),
-            'high': Finding.query.filter_by(risk_level='high').count(),
-            'medium': Finding.query.filter_by(risk_level='medium').count(),
-            'low': Finding.query.filter_by(risk_level='low').count()
+        audits = DashboardMetricsService.audits()
+        soa = DashboardMetricsService.soa()
+
+        metrics = {
+            # 1. Tasa de completitud de auditorías
+            'audit_completion_rate': round(
+                (audits['completed_this_year'] / audits['total_this_year'] * 100)
+                if audits['total_this_year'] > 0 else 0, 2
+            ),
+            # 2. Cobertura ISO 27001 (% controles implementados)
+            'iso_coverage_percentage': round(
+                (soa['applicable_implemented'] / soa['applicable'] * 100) if soa['applicable'] > 0 else 0, 2
+            ),
+            # 3. Hallazgos abiertos
+            'open_findings': audits['open_findings'],
+            # 4. Acciones correctivas vencidas
+            'overdue_corrective_actions': audits['overdue_corrective_actions'],
+            # 5. Hallazgos por nivel de riesgo
+            'findings_by_severity': audits['findings_by_severity']
         }
 
         return jsonify(metrics)
@@ -766,34 +608,7 @@ def trends_incidents():
     API endpoint para tendencias de incidentes (últimos 6 meses)
     """
     try:
-        today = datetime.utcnow()
-        six_months_ago = today - timedelta(days=180)
-
-        incidents_by_month = Incident.query.filter(
-            Incident.created_at >= six_months_ago
-        ).all()
-
-        months = {}
-        for i in range(6):
-            month_date = today - timedelta(days=30*i)
-            month_key = month_date.strftime('%Y-%m')
-            month_name = month_date.strftime('%b %Y')
-            months[month_key] = {'name': month_name, 'count': 0, 'critical': 0}
-
-        for incident in incidents_by_month:
-            month_key = incident.created_at.strftime('%Y-%m')
-            if month_key in months:
-                months[month_key]['count'] += 1
-                if incident.severity in ['CRITICAL', 'HIGH']:
-                    months[month_key]['critical'] += 1
-
-        sorted_months = sorted(months.items(), key=lambda x: x[0])
-
-        return jsonify({
-            'labels': [m[1]['name'] for m in sorted_months],
-            'data': [m[1]['count'] for m in sorted_months],
-            'critical': [m[1]['critical'] for m in sorted_months]
-        })
+        return jsonify(DashboardMetricsService.incident_trends())
 
     except Exception as e:
         import traceback
@@ -808,13 +623,7 @@ def trends_risks():
     API endpoint para evolución de riesgos en el tiempo
     """
     try:
-        risks_by_level = {
-            'MUY_ALTO': Riesgo.query.filter_by(clasificacion_efectiva='MUY_ALTO').count(),
-            'ALTO': Riesgo.query.filter_by(clasificacion_efectiva='ALTO').count(),
-            'MEDIO': Riesgo.query.filter_by(clasificacion_efectiva='MEDIO').count(),
-            'BAJO': Riesgo.query.filter_by(clasificacion_efectiva='BAJO').count(),
-            'MUY_BAJO': Riesgo.query.filter_by(clasificacion_efectiva='MUY_BAJO').count()
-        }
+        risks_by_level = DashboardMetricsService.risks()['by_classification']
 
         return jsonify({
             'labels': list(risks_by_level.keys()),
@@ -835,42 +644,7 @@ def trends_tasks():
     API endpoint para tendencias de tareas (últimos 6 meses)
     """
     try:
-        today = datetime.utcnow()
-        six_months_ago = today - timedelta(days=180)
-
-        tasks = Task.query.filter(
-            Task.created_at >= six_months_ago
-        ).all()
-
-        months = {}
-        for i in range(6):
-            month_date = today - timedelta(days=30*i)
-            month_key = month_date.strftime('%Y-%m')
-            month_name = month_date.strftime('%b %Y')
-            months[month_key] = {
-                'name': month_name,
-                'created': 0,
-                'completed': 0,
-                'overdue': 0
-            }
-
-        for task in tasks:
-            month_key = task.created_at.strftime('%Y-%m')
-            if month_key in months:
-                months[month_key]['created'] += 1
-                if task.status == PeriodicTaskStatus.COMPLETADA:
-                    months[month_key]['completed'] += 1
-                elif task.status == PeriodicTaskStatus.VENCIDA:
-                    months[month_key]['overdue'] += 1
-
-        sorted_months = sorted(months.items(), key=lambda x: x[0])
-
-        return jsonify({
-            'labels': [m[1]['name'] for m in sorted_months],
-            'created': [m[1]['created'] for m in sorted_months],
-            'completed': [m[1]['completed'] for m in sorted_months],
-            'overdue': [m[1]['overdue'] for m in sorted_months]
-        })
+        return jsonify(DashboardMetricsService.task_trends())
 
     except Exception as e:
         import traceback
@@ -889,32 +663,7 @@ def assets_distribution():
     API endpoint para distribución de activos
     """
     try:
-        assets_by_category = Asset.query.with_entities(
-            Asset.category,
-            func.count(Asset.id)
-        ).group_by(Asset.category).all()
-
-        assets_by_status = Asset.query.with_entities(
-            Asset.status,
-            func.count(Asset.id)
-        ).group_by(Asset.status).all()
-
-        critical_assets = Asset.query.filter(
-            Asset.criticality >= 8
-        ).count()
-
-        return jsonify({
-            'by_category': {
-                cat.value if hasattr(cat, 'value') else str(cat): count
-                for cat, count in assets_by_category if cat
-            },
-            'by_status': {
-                status.value if hasattr(status, 'value') else str(status): count
-                for status, count in assets_by_status if status
-            },
-            'critical_count': critical_assets,
-            'total': Asset.query.count()
-        })
+        return jsonify(DashboardMetricsService.assets())
 
     except Exception as e:
         import traceback
@@ -929,37 +678,7 @@ def services_metrics():
     API endpoint para métricas de servicios
     """
     try:
-        services_by_type = Service.query.with_entities(
-            Service.service_type,
-            func.count(Service.id)
-        ).group_by(Service.service_type).all()
-
-        services_by_status = Service.query.with_entities(
-            Service.status,
-            func.count(Service.id)
-        ).group_by(Service.status).all()
-
-        critical_services = Service.query.filter(
-            Service.criticality >= 8
-        ).count()
-
-        services_with_rto = Service.query.filter(
-            Service.rto.isnot(None)
-        ).count()
-
-        return jsonify({
-            'by_type': {
-                stype.value if hasattr(stype, 'value') else str(stype): count
-                for stype, count in services_by_type if stype
-            },
-            'by_status': {
-                status.value if hasattr(status, 'value') else str(status): count
-                for status, count in services_by_status if status
-            },
-            'critical_count': critical_services,
-            'with_rto_rpo': services_with_rto,
-            'total': Service.query.count()
-        })
+        return jsonify(DashboardMetricsService.services())
 
     except Exception as e:
         import traceback
@@ -974,34 +693,13 @@ def documents_metrics():
     API endpoint para métricas detalladas de documentos
     """
     try:
-        today = date.today()
-
-        overdue_docs = Document.query.filter(
-            Document.next_review_date.isnot(None),
-            Document.next_review_date < today,
-            Document.status.in_(['approved', 'review'])
-        ).count()
-
-        docs_by_type = Document.query.with_entities(
-            Document.document_type,
-            func.count(Document.id)
-        ).group_by(Document.document_type).all()
-
-        docs_by_status = Document.query.with_entities(
-            Document.status,
-            func.count(Document.id)
-        ).group_by(Document.status).all()
+        documents = DashboardMetricsService.documents()
 
         return jsonify({
-            'overdue_for_review': overdue_docs,
-            'by_type': {
-                dtype.value if hasattr(dtype, 'value') else str(dtype): count
-                for dtype, count in docs_by_type if dtype
-            },
-            'by_status': {
-                status: count for status, count in docs_by_status if status
-            },
-            'total': Document.query.count()
+            'overdue_for_review': documents['overdue_for_review'],
+            'by_type': documents['by_type'],
+            'by_status': documents['by_status'],
+            'total': documents['total']
         })
 
     except Exception as e:
@@ -1021,31 +719,17 @@ def training_metrics():
     API endpoint para métricas de capacitación
     """
     try:
-        today = datetime.utcnow()
-
-        upcoming_sessions = TrainingSession.query.filter(
-            TrainingSession.date >= today,
-            TrainingSession.date <= today + timedelta(days=30)
-        ).count()
-
-        current_year = today.year
-        completed_sessions = TrainingSession.query.filter(
-            extract('year', TrainingSession.date) == current_year,
-            TrainingSession.status == 'COMPLETED'
-        ).count()
-
-        total_sessions_year = TrainingSession.query.filter(
-            extract('year', TrainingSession.date) == current_year
-        ).count()
+        training = DashboardMetricsService.training()
 
         completion_rate = round(
-            (completed_sessions / total_sessions_year * 100) if total_sessions_year > 0 else 0, 2
+            (training['completed_this_year'] / training['total_this_year'] * 100)
+            if training['total_this_year'] > 0 else 0, 2
         )
 
         return jsonify({
-            'upcoming_sessions': upcoming_sessions,
-            'completed_this_year': completed_sessions,
-            'total_this_year': total_sessions_year,
+            'upcoming_sessions': training['upcoming_sessions'],
+            'completed_this_year': training['completed_this_year'],
+            'total_this_year': training['total_this_year'],
             'completion_rate': completion_rate
         })
 
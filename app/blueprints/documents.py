@@ -2,19 +2,18 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from models import Document, DocumentVersion, DocumentControlValidation, DocumentType, User, SOAControl, SOAVersion, db
 from datetime import datetime, date
-from werkzeug.utils import secure_filename
 from dateutil.relativedelta import relativedelta
 import os
 import mimetypes
 import subprocess
 import tempfile
 from app.services.ai_verification import AIVerificationService
+from app.services.blob_storage_service import BlobStorageService
 
 documents_bp = Blueprint('documents', __name__)
 
 # Configuración de archivos permitidos
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'odt', 'ods', 'odp', 'txt', 'md'}
-UPLOAD_FOLDER = 'uploads/documents'
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
 
 def allowed_file(filename):
@@ -188,19 +187,11 @@ def create():
             if 'file' in request.files:
                 file = request.files['file']
                 if file and file.filename and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    filename = f"{timestamp}_{filename}"
+                    blob = BlobStorageService.store(file)
 
-                    # Crear directorio si no existe
-                    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-                    filepath = os.path.join(UPLOAD_FOLDER, filename)
-                    file.save(filepath)
-
-                    document.file_path = filepath
-                    document.file_size = os.path.getsize(filepath)
-                    document.file_type = mimetypes.guess_type(filepath)[0]
+                    document.file_path = blob['file_path']
+                    document.file_size = blob['file_size']
+                    document.file_type = mimetypes.guess_type(file.filename)[0]
 
             db.session.add(document)
             db.session.flush()  # Para obtener el ID
@@ -316,18 +307,11 @@ def edit(id):
             if 'file' in request.files:
                 file = request.files['file']
                 if file and file.filename and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    filename = f"{timestamp}_{filename}"
-
-                    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+                    blob = BlobStorageService.store(file)
 
-                    filepath = os.path.join(UPLOAD_FOLDER, filename)
-                    file.save(filepath)
-
-                    new_file_path = filepath
-                    new_file_size = os.path.getsize(filepath)
-                    new_file_type = mimetypes.guess_type(filepath)[0]
+                    new_file_path = blob['file_path']
+                    new_file_size = blob['file_size']
+                    new_file_type = mimetypes.guess_type(file.filename)[0]
                     file_changed = True
 
             # Si hay cambios significativos, crear nueva versión
@@ -409,9 +393,8 @@ def delete(id):
     document = Document.query.get_or_404(id)
 
     try:
-        # Eliminar archivo físico si existe
-        if document.file_path and os.path.exists(document.file_path):
-            os.remove(document.file_path)
+        # Liberar archivo (los blobs compartidos los elimina la recolección)
+        BlobStorageService.release(document.file_path)
 
         # Romper la referencia circular antes de eliminar versiones
         document.current_version_id = None
@@ -419,8 +402,7 @@ def delete(id):
 
         # Eliminar archivos de versiones
         for version in document.versions:
-            if version.file_path and os.path.exists(version.file_path):
-                os.remove(version.file_path)
+            BlobStorageService.release(version.file_path)
             db.session.delete(version)
 
         # Eliminar validaciones IA
@@ -572,17 +554,12 @@ def clone(id):
             parent_document_id=original.id
         )
 
-        # Copiar archivo si existe
+        # Compartir el archivo del original (se guarda en el almacén si aún no lo está)
         if original.file_path and os.path.exists(original.file_path):
-            ext = original.file_path.rsplit('.', 1)[-1]
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            new_filename = f"{timestamp}_copia_{os.path.basename(original.file_path)}"
-            new_filepath = os.path.join(UPLOAD_FOLDER, new_filename)
-
-            import shutil
-            shutil.copy2(original.file_path, new_filepath)
-
-            cloned.file_path = new_filepath
+            if BlobStorageService.is_blob(original.file_path):
+                cloned.file_path = original.file_path
+            else:
+                cloned.file_path = BlobStorageService.store_path(original.file_path)['file_path']
             cloned.file_size = original.file_size
             cloned.file_type = original.file_type
 
@@ -634,91 +611,28 @@ def verify_ai(id):
     if not document.has_file:
         return jsonify({'success': False, 'error': 'El documento no tiene archivo adjunto'}), 400
 
-    try:
-        # Inicializar servicio de verificación
-        ai_service = AIVerificationService()
-
-        # Verificar disponibilidad
-        available, message = ai_service.is_available()
-        if not available:
-            return jsonify({'success': False, 'error': message}), 503
-
-        # Realizar verificación
-        results = ai_service.verify_document(document, document.related_controls)
-
-        # Guardar resultados en la base de datos
-        # Actualizar el documento
-        document.ai_verified = True
-        document.ai_verification_date = datetime.utcnow()
-        document.ai_verification_version = document.version
-        document.ai_model_used = results['model_used']
-        document.ai_overall_score = results['overall_score']
-        document.ai_verified_by_id = current_user.id
-        document.ai_needs_reverification = False
-
-        # Guardar validaciones individuales por control
-        for validation_data in results['validations']:
-            control_id = validation_data['control_id']
-
-            # Buscar si ya existe una validación previa
-            existing_validation = DocumentControlValidation.query.filter_by(
-                document_id=document.id,
-                control_id=control_id
-            ).first()
-
-            if existing_validation:
-                # Actualizar existente
-                existing_validation.document_version = document.version
-                existing_validation.compliance_status = validation_data['compliance_status']
-                existing_validation.confidence_level = validation_data['confidence_level']
-                existing_validation.overall_score = validation_data['overall_score']
-                existing_validation.summary = validation_data['summary']
-                existing_validation.covered_aspects = validation_data['covered_aspects']
-                existing_validation.missing_aspects = validation_data['missing_aspects']
-                existing_validation.evidence_quotes = validation_data['evidence_quotes']
-                existing_validation.recommendations = validation_data['recommendations']
-                existing_validation.maturity_suggestion = validation_data['maturity_suggestion']
-                existing_validation.ai_model = results['model_used']
-                existing_validation.tokens_used = validation_data['tokens_used']
-                existing_validation.validation_time = validation_data['validation_time']
-                existing_validation.validated_at = datetime.utcnow()
-                existing_validation.validated_by_id = current_user.id
-            else:
-                # Crear nueva
-                new_validation = DocumentControlValidation(
-                    document_id=document.id,
-                    control_id=control_id,
-                    document_version=document.version,
-                    compliance_status=validation_data['compliance_status'],
-                    confidence_level=validation_data['confidence_level'],
-                    overall_score=validation_data['overall_score'],
-                    summary=validation_data['summary'],
-                    covered_aspects=validation_data['covered_aspects'],
-                    missing_aspects=validation_data['missing_aspects'],
-                    evidence_quotes=validation_data['evidence_quotes'],
-                    recommendations=validation_data['recommendations'],
-                    maturity_suggestion=validation_data['maturity_suggestion'],
-                    ai_model=results['model_used'],
-                    tokens_used=validation_data['tokens_used'],
-                    validation_time=validation_data['validation_time'],
-                    validated_at=datetime.utcnow(),
-                    validated_by_id=current_user.id
-                )
-                db.session.add(new_validation)
-
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'message': 'Verificación completada exitosamente',
-            'overall_score': results['overall_score'],
-            'verified_controls': results['verified_controls'],
-            'total_controls': results['total_controls']
-        })
+    # Verificar disponibilidad antes de encolar
+    available, message = AIVerificationService().is_available()
+    if not available:
+        return jsonify({'success': False, 'error': message}), 503
+
+    # La verificación puede tardar minutos: se ejecuta en segundo plano
+    from app.services.job_service import JobService
+    job = JobService.enqueue(
+        'ai_verification',
+        payload={
+            'document_id': document.id,
+            # Ignorar los resultados en caché y volver a consultar a la IA
+            'force': bool((request.get_json(silent=True) or {}).get('force', False))
+        },
+        user_id=current_user.id
+    )
 
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': url_for('jobs.status', id=job.id)
+    }), 202
 
 @documents_bp.route('/<int:id>/update-verification-comments', methods=['POST'])
 @login_required
@@ -13,28 +13,19 @@ from models import (
 )
 from datetime import datetime, timedelta
 from sqlalchemy import or_, and_, func
-import hashlib
 import os
 from werkzeug.utils import secure_filename
+from app.services.blob_storage_service import BlobStorageService
 
 incidents_bp = Blueprint('incidents', __name__, url_prefix='/incidents')
 
 # Configuración de uploads
-UPLOAD_FOLDER = 'uploads/incidents'
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'log', 'pcap', 'zip'}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def calculate_file_hash(file_path):
-    """Calcula SHA-256 hash de un archivo para integridad"""
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
-
 
 # ============================================================================
 # VISTAS PRINCIPALES
@@ -605,19 +596,14 @@ def evidences(id):
                 file = request.files['evidence_file']
                 if file and file.filename and allowed_file(file.filename):
                     filename = secure_filename(file.filename)
-                    # Crear directorio si no existe
-                    upload_dir = os.path.join(UPLOAD_FOLDER, str(incident.id))
-                    os.makedirs(upload_dir, exist_ok=True)
-
-                    # Guardar archivo con timestamp
                     timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
                     file_name = f"{timestamp}_{filename}"
-                    file_path = os.path.join(upload_dir, file_name)
-                    file.save(file_path)
 
-                    # Calcular hash
-                    file_hash = calculate_file_hash(file_path)
-                    file_size = os.path.getsize(file_path)
+                    # Guardar archivo calculando su hash para la cadena de custodia
+                    blob = BlobStorageService.store(file)
+                    file_path = blob['file_path']
+                    file_hash = blob['sha256']
+                    file_size = blob['file_size']
 
             # Crear evidencia
             evidence = IncidentEvidence(
@@ -720,9 +706,8 @@ def delete_evidence(id, evidence_id):
         return redirect(url_for('incidents.evidences', id=id))
 
     try:
-        # Eliminar archivo físico si existe
-        if evidence.file_path and os.path.exists(evidence.file_path):
-            os.remove(evidence.file_path)
+        # Liberar archivo (los blobs compartidos los elimina la recolección)
+        BlobStorageService.release(evidence.file_path)
 
         file_name = evidence.file_name
 
@@ -940,8 +925,8 @@ def api_get(id):
 @login_required
 def export_reports():
     """Exportar reportes en formato PDF o Excel"""
-    from flask import make_response
-    import io
+    from sqlalchemy.orm import joinedload
+    from app.services.export_service import ExportService
 
     export_format = request.args.get('format', 'pdf')
     period = request.args.get('period', 30, type=int)
@@ -960,64 +945,33 @@ def export_reports():
     if category != 'all':
         query = query.filter(Incident.category == IncidentCategory[category])
 
-    incidents = query.all()
+    # Lectura por lotes con el responsable cargado en la misma consulta
+    query = query.options(joinedload(Incident.assigned_to))
+    fecha = datetime.utcnow().strftime("%Y%m%d")
 
     if export_format == 'excel':
         try:
-            import openpyxl
-            from openpyxl.styles import Font, Alignment, PatternFill
-
-            # Crear workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Reporte de Incidentes"
-
-            # Encabezados
             headers = ['Número', 'Título', 'Categoría', 'Severidad', 'Estado', 'Fecha Reporte',
                       'Fecha Descubrimiento', 'Responsable', 'Tiempo Resolución (h)']
 
-            # Estilo de encabezados
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_font = Font(color="FFFFFF", bold=True)
-
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-
-            # Datos
-            for row, incident in enumerate(incidents, start=2):
-                ws.cell(row=row, column=1, value=incident.incident_number)
-                ws.cell(row=row, column=2, value=incident.title)
-                ws.cell(row=row, column=3, value=incident.category.value if incident.category else '')
-                ws.cell(row=row, column=4, value=incident.severity.value if incident.severity else '')
-                ws.cell(row=row, column=5, value=incident.status.value if incident.status else '')
-                ws.cell(row=row, column=6, value=incident.reported_date.strftime('%Y-%m-%d'))
-                ws.cell(row=row, column=7, value=incident.discovery_date.strftime('%Y-%m-%d') if incident.discovery_date else '')
-                ws.cell(row=row, column=8, value=incident.assigned_to.name if incident.assigned_to else 'Sin asignar')
-                ws.cell(row=row, column=9, value=incident.calculate_resolution_time() or '')
-
-            # Ajustar ancho de columnas
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            # Guardar en memoria
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-
-            response = make_response(output.read())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = f'attachment; filename=reporte_incidentes_{datetime.utcnow().strftime("%Y%m%d")}.xlsx'
-
-            return response
+            rows = ([
+                incident.incident_number,
+                incident.title,
+                incident.category.value if incident.category else '',
+                incident.severity.value if incident.severity else '',
+                incident.status.value if incident.status else '',
+                incident.reported_date.strftime('%Y-%m-%d'),
+                incident.discovery_date.strftime('%Y-%m-%d') if incident.discovery_date else '',
+                incident.assigned_to.name if incident.assigned_to else 'Sin asignar',
+                incident.calculate_resolution_time() or ''
+            ] for incident in ExportService.iter_query(query))
+
+            return ExportService.xlsx_response(
+                rows, headers,
+                filename=f'reporte_incidentes_{fecha}.xlsx',
+                title='Reporte de Incidentes',
+                column_widths=[18, 50, 30, 12, 16, 15, 22, 25, 23]
+            )
 
         except ImportError:
             flash('openpyxl no está instalado. Instale con: pip install openpyxl', 'error')
@@ -1026,16 +980,10 @@ def export_reports():
     elif export_format == 'pdf':
         try:
             from reportlab.lib import colors
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+            from reportlab.platypus import Paragraph, Spacer
             from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
             from reportlab.lib.units import inch
 
-            # Crear PDF en memoria
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            elements = []
-
             # Estilos
             styles = getSampleStyleSheet()
             title_style = ParagraphStyle(
@@ -1045,33 +993,7 @@ def export_reports():
                 textColor=colors.HexColor('#4472C4'),
                 spaceAfter=30,
             )
-
-            # Título
-            title = Paragraph(f"Reporte de Incidentes de Seguridad", title_style)
-            elements.append(title)
-
-            subtitle = Paragraph(
-                f"Periodo: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}<br/>"
-                f"Total de incidentes: {len(incidents)}",
-                styles['Normal']
-            )
-            elements.append(subtitle)
-            elements.append(Spacer(1, 20))
-
-            # Tabla de datos
-            data = [['Número', 'Título', 'Severidad', 'Estado', 'Fecha']]
-
-            for incident in incidents:
-                data.append([
-                    incident.incident_number,
-                    incident.title[:40] + '...' if len(incident.title) > 40 else incident.title,
-                    incident.severity.value if incident.severity else '',
-                    incident.status.value if incident.status else '',
-                    incident.reported_date.strftime('%d/%m/%Y')
-                ])
-
-            table = Table(data, colWidths=[1.2*inch, 3*inch, 1*inch, 1.2*inch, 1*inch])
-            table.setStyle(TableStyle([
+            table_style = [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -1080,19 +1002,36 @@ def export_reports():
                 ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
                 ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
                 ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            elements.append(table)
-
-            # Generar PDF
-            doc.build(elements)
-            buffer.seek(0)
+            ]
+            total = query.order_by(None).count()
+
+            def flowables():
+                # Título
+                yield Paragraph(f"Reporte de Incidentes de Seguridad", title_style)
+                yield Paragraph(
+                    f"Periodo: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}<br/>"
+                    f"Total de incidentes: {total}",
+                    styles['Normal']
+                )
+                yield Spacer(1, 20)
+
+                # Tabla de datos, generada por bloques de filas
+                rows = ([
+                    incident.incident_number,
+                    incident.title[:40] + '...' if len(incident.title) > 40 else incident.title,
+                    incident.severity.value if incident.severity else '',
+                    incident.status.value if incident.status else '',
+                    incident.reported_date.strftime('%d/%m/%Y')
+                ] for incident in ExportService.iter_query(query))
 
-            response = make_response(buffer.read())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'attachment; filename=reporte_incidentes_{datetime.utcnow().strftime("%Y%m%d")}.pdf'
+                yield from ExportService.pdf_table_chunks(
+                    ['Número', 'Título', 'Severidad', 'Estado', 'Fecha'],
+                    rows,
+                    col_widths=[1.2*inch, 3*inch, 1*inch, 1.2*inch, 1*inch],
+                    style=table_style
+                )
 
-            return response
+            return ExportService.pdf_response(flowables(), f'reporte_incidentes_{fecha}.pdf')
 
         except ImportError:
             flash('reportlab no está instalado. Instale con: pip install reportlab', 'error')
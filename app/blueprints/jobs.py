@@ -0,0 +1,56 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, current_app
+from flask_login import login_required, current_user
+from app.services.job_service import JobService
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def get_job_or_404(id):
+    """Obtiene un trabajo visible para el usuario actual (propio o admin)"""
+    job = JobService.get_job(id)
+    if job is None:
+        abort(404)
+    if job.created_by_id != current_user.id and not current_user.has_role('admin'):
+        abort(403)
+    return job
+
+
+@jobs_bp.route('/')
+@login_required
+def index():
+    """Listado de trabajos en segundo plano recientes"""
+    user_id = None if current_user.has_role('admin') else current_user.id
+    jobs = JobService.get_recent_jobs(user_id=user_id)
+
+    # Jobs programados y sus últimas ejecuciones (solo administradores)
+    scheduler_status = None
+    scheduler = current_app.extensions.get('task_scheduler')
+    if scheduler is not None and current_user.has_role('admin'):
+        scheduler_status = scheduler.get_job_status()
+
+    return render_template('jobs/index.html', jobs=jobs, scheduler_status=scheduler_status)
+
+
+@jobs_bp.route('/<int:id>')
+@login_required
+def status(id):
+    """Estado de un trabajo (consultado periódicamente por la interfaz)"""
+    job = get_job_or_404(id)
+    return jsonify(job.to_dict())
+
+
+@jobs_bp.route('/<int:id>/cancelar', methods=['POST'])
+@login_required
+def cancel(id):
+    """Solicitar la cancelación de un trabajo"""
+    job = get_job_or_404(id)
+    cancelled = JobService.request_cancel(job)
+
+    if request.is_json or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return jsonify({'success': cancelled, 'job': job.to_dict()})
+
+    if cancelled:
+        flash(f'Cancelación solicitada para el trabajo #{job.id}', 'info')
+    else:
+        flash(f'El trabajo #{job.id} ya ha finalizado', 'warning')
+    return redirect(url_for('jobs.index'))
@@ -6,6 +6,7 @@ Control 10.1 - Mejora continua
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from sqlalchemy import func, extract, and_, or_
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime, timedelta
 from models import (
     db, User, Audit, Asset,
@@ -14,12 +15,11 @@ from models import (
     NCTimelineEventType
 )
 from werkzeug.utils import secure_filename
-import os
+from app.services.blob_storage_service import BlobStorageService
 
 nonconformities_bp = Blueprint('nonconformities', __name__)
 
 # Configuración de uploads
-UPLOAD_FOLDER = 'uploads/nonconformities'
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx', 'xls', 'xlsx', 'txt'}
 
 def allowed_file(filename):
@@ -56,17 +56,32 @@ def index():
             )
         )
 
-    # Ordenar
-    nonconformities = query.order_by(NonConformity.created_at.desc()).all()
-
-    # KPIs básicos para el dashboard
-    total_nc = NonConformity.query.count()
-    open_nc = NonConformity.query.filter(NonConformity.status != NCStatus.CLOSED).count()
-    critical_nc = NonConformity.query.filter(NonConformity.severity == NCSeverity.CRITICAL).count()
-    overdue_nc = sum(1 for nc in nonconformities if nc.is_overdue())
+    # Ordenar y paginar (responsable y acciones en bloque para la tabla)
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+    query = query.options(
+        joinedload(NonConformity.responsible),
+        selectinload(NonConformity.actions)
+    ).order_by(NonConformity.created_at.desc())
+    nc_pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+
+    # Una página posterior a la última muestra la última
+    if nc_pagination.pages and nc_pagination.page > nc_pagination.pages:
+        nc_pagination = query.paginate(page=nc_pagination.pages, per_page=per_page, error_out=False)
+
+    # KPIs básicos para el dashboard en una sola consulta
+    kpis = db.session.query(
+        func.count(NonConformity.id),
+        func.count(NonConformity.id).filter(NonConformity.status != NCStatus.CLOSED),
+        func.count(NonConformity.id).filter(NonConformity.severity == NCSeverity.CRITICAL),
+        func.count(NonConformity.id).filter(NonConformity.overdue_condition())
+    ).one()
+    total_nc, open_nc, critical_nc, overdue_nc = kpis
 
     return render_template('nonconformities/index.html',
-                         nonconformities=nonconformities,
+                         nonconformities=nc_pagination.items,
+                         pagination=nc_pagination,
                          total_nc=total_nc,
                          open_nc=open_nc,
                          critical_nc=critical_nc,
@@ -87,37 +102,68 @@ def index():
 def dashboard():
     """Dashboard con métricas y KPIs detallados"""
 
-    # Métricas generales
-    total_nc = NonConformity.query.count()
-    open_nc = NonConformity.query.filter(NonConformity.status != NCStatus.CLOSED).count()
-    closed_nc = NonConformity.query.filter(NonConformity.status == NCStatus.CLOSED).count()
-
-    # Por severidad
-    critical_nc = NonConformity.query.filter(NonConformity.severity == NCSeverity.CRITICAL).count()
-    major_nc = NonConformity.query.filter(NonConformity.severity == NCSeverity.MAJOR).count()
-    minor_nc = NonConformity.query.filter(NonConformity.severity == NCSeverity.MINOR).count()
-
-    # Por origen
-    nc_by_origin = db.session.query(
-        NonConformity.origin,
-        func.count(NonConformity.id)
-    ).group_by(NonConformity.origin).all()
-
-    # Por estado
-    nc_by_status = db.session.query(
+    # Métricas generales en una consulta agrupada por estado, origen y severidad
+    closed = NonConformity.status == NCStatus.CLOSED
+    resolution_days = func.coalesce(NonConformity.resolution_days(), 0)
+    groups = db.session.query(
         NonConformity.status,
-        func.count(NonConformity.id)
-    ).group_by(NonConformity.status).all()
-
-    # Tiempo promedio de resolución
-    closed_ncs = NonConformity.query.filter(NonConformity.status == NCStatus.CLOSED).all()
-    avg_resolution_time = sum(nc.calculate_resolution_time() or 0 for nc in closed_ncs) / len(closed_ncs) if closed_ncs else 0
-
-    # NC recurrentes
-    recurrent_nc = NonConformity.query.filter(NonConformity.is_recurrent == True).count()
+        NonConformity.origin,
+        NonConformity.severity,
+        func.count(NonConformity.id).label('total'),
+        func.count(NonConformity.id).filter(NonConformity.is_recurrent == True).label('recurrent'),
+        func.count(NonConformity.id).filter(NonConformity.overdue_condition()).label('overdue'),
+        func.sum(resolution_days).filter(closed).label('resolution_sum'),
+        func.min(NonConformity.resolution_days()).filter(closed).label('resolution_min'),
+        func.max(NonConformity.resolution_days()).filter(closed).label('resolution_max')
+    ).group_by(
+        NonConformity.status, NonConformity.origin, NonConformity.severity
+    ).all()
+
+    by_status = {}
+    by_origin = {}
+    by_severity = {}
+    recurrent_nc = 0
+    overdue_count = 0
+    resolution_sum = 0
+    resolution_min = None
+    resolution_max = None
+    for group in groups:
+        by_status[group.status] = by_status.get(group.status, 0) + group.total
+        by_origin[group.origin] = by_origin.get(group.origin, 0) + group.total
+        by_severity[group.severity] = by_severity.get(group.severity, 0) + group.total
+        recurrent_nc += group.recurrent
+        overdue_count += group.overdue
+        resolution_sum += group.resolution_sum or 0
+        if group.resolution_min is not None:
+            resolution_min = min(resolution_min, group.resolution_min) if resolution_min is not None else group.resolution_min
+            resolution_max = max(resolution_max, group.resolution_max) if resolution_max is not None else group.resolution_max
+
+    total_nc = sum(by_status.values())
+    closed_nc = by_status.get(NCStatus.CLOSED, 0)
+    open_nc = total_nc - closed_nc
 
-    # NC vencidas
-    overdue_nc = [nc for nc in NonConformity.query.filter(NonConformity.status != NCStatus.CLOSED).all() if nc.is_overdue()]
+    # Por severidad
+    critical_nc = by_severity.get(NCSeverity.CRITICAL, 0)
+    major_nc = by_severity.get(NCSeverity.MAJOR, 0)
+    minor_nc = by_severity.get(NCSeverity.MINOR, 0)
+
+    # Por origen y por estado
+    nc_by_origin = list(by_origin.items())
+    nc_by_status = list(by_status.items())
+
+    # Tiempo de resolución (días) de las NC cerradas
+    avg_resolution_time = float(resolution_sum) / closed_nc if closed_nc else 0
+    resolution_stats = {
+        'min': int(resolution_min) if resolution_min is not None else None,
+        'max': int(resolution_max) if resolution_max is not None else None
+    }
+
+    # NC vencidas más antiguas (el total sale de la consulta agrupada)
+    overdue_nc = NonConformity.query.options(
+        joinedload(NonConformity.responsible)
+    ).filter(
+        NonConformity.overdue_condition()
+    ).order_by(NonConformity.target_closure_date).limit(5).all()
 
     # Tendencia últimos 6 meses
     six_months_ago = datetime.utcnow() - timedelta(days=180)
@@ -129,15 +175,13 @@ def dashboard():
         NonConformity.reported_date >= six_months_ago
     ).group_by('year', 'month').order_by('year', 'month').all()
 
-    # Top 5 controles más afectados
-    # Necesitamos desempaquetar el JSON affected_controls
-    all_controls = []
-    for nc in NonConformity.query.all():
-        if nc.affected_controls:
-            all_controls.extend(nc.affected_controls)
-
-    from collections import Counter
-    top_controls = Counter(all_controls).most_common(5)
+    # Top 5 controles más afectados: se desempaqueta el JSON affected_controls en la BD
+    control = func.json_array_elements_text(NonConformity.affected_controls).table_valued('value')
+    top_controls = db.session.query(
+        control.c.value, func.count()
+    ).select_from(NonConformity).join(control, db.true()).filter(
+        func.json_typeof(NonConformity.affected_controls) == 'array'
+    ).group_by(control.c.value).order_by(func.count().desc(), control.c.value).limit(5).all()
 
     return render_template('nonconformities/dashboard.html',
                          total_nc=total_nc,
@@ -149,8 +193,10 @@ def dashboard():
                          nc_by_origin=nc_by_origin,
                          nc_by_status=nc_by_status,
                          avg_resolution_time=avg_resolution_time,
+                         resolution_stats=resolution_stats,
                          recurrent_nc=recurrent_nc,
                          overdue_nc=overdue_nc,
+                         overdue_count=overdue_count,
                          nc_trend=nc_trend,
                          top_controls=top_controls)
 
@@ -682,23 +728,15 @@ def upload_attachment(id):
 
     if file and allowed_file(file.filename):
         try:
-            filename = secure_filename(file.filename)
-            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"{timestamp}_{filename}"
-
-            # Crear directorio si no existe
-            upload_path = os.path.join(UPLOAD_FOLDER, str(nc.id))
-            os.makedirs(upload_path, exist_ok=True)
-
-            file_path = os.path.join(upload_path, filename)
-            file.save(file_path)
+            # Guardar archivo en el almacén compartido
+            blob = BlobStorageService.store(file, filename=secure_filename(file.filename))
 
             # Crear registro de adjunto
             attachment = NCAttachment(
                 nonconformity=nc,
                 file_name=file.filename,
-                file_path=file_path,
-                file_size=os.path.getsize(file_path),
+                file_path=blob['file_path'],
+                file_size=blob['file_size'],
                 file_type=file.content_type,
                 description=request.form.get('description', ''),
                 attachment_type=request.form.get('attachment_type', 'other'),
@@ -753,9 +791,8 @@ def delete_attachment(attachment_id):
     nc_id = attachment.nonconformity_id
 
     try:
-        # Eliminar archivo físico
-        if os.path.exists(attachment.file_path):
-            os.remove(attachment.file_path)
+        # Liberar archivo (los blobs compartidos los elimina la recolección)
+        BlobStorageService.release(attachment.file_path)
 
         # Eliminar registro de base de datos
         db.session.delete(attachment)
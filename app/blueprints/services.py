@@ -12,7 +12,7 @@ from sqlalchemy import or_, and_
 from datetime import datetime
 from models import db, Service, ServiceType, ServiceStatus, Asset, User, ServiceDependency
 from utils.decorators import role_required
-from app.risks.models import Riesgo, ActivoInformacion
+from app.risks.services.service_risk_service import ServiceRiskService
 
 services_bp = Blueprint('services', __name__, url_prefix='/servicios')
 
@@ -541,28 +541,7 @@ def get_risks_for_service(service):
     Returns:
         list: Lista de objetos Riesgo asociados al servicio
     """
-    # Obtener códigos de los activos del servicio
-    asset_codes = [asset.asset_code for asset in service.assets if asset.asset_code]
-
-    if not asset_codes:
-        return []
-
-    # Buscar ActivoInformacion por código
-    activos_info = ActivoInformacion.query.filter(
-        ActivoInformacion.codigo.in_(asset_codes)
-    ).all()
-
-    activos_ids = [activo.id for activo in activos_info]
-
-    if not activos_ids:
-        return []
-
-    # Obtener riesgos asociados a esos activos
-    riesgos = Riesgo.query.filter(
-        Riesgo.activo_id.in_(activos_ids)
-    ).order_by(Riesgo.nivel_riesgo_efectivo.desc()).all()
-
-    return riesgos
+    return ServiceRiskService.riesgos_de_servicio(service.id)
 
 
 def calculate_service_risk_stats(service):
@@ -575,34 +554,8 @@ def calculate_service_risk_stats(service):
     Returns:
         dict: Diccionario con estadísticas de riesgos
     """
-    riesgos = get_risks_for_service(service)
-
-    if not riesgos:
-        return {
-            'total': 0,
-            'high_count': 0,
-            'medium_count': 0,
-            'low_count': 0,
-            'avg_level': 0,
-            'max_level': 0
-        }
-
-    high_count = len([r for r in riesgos if r.clasificacion_efectiva in ['ALTO', 'MUY_ALTO']])
-    medium_count = len([r for r in riesgos if r.clasificacion_efectiva == 'MEDIO'])
-    low_count = len([r for r in riesgos if r.clasificacion_efectiva in ['BAJO', 'MUY_BAJO']])
-
-    niveles = [float(r.nivel_riesgo_efectivo or 0) for r in riesgos]
-    avg_level = sum(niveles) / len(niveles) if niveles else 0
-    max_level = max(niveles) if niveles else 0
-
-    return {
-        'total': len(riesgos),
-        'high_count': high_count,
-        'medium_count': medium_count,
-        'low_count': low_count,
-        'avg_level': round(avg_level, 2),
-        'max_level': round(max_level, 2)
-    }
+    estadisticas = ServiceRiskService.estadisticas_por_servicio([service.id])
+    return estadisticas.get(service.id, ServiceRiskService.estadisticas_vacias())
 
 
 # ==================== VISTAS DE RIESGOS POR SERVICIO ====================
@@ -615,16 +568,18 @@ def risks_by_service():
     # Obtener todos los servicios activos
     services = Service.query.filter_by(status=ServiceStatus.ACTIVE).all()
 
-    # Calcular estadísticas de riesgos para cada servicio
+    # Estadísticas de riesgos de todos los servicios en una consulta agrupada
+    stats_by_service = ServiceRiskService.estadisticas_por_servicio([s.id for s in services])
+
     services_with_risks = []
     total_risks = 0
     services_with_high_risks = 0
     total_avg_risk = []
 
     for service in services:
-        stats = calculate_service_risk_stats(service)
+        stats = stats_by_service.get(service.id)
 
-        if stats['total'] > 0:
+        if stats:
             services_with_risks.append({
                 'service': service,
                 'stats': stats
@@ -664,7 +619,7 @@ def service_risks_detail(service_id):
     riesgos = get_risks_for_service(service)
 
     # Obtener umbral de riesgo de la evaluación activa
-    from app.risks.models import TratamientoRiesgo, EvaluacionRiesgo
+    from app.risks.models import EvaluacionRiesgo
     evaluacion_activa = EvaluacionRiesgo.query.filter(
         EvaluacionRiesgo.estado.in_(['en_curso', 'completada', 'aprobada'])
     ).order_by(EvaluacionRiesgo.created_at.desc()).first()
@@ -678,11 +633,12 @@ def service_risks_detail(service_id):
     medios = []
     bajos = []
 
+    # Tratamiento más reciente de cada riesgo en una sola consulta
+    tratamientos = ServiceRiskService.ultimos_tratamientos([r.id for r in riesgos])
+
     for riesgo in riesgos:
         # Verificar si tiene tratamiento
-        tratamiento = TratamientoRiesgo.query.filter_by(
-            riesgo_id=riesgo.id
-        ).order_by(TratamientoRiesgo.created_at.desc()).first()
+        tratamiento = tratamientos.get(riesgo.id)
 
         # Clasificar sin tratamiento
         if not tratamiento or tratamiento.estado == 'planificado':
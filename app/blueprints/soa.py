@@ -1,8 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, Response
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
 from flask_login import login_required, current_user
 from models import SOAControl, SOAVersion, User, ISOVersion, db
+from app.risks.services.soa_snapshot import SOASnapshot
+from app.risks.services.risk_recalculation_queue import RiskRecalculationQueue
+from app.services.export_service import ExportService
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 import csv
 import io
@@ -106,6 +110,14 @@ def edit_control(id):
             control.target_date = None
 
         db.session.commit()
+        SOASnapshot.invalidar()
+
+        # Recalcular solo los riesgos que dependen de este control
+        if control.soa_version and control.soa_version.is_current:
+            cola = RiskRecalculationQueue()
+            cola.marcar_control(control.control_id)
+            cola.procesar(usuario_id=current_user.id)
+
         flash('Control actualizado correctamente', 'success')
         return redirect(url_for('soa.view_control', id=control.id))
 
@@ -211,6 +223,11 @@ def activate_version(id):
 
     version = SOAVersion.query.get_or_404(id)
     version.set_as_current()
+    SOASnapshot.invalidar()
+
+    cola = RiskRecalculationQueue()
+    cola.marcar_controles_soa()
+    cola.procesar(usuario_id=current_user.id)
 
     flash(f'Versión {version.version_number} activada como versión actual', 'success')
     return redirect(url_for('soa.view_version', id=version.id))
@@ -434,51 +451,40 @@ def export_controls_version(id):
 
     # Obtener la versión especificada
     version = SOAVersion.query.get_or_404(id)
-    controls = sort_controls_by_id(version.controls.all())
+    # El orden natural de los identificadores se resuelve en Python; una
+    # versión del SOA tiene un número acotado de controles
+    controls = sort_controls_by_id(
+        version.controls.options(joinedload(SOAControl.responsible)).all()
+    )
 
     return export_controls_csv(controls, version)
 
 def export_controls_csv(controls, version):
-    """Exportar controles a formato CSV"""
-    # Crear buffer de texto
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-
-    # Encabezados
+    """Exportar controles a formato CSV (respuesta en streaming)"""
     headers = [
         'ID Control', 'Título', 'Descripción', 'Categoría',
         'Estado Aplicabilidad', 'Estado Implementación', 'Nivel Madurez',
         'Justificación', 'Detalles Transferencia', 'Evidencia',
         'Responsable', 'Fecha Objetivo'
     ]
-    writer.writerow(headers)
-
-    # Datos
-    for control in controls:
-        writer.writerow([
-            control.control_id,
-            control.title or '',
-            control.description or '',
-            control.category or '',
-            control.applicability_status or 'aplicable',
-            control.implementation_status or '',
-            control.maturity_level or '',
-            control.justification or '',
-            control.transfer_details or '',
-            control.evidence or '',
-            control.responsible.full_name if control.responsible else '',
-            control.target_date.strftime('%Y-%m-%d') if control.target_date else ''
-        ])
-
-    # Preparar respuesta
-    output.seek(0)
-    filename = f"SOA_Controles_v{version.version_number}_{datetime.now().strftime('%Y%m%d')}.csv"
 
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment; filename={filename}'}
-    )
+    rows = ([
+        control.control_id,
+        control.title or '',
+        control.description or '',
+        control.category or '',
+        control.applicability_status or 'aplicable',
+        control.implementation_status or '',
+        control.maturity_level or '',
+        control.justification or '',
+        control.transfer_details or '',
+        control.evidence or '',
+        control.responsible.full_name if control.responsible else '',
+        control.target_date.strftime('%Y-%m-%d') if control.target_date else ''
+    ] for control in controls)
+
+    filename = f"SOA_Controles_v{version.version_number}_{datetime.now().strftime('%Y%m%d')}.csv"
+    return ExportService.csv_response(rows, headers, filename)
 
 @soa_bp.route('/import-controls', methods=['POST'])
 @login_required
@@ -508,36 +514,55 @@ def import_controls():
         flash('Debe seleccionar un archivo para importar', 'error')
         return redirect(url_for('soa.versions'))
 
-    try:
-        # Determinar el tipo de archivo
-        filename = secure_filename(file.filename)
-        file_ext = os.path.splitext(filename)[1].lower()
-
-        if file_ext == '.csv':
-            result = import_controls_from_csv(file, version, overwrite_existing)
-        else:
-            flash('Formato de archivo no soportado. Use CSV (.csv)', 'error')
-            return redirect(url_for('soa.versions'))
+    # Determinar el tipo de archivo
+    filename = secure_filename(file.filename)
+    file_ext = os.path.splitext(filename)[1].lower()
 
-        flash(result['message'], result['category'])
-
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error al importar controles: {str(e)}', 'error')
+    if file_ext != '.csv':
+        flash('Formato de archivo no soportado. Use CSV (.csv)', 'error')
+        return redirect(url_for('soa.versions'))
 
-    return redirect(url_for('soa.view_version', id=version.id))
+    try:
+        content = file.stream.read().decode("UTF8")
+    except UnicodeDecodeError:
+        flash('El archivo CSV debe estar codificado en UTF-8', 'error')
+        return redirect(url_for('soa.versions'))
 
-def import_controls_from_csv(file, version, overwrite_existing):
-    """Importar controles desde archivo CSV"""
-    # Decodificar el archivo
-    stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-    csv_reader = csv.DictReader(stream)
+    # La importación y el recálculo de riesgos se ejecutan en segundo plano
+    from app.services.job_service import JobService
+    job = JobService.enqueue('soa_import', payload={
+        'version_id': version.id,
+        'overwrite_existing': overwrite_existing,
+        'filename': filename,
+        'content': content
+    }, user_id=current_user.id)
+
+    flash(f'Importación de {filename} en curso (trabajo #{job.id})', 'info')
+    return redirect(url_for('soa.view_version', id=version.id, job=job.id))
+
+def import_controls_from_csv(content, version, overwrite_existing, usuario_id=None, progress=None):
+    """
+    Importar controles desde el contenido de un archivo CSV
+
+    Args:
+        content: Texto del CSV ya decodificado
+        version: SOAVersion destino
+        overwrite_existing: Si se sobrescriben los controles existentes
+        usuario_id: Usuario que solicitó la importación
+        progress: Callback opcional progress(porcentaje, mensaje)
+    """
+    stream = io.StringIO(content, newline=None)
+    rows = list(csv.DictReader(stream))
 
     added_count = 0
     updated_count = 0
     skipped_count = 0
+    cola = RiskRecalculationQueue()
+
+    for index, row in enumerate(rows):
+        if progress and index % 50 == 0:
+            progress(int(index * 90 / len(rows)), f'Importando fila {index + 1} de {len(rows)}')
 
-    for row in csv_reader:
         # Obtener el ID del control (buscar variaciones del nombre de columna)
         control_id = row.get('ID Control') or row.get('control_id') or row.get('id_control')
 
@@ -591,7 +616,15 @@ def import_controls_from_csv(file, version, overwrite_existing):
             db.session.add(new_control)
             added_count += 1
 
+        cola.marcar_control(control_id)
+
     db.session.commit()
+    SOASnapshot.invalidar()
+
+    if version.is_current:
+        if progress:
+            progress(90, 'Recalculando riesgos afectados')
+        cola.procesar(usuario_id=usuario_id)
 
     message = f'Importación completada: {added_count} controles añadidos'
     if updated_count > 0:
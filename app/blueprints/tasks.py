@@ -7,7 +7,6 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
-import os
 
 from models import db, User, Role, SOAControl
 from app.models.task import (
@@ -15,6 +14,7 @@ from app.models.task import (
     PeriodicTaskStatus, TaskPriority, TaskCategory, TaskFrequency
 )
 from app.services.task_service import TaskService
+from app.services.blob_storage_service import BlobStorageService
 from app.services.notification_service import NotificationService
 from app.forms.task_forms import (
     TaskTemplateForm, TaskForm, TaskUpdateForm, TaskCompleteForm,
@@ -530,15 +530,21 @@ def delete(id):
         if task.evidences:
             for evidence in task.evidences:
                 try:
-                    if evidence.file_path and os.path.exists(evidence.file_path):
-                        os.remove(evidence.file_path)
+                    BlobStorageService.release(evidence.file_path)
                 except Exception as file_error:
                     print(f"Error eliminando archivo de evidencia {evidence.file_path}: {file_error}")
 
         # Eliminar todas las relaciones asociadas
         # Las relaciones con cascade='all, delete-orphan' se eliminarán automáticamente
         # Esto incluye: comentarios, historial, evidencias, notificaciones
+        template_id = task.template_id
         db.session.delete(task)
+
+        # La próxima generación de la plantilla depende de su última tarea
+        if template_id:
+            db.session.flush()
+            TaskService.refresh_template_schedules([template_id])
+
         db.session.commit()
 
         flash(f'Tarea "{task_title}" eliminada exitosamente', 'success')
@@ -599,13 +605,8 @@ def add_evidence(id):
                 timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
                 unique_filename = f"{timestamp}_{filename}"
 
-                # Crear directorio si no existe
-                upload_folder = os.path.join('uploads', 'tasks', str(task.id))
-                os.makedirs(upload_folder, exist_ok=True)
-
-                # Guardar archivo
-                file_path = os.path.join(upload_folder, unique_filename)
-                file.save(file_path)
+                # Guardar archivo en el almacén compartido
+                blob = BlobStorageService.store(file)
 
                 # Registrar evidencia
                 TaskService.add_evidence(
@@ -613,8 +614,8 @@ def add_evidence(id):
                     current_user.id,
                     filename=unique_filename,
                     original_filename=filename,
-                    file_path=file_path,
-                    file_size=os.path.getsize(file_path),
+                    file_path=blob['file_path'],
+                    file_size=blob['file_size'],
                     mime_type=file.content_type,
                     description=form.description.data
                 )
@@ -666,9 +667,8 @@ def delete_evidence(evidence_id):
         return redirect(url_for('tasks.view', id=task.id))
 
     try:
-        # Eliminar archivo físico
-        if os.path.exists(evidence.file_path):
-            os.remove(evidence.file_path)
+        # Liberar archivo (los blobs compartidos los elimina la recolección)
+        BlobStorageService.release(evidence.file_path)
 
         # Eliminar registro de base de datos
         db.session.delete(evidence)
@@ -806,10 +806,13 @@ def edit_template(id):
 
     if form.validate_on_submit():
         try:
+            frequency = TaskFrequency(form.frequency.data)
+            frequency_changed = frequency != template.frequency
+
             template.title = form.title.data
             template.description = form.description.data
             template.category = TaskCategory(form.category.data)
-            template.frequency = TaskFrequency(form.frequency.data)
+            template.frequency = frequency
             template.priority = TaskPriority(form.priority.data)
             template.iso_control = form.iso_control.data
             template.estimated_hours = form.estimated_hours.data
@@ -821,6 +824,10 @@ def edit_template(id):
             template.is_active = form.is_active.data
             template.updated_at = datetime.utcnow()
 
+            # Reprogramar la próxima generación con la nueva frecuencia
+            if frequency_changed:
+                TaskService.refresh_template_schedules([template.id])
+
             db.session.commit()
 
             flash(f'Plantilla "{template.title}" actualizada correctamente', 'success')
@@ -0,0 +1,279 @@
+"""
+Comandos Flask CLI generales de la aplicación
+Preparación del esquema de base de datos, mantenimiento del log de auditoría
+(particiones mensuales y archivo) y del almacén de archivos subidos
+"""
+
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+def _archive_dir(directorio):
+    return directorio or current_app.config['AUDIT_LOG_ARCHIVE_DIR']
+
+
+@click.command('particiones-auditoria')
+@click.option('--meses-adelante', type=int, default=None,
+              help='Meses futuros con partición creada (por defecto AUDIT_LOG_PARTITIONS_AHEAD)')
+@with_appcontext
+def particiones_auditoria_command(meses_adelante):
+    """
+    Crea las particiones mensuales pendientes de audit_logs.
+
+    Se ejecuta a diario desde el planificador; los registros que hubieran
+    caído en la partición por defecto se mueven a la partición de su mes.
+
+    Uso:
+        flask particiones-auditoria
+    """
+    from app.services.audit_log_service import AuditLogService
+
+    if meses_adelante is None:
+        meses_adelante = current_app.config['AUDIT_LOG_PARTITIONS_AHEAD']
+
+    creadas = AuditLogService.ensure_partitions(meses_adelante)
+    for nombre in creadas:
+        click.echo(f'Partición creada: {nombre}')
+    click.echo(f'Particiones creadas: {len(creadas)}')
+
+
+@click.command('archivar-auditoria')
+@click.option('--meses', type=int, default=None,
+              help='Antigüedad mínima en meses (por defecto AUDIT_LOG_ARCHIVE_MONTHS)')
+@click.option('--directorio', default=None, help='Directorio de archivo (por defecto AUDIT_LOG_ARCHIVE_DIR)')
+@with_appcontext
+def archivar_auditoria_command(meses, directorio):
+    """
+    Archiva las particiones de audit_logs anteriores a N meses.
+
+    Cada partición se vuelca a <directorio>/audit_logs_AAAA_MM.jsonl.gz con
+    su manifiesto y después se elimina de la base de datos.
+
+    Uso:
+        flask archivar-auditoria --meses 24
+    """
+    from app.services.audit_log_service import AuditLogService
+
+    if meses is None:
+        meses = current_app.config['AUDIT_LOG_ARCHIVE_MONTHS']
+
+    manifiestos = AuditLogService.archive_partitions(meses, _archive_dir(directorio))
+    for manifiesto in manifiestos:
+        click.echo(f"{manifiesto['partition']}: {manifiesto['rows']} registros archivados")
+    click.echo(f'Particiones archivadas: {len(manifiestos)}')
+
+
+@click.command('buscar-auditoria-archivada')
+@click.option('--directorio', default=None, help='Directorio de archivo (por defecto AUDIT_LOG_ARCHIVE_DIR)')
+@click.option('--accion', default=None)
+@click.option('--usuario', type=int, default=None, help='ID del usuario')
+@click.option('--entidad', default=None, help='Tipo de entidad')
+@click.option('--entidad-id', type=int, default=None)
+@click.option('--texto', default=None, help='Texto contenido en el registro')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Fecha final (incluida)')
+@click.option('--limite', type=int, default=100)
+@with_appcontext
+def buscar_auditoria_archivada_command(directorio, accion, usuario, entidad, entidad_id,
+                                       texto, desde, hasta, limite):
+    """
+    Busca registros en las particiones archivadas de audit_logs.
+
+    Uso:
+        flask buscar-auditoria-archivada --accion login_failed --desde 2024-01-01 --hasta 2024-03-31
+    """
+    from app.services.audit_log_service import AuditLogService
+
+    encontrados = 0
+    for registro in AuditLogService.search_archives(
+        _archive_dir(directorio),
+        action=accion,
+        user_id=usuario,
+        entity_type=entidad,
+        entity_id=entidad_id,
+        text_contains=texto,
+        date_from=desde,
+        date_to=hasta + timedelta(days=1) if hasta else None
+    ):
+        click.echo(
+            f"{registro['created_at']}  {registro['action']:<24} "
+            f"{registro['username'] or '-':<20} {registro['entity_type'] or '-'}:{registro['entity_id'] or '-'}  "
+            f"{registro['description'] or ''}"
+        )
+        encontrados += 1
+        if encontrados >= limite:
+            break
+
+    click.echo(f'Registros encontrados: {encontrados}')
+
+
+@click.command('verificar-auditoria-archivada')
+@click.option('--directorio', default=None, help='Directorio de archivo (por defecto AUDIT_LOG_ARCHIVE_DIR)')
+@with_appcontext
+def verificar_auditoria_archivada_command(directorio):
+    """
+    Verifica los archivos de audit_logs contra sus manifiestos (filas y SHA-256).
+
+    Uso:
+        flask verificar-auditoria-archivada
+    """
+    from app.services.audit_log_service import AuditLogService
+
+    directorio = _archive_dir(directorio)
+    errores_totales = 0
+    manifiestos = AuditLogService.list_archives(directorio)
+    for manifiesto in manifiestos:
+        errores = AuditLogService.verify_archive(directorio, manifiesto)
+        estado = 'OK' if not errores else 'ERROR'
+        click.echo(f"{manifiesto['partition']}: {estado} ({manifiesto['rows']} registros)")
+        for error in errores:
+            click.echo(f'  - {error}')
+        errores_totales += len(errores)
+
+    click.echo(f'Archivos verificados: {len(manifiestos)}')
+    if errores_totales:
+        raise click.ClickException(f'{errores_totales} errores de verificación')
+
+
+@click.command('limpiar-blobs')
+@click.option('--gracia-minutos', type=int, default=60,
+              help='Antigüedad mínima de un blob sin referencias para eliminarlo')
+@click.option('--simular', is_flag=True, help='Solo mostrar los blobs que se eliminarían')
+@with_appcontext
+def limpiar_blobs_command(gracia_minutos, simular):
+    """
+    Elimina del almacén los archivos que ya no referencia ningún registro.
+
+    Uso:
+        flask limpiar-blobs --simular
+    """
+    from app.services.blob_storage_service import BlobStorageService
+
+    resultado = BlobStorageService.garbage_collect(grace_seconds=gracia_minutos * 60, dry_run=simular)
+    for ruta in resultado['removed']:
+        click.echo(f"{'Se eliminaría' if simular else 'Eliminado'}: {ruta}")
+    click.echo(
+        f"Blobs {'a eliminar' if simular else 'eliminados'}: {len(resultado['removed'])} "
+        f"({resultado['freed_bytes']:,} bytes), conservados: {resultado['kept']}"
+    )
+
+
+@click.command('migrar-archivos-blobs')
+@with_appcontext
+def migrar_archivos_blobs_command():
+    """
+    Mueve al almacén de blobs los archivos guardados en uploads/<módulo>.
+
+    Los archivos con el mismo contenido pasan a compartir un único blob.
+
+    Uso:
+        flask migrar-archivos-blobs
+    """
+    from app.services.blob_storage_service import BlobStorageService
+
+    resultado = BlobStorageService.migrate_existing_files()
+    for ruta in resultado['missing']:
+        click.echo(f'Archivo no encontrado: {ruta}')
+    click.echo(f"Registros actualizados: {resultado['migrated']}")
+
+
+@click.command('preparar-bd')
+@click.option('--sin-datos', is_flag=True, help='No cargar los datos iniciales')
+@with_appcontext
+def preparar_bd_command(sin_datos):
+    """
+    Aplica las migraciones pendientes y carga los datos iniciales.
+
+    Se ejecuta una vez por despliegue desde entrypoint.sh, antes de arrancar
+    gunicorn; los workers solo comprueban que la base de datos está en la
+    última revisión. Es idempotente.
+
+    Uso:
+        SCHEMA_VERSION_CHECK=False flask --app application preparar-bd
+    """
+    from app.services.schema_service import SchemaService
+
+    resultado = SchemaService.prepare(seed=not sin_datos)
+    acciones = {
+        'created': 'Esquema creado',
+        'upgraded': 'Migraciones aplicadas',
+        'stamped': 'Esquema sin versionar marcado en 011 y migrado'
+    }
+    click.echo(f"{acciones[resultado['action']]}: "
+               f"{', '.join(resultado['from']) or '(ninguna)'} -> {', '.join(resultado['to'])}")
+
+
+@click.command('verificar-bd')
+@with_appcontext
+def verificar_bd_command():
+    """
+    Comprueba que la base de datos está en la última revisión de las migraciones.
+
+    Uso:
+        SCHEMA_VERSION_CHECK=False flask --app application verificar-bd
+    """
+    from app.services.schema_service import SchemaService, SchemaVersionError
+
+    try:
+        SchemaService.check_version()
+    except SchemaVersionError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Base de datos en la revisión {', '.join(sorted(SchemaService.expected_heads()))}")
+
+
+@click.command('cargar-catalogos')
+@click.option('--catalogo', 'catalogos', multiple=True,
+              help='Catálogo a cargar (por defecto todos); se puede repetir')
+@click.option('--forzar', is_flag=True, help='Cargar aunque ya haya datos (añade lo que falte y actualiza los campos del catálogo)')
+@with_appcontext
+def cargar_catalogos_command(catalogos, forzar):
+    """
+    Carga los catálogos de app/data/catalogs que hayan cambiado.
+
+    Amenazas MAGERIT, controles ISO 27002, relaciones control-amenaza y
+    amenaza-recurso y plantillas de tareas ISO 27001, en una transacción.
+    Sin --forzar solo se cargan en tablas vacías: los datos existentes
+    (editados o borrados desde la aplicación) se conservan.
+
+    Uso:
+        flask cargar-catalogos
+        flask cargar-catalogos --catalogo amenazas --forzar
+    """
+    from models import db
+    from app.services.catalog_service import CatalogService
+
+    desconocidos = set(catalogos) - set(CatalogService.CATALOGS)
+    if desconocidos:
+        raise click.BadParameter(
+            f"{', '.join(sorted(desconocidos))}. Disponibles: {', '.join(CatalogService.CATALOGS)}",
+            param_hint='--catalogo'
+        )
+
+    resultados = [CatalogService.load(nombre, force=forzar) for nombre in catalogos or CatalogService.CATALOGS]
+    db.session.commit()
+
+    for resultado in resultados:
+        estado = {
+            'loaded': 'cargado',
+            'kept': 'ya hay datos, se conservan (usa --forzar para cargarlo)',
+            'skipped': 'sin cambios'
+        }[resultado['status']]
+        click.echo(f"{resultado['name']}: {estado} ({resultado['rows']} filas)")
+
+
+def init_app(app):
+    """
+    Registra los comandos CLI en la aplicación Flask
+    """
+    app.cli.add_command(particiones_auditoria_command)
+    app.cli.add_command(archivar_auditoria_command)
+    app.cli.add_command(buscar_auditoria_archivada_command)
+    app.cli.add_command(verificar_auditoria_archivada_command)
+    app.cli.add_command(limpiar_blobs_command)
+    app.cli.add_command(migrar_archivos_blobs_command)
+    app.cli.add_command(preparar_bd_command)
+    app.cli.add_command(verificar_bd_command)
+    app.cli.add_command(cargar_catalogos_command)
@@ -385,6 +385,11 @@ class AuditFinding(db.Model):
     # Relaciones
     corrective_actions = db.relationship('AuditCorrectiveAction', back_populates='finding', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Análisis de recurrencia: hallazgos de cada control por fecha
+        db.Index('idx_audit_findings_control_created', 'affected_control', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<AuditFinding {self.finding_code}>'
 
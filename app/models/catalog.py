@@ -0,0 +1,23 @@
+"""
+Modelo de versiones de catálogos
+Registra qué versión (checksum del archivo de datos) de cada catálogo de
+referencia (amenazas MAGERIT, controles ISO 27002, relaciones y plantillas
+de tareas) está cargada, para no volver a cargar los que no han cambiado.
+"""
+from datetime import datetime
+from models import db
+
+
+class CatalogVersion(db.Model):
+    """Versión cargada de un catálogo de app/data/catalogs"""
+    __tablename__ = 'catalog_versions'
+
+    name = db.Column(db.String(100), primary_key=True)
+
+    # SHA-256 del archivo de datos y de la versión del cargador
+    checksum = db.Column(db.String(64), nullable=False)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    loaded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CatalogVersion {self.name} {self.checksum[:12]}>'
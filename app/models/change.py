@@ -404,6 +404,11 @@ class ChangeApproval(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('idx_change_approvals_approver_status', 'approver_id', 'status'),
+        db.Index('idx_change_approvals_change', 'change_id'),
+    )
+
     def __repr__(self):
         return f'<ChangeApproval {self.change_id} - {self.approval_level.value}>'
 
@@ -0,0 +1,125 @@
+"""
+Modelo de trabajos en segundo plano
+Las operaciones largas (recálculo de riesgos, backups, verificación IA,
+importación SOA) se encolan como filas de esta tabla y las ejecutan los
+workers del scheduler fuera del ciclo de la petición HTTP.
+
+SchedulerRun registra cada ejecución de los jobs programados del scheduler.
+"""
+from datetime import datetime
+from models import db
+
+
+class BackgroundJob(db.Model):
+    """Trabajo encolado para ejecución en segundo plano"""
+    __tablename__ = 'background_jobs'
+
+    # Estados del trabajo
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+
+    # Parámetros de entrada y resultado (JSON serializable)
+    payload = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+
+    # Progreso (0-100) y mensaje de la etapa actual
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    progress_message = db.Column(db.String(255))
+
+    # Cancelación cooperativa: el handler la comprueba al informar progreso
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+
+    # Ejecución
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(100))
+
+    # Auditoría
+    created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    # Relaciones
+    created_by = db.relationship('User')
+
+    __table_args__ = (
+        db.Index('idx_background_jobs_status_created', 'status', 'created_at'),
+    )
+
+    @property
+    def is_finished(self):
+        """Indica si el trabajo ha terminado (con o sin éxito)"""
+        return self.status in self.FINISHED_STATUSES
+
+    def to_dict(self):
+        """Representación JSON para el endpoint de estado"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'cancel_requested': self.cancel_requested,
+            'result': self.result,
+            'error': self.error,
+            'is_finished': self.is_finished,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.job_type} {self.status}>'
+
+
+class SchedulerRun(db.Model):
+    """Ejecución de un job programado (solo los ejecuta el proceso líder)"""
+    __tablename__ = 'scheduler_runs'
+
+    # Resultado de la ejecución
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(100), nullable=False)
+    job_name = db.Column(db.String(200))
+    status = db.Column(db.String(20), nullable=False, default=RUNNING)
+    error = db.Column(db.Text)
+
+    # Proceso que lo ejecutó (host:pid)
+    worker = db.Column(db.String(100))
+
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    duration = db.Column(db.Float)  # Segundos
+
+    __table_args__ = (
+        db.Index('idx_scheduler_runs_job_started', 'job_id', 'started_at'),
+    )
+
+    def to_dict(self):
+        """Representación JSON para el estado del scheduler"""
+        return {
+            'id': self.id,
+            'job_id': self.job_id,
+            'status': self.status,
+            'error': self.error,
+            'worker': self.worker,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration': self.duration
+        }
+
+    def __repr__(self):
+        return f'<SchedulerRun {self.id} {self.job_id} {self.status}>'
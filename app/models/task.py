@@ -30,6 +30,21 @@ class TaskFrequency(enum.Enum):
     UNICA = 'unica'  # Tarea no recurrente
 
 
+# Intervalo entre tareas de cada frecuencia recurrente
+FREQUENCY_DELTAS = {
+    TaskFrequency.DIARIA: timedelta(days=1),
+    TaskFrequency.SEMANAL: timedelta(weeks=1),
+    TaskFrequency.QUINCENAL: timedelta(weeks=2),
+    TaskFrequency.MENSUAL: timedelta(days=30),
+    TaskFrequency.BIMESTRAL: timedelta(days=60),
+    TaskFrequency.TRIMESTRAL: timedelta(days=90),
+    TaskFrequency.CUATRIMESTRAL: timedelta(days=120),
+    TaskFrequency.SEMESTRAL: timedelta(days=180),
+    TaskFrequency.ANUAL: timedelta(days=365),
+    TaskFrequency.BIENAL: timedelta(days=730),
+}
+
+
 class PeriodicTaskStatus(enum.Enum):
     """Estados de las tareas periódicas del SGSI"""
     PENDIENTE = 'pendiente'
@@ -110,6 +125,9 @@ class TaskTemplate(db.Model):
     # Activa/Inactiva
     is_active = db.Column(db.Boolean, default=True)
 
+    # Próxima generación automática de tarea (NULL: no se generan más, p. ej. única ya generada)
+    next_generation_at = db.Column(db.DateTime, default=datetime.utcnow)
+
     # Auditoría
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -123,6 +141,12 @@ class TaskTemplate(db.Model):
     updated_by = db.relationship('User', foreign_keys=[updated_by_id])
     tasks = db.relationship('Task', back_populates='template', lazy='dynamic')
 
+    __table_args__ = (
+        # Plantillas activas pendientes de generar tarea
+        db.Index('idx_task_templates_next_generation', 'next_generation_at',
+                 postgresql_where=db.text('is_active')),
+    )
+
     def __repr__(self):
         return f'<TaskTemplate {self.title}>'
 
@@ -131,23 +155,14 @@ class TaskTemplate(db.Model):
         if from_date is None:
             from_date = datetime.utcnow()
 
-        frequency_deltas = {
-            TaskFrequency.DIARIA: timedelta(days=1),
-            TaskFrequency.SEMANAL: timedelta(weeks=1),
-            TaskFrequency.QUINCENAL: timedelta(weeks=2),
-            TaskFrequency.MENSUAL: timedelta(days=30),
-            TaskFrequency.BIMESTRAL: timedelta(days=60),
-            TaskFrequency.TRIMESTRAL: timedelta(days=90),
-            TaskFrequency.CUATRIMESTRAL: timedelta(days=120),
-            TaskFrequency.SEMESTRAL: timedelta(days=180),
-            TaskFrequency.ANUAL: timedelta(days=365),
-            TaskFrequency.BIENAL: timedelta(days=730),
-        }
-
         if self.frequency == TaskFrequency.UNICA:
             return None
 
-        return from_date + frequency_deltas.get(self.frequency, timedelta(days=30))
+        return from_date + FREQUENCY_DELTAS.get(self.frequency, timedelta(days=30))
+
+    def schedule_after(self, task):
+        """Programa la próxima generación tras crear una tarea desde la plantilla"""
+        self.next_generation_at = self.calculate_next_due_date(task.due_date)
 
 
 class Task(db.Model):
@@ -224,6 +239,16 @@ class Task(db.Model):
     history = db.relationship('TaskHistory', back_populates='task', cascade='all, delete-orphan', order_by='TaskHistory.created_at.desc()')
     notification_logs = db.relationship('TaskNotificationLog', back_populates='task', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('idx_tasks_status_due_date', 'status', 'due_date'),
+        db.Index('idx_tasks_assigned_to_due_date', 'assigned_to_id', 'due_date'),
+        db.Index('idx_tasks_assigned_role', 'assigned_role_id'),
+        db.Index('idx_tasks_template_created', 'template_id', 'created_at'),
+        # Tareas abiertas por vencimiento (vencidas, próximas y notificaciones)
+        db.Index('idx_tasks_open_due_date', 'due_date',
+                 postgresql_where=db.text("status IN ('PENDIENTE', 'EN_PROGRESO', 'VENCIDA')")),
+    )
+
     def __repr__(self):
         return f'<Task {self.title}>'
 
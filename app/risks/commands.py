@@ -24,8 +24,9 @@ def seed_risks_command():
 
 
 @click.command('seed-amenazas')
+@click.option('--forzar', is_flag=True, help='Cargar aunque ya haya datos (añade lo que falte y actualiza los campos del catálogo)')
 @with_appcontext
-def seed_amenazas_command():
+def seed_amenazas_command(forzar):
     """
     Carga únicamente el catálogo de amenazas MAGERIT 3.2.
 
@@ -33,12 +34,13 @@ def seed_amenazas_command():
         flask seed-amenazas
     """
     from app.risks.seed_amenazas import seed_amenazas
-    seed_amenazas()
+    seed_amenazas(force_reload=forzar)
 
 
 @click.command('seed-controles')
+@click.option('--forzar', is_flag=True, help='Cargar aunque ya haya datos (añade lo que falte y actualiza los campos del catálogo)')
 @with_appcontext
-def seed_controles_command():
+def seed_controles_command(forzar):
     """
     Carga únicamente el catálogo de controles ISO/IEC 27002:2022.
 
@@ -46,12 +48,13 @@ def seed_controles_command():
         flask seed-controles
     """
     from app.risks.seed_controles import seed_controles
-    seed_controles()
+    seed_controles(force_reload=forzar)
 
 
 @click.command('seed-control-amenaza')
+@click.option('--forzar', is_flag=True, help='Cargar aunque ya haya datos (añade lo que falte y actualiza los campos del catálogo)')
 @with_appcontext
-def seed_control_amenaza_command():
+def seed_control_amenaza_command(forzar):
     """
     Carga las relaciones control-amenaza según mejores prácticas.
 
@@ -65,12 +68,13 @@ def seed_control_amenaza_command():
         docker exec ismsmanager-web-1 flask seed-control-amenaza
     """
     from app.risks.seed_control_amenaza import seed_control_amenaza
-    seed_control_amenaza()
+    seed_control_amenaza(force_reload=forzar)
 
 
 @click.command('seed-amenaza-recurso')
+@click.option('--forzar', is_flag=True, help='Cargar aunque ya haya datos (añade lo que falte y actualiza los campos del catálogo)')
 @with_appcontext
-def seed_amenaza_recurso_command():
+def seed_amenaza_recurso_command(forzar):
     """
     Carga las relaciones amenaza-recurso-tipo según MAGERIT 3.2.
 
@@ -84,7 +88,28 @@ def seed_amenaza_recurso_command():
         docker exec ismsmanager-web-1 flask seed-amenaza-recurso
     """
     from app.risks.seed_amenaza_recurso import seed_amenaza_recurso
-    seed_amenaza_recurso()
+    seed_amenaza_recurso(force_reload=forzar)
+
+
+@click.command('refrescar-resumen-riesgos')
+@with_appcontext
+def refrescar_resumen_riesgos_command():
+    """
+    Reconstruye el resumen materializado de riesgos de todas las evaluaciones.
+
+    El resumen se mantiene automáticamente al generar o recalcular riesgos;
+    este comando solo es necesario tras cargar riesgos por otras vías
+    (por ejemplo, una base de datos creada sin la migración 013).
+
+    Uso:
+        flask refrescar-resumen-riesgos
+    """
+    from models import db
+    from app.risks.services.risk_summary_service import RiskSummaryService
+
+    filas = RiskSummaryService.refrescar()
+    db.session.commit()
+    click.echo(f'Resumen de riesgos reconstruido: {filas} filas')
 
 
 def init_app(app):
@@ -96,3 +121,4 @@ def init_app(app):
     app.cli.add_command(seed_controles_command)
     app.cli.add_command(seed_control_amenaza_command)
     app.cli.add_command(seed_amenaza_recurso_command)
+    app.cli.add_command(refrescar_resumen_riesgos_command)
@@ -511,6 +511,12 @@ class Riesgo(db.Model):
     tratamientos = db.relationship('TratamientoRiesgo', back_populates='riesgo', cascade='all, delete-orphan')
     historial = db.relationship('HistorialRiesgo', back_populates='riesgo', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('idx_riesgos_evaluacion_nivel', 'evaluacion_id', 'nivel_riesgo_efectivo'),
+        db.Index('idx_riesgos_evaluacion_clasificacion', 'evaluacion_id', 'clasificacion_efectiva'),
+        db.Index('idx_riesgos_activo', 'activo_id'),
+    )
+
     def __repr__(self):
         return f'<Riesgo {self.codigo} Nivel:{self.nivel_riesgo_efectivo} {self.clasificacion_efectiva}>'
 
@@ -531,36 +537,60 @@ class Riesgo(db.Model):
         Prob Medio  Bajo  Medio Alto
         Prob Bajo   Muy Bajo Bajo Medio
         """
-        # Determinar nivel de probabilidad (escala 0-10)
-        if probabilidad >= 7:
-            nivel_prob = 'ALTO'
-        elif probabilidad >= 4:
-            nivel_prob = 'MEDIO'
-        else:
-            nivel_prob = 'BAJO'
-
-        # Determinar nivel de impacto (escala 0-10)
-        if impacto >= 7:
-            nivel_imp = 'ALTO'
-        elif impacto >= 4:
-            nivel_imp = 'MEDIO'
-        else:
-            nivel_imp = 'BAJO'
-
-        # Aplicar matriz
-        matriz = {
-            ('ALTO', 'ALTO'): 'MUY_ALTO',
-            ('ALTO', 'MEDIO'): 'ALTO',
-            ('ALTO', 'BAJO'): 'MEDIO',
-            ('MEDIO', 'ALTO'): 'ALTO',
-            ('MEDIO', 'MEDIO'): 'MEDIO',
-            ('MEDIO', 'BAJO'): 'BAJO',
-            ('BAJO', 'ALTO'): 'MEDIO',
-            ('BAJO', 'MEDIO'): 'BAJO',
-            ('BAJO', 'BAJO'): 'MUY_BAJO'
-        }
+        # La matriz y los umbrales viven en el núcleo vectorizado para que el
+        # cálculo individual y el masivo compartan exactamente la misma lógica
+        from app.risks.services import scoring_kernel
+
+        return scoring_kernel.clasificar(probabilidad, impacto)[0]
+
+
+class ResumenRiesgo(db.Model):
+    """
+    Resumen materializado de los riesgos de cada evaluación
+
+    Una fila por evaluación, clasificación efectiva, celda de la matriz 5x5
+    (probabilidad x impacto) y banda de nivel. Lo mantiene RiskSummaryService
+    cada vez que se crean o recalculan riesgos, de modo que dashboards y
+    estadísticas leen unas decenas de filas en lugar de todos los riesgos.
+    """
+    __tablename__ = 'resumen_riesgos'
+
+    # Clasificación usada para los riesgos sin clasificación efectiva
+    SIN_CLASIFICAR = 'SIN_CLASIFICAR'
+
+    # Bandas de nivel de riesgo efectivo (escala 0-100). La banda 1 separa los
+    # riesgos por encima del umbral de 12 de obtener_estadisticas_evaluacion
+    BANDA_MUY_BAJO = 0   # nivel <= 12 o sin nivel
+    BANDA_SOBRE_UMBRAL = 1  # 12 < nivel < 20
+    BANDA_BAJO = 2       # 20 <= nivel < 40
+    BANDA_MEDIO = 3      # 40 <= nivel < 60
+    BANDA_ALTO = 4       # 60 <= nivel < 80
+    BANDA_MUY_ALTO = 5   # nivel >= 80
 
-        return matriz.get((nivel_prob, nivel_imp), 'MEDIO')
+    id = db.Column(db.Integer, primary_key=True)
+    evaluacion_id = db.Column(
+        db.Integer, db.ForeignKey('evaluaciones_riesgo.id', ondelete='CASCADE'), nullable=False
+    )
+    clasificacion = db.Column(db.String(20), nullable=False)
+
+    # Celdas 1-5 de la matriz; 0 cuando el valor efectivo es nulo o cero
+    celda_probabilidad = db.Column(db.Integer, nullable=False)
+    celda_impacto = db.Column(db.Integer, nullable=False)
+    banda_nivel = db.Column(db.Integer, nullable=False)
+
+    # Agregados
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    cantidad_con_nivel = db.Column(db.Integer, nullable=False, default=0)
+    suma_nivel = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    nivel_maximo = db.Column(db.Numeric(10, 2))
+
+    __table_args__ = (
+        db.Index('idx_resumen_riesgos_evaluacion', 'evaluacion_id'),
+    )
+
+    def __repr__(self):
+        return f'<ResumenRiesgo Eval:{self.evaluacion_id} {self.clasificacion} ' \
+               f'({self.celda_probabilidad},{self.celda_impacto}) x{self.cantidad}>'
 
 
 # ==================== TRATAMIENTOS DE RIESGO ====================
@@ -615,6 +645,11 @@ class TratamientoRiesgo(db.Model):
     responsable_implementacion = db.relationship('User', foreign_keys=[responsable_implementacion_id], backref='tratamientos_responsable')
     aprobado_por = db.relationship('User', foreign_keys=[aprobado_por_id], backref='tratamientos_aprobados')
 
+    # Último tratamiento de cada riesgo
+    __table_args__ = (
+        db.Index('idx_tratamientos_riesgo_riesgo_created', 'riesgo_id', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<TratamientoRiesgo R:{self.riesgo_id} {self.opcion_tratamiento}>'
 
@@ -8,10 +8,14 @@ from app.risks import bp
 from app.risks.models import (
     ActivoInformacion, RecursoInformacion, ProcesoNegocio,
     Amenaza, ControlISO27002, EvaluacionRiesgo, Riesgo,
-    SalvaguardaImplantada, TratamientoRiesgo, DeclaracionAplicabilidad,
+    SalvaguardaImplantada,
     ActivoRecurso, ActivoProceso, HistorialRiesgo
 )
 from app.risks.services.risk_calculation_service import RiskCalculationService
+from app.risks.services.risk_recalculation_queue import RiskRecalculationQueue
+from app.risks.services.risk_summary_service import RiskSummaryService
+from app.risks.services.service_risk_service import ServiceRiskService
+from app.services.job_service import JobService
 from models import db
 from datetime import datetime
 
@@ -33,45 +37,17 @@ def dashboard():
         Riesgo.nivel_riesgo_efectivo.desc()
     ).limit(10).all()
 
-    # Matriz de riesgos (probabilidad x impacto)
-    # Normalizar valores MAGERIT (que pueden ser > 5) a escala 1-5
-    matriz_riesgos = {}
-    distribucion_riesgos = {
-        'MUY_ALTO': 0,
-        'ALTO': 0,
-        'MEDIO': 0,
-        'BAJO': 0,
-        'MUY_BAJO': 0
+    # Matriz de riesgos (probabilidad x impacto) y distribución por nivel
+    # efectivo, leídas del resumen materializado. Los valores 0-10 se
+    # normalizan a la escala 1-5; los riesgos sin probabilidad o impacto
+    # efectivo (celda 0) no se muestran
+    matriz_riesgos = {
+        celda: cantidad
+        for celda, cantidad in RiskSummaryService.matriz().items()
+        if celda[0] and celda[1]
     }
-    riesgos_criticos = 0
-
-    riesgos_all = Riesgo.query.all()
-    for riesgo in riesgos_all:
-        if riesgo.probabilidad_efectiva and riesgo.impacto_efectivo:
-            # Normalizar a escala 1-5 para la matriz visual
-            # Nueva escala normalizada: prob 0-10, impacto 0-10
-            prob_norm = min(5, max(1, round(riesgo.probabilidad_efectiva / 2)))  # 0-10 -> 1-5
-            imp_norm = min(5, max(1, round(riesgo.impacto_efectivo / 2)))        # 0-10 -> 1-5
-            nivel_norm = prob_norm * imp_norm  # Nivel normalizado 1-25
-
-            # Agregar a matriz
-            key = (prob_norm, imp_norm)
-            matriz_riesgos[key] = matriz_riesgos.get(key, 0) + 1
-
-            # Clasificar por nivel de riesgo efectivo (escala 0-100)
-            nivel_riesgo = riesgo.nivel_riesgo_efectivo
-            if nivel_riesgo >= 80:
-                distribucion_riesgos['MUY_ALTO'] += 1
-                riesgos_criticos += 1
-            elif nivel_riesgo >= 60:
-                distribucion_riesgos['ALTO'] += 1
-                riesgos_criticos += 1
-            elif nivel_riesgo >= 40:
-                distribucion_riesgos['MEDIO'] += 1
-            elif nivel_riesgo >= 20:
-                distribucion_riesgos['BAJO'] += 1
-            else:
-                distribucion_riesgos['MUY_BAJO'] += 1
+    distribucion_riesgos = RiskSummaryService.distribucion_niveles()
+    riesgos_criticos = distribucion_riesgos['MUY_ALTO'] + distribucion_riesgos['ALTO']
 
     stats = {
         'total_activos': total_activos,
@@ -79,11 +55,6 @@ def dashboard():
         'riesgos_criticos': riesgos_criticos
     }
 
-    # Debug: log matriz_riesgos
-    print(f"DEBUG Dashboard - Total riesgos: {total_riesgos}")
-    print(f"DEBUG Dashboard - Matriz riesgos: {matriz_riesgos}")
-    print(f"DEBUG Dashboard - Distribución: {distribucion_riesgos}")
-
     return render_template(
         'risks/dashboard.html',
         stats=stats,
@@ -244,6 +215,11 @@ def activos_edit(id):
 
             db.session.commit()
 
+            # Recalcular los riesgos del activo
+            cola = RiskRecalculationQueue()
+            cola.marcar_activo(activo.id)
+            cola.procesar(usuario_id=current_user.id)
+
             flash(f'Activo {activo.codigo} actualizado exitosamente', 'success')
             return redirect(url_for('risks.activos_view', id=id))
 
@@ -381,6 +357,11 @@ def recursos_edit(id):
 
             db.session.commit()
 
+            # Recalcular los riesgos del recurso
+            cola = RiskRecalculationQueue()
+            cola.marcar_recurso(recurso.id)
+            cola.procesar(usuario_id=current_user.id)
+
             flash(f'Recurso {recurso.codigo} actualizado exitosamente', 'success')
             return redirect(url_for('risks.recursos_view', id=id))
 
@@ -422,15 +403,17 @@ def evaluaciones_create():
             )
 
             db.session.add(evaluacion)
-            db.session.flush()  # Para obtener el ID
-
-            # Generar todos los riesgos automáticamente
-            cantidad_riesgos = RiskCalculationService.generar_todos_los_riesgos(evaluacion.id)
-
             db.session.commit()
 
-            flash(f'Evaluación creada exitosamente. Se generaron {cantidad_riesgos} riesgos.', 'success')
-            return redirect(url_for('risks.evaluaciones_view', id=evaluacion.id))
+            # Generar todos los riesgos automáticamente en segundo plano
+            job = JobService.enqueue(
+                'risk_generation',
+                payload={'evaluacion_id': evaluacion.id},
+                user_id=current_user.id
+            )
+
+            flash(f'Evaluación creada exitosamente. Generando riesgos (trabajo #{job.id})...', 'success')
+            return redirect(url_for('risks.evaluaciones_view', id=evaluacion.id, job=job.id))
 
         except Exception as e:
             db.session.rollback()
@@ -570,13 +553,14 @@ def evaluaciones_recalcular(id):
     """Recalcular todos los riesgos de una evaluación"""
     evaluacion = EvaluacionRiesgo.query.get_or_404(id)
 
-    try:
-        cantidad = RiskCalculationService.recalcular_riesgos_evaluacion(id)
-        flash(f'Se recalcularon {cantidad} riesgos exitosamente', 'success')
-    except Exception as e:
-        flash(f'Error al recalcular riesgos: {str(e)}', 'error')
+    job = JobService.enqueue(
+        'risk_recalculation',
+        payload={'evaluacion_id': evaluacion.id},
+        user_id=current_user.id
+    )
+    flash(f'Recálculo de riesgos en curso (trabajo #{job.id})', 'info')
 
-    return redirect(url_for('risks.evaluaciones_view', id=id))
+    return redirect(url_for('risks.evaluaciones_view', id=id, job=job.id))
 
 
 # ==================== RIESGOS ====================
@@ -852,6 +836,9 @@ def riesgos_a_tratar():
 
     riesgos_all = riesgos_query.all()
 
+    # Tratamiento más reciente de cada riesgo en una sola consulta
+    tratamientos = ServiceRiskService.ultimos_tratamientos([riesgo.id for riesgo in riesgos_all])
+
     # Clasificar riesgos según su estado de tratamiento
     sin_tratamiento = []
     tratamiento_planificado = []
@@ -859,10 +846,7 @@ def riesgos_a_tratar():
     tratamiento_implementado = []
 
     for riesgo in riesgos_all:
-        # Obtener el tratamiento más reciente del riesgo
-        tratamiento = TratamientoRiesgo.query.filter_by(
-            riesgo_id=riesgo.id
-        ).order_by(TratamientoRiesgo.created_at.desc()).first()
+        tratamiento = tratamientos.get(riesgo.id)
 
         if not tratamiento:
             sin_tratamiento.append({
@@ -921,28 +905,7 @@ def get_risks_for_service(service):
     Returns:
         list: Lista de objetos Riesgo asociados al servicio
     """
-    # Obtener códigos de los activos del servicio
-    asset_codes = [asset.asset_code for asset in service.assets if asset.asset_code]
-
-    if not asset_codes:
-        return []
-
-    # Buscar ActivoInformacion por código
-    activos_info = ActivoInformacion.query.filter(
-        ActivoInformacion.codigo.in_(asset_codes)
-    ).all()
-
-    activos_ids = [activo.id for activo in activos_info]
-
-    if not activos_ids:
-        return []
-
-    # Obtener riesgos asociados a esos activos
-    riesgos = Riesgo.query.filter(
-        Riesgo.activo_id.in_(activos_ids)
-    ).order_by(Riesgo.nivel_riesgo_efectivo.desc()).all()
-
-    return riesgos
+    return ServiceRiskService.riesgos_de_servicio(service.id)
 
 
 def calculate_service_risk_stats(service):
@@ -955,34 +918,8 @@ def calculate_service_risk_stats(service):
     Returns:
         dict: Diccionario con estadísticas de riesgos
     """
-    riesgos = get_risks_for_service(service)
-
-    if not riesgos:
-        return {
-            'total': 0,
-            'high_count': 0,
-            'medium_count': 0,
-            'low_count': 0,
-            'avg_level': 0,
-            'max_level': 0
-        }
-
-    high_count = len([r for r in riesgos if r.clasificacion_efectiva in ['ALTO', 'MUY_ALTO']])
-    medium_count = len([r for r in riesgos if r.clasificacion_efectiva == 'MEDIO'])
-    low_count = len([r for r in riesgos if r.clasificacion_efectiva in ['BAJO', 'MUY_BAJO']])
-
-    niveles = [float(r.nivel_riesgo_efectivo or 0) for r in riesgos]
-    avg_level = sum(niveles) / len(niveles) if niveles else 0
-    max_level = max(niveles) if niveles else 0
-
-    return {
-        'total': len(riesgos),
-        'high_count': high_count,
-        'medium_count': medium_count,
-        'low_count': low_count,
-        'avg_level': round(avg_level, 2),
-        'max_level': round(max_level, 2)
-    }
+    estadisticas = ServiceRiskService.estadisticas_por_servicio([service.id])
+    return estadisticas.get(service.id, ServiceRiskService.estadisticas_vacias())
 
 
 @bp.route('/servicios')
@@ -994,16 +931,18 @@ def risks_by_service():
     # Obtener todos los servicios activos
     services = Service.query.filter_by(status=ServiceStatus.ACTIVE).all()
 
-    # Calcular estadísticas de riesgos para cada servicio
+    # Estadísticas de riesgos de todos los servicios en una consulta agrupada
+    stats_by_service = ServiceRiskService.estadisticas_por_servicio([s.id for s in services])
+
     services_with_risks = []
     total_risks = 0
     services_with_high_risks = 0
     total_avg_risk = []
 
     for service in services:
-        stats = calculate_service_risk_stats(service)
+        stats = stats_by_service.get(service.id)
 
-        if stats['total'] > 0:
+        if stats:
             services_with_risks.append({
                 'service': service,
                 'stats': stats
@@ -1057,11 +996,12 @@ def service_risks_detail(service_id):
     medios = []
     bajos = []
 
+    # Tratamiento más reciente de cada riesgo en una sola consulta
+    tratamientos = ServiceRiskService.ultimos_tratamientos([r.id for r in riesgos])
+
     for riesgo in riesgos:
         # Verificar si tiene tratamiento
-        tratamiento = TratamientoRiesgo.query.filter_by(
-            riesgo_id=riesgo.id
-        ).order_by(TratamientoRiesgo.created_at.desc()).first()
+        tratamiento = tratamientos.get(riesgo.id)
 
         # Clasificar sin tratamiento
         if not tratamiento or tratamiento.estado == 'planificado':
@@ -0,0 +1,522 @@
+"""
+Motor de Generación Masiva de Riesgos
+Calcula todas las combinaciones activo × recurso × amenaza × dimensión de una
+evaluación en memoria y persiste los resultados con inserciones y
+actualizaciones por lotes.
+"""
+
+from collections import defaultdict
+from sqlalchemy.orm import joinedload
+from models import db, Asset, AssetStatus
+from app.risks.models import (
+    Riesgo, ActivoInformacion, RecursoInformacion, ActivoRecurso,
+    Amenaza, AmenazaRecursoTipo, ControlAmenaza, HistorialRiesgo
+)
+from app.risks.services.risk_calculation_service import RiskCalculationService
+from app.risks.services.risk_summary_service import RiskSummaryService
+from app.risks.services.soa_snapshot import SOASnapshot
+from app.risks.services import scoring_kernel
+
+
+# Columnas de Riesgo escritas por el motor de cálculo
+CAMPOS_CALCULO = [
+    'importancia_propia', 'importancia_tipologica',
+    'modulo_normalizador_impacto', 'frecuencia_amenaza',
+    'modulo_normalizador_probabilidad',
+    'impacto_intrinseco', 'probabilidad_intrinseca', 'nivel_riesgo_intrinseco',
+    'clasificacion_intrinseca',
+    'gravedad_vulnerabilidad', 'facilidad_explotacion',
+    'num_controles_reactivos', 'num_controles_preventivos',
+    'impacto_efectivo', 'probabilidad_efectiva', 'nivel_riesgo_efectivo',
+    'clasificacion_efectiva'
+]
+
+CAMPOS_RELACION = ['codigo', 'evaluacion_id', 'activo_id', 'recurso_id', 'amenaza_id', 'dimension']
+
+# Tamaño de lote para las escrituras masivas
+TAMANO_LOTE = 1000
+
+
+class CatalogoRiesgos:
+    """
+    Tablas de consulta en memoria con los catálogos que intervienen en el cálculo
+
+    Se construye una sola vez por ejecución y sustituye a las consultas
+    individuales de RiskCalculationService (frecuencia, controles y SOA).
+    """
+
+    def __init__(self):
+        self.amenazas = {}
+        self.aplicabilidades_por_tipo = defaultdict(list)
+        self.frecuencias = {}
+        self.niveles_control = {}
+
+    @classmethod
+    def cargar(cls):
+        """Carga amenazas, aplicabilidades, controles y madurez SOA"""
+        catalogo = cls()
+
+        catalogo.amenazas = {a.id: a for a in Amenaza.query.all()}
+
+        for aplicabilidad in AmenazaRecursoTipo.query.order_by(AmenazaRecursoTipo.id).all():
+            catalogo.aplicabilidades_por_tipo[aplicabilidad.tipo_recurso].append(aplicabilidad)
+            clave = (aplicabilidad.amenaza_id, aplicabilidad.tipo_recurso, aplicabilidad.dimension_afectada)
+            catalogo.frecuencias[clave] = aplicabilidad.frecuencia_base
+
+        # Pares (madurez, efectividad) por amenaza y tipo de control, leyendo
+        # la madurez de la instantánea del SOA activo
+        snapshot = SOASnapshot.actual()
+        pares = defaultdict(list)
+        for control in ControlAmenaza.query.order_by(ControlAmenaza.id).all():
+            madurez = snapshot.madurez_aplicable(control.control_codigo)
+            if madurez is not None:
+                pares[(control.amenaza_id, control.tipo_control)].append(
+                    (madurez, control.efectividad)
+                )
+
+        for clave, lista in pares.items():
+            catalogo.niveles_control[clave] = RiskCalculationService.agregar_nivel_controles(lista)
+
+        return catalogo
+
+    def obtener_frecuencia(self, amenaza_id, tipo_recurso, dimension):
+        """Equivalente en memoria de RiskCalculationService.obtener_frecuencia_amenaza"""
+        return self.frecuencias.get((amenaza_id, tipo_recurso, dimension), 3)
+
+    def obtener_nivel_controles(self, amenaza_id, tipo_control):
+        """Equivalente en memoria de calcular_nivel_controles para una amenaza"""
+        return self.niveles_control.get((amenaza_id, tipo_control), (0, 0, 5.0))
+
+
+class BulkRiskEngine:
+    """Generación y recálculo masivo de riesgos"""
+
+    def __init__(self, evaluacion_id=None):
+        self.evaluacion_id = evaluacion_id
+        self.catalogo = None
+
+        # Estado en memoria de los riesgos de la evaluación
+        self.por_codigo = {}
+        self.por_clave = {}
+        self.existentes = {}
+        self.originales = {}
+        self.nuevos = []
+        self.pendientes = []
+
+    def generar(self):
+        """
+        Genera o actualiza todos los riesgos de la evaluación
+
+        Returns:
+            int: Cantidad de riesgos generados
+        """
+        self.catalogo = CatalogoRiesgos.cargar()
+        self._cargar_riesgos_existentes(Riesgo.evaluacion_id == self.evaluacion_id)
+
+        contador = 0
+        for activo, recurso, tipo_recurso in self._obtener_pares():
+            for aplicabilidad in self.catalogo.aplicabilidades_por_tipo.get(tipo_recurso, []):
+                try:
+                    if self._calcular(activo, recurso, aplicabilidad.amenaza_id,
+                                      aplicabilidad.dimension_afectada):
+                        contador += 1
+                except Exception as e:
+                    print(f"Error generando riesgo para {activo.codigo}: {e}")
+                    continue
+
+        self._puntuar_pendientes()
+        self._persistir()
+        return contador
+
+    def recalcular(self, riesgo_ids, tipo_cambio='RECALCULO', usuario_id=None):
+        """
+        Recalcula un conjunto concreto de riesgos existentes
+
+        Solo se actualizan las filas cuyos valores cambian y solo se registra
+        historial para las que cambian de nivel o clasificación.
+
+        Args:
+            riesgo_ids: IDs de los riesgos a recalcular
+            tipo_cambio: Tipo de cambio registrado en HistorialRiesgo
+            usuario_id: Usuario que originó el recálculo
+
+        Returns:
+            dict: {'recalculados': n, 'actualizados': n, 'cambios_nivel': n}
+        """
+        riesgo_ids = sorted(set(riesgo_ids))
+        if not riesgo_ids:
+            return {'recalculados': 0, 'actualizados': 0, 'cambios_nivel': 0}
+
+        self.catalogo = CatalogoRiesgos.cargar()
+        for inicio in range(0, len(riesgo_ids), TAMANO_LOTE):
+            self._cargar_riesgos_existentes(Riesgo.id.in_(riesgo_ids[inicio:inicio + TAMANO_LOTE]))
+
+        riesgos = list(self.existentes.values())
+        activos = self._cargar_por_id(ActivoInformacion, {r['activo_id'] for r in riesgos})
+        recursos = self._cargar_por_id(RecursoInformacion, {r['recurso_id'] for r in riesgos})
+
+        recalculados = 0
+        for riesgo in riesgos:
+            activo = activos.get(riesgo['activo_id'])
+            recurso = recursos.get(riesgo['recurso_id'])
+            amenaza = self.catalogo.amenazas.get(riesgo['amenaza_id'])
+            dimension = riesgo['dimension']
+
+            try:
+                # Igual que crear_o_actualizar_riesgo: si el riesgo ya no aplica
+                # se deja como está
+                if not activo or not amenaza or not amenaza.afecta_dimension(dimension):
+                    continue
+                ip = activo.get_valoracion_dimension(dimension)
+                if ip == 0:
+                    continue
+
+                it = recurso.importancia_tipologica if recurso else 3
+                tipo_recurso = recurso.tipo_recurso if recurso else 'sw_aplicacion'
+                frecuencia = self.catalogo.obtener_frecuencia(amenaza.id, tipo_recurso, dimension)
+                if frecuencia is None:
+                    continue
+            except Exception as e:
+                print(f"Error recalculando riesgo {riesgo['id']}: {e}")
+                continue
+
+            self.pendientes.append((
+                riesgo, ip, it, frecuencia,
+                self.catalogo.obtener_nivel_controles(amenaza.id, 'REACTIVO'),
+                self.catalogo.obtener_nivel_controles(amenaza.id, 'PREVENTIVO')
+            ))
+            recalculados += 1
+
+        self._puntuar_pendientes()
+        actualizados, cambios_nivel = self._persistir(tipo_cambio, usuario_id)
+
+        return {
+            'recalculados': recalculados,
+            'actualizados': actualizados,
+            'cambios_nivel': cambios_nivel
+        }
+
+    # ==================== CARGA ====================
+
+    @staticmethod
+    def _cargar_por_id(modelo, ids):
+        """Carga instancias de un modelo por lotes de IDs"""
+        ids = sorted(i for i in ids if i is not None)
+        resultado = {}
+        for inicio in range(0, len(ids), TAMANO_LOTE):
+            for instancia in modelo.query.filter(modelo.id.in_(ids[inicio:inicio + TAMANO_LOTE])).all():
+                resultado[instancia.id] = instancia
+        return resultado
+
+    def _cargar_riesgos_existentes(self, filtro):
+        """Carga como diccionarios los riesgos existentes que cumplen el filtro"""
+        columnas = [Riesgo.id, Riesgo.propietario_riesgo_id] + \
+            [getattr(Riesgo, c) for c in CAMPOS_RELACION + CAMPOS_CALCULO]
+
+        filas = db.session.query(*columnas).filter(filtro).order_by(Riesgo.id).all()
+
+        for fila in filas:
+            riesgo = dict(fila._mapping)
+            self.existentes[riesgo['id']] = riesgo
+            self.originales[riesgo['id']] = dict(riesgo)
+            self.por_codigo[riesgo['codigo']] = riesgo
+            clave = (riesgo['activo_id'], riesgo['amenaza_id'], riesgo['dimension'])
+            self.por_clave.setdefault(clave, riesgo)
+
+    def _obtener_pares(self):
+        """
+        Obtiene las parejas (activo, recurso, tipo_recurso) a evaluar
+
+        Usa las relaciones ActivoRecurso existentes o, si no hay ninguna,
+        las crea a partir de los activos del módulo principal.
+        """
+        relaciones = ActivoRecurso.query.options(
+            joinedload(ActivoRecurso.activo),
+            joinedload(ActivoRecurso.recurso)
+        ).order_by(ActivoRecurso.id).all()
+
+        if relaciones:
+            return [(r.activo, r.recurso, r.recurso.tipo_recurso) for r in relaciones]
+
+        print("Generando riesgos desde activos del módulo principal...")
+        return self._pares_desde_activos_principales()
+
+    def _pares_desde_activos_principales(self):
+        """Crea en bloque los activos, recursos y relaciones equivalentes a los Asset activos"""
+        activos_principales = Asset.query.filter_by(status=AssetStatus.ACTIVE).all()
+        codigos = [a.asset_code for a in activos_principales]
+
+        activos_info = {
+            a.codigo: a for a in ActivoInformacion.query.filter(
+                ActivoInformacion.codigo.in_(codigos)
+            ).all()
+        } if codigos else {}
+        recursos = {
+            r.codigo: r for r in RecursoInformacion.query.filter(
+                RecursoInformacion.codigo.in_([f"REC-{c}" for c in codigos])
+            ).all()
+        } if codigos else {}
+
+        pares = []
+        for asset in activos_principales:
+            activo_info = activos_info.get(asset.asset_code)
+            if not activo_info:
+                activo_info = ActivoInformacion(
+                    codigo=asset.asset_code,
+                    nombre=asset.name,
+                    descripcion=asset.description or '',
+                    tipo_activo=self._tipo_activo(asset),
+                    funcion=asset.description or '',
+                    ubicacion=asset.physical_location or '',
+                    propietario_id=asset.owner_id,
+                    estado='activo',
+                    confidencialidad=self._valor_cia(asset.confidentiality_level),
+                    integridad=self._valor_cia(asset.integrity_level),
+                    disponibilidad=self._valor_cia(asset.availability_level)
+                )
+                activo_info.calcular_importancia_propia()
+                db.session.add(activo_info)
+                activos_info[asset.asset_code] = activo_info
+
+            tipo_recurso = 'HARDWARE' if 'HARDWARE' in str(asset.category) else \
+                          'SOFTWARE' if 'SOFTWARE' in str(asset.category) else \
+                          'DATOS' if 'INFORMATION' in str(asset.category) else 'OTROS'
+
+            codigo_recurso = f"REC-{asset.asset_code}"
+            recurso = recursos.get(codigo_recurso)
+            if not recurso:
+                recurso = RecursoInformacion(
+                    codigo=codigo_recurso,
+                    nombre=f"Recurso {asset.name}",
+                    descripcion=f"Recurso para {asset.name}",
+                    tipo_recurso=tipo_recurso,
+                    importancia_tipologica=3,
+                    responsable_id=asset.owner_id,
+                    ubicacion=asset.physical_location or ''
+                )
+                db.session.add(recurso)
+                recursos[codigo_recurso] = recurso
+
+            pares.append((activo_info, recurso, tipo_recurso))
+
+        # Un único flush para obtener los IDs de todo lo creado
+        db.session.flush()
+
+        existentes = set(db.session.query(ActivoRecurso.activo_id, ActivoRecurso.recurso_id).all())
+        for activo_info, recurso, _ in pares:
+            if (activo_info.id, recurso.id) not in existentes:
+                db.session.add(ActivoRecurso(
+                    activo_id=activo_info.id,
+                    recurso_id=recurso.id,
+                    tipo_uso='procesa',
+                    criticidad=3
+                ))
+                existentes.add((activo_info.id, recurso.id))
+
+        return pares
+
+    @staticmethod
+    def _valor_cia(nivel):
+        """Mapea CIALevel a escala 0-5 (CRITICAL=5, HIGH=4, MEDIUM=3, LOW=2)"""
+        return 5 if str(nivel) == 'CIALevel.CRITICAL' else \
+            4 if str(nivel) == 'CIALevel.HIGH' else \
+            3 if str(nivel) == 'CIALevel.MEDIUM' else 2
+
+    @staticmethod
+    def _tipo_activo(asset):
+        return 'HW' if str(asset.category) == 'AssetCategory.HARDWARE' else \
+            'SW' if str(asset.category) == 'AssetCategory.SOFTWARE' else \
+            'DAT' if str(asset.category) == 'AssetCategory.INFORMATION' else 'OT'
+
+    # ==================== CÁLCULO ====================
+
+    def _calcular(self, activo, recurso, amenaza_id, dimension):
+        """
+        Calcula un riesgo en memoria con la misma semántica que crear_o_actualizar_riesgo
+
+        Returns:
+            bool: True si el riesgo aplica y se ha calculado
+        """
+        amenaza = self.catalogo.amenazas.get(amenaza_id)
+        if not activo or not amenaza:
+            raise ValueError("Activo o amenaza no encontrados")
+
+        if not amenaza.afecta_dimension(dimension):
+            return False
+
+        ip = activo.get_valoracion_dimension(dimension)
+        if ip == 0:
+            return False
+
+        recurso_id = recurso.id if recurso else None
+        codigo = RiskCalculationService.generar_codigo_riesgo(
+            self.evaluacion_id, activo.id, recurso_id, amenaza_id, dimension
+        )
+
+        it = recurso.importancia_tipologica if recurso else 3
+        tipo_recurso = recurso.tipo_recurso if recurso else 'sw_aplicacion'
+        frecuencia = self.catalogo.obtener_frecuencia(amenaza_id, tipo_recurso, dimension)
+        if frecuencia is None:
+            raise ValueError(f"Frecuencia no definida para amenaza {amenaza_id} ({tipo_recurso}/{dimension})")
+
+        riesgo = self._localizar(codigo, activo.id, amenaza_id, dimension)
+
+        # La puntuación se difiere para calcular todas las tuplas en bloque
+        self.pendientes.append((
+            riesgo, ip, it, frecuencia,
+            self.catalogo.obtener_nivel_controles(amenaza_id, 'REACTIVO'),
+            self.catalogo.obtener_nivel_controles(amenaza_id, 'PREVENTIVO')
+        ))
+
+        riesgo['recurso_id'] = recurso_id
+        if not riesgo.get('propietario_riesgo_id'):
+            riesgo['propietario_riesgo_id'] = activo.propietario_id
+
+        return True
+
+    def _puntuar_pendientes(self):
+        """Puntúa todas las tuplas pendientes con el núcleo vectorizado"""
+        if not self.pendientes:
+            return
+
+        riesgos, ip, it, frecuencia, reactivos, preventivos = zip(*self.pendientes)
+        gravedad = [nivel for _, _, nivel in reactivos]
+        facilidad = [nivel for _, _, nivel in preventivos]
+
+        intrinseco = scoring_kernel.puntuar(ip, it, frecuencia)
+        efectivo = scoring_kernel.puntuar(
+            ip, it, frecuencia,
+            nivel_preventivo=facilidad, nivel_reactivo=gravedad
+        )
+
+        columnas = zip(
+            riesgos, ip, it, frecuencia, reactivos, preventivos,
+            scoring_kernel.redondear(intrinseco['impacto']),
+            scoring_kernel.redondear(intrinseco['probabilidad']),
+            scoring_kernel.redondear(intrinseco['nivel']),
+            intrinseco['clasificacion'].tolist(),
+            scoring_kernel.redondear(efectivo['impacto']),
+            scoring_kernel.redondear(efectivo['probabilidad']),
+            scoring_kernel.redondear(efectivo['nivel']),
+            efectivo['clasificacion'].tolist()
+        )
+
+        # Si un riesgo aparece varias veces prevalece la última tupla, como en
+        # el cálculo individual
+        for (riesgo, ip_i, it_i, frec_i, reactivo, preventivo,
+             imp_i, prob_i, nivel_i, clf_i, imp_e, prob_e, nivel_e, clf_e) in columnas:
+            riesgo.update({
+                'importancia_propia': float(ip_i),
+                'importancia_tipologica': it_i,
+                'modulo_normalizador_impacto': 0,
+                'frecuencia_amenaza': frec_i,
+                'modulo_normalizador_probabilidad': 0,
+                'impacto_intrinseco': imp_i,
+                'probabilidad_intrinseca': prob_i,
+                'nivel_riesgo_intrinseco': nivel_i,
+                'clasificacion_intrinseca': clf_i,
+                'gravedad_vulnerabilidad': round(reactivo[2], 2),
+                'facilidad_explotacion': round(preventivo[2], 2),
+                'num_controles_reactivos': reactivo[1],
+                'num_controles_preventivos': preventivo[1],
+                'impacto_efectivo': imp_e,
+                'probabilidad_efectiva': prob_e,
+                'nivel_riesgo_efectivo': nivel_e,
+                'clasificacion_efectiva': clf_e
+            })
+
+        self.pendientes = []
+
+    def _localizar(self, codigo, activo_id, amenaza_id, dimension):
+        """Busca el riesgo por código o por evaluación+activo+amenaza+dimensión, o lo crea"""
+        riesgo = self.por_codigo.get(codigo)
+        clave = (activo_id, amenaza_id, dimension)
+
+        if not riesgo:
+            riesgo = self.por_clave.get(clave)
+            if riesgo:
+                # El recurso cambió: se conserva el riesgo y se actualiza su código
+                del self.por_codigo[riesgo['codigo']]
+                riesgo['codigo'] = codigo
+                self.por_codigo[codigo] = riesgo
+
+        if not riesgo:
+            riesgo = {
+                'codigo': codigo,
+                'evaluacion_id': self.evaluacion_id,
+                'activo_id': activo_id,
+                'amenaza_id': amenaza_id,
+                'dimension': dimension,
+                'propietario_riesgo_id': None
+            }
+            self.nuevos.append(riesgo)
+            self.por_codigo[codigo] = riesgo
+            self.por_clave.setdefault(clave, riesgo)
+
+        return riesgo
+
+    # ==================== PERSISTENCIA ====================
+
+    @staticmethod
+    def _ha_cambiado(original, actual):
+        """Compara los campos persistidos, normalizando Decimal frente a float"""
+        for campo in ['codigo', 'recurso_id', 'propietario_riesgo_id'] + CAMPOS_CALCULO:
+            antes, despues = original.get(campo), actual.get(campo)
+            if isinstance(despues, float) and antes is not None:
+                if round(float(antes), 2) != round(despues, 2):
+                    return True
+            elif antes != despues:
+                return True
+        return False
+
+    def _persistir(self, tipo_cambio='RECALCULO', usuario_id=None):
+        """
+        Escribe nuevos riesgos y cambios con inserciones/actualizaciones por lotes
+
+        Returns:
+            tuple: (riesgos actualizados, entradas de historial registradas)
+        """
+        actualizados = []
+        historial = []
+
+        for riesgo_id, actual in self.existentes.items():
+            original = self.originales[riesgo_id]
+            if not self._ha_cambiado(original, actual):
+                continue
+
+            actualizados.append(actual)
+
+            nivel_anterior = original['nivel_riesgo_efectivo']
+            clasificacion_anterior = original['clasificacion_efectiva']
+            if nivel_anterior is None or \
+                    round(float(nivel_anterior), 2) != actual['nivel_riesgo_efectivo'] or \
+                    clasificacion_anterior != actual['clasificacion_efectiva']:
+                historial.append({
+                    'riesgo_id': riesgo_id,
+                    'usuario_id': usuario_id,
+                    'nivel_riesgo_efectivo_anterior': nivel_anterior,
+                    'nivel_riesgo_efectivo_nuevo': actual['nivel_riesgo_efectivo'],
+                    'clasificacion_anterior': clasificacion_anterior,
+                    'clasificacion_nueva': actual['clasificacion_efectiva'],
+                    'tipo_cambio': tipo_cambio,
+                    'descripcion_cambio': f"Cambio de {clasificacion_anterior} ({nivel_anterior}) a "
+                                          f"{actual['clasificacion_efectiva']} ({actual['nivel_riesgo_efectivo']})"
+                })
+
+        for inicio in range(0, len(actualizados), TAMANO_LOTE):
+            db.session.bulk_update_mappings(Riesgo, actualizados[inicio:inicio + TAMANO_LOTE])
+
+        for inicio in range(0, len(self.nuevos), TAMANO_LOTE):
+            db.session.bulk_insert_mappings(Riesgo, self.nuevos[inicio:inicio + TAMANO_LOTE])
+
+        for inicio in range(0, len(historial), TAMANO_LOTE):
+            db.session.bulk_insert_mappings(HistorialRiesgo, historial[inicio:inicio + TAMANO_LOTE])
+
+        db.session.flush()
+
+        # Mantener el resumen materializado de las evaluaciones afectadas
+        RiskSummaryService.refrescar(
+            {r['evaluacion_id'] for r in actualizados} | {r['evaluacion_id'] for r in self.nuevos}
+        )
+
+        return len(actualizados), len(historial)
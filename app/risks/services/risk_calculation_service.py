@@ -5,11 +5,14 @@ Motor principal que implementa las fórmulas de cálculo según metodología MAG
 
 import math
 from sqlalchemy import and_
-from models import db, SOAControl, SOAVersion
+from models import db
 from app.risks.models import (
     Riesgo, ActivoInformacion, RecursoInformacion, Amenaza,
     AmenazaRecursoTipo, ControlAmenaza, HistorialRiesgo
 )
+from app.risks.services.soa_snapshot import SOASnapshot
+from app.risks.services.risk_summary_service import RiskSummaryService
+from app.risks.services import scoring_kernel
 
 
 class RiskCalculationService:
@@ -92,31 +95,43 @@ class RiskCalculationService:
         if not controles_aplicables:
             return 0, 0, 5.0  # Sin controles = máxima vulnerabilidad
 
-        # Obtener la versión SOA activa
-        soa_activo = SOAVersion.query.filter_by(is_current=True).first()
-        if not soa_activo:
+        # Instantánea del SOA activo (una lectura por recálculo/petición)
+        snapshot = SOASnapshot.actual()
+        if not snapshot:
             # Si no hay SOA activo, no podemos calcular (ya no usamos salvaguardas)
             return 0, 0, 5.0
 
+        pares = []
+        for control_amenaza in controles_aplicables:
+            madurez = snapshot.madurez_aplicable(control_amenaza.control_codigo)
+            if madurez is not None:
+                pares.append((madurez, control_amenaza.efectividad))
+
+        return RiskCalculationService.agregar_nivel_controles(pares)
+
+    @staticmethod
+    def agregar_nivel_controles(pares):
+        """
+        Agrega la madurez de un conjunto de controles en un nivel de gravedad/facilidad
+
+        Args:
+            pares: Iterable de tuplas (maturity_score SOA 0-6, efectividad 0-1)
+
+        Returns:
+            tuple: (suma_madurez, cantidad_controles, nivel_promedio)
+        """
         suma_madurez = 0
         cantidad = 0
 
-        for control_amenaza in controles_aplicables:
-            # Buscar el control en el SOA activo directamente por código
-            soa_control = SOAControl.query.filter_by(
-                control_id=control_amenaza.control_codigo,
-                soa_version_id=soa_activo.id,
-                applicability_status='aplicable'
-            ).first()
-
-            if soa_control and soa_control.maturity_score > 0:
+        for maturity_score, efectividad in pares:
+            if maturity_score > 0:
                 # Normalizar madurez del SOA (0-6) a escala MAGERIT (0-5)
                 # 0 (no implementado) -> 0
                 # 6 (optimizado) -> 5
-                madurez_normalizada = min(5, soa_control.maturity_score * 5.0 / 6.0)
+                madurez_normalizada = min(5, maturity_score * 5.0 / 6.0)
 
                 # Convertir efectividad de Decimal a float para evitar errores de tipo
-                efectividad_float = float(control_amenaza.efectividad)
+                efectividad_float = float(efectividad)
                 suma_madurez += madurez_normalizada * efectividad_float
                 cantidad += 1
 
@@ -126,6 +141,77 @@ class RiskCalculationService:
         nivel = 5 - (suma_madurez / cantidad)
         return suma_madurez, cantidad, max(0, min(5, nivel))
 
+    @staticmethod
+    def puntuar_intrinseco(ip, it, frecuencia):
+        """
+        Aplica las fórmulas del riesgo intrínseco sobre valores ya resueltos
+
+        Usa el núcleo vectorizado (scoring_kernel) con una sola tupla, igual
+        que el motor masivo, para que ambos caminos no puedan divergir.
+
+        Args:
+            ip: Importancia propia del activo en la dimensión (0-5)
+            it: Importancia tipológica del recurso (1-5)
+            frecuencia: Frecuencia de la amenaza (0-5)
+
+        Returns:
+            dict: Valores intrínsecos listos para asignar al Riesgo
+        """
+        # Gravedad y facilidad máximas = 5 (sin controles)
+        resultado = scoring_kernel.puntuar([ip], [it], [frecuencia])
+
+        return {
+            'importancia_propia': float(ip),
+            'importancia_tipologica': it,
+            'modulo_normalizador_impacto': 0,  # No usado en nueva fórmula
+            'frecuencia_amenaza': frecuencia,
+            'modulo_normalizador_probabilidad': 0,  # No usado en nueva fórmula
+            'impacto_intrinseco': scoring_kernel.redondear(resultado['impacto'])[0],
+            'probabilidad_intrinseca': scoring_kernel.redondear(resultado['probabilidad'])[0],
+            'nivel_riesgo_intrinseco': scoring_kernel.redondear(resultado['nivel'])[0],
+            'clasificacion_intrinseca': resultado['clasificacion'][0]
+        }
+
+    @staticmethod
+    def puntuar_efectivo(ip, it, frecuencia, nivel_reactivo, nivel_preventivo):
+        """
+        Aplica las fórmulas del riesgo efectivo sobre valores ya resueltos
+
+        Args:
+            ip: Importancia propia del activo en la dimensión (0-5)
+            it: Importancia tipológica del recurso (1-5)
+            frecuencia: Frecuencia de la amenaza (0-5)
+            nivel_reactivo: Tupla (suma, cantidad, gravedad) de controles reactivos
+            nivel_preventivo: Tupla (suma, cantidad, facilidad) de controles preventivos
+
+        Returns:
+            dict: Valores efectivos listos para asignar al Riesgo
+        """
+        _, n_reactivos, gravedad = nivel_reactivo
+        _, n_preventivos, facilidad = nivel_preventivo
+
+        # La gravedad reduce el impacto (0=sin daño, 5=daño máximo)
+        # La facilidad incrementa la probabilidad (0=imposible, 5=muy fácil)
+        resultado = scoring_kernel.puntuar(
+            [ip], [it], [frecuencia],
+            nivel_preventivo=[facilidad], nivel_reactivo=[gravedad]
+        )
+
+        return {
+            'importancia_propia': float(ip),
+            'importancia_tipologica': it,
+            'modulo_normalizador_impacto': 0,  # No usado en nueva fórmula
+            'frecuencia_amenaza': frecuencia,
+            'modulo_normalizador_probabilidad': 0,  # No usado en nueva fórmula
+            'gravedad_vulnerabilidad': round(gravedad, 2),
+            'facilidad_explotacion': round(facilidad, 2),
+            'num_controles_reactivos': n_reactivos,
+            'num_controles_preventivos': n_preventivos,
+            'impacto_efectivo': scoring_kernel.redondear(resultado['impacto'])[0],
+            'probabilidad_efectiva': scoring_kernel.redondear(resultado['probabilidad'])[0],
+            'nivel_riesgo_efectivo': scoring_kernel.redondear(resultado['nivel'])[0],
+            'clasificacion_efectiva': resultado['clasificacion'][0]
+        }
 
     @staticmethod
     def calcular_riesgo_intrinseco(activo, recurso, amenaza, dimension):
@@ -155,41 +241,14 @@ class RiskCalculationService:
         # Si no hay recurso, usar valor medio (3)
         it = recurso.importancia_tipologica if recurso else 3  # 1-5
 
-        # 2. IMPACTO INTRÍNSECO (escala 0-10)
-        # Gravedad máxima = 5 (sin controles reactivos)
-        gravedad_intrinseca = 5.0
-        # Fórmula simplificada y normalizada
-        impacto_intrinseco = ((ip + it) / 2.0) * (gravedad_intrinseca / 5.0) * 2.0
-
-        # 3. FRECUENCIA DE LA AMENAZA
+        # 2. FRECUENCIA DE LA AMENAZA
         tipo_recurso = recurso.tipo_recurso if recurso else 'sw_aplicacion'
         frecuencia = RiskCalculationService.obtener_frecuencia_amenaza(
             amenaza, tipo_recurso, dimension
         )
 
-        # 4. PROBABILIDAD INTRÍNSECA (escala 0-10)
-        # Facilidad máxima = 5 (sin controles preventivos)
-        facilidad_intrinseca = 5.0
-        # Fórmula simplificada y normalizada
-        probabilidad_intrinseca = ((frecuencia + facilidad_intrinseca) / 2.0) * 2.0
-
-        # 5. RIESGO INTRÍNSECO (escala 0-100)
-        nivel_riesgo_intrinseco = impacto_intrinseco * probabilidad_intrinseca
-
-        # 6. CLASIFICACIÓN
-        clasificacion = Riesgo.clasificar_nivel(probabilidad_intrinseca, impacto_intrinseco)
-
-        return {
-            'importancia_propia': float(ip),
-            'importancia_tipologica': it,
-            'modulo_normalizador_impacto': 0,  # No usado en nueva fórmula
-            'frecuencia_amenaza': frecuencia,
-            'modulo_normalizador_probabilidad': 0,  # No usado en nueva fórmula
-            'impacto_intrinseco': round(impacto_intrinseco, 2),
-            'probabilidad_intrinseca': round(probabilidad_intrinseca, 2),
-            'nivel_riesgo_intrinseco': round(nivel_riesgo_intrinseco, 2),
-            'clasificacion_intrinseca': clasificacion
-        }
+        # 3. IMPACTO, PROBABILIDAD, NIVEL Y CLASIFICACIÓN
+        return RiskCalculationService.puntuar_intrinseco(ip, it, frecuencia)
 
     @staticmethod
     def calcular_riesgo_efectivo(activo, recurso, amenaza, dimension):
@@ -225,53 +284,24 @@ class RiskCalculationService:
         controles_reactivos = RiskCalculationService.obtener_controles_aplicables(
             amenaza, 'REACTIVO'
         )
-        suma_reactiva, n_reactivos, gravedad = RiskCalculationService.calcular_nivel_controles(
-            controles_reactivos
-        )
-
-        # 3. CALCULAR IMPACTO EFECTIVO (escala 0-10)
-        # La gravedad reduce el impacto (0=sin daño, 5=daño máximo)
-        impacto_efectivo = ((ip + it) / 2.0) * (gravedad / 5.0) * 2.0
+        nivel_reactivo = RiskCalculationService.calcular_nivel_controles(controles_reactivos)
 
-        # 4. FRECUENCIA DE LA AMENAZA
+        # 3. FRECUENCIA DE LA AMENAZA
         tipo_recurso = recurso.tipo_recurso if recurso else 'sw_aplicacion'
         frecuencia = RiskCalculationService.obtener_frecuencia_amenaza(
             amenaza, tipo_recurso, dimension
         )
 
-        # 5. OBTENER CONTROLES PREVENTIVOS Y CALCULAR FACILIDAD
+        # 4. OBTENER CONTROLES PREVENTIVOS Y CALCULAR FACILIDAD
         controles_preventivos = RiskCalculationService.obtener_controles_aplicables(
             amenaza, 'PREVENTIVO'
         )
-        suma_preventiva, n_preventivos, facilidad = RiskCalculationService.calcular_nivel_controles(
-            controles_preventivos
-        )
+        nivel_preventivo = RiskCalculationService.calcular_nivel_controles(controles_preventivos)
 
-        # 6. CALCULAR PROBABILIDAD EFECTIVA (escala 0-10)
-        # La facilidad incrementa la probabilidad (0=imposible, 5=muy fácil)
-        probabilidad_efectiva = ((frecuencia + facilidad) / 2.0) * 2.0
-
-        # 7. RIESGO EFECTIVO (escala 0-100)
-        nivel_riesgo_efectivo = impacto_efectivo * probabilidad_efectiva
-
-        # 8. CLASIFICACIÓN
-        clasificacion = Riesgo.clasificar_nivel(probabilidad_efectiva, impacto_efectivo)
-
-        return {
-            'importancia_propia': float(ip),
-            'importancia_tipologica': it,
-            'modulo_normalizador_impacto': 0,  # No usado en nueva fórmula
-            'frecuencia_amenaza': frecuencia,
-            'modulo_normalizador_probabilidad': 0,  # No usado en nueva fórmula
-            'gravedad_vulnerabilidad': round(gravedad, 2),
-            'facilidad_explotacion': round(facilidad, 2),
-            'num_controles_reactivos': n_reactivos,
-            'num_controles_preventivos': n_preventivos,
-            'impacto_efectivo': round(impacto_efectivo, 2),
-            'probabilidad_efectiva': round(probabilidad_efectiva, 2),
-            'nivel_riesgo_efectivo': round(nivel_riesgo_efectivo, 2),
-            'clasificacion_efectiva': clasificacion
-        }
+        # 5. IMPACTO, PROBABILIDAD, NIVEL Y CLASIFICACIÓN
+        return RiskCalculationService.puntuar_efectivo(
+            ip, it, frecuencia, nivel_reactivo, nivel_preventivo
+        )
 
     @staticmethod
     def calcular_riesgo_residual(activo, recurso, amenaza, dimension, controles_adicionales=None):
@@ -425,153 +455,18 @@ class RiskCalculationService:
         Crea un riesgo por cada combinación de:
         - Activo (del módulo principal) × Amenaza × Dimensión
 
+        El cálculo se realiza en bloque con BulkRiskEngine: los catálogos se
+        cargan una sola vez y los riesgos se escriben por lotes.
+
         Args:
             evaluacion_id: ID de la evaluación
 
         Returns:
             int: Cantidad de riesgos generados
         """
-        from app.risks.models import ActivoRecurso
-        from models import Asset, AssetStatus
-
-        contador = 0
-
-        # Obtener todas las relaciones activo-recurso existentes
-        relaciones = ActivoRecurso.query.all()
-
-        if relaciones:
-            # Usar el sistema legacy de activos del módulo de riesgos
-            for relacion in relaciones:
-                activo = relacion.activo
-                recurso = relacion.recurso
-
-                # Obtener todas las amenazas aplicables al tipo de recurso
-                aplicabilidades = AmenazaRecursoTipo.query.filter_by(
-                    tipo_recurso=recurso.tipo_recurso
-                ).all()
-
-                for aplicabilidad in aplicabilidades:
-                    amenaza = aplicabilidad.amenaza
-                    dimension = aplicabilidad.dimension_afectada
-
-                    try:
-                        riesgo = RiskCalculationService.crear_o_actualizar_riesgo(
-                            evaluacion_id,
-                            activo.id,
-                            recurso.id,
-                            amenaza.id,
-                            dimension
-                        )
-
-                        if riesgo:
-                            contador += 1
-
-                    except Exception as e:
-                        print(f"Error generando riesgo (legacy): {e}")
-                        continue
-        else:
-            # Usar activos del módulo principal
-            print("Generando riesgos desde activos del módulo principal...")
-            activos_principales = Asset.query.filter_by(status=AssetStatus.ACTIVE).all()
-
-            for asset in activos_principales:
-                # Crear o obtener ActivoInformacion equivalente
-                activo_info = ActivoInformacion.query.filter_by(codigo=asset.asset_code).first()
-
-                if not activo_info:
-                    # Mapear CIA levels a valores numéricos (escala 0-5 para módulo riesgos)
-                    # CIALevel: CRITICAL=5, HIGH=4, MEDIUM=3, LOW=2
-                    conf_val = 5 if str(asset.confidentiality_level) == 'CIALevel.CRITICAL' else \
-                              4 if str(asset.confidentiality_level) == 'CIALevel.HIGH' else \
-                              3 if str(asset.confidentiality_level) == 'CIALevel.MEDIUM' else 2
-                    int_val = 5 if str(asset.integrity_level) == 'CIALevel.CRITICAL' else \
-                             4 if str(asset.integrity_level) == 'CIALevel.HIGH' else \
-                             3 if str(asset.integrity_level) == 'CIALevel.MEDIUM' else 2
-                    disp_val = 5 if str(asset.availability_level) == 'CIALevel.CRITICAL' else \
-                              4 if str(asset.availability_level) == 'CIALevel.HIGH' else \
-                              3 if str(asset.availability_level) == 'CIALevel.MEDIUM' else 2
-
-                    # Crear activo de información
-                    activo_info = ActivoInformacion(
-                        codigo=asset.asset_code,
-                        nombre=asset.name,
-                        descripcion=asset.description or '',
-                        tipo_activo='HW' if str(asset.category) == 'AssetCategory.HARDWARE' else \
-                                   'SW' if str(asset.category) == 'AssetCategory.SOFTWARE' else \
-                                   'DAT' if str(asset.category) == 'AssetCategory.INFORMATION' else 'OT',
-                        funcion=asset.description or '',
-                        ubicacion=asset.physical_location or '',
-                        propietario_id=asset.owner_id,
-                        estado='activo',
-                        confidencialidad=conf_val,
-                        integridad=int_val,
-                        disponibilidad=disp_val
-                    )
-                    activo_info.calcular_importancia_propia()
-                    db.session.add(activo_info)
-                    db.session.flush()
-
-                # Crear un recurso genérico
-                tipo_recurso = 'HARDWARE' if 'HARDWARE' in str(asset.category) else \
-                              'SOFTWARE' if 'SOFTWARE' in str(asset.category) else \
-                              'DATOS' if 'INFORMATION' in str(asset.category) else 'OTROS'
-
-                recurso = RecursoInformacion.query.filter_by(
-                    codigo=f"REC-{asset.asset_code}"
-                ).first()
-
-                if not recurso:
-                    recurso = RecursoInformacion(
-                        codigo=f"REC-{asset.asset_code}",
-                        nombre=f"Recurso {asset.name}",
-                        descripcion=f"Recurso para {asset.name}",
-                        tipo_recurso=tipo_recurso,
-                        importancia_tipologica=3,
-                        responsable_id=asset.owner_id,
-                        ubicacion=asset.physical_location or ''
-                    )
-                    db.session.add(recurso)
-                    db.session.flush()
-
-                # Crear relación activo-recurso
-                relacion_existe = ActivoRecurso.query.filter_by(
-                    activo_id=activo_info.id,
-                    recurso_id=recurso.id
-                ).first()
-
-                if not relacion_existe:
-                    relacion = ActivoRecurso(
-                        activo_id=activo_info.id,
-                        recurso_id=recurso.id,
-                        tipo_uso='procesa',
-                        criticidad=3
-                    )
-                    db.session.add(relacion)
-
-                # Generar riesgos
-                aplicabilidades = AmenazaRecursoTipo.query.filter_by(
-                    tipo_recurso=tipo_recurso
-                ).all()
-
-                for aplicabilidad in aplicabilidades:
-                    amenaza = aplicabilidad.amenaza
-                    dimension = aplicabilidad.dimension_afectada
-
-                    try:
-                        riesgo = RiskCalculationService.crear_o_actualizar_riesgo(
-                            evaluacion_id,
-                            activo_info.id,
-                            recurso.id,
-                            amenaza.id,
-                            dimension
-                        )
-
-                        if riesgo:
-                            contador += 1
-
-                    except Exception as e:
-                        print(f"Error generando riesgo para {asset.asset_code}: {e}")
-                        continue
+        from app.risks.services.bulk_risk_engine import BulkRiskEngine
+
+        contador = BulkRiskEngine(evaluacion_id).generar()
 
         db.session.commit()
         return contador
@@ -612,6 +507,8 @@ class RiskCalculationService:
                 'RECALCULO_MANUAL'
             )
 
+        RiskSummaryService.refrescar([riesgo_actualizado.evaluacion_id])
+
         db.session.commit()
         return riesgo_actualizado
 
@@ -620,24 +517,26 @@ class RiskCalculationService:
         """
         Recalcula todos los riesgos de una evaluación
 
+        Usa el motor masivo: una sola transacción y registro en el historial
+        únicamente de los riesgos cuyo nivel o clasificación cambia.
+
         Args:
             evaluacion_id: ID de la evaluación
 
         Returns:
             int: Cantidad de riesgos recalculados
         """
-        riesgos = Riesgo.query.filter_by(evaluacion_id=evaluacion_id).all()
+        from app.risks.services.bulk_risk_engine import BulkRiskEngine
 
-        contador = 0
-        for riesgo in riesgos:
-            try:
-                RiskCalculationService.recalcular_riesgo(riesgo.id)
-                contador += 1
-            except Exception as e:
-                print(f"Error recalculando riesgo {riesgo.id}: {e}")
-                continue
+        riesgo_ids = [
+            riesgo_id for (riesgo_id,) in
+            db.session.query(Riesgo.id).filter_by(evaluacion_id=evaluacion_id).all()
+        ]
 
-        return contador
+        resultado = BulkRiskEngine(evaluacion_id).recalcular(riesgo_ids, 'RECALCULO_MANUAL')
+
+        db.session.commit()
+        return resultado['recalculados']
 
     @staticmethod
     def registrar_cambio_historial(riesgo, nivel_anterior, clasificacion_anterior, tipo_cambio, usuario_id=None):
@@ -679,9 +578,10 @@ class RiskCalculationService:
         Returns:
             dict: Diccionario con estadísticas
         """
-        riesgos = Riesgo.query.filter_by(evaluacion_id=evaluacion_id).all()
+        # Se lee del resumen materializado en lugar de cargar los riesgos
+        resumen = RiskSummaryService.estadisticas_evaluacion(evaluacion_id)
 
-        if not riesgos:
+        if not resumen['total_riesgos']:
             return {
                 'total_riesgos': 0,
                 'por_clasificacion': {},
@@ -690,21 +590,17 @@ class RiskCalculationService:
                 'riesgos_sobre_umbral': 0
             }
 
-        # Estadísticas básicas
-        total = len(riesgos)
-        niveles = [r.nivel_riesgo_efectivo for r in riesgos if r.nivel_riesgo_efectivo]
-        promedio = sum(niveles) / len(niveles) if niveles else 0
-        maximo = max(niveles) if niveles else 0
+        # Estadísticas básicas (media sobre los riesgos con nivel no nulo)
+        total = resumen['total_riesgos']
+        con_nivel = resumen['riesgos_con_nivel']
+        promedio = resumen['suma_nivel'] / con_nivel if con_nivel else 0
+        maximo = resumen['nivel_riesgo_maximo']
 
         # Por clasificación
-        clasificaciones = {}
-        for riesgo in riesgos:
-            clf = riesgo.clasificacion_efectiva or 'SIN_CLASIFICAR'
-            clasificaciones[clf] = clasificaciones.get(clf, 0) + 1
-
-        # Sobre umbral (asumiendo umbral de 12)
-        umbral = 12.0
-        sobre_umbral = sum(1 for n in niveles if n > umbral)
+        clasificaciones = RiskSummaryService.por_clasificacion(evaluacion_id)
+
+        # Sobre umbral (umbral fijo de 12)
+        sobre_umbral = resumen['riesgos_sobre_umbral']
 
         return {
             'total_riesgos': total,
@@ -0,0 +1,152 @@
+"""
+Recálculo Incremental de Riesgos
+Registra qué filas de catálogo han cambiado (control SOA, amenaza,
+aplicabilidad amenaza-recurso, activo o recurso), resuelve los riesgos que
+dependen de ellas y recalcula solo esos riesgos.
+"""
+
+from sqlalchemy import or_, and_
+from models import db
+from app.risks.models import Riesgo, RecursoInformacion, ControlAmenaza
+from app.risks.services.bulk_risk_engine import BulkRiskEngine, TAMANO_LOTE
+
+
+class RiskRecalculationQueue:
+    """
+    Cola de dependencias modificadas pendientes de recálculo
+
+    Uso:
+        cola = RiskRecalculationQueue()
+        cola.marcar_control('A.5.1')
+        resultado = cola.procesar(usuario_id=current_user.id)
+    """
+
+    def __init__(self):
+        self._vaciar()
+
+    def _vaciar(self):
+        self.controles = set()
+        self.amenazas = set()
+        self.aplicabilidades = set()
+        self.activos = set()
+        self.recursos = set()
+        self.riesgos = set()
+
+    def __bool__(self):
+        return any([self.controles, self.amenazas, self.aplicabilidades,
+                    self.activos, self.recursos, self.riesgos])
+
+    # ==================== MARCADO ====================
+
+    def marcar_control(self, control_codigo):
+        """Cambio de madurez/aplicabilidad de un control del SOA activo"""
+        self.controles.add(control_codigo)
+
+    def marcar_controles_soa(self):
+        """Cambio de versión SOA activa: afecta a todos los controles mapeados"""
+        codigos = db.session.query(ControlAmenaza.control_codigo).distinct().all()
+        self.controles.update(c for (c,) in codigos)
+
+    def marcar_amenaza(self, amenaza_id):
+        """Cambio en los controles (ControlAmenaza) o dimensiones de una amenaza"""
+        self.amenazas.add(int(amenaza_id))
+
+    def marcar_aplicabilidad(self, amenaza_id, tipo_recurso, dimension):
+        """Cambio de frecuencia de una fila AmenazaRecursoTipo"""
+        self.aplicabilidades.add((int(amenaza_id), tipo_recurso, dimension))
+
+    def marcar_activo(self, activo_id):
+        """Cambio de valoración C-I-D de un activo de información"""
+        self.activos.add(activo_id)
+
+    def marcar_recurso(self, recurso_id):
+        """Cambio de tipo o importancia tipológica de un recurso"""
+        self.recursos.add(recurso_id)
+
+    def marcar_riesgo(self, riesgo_id):
+        """Recalcular un riesgo concreto"""
+        self.riesgos.add(riesgo_id)
+
+    # ==================== RESOLUCIÓN ====================
+
+    def _condiciones(self):
+        """Predicados SQL sobre Riesgo para cada dependencia marcada"""
+        condiciones = []
+
+        amenazas = set(self.amenazas)
+        if self.controles:
+            controles = sorted(self.controles)
+            for inicio in range(0, len(controles), TAMANO_LOTE):
+                filas = db.session.query(ControlAmenaza.amenaza_id).filter(
+                    ControlAmenaza.control_codigo.in_(controles[inicio:inicio + TAMANO_LOTE])
+                ).distinct().all()
+                amenazas.update(a for (a,) in filas)
+
+        if amenazas:
+            condiciones.append(Riesgo.amenaza_id.in_(sorted(amenazas)))
+
+        for amenaza_id, tipo_recurso, dimension in sorted(self.aplicabilidades):
+            recursos_tipo = db.session.query(RecursoInformacion.id).filter(
+                RecursoInformacion.tipo_recurso == tipo_recurso
+            )
+            por_recurso = Riesgo.recurso_id.in_(recursos_tipo.scalar_subquery())
+            if tipo_recurso == 'sw_aplicacion':
+                # Tipo asumido para los riesgos sin recurso
+                por_recurso = or_(por_recurso, Riesgo.recurso_id.is_(None))
+            condiciones.append(and_(
+                Riesgo.amenaza_id == amenaza_id,
+                Riesgo.dimension == dimension,
+                por_recurso
+            ))
+
+        if self.activos:
+            condiciones.append(Riesgo.activo_id.in_(sorted(self.activos)))
+        if self.recursos:
+            condiciones.append(Riesgo.recurso_id.in_(sorted(self.recursos)))
+        if self.riesgos:
+            condiciones.append(Riesgo.id.in_(sorted(self.riesgos)))
+
+        return condiciones
+
+    def riesgos_afectados(self):
+        """
+        Resuelve las dependencias marcadas a IDs de Riesgo
+
+        Returns:
+            set: IDs de los riesgos que dependen de alguna fila modificada
+        """
+        condiciones = self._condiciones()
+        if not condiciones:
+            return set()
+
+        filas = db.session.query(Riesgo.id).filter(or_(*condiciones)).all()
+        return {riesgo_id for (riesgo_id,) in filas}
+
+    # ==================== PROCESADO ====================
+
+    def procesar(self, usuario_id=None, tipo_cambio='RECALCULO_INCREMENTAL'):
+        """
+        Recalcula los riesgos afectados en una única transacción y vacía la cola
+
+        Args:
+            usuario_id: Usuario que originó el cambio
+            tipo_cambio: Tipo de cambio registrado en HistorialRiesgo
+
+        Returns:
+            dict: {'afectados', 'recalculados', 'actualizados', 'cambios_nivel'} o
+                  {'error': mensaje} si el recálculo falla
+        """
+        try:
+            riesgo_ids = self.riesgos_afectados()
+            resultado = BulkRiskEngine().recalcular(
+                riesgo_ids, tipo_cambio=tipo_cambio, usuario_id=usuario_id
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error en recálculo incremental de riesgos: {e}")
+            return {'error': str(e)}
+
+        resultado['afectados'] = len(riesgo_ids)
+        self._vaciar()
+        return resultado
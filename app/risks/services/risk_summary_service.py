@@ -0,0 +1,195 @@
+"""
+Resumen Materializado de Riesgos
+Mantiene la tabla resumen_riesgos (conteos y niveles agregados por evaluación,
+clasificación, celda de la matriz y banda de nivel) y resuelve sobre ella las
+consultas de dashboards y estadísticas sin cargar los riesgos individuales.
+"""
+
+from sqlalchemy import func, case, or_
+from models import db
+from app.risks.models import Riesgo, ResumenRiesgo
+
+
+# Banda de nivel -> distribución del dashboard de riesgos (escala 0-100)
+DISTRIBUCION_POR_BANDA = {
+    ResumenRiesgo.BANDA_MUY_ALTO: 'MUY_ALTO',
+    ResumenRiesgo.BANDA_ALTO: 'ALTO',
+    ResumenRiesgo.BANDA_MEDIO: 'MEDIO',
+    ResumenRiesgo.BANDA_BAJO: 'BAJO',
+    ResumenRiesgo.BANDA_SOBRE_UMBRAL: 'MUY_BAJO',
+    ResumenRiesgo.BANDA_MUY_BAJO: 'MUY_BAJO',
+}
+
+# Bandas cuyo nivel supera el umbral fijo de 12 de las estadísticas de evaluación
+BANDAS_SOBRE_UMBRAL = [
+    ResumenRiesgo.BANDA_SOBRE_UMBRAL, ResumenRiesgo.BANDA_BAJO, ResumenRiesgo.BANDA_MEDIO,
+    ResumenRiesgo.BANDA_ALTO, ResumenRiesgo.BANDA_MUY_ALTO
+]
+
+
+def celda_matriz(valor):
+    """
+    Escala un valor efectivo 0-10 a la celda 1-5 de la matriz (0 si no hay valor)
+
+    Redondeo hacia arriba en los valores medios: 0-3 -> 1, 3-5 -> 2, 5-7 -> 3,
+    7-9 -> 4, 9-10 -> 5. Equivale a max(1, min(5, int(valor / 2 + 0.5))).
+    """
+    return case(
+        (or_(valor.is_(None), valor == 0), 0),
+        (valor < 3, 1),
+        (valor < 5, 2),
+        (valor < 7, 3),
+        (valor < 9, 4),
+        else_=5
+    )
+
+
+def banda_nivel(nivel):
+    """Banda de nivel de riesgo efectivo (ver constantes BANDA_* de ResumenRiesgo)"""
+    return case(
+        (or_(nivel.is_(None), nivel <= 12), ResumenRiesgo.BANDA_MUY_BAJO),
+        (nivel < 20, ResumenRiesgo.BANDA_SOBRE_UMBRAL),
+        (nivel < 40, ResumenRiesgo.BANDA_BAJO),
+        (nivel < 60, ResumenRiesgo.BANDA_MEDIO),
+        (nivel < 80, ResumenRiesgo.BANDA_ALTO),
+        else_=ResumenRiesgo.BANDA_MUY_ALTO
+    )
+
+
+class RiskSummaryService:
+    """Mantenimiento y consulta del resumen materializado de riesgos"""
+
+    # ==================== MANTENIMIENTO ====================
+
+    @staticmethod
+    def refrescar(evaluacion_ids=None):
+        """
+        Recalcula el resumen de las evaluaciones indicadas
+
+        Sustituye sus filas con un único INSERT ... SELECT ... GROUP BY dentro
+        de la transacción en curso, de modo que el resumen se confirma (o se
+        descarta) junto con los riesgos que lo originan.
+
+        Args:
+            evaluacion_ids: IDs de evaluación a refrescar (None = todas)
+
+        Returns:
+            int: Número de filas de resumen escritas
+        """
+        if evaluacion_ids is not None:
+            evaluacion_ids = sorted({e for e in evaluacion_ids if e is not None})
+            if not evaluacion_ids:
+                return 0
+
+        # Los riesgos pendientes de la sesión deben estar en la base de datos
+        db.session.flush()
+
+        tabla = ResumenRiesgo.__table__
+        borrado = tabla.delete()
+        if evaluacion_ids is not None:
+            borrado = borrado.where(tabla.c.evaluacion_id.in_(evaluacion_ids))
+        db.session.execute(borrado)
+
+        clasificacion = func.coalesce(Riesgo.clasificacion_efectiva, ResumenRiesgo.SIN_CLASIFICAR)
+        celda_probabilidad = celda_matriz(Riesgo.probabilidad_efectiva)
+        celda_impacto = celda_matriz(Riesgo.impacto_efectivo)
+        banda = banda_nivel(Riesgo.nivel_riesgo_efectivo)
+
+        seleccion = db.select(
+            Riesgo.evaluacion_id,
+            clasificacion,
+            celda_probabilidad,
+            celda_impacto,
+            banda,
+            func.count(Riesgo.id),
+            func.count(Riesgo.id).filter(Riesgo.nivel_riesgo_efectivo != 0),
+            func.coalesce(func.sum(Riesgo.nivel_riesgo_efectivo), 0),
+            func.max(Riesgo.nivel_riesgo_efectivo)
+        ).group_by(
+            Riesgo.evaluacion_id, clasificacion, celda_probabilidad, celda_impacto, banda
+        )
+        if evaluacion_ids is not None:
+            seleccion = seleccion.where(Riesgo.evaluacion_id.in_(evaluacion_ids))
+
+        resultado = db.session.execute(tabla.insert().from_select([
+            'evaluacion_id', 'clasificacion', 'celda_probabilidad', 'celda_impacto',
+            'banda_nivel', 'cantidad', 'cantidad_con_nivel', 'suma_nivel', 'nivel_maximo'
+        ], seleccion))
+
+        return resultado.rowcount
+
+    # ==================== CONSULTAS ====================
+
+    @staticmethod
+    def _consulta(*columnas, evaluacion_id=None):
+        consulta = db.session.query(*columnas)
+        if evaluacion_id is not None:
+            consulta = consulta.filter(ResumenRiesgo.evaluacion_id == evaluacion_id)
+        return consulta
+
+    @classmethod
+    def por_clasificacion(cls, evaluacion_id=None):
+        """Número de riesgos por clasificación efectiva"""
+        filas = cls._consulta(
+            ResumenRiesgo.clasificacion, func.sum(ResumenRiesgo.cantidad),
+            evaluacion_id=evaluacion_id
+        ).group_by(ResumenRiesgo.clasificacion).all()
+        return {clasificacion: int(cantidad) for clasificacion, cantidad in filas}
+
+    @classmethod
+    def matriz(cls, evaluacion_id=None):
+        """
+        Número de riesgos por celda (probabilidad, impacto)
+
+        Incluye las celdas 0 de los riesgos sin probabilidad o impacto efectivo;
+        cada vista decide si los descarta o los agrupa en la celda 1.
+        """
+        filas = cls._consulta(
+            ResumenRiesgo.celda_probabilidad, ResumenRiesgo.celda_impacto,
+            func.sum(ResumenRiesgo.cantidad),
+            evaluacion_id=evaluacion_id
+        ).group_by(ResumenRiesgo.celda_probabilidad, ResumenRiesgo.celda_impacto).all()
+        return {(probabilidad, impacto): int(cantidad) for probabilidad, impacto, cantidad in filas}
+
+    @classmethod
+    def distribucion_niveles(cls, evaluacion_id=None):
+        """
+        Distribución por nivel efectivo de los riesgos con probabilidad e impacto
+
+        Returns:
+            dict: MUY_ALTO, ALTO, MEDIO, BAJO y MUY_BAJO (umbrales 80/60/40/20)
+        """
+        filas = cls._consulta(
+            ResumenRiesgo.banda_nivel, func.sum(ResumenRiesgo.cantidad),
+            evaluacion_id=evaluacion_id
+        ).filter(
+            ResumenRiesgo.celda_probabilidad > 0,
+            ResumenRiesgo.celda_impacto > 0
+        ).group_by(ResumenRiesgo.banda_nivel).all()
+
+        distribucion = {'MUY_ALTO': 0, 'ALTO': 0, 'MEDIO': 0, 'BAJO': 0, 'MUY_BAJO': 0}
+        for banda, cantidad in filas:
+            distribucion[DISTRIBUCION_POR_BANDA[banda]] += int(cantidad)
+        return distribucion
+
+    @classmethod
+    def estadisticas_evaluacion(cls, evaluacion_id):
+        """Totales, nivel medio/máximo y riesgos sobre el umbral de 12"""
+        total, con_nivel, suma, maximo, sobre_umbral = cls._consulta(
+            func.coalesce(func.sum(ResumenRiesgo.cantidad), 0),
+            func.coalesce(func.sum(ResumenRiesgo.cantidad_con_nivel), 0),
+            func.coalesce(func.sum(ResumenRiesgo.suma_nivel), 0),
+            func.max(ResumenRiesgo.nivel_maximo),
+            func.coalesce(func.sum(ResumenRiesgo.cantidad).filter(
+                ResumenRiesgo.banda_nivel.in_(BANDAS_SOBRE_UMBRAL)
+            ), 0),
+            evaluacion_id=evaluacion_id
+        ).one()
+
+        return {
+            'total_riesgos': int(total),
+            'riesgos_con_nivel': int(con_nivel),
+            'suma_nivel': float(suma),
+            'nivel_riesgo_maximo': float(maximo or 0),
+            'riesgos_sobre_umbral': int(sobre_umbral)
+        }
@@ -0,0 +1,141 @@
+"""
+Núcleo vectorizado de puntuación de riesgos MAGERIT
+Aplica las fórmulas de impacto, probabilidad, nivel y clasificación sobre
+columnas completas (arrays NumPy) en una sola pasada. Tanto el cálculo
+individual de RiskCalculationService como el motor masivo pasan por aquí.
+"""
+
+import numpy as np
+
+
+# Umbrales de la escala normalizada 0-10 para probabilidad e impacto
+UMBRAL_MEDIO = 4
+UMBRAL_ALTO = 7
+
+# Gravedad/facilidad máximas: valores sin controles (riesgo intrínseco)
+NIVEL_SIN_CONTROLES = 5.0
+
+NIVELES = ['BAJO', 'MEDIO', 'ALTO']
+
+# Matriz Probabilidad (filas) x Impacto (columnas), índices según NIVELES
+MATRIZ_CLASIFICACION = np.array([
+    # Impacto:  BAJO        MEDIO      ALTO
+    ['MUY_BAJO', 'BAJO',   'MEDIO'],     # Probabilidad BAJO
+    ['BAJO',     'MEDIO',  'ALTO'],      # Probabilidad MEDIO
+    ['MEDIO',    'ALTO',   'MUY_ALTO'],  # Probabilidad ALTO
+], dtype=object)
+
+DIMENSIONES = {'C': 0, 'I': 1, 'D': 2}
+
+
+def _columna(valores):
+    """Convierte escalares, listas o Decimal a un array float64 de una dimensión"""
+    return np.atleast_1d(np.asarray(valores, dtype=np.float64))
+
+
+def nivel_escala(valores):
+    """
+    Índice de nivel (0=BAJO, 1=MEDIO, 2=ALTO) de valores en escala 0-10
+
+    Args:
+        valores: Array de probabilidades o impactos
+
+    Returns:
+        ndarray: Índices enteros en NIVELES
+    """
+    valores = _columna(valores)
+    return (valores >= UMBRAL_MEDIO).astype(np.intp) + (valores >= UMBRAL_ALTO)
+
+
+def clasificar(probabilidad, impacto):
+    """
+    Clasifica riesgos según la matriz Probabilidad x Impacto
+
+    Args:
+        probabilidad: Array de probabilidades (0-10)
+        impacto: Array de impactos (0-10)
+
+    Returns:
+        ndarray: Clasificaciones (MUY_BAJO ... MUY_ALTO) con dtype object
+    """
+    return MATRIZ_CLASIFICACION[nivel_escala(probabilidad), nivel_escala(impacto)]
+
+
+def seleccionar_dimension(valoraciones, dimension):
+    """
+    Selecciona la valoración de la dimensión de cada tupla
+
+    Args:
+        valoraciones: Array (n, 3) con las valoraciones C, I, D del activo
+        dimension: Array de n dimensiones ('C', 'I' o 'D')
+
+    Returns:
+        ndarray: Importancia propia de cada tupla
+    """
+    valoraciones = np.asarray(valoraciones, dtype=np.float64)
+    dimension = np.char.upper(np.atleast_1d(dimension).astype(str))
+
+    indices = np.full(dimension.shape, -1, dtype=np.intp)
+    for letra, columna in DIMENSIONES.items():
+        indices[dimension == letra] = columna
+    if (indices < 0).any():
+        raise ValueError(f"Dimensión no válida: {dimension[indices < 0][0]}")
+
+    return valoraciones[np.arange(len(indices)), indices]
+
+
+def puntuar(importancia_propia, importancia_tipologica, frecuencia,
+            nivel_preventivo=NIVEL_SIN_CONTROLES, nivel_reactivo=NIVEL_SIN_CONTROLES,
+            dimension=None):
+    """
+    Puntúa un lote de tuplas de riesgo en una pasada vectorizada
+
+    Fórmulas (escala 0-10, nivel 0-100):
+        IMPACTO = ((IP + IT) / 2) × (GRAVEDAD / 5) × 2
+        PROBABILIDAD = ((FRECUENCIA + FACILIDAD) / 2) × 2
+        NIVEL = IMPACTO × PROBABILIDAD
+
+    Con nivel_preventivo y nivel_reactivo por defecto (5 = sin controles) se
+    obtiene el riesgo intrínseco.
+
+    Args:
+        importancia_propia: Array de IP (0-5), o array (n, 3) C/I/D si se indica dimension
+        importancia_tipologica: Array de IT (1-5)
+        frecuencia: Array de frecuencias de la amenaza (0-5)
+        nivel_preventivo: Facilidad de explotación (0-5), escalar o array
+        nivel_reactivo: Gravedad de la vulnerabilidad (0-5), escalar o array
+        dimension: Array opcional de dimensiones para seleccionar la IP
+
+    Returns:
+        dict: Arrays 'impacto', 'probabilidad', 'nivel' (sin redondear) y 'clasificacion'
+    """
+    if dimension is not None:
+        ip = seleccionar_dimension(importancia_propia, dimension)
+    else:
+        ip = _columna(importancia_propia)
+
+    it = _columna(importancia_tipologica)
+    frecuencia = _columna(frecuencia)
+    gravedad = _columna(nivel_reactivo)
+    facilidad = _columna(nivel_preventivo)
+
+    impacto = ((ip + it) / 2.0) * (gravedad / 5.0) * 2.0
+    probabilidad = ((frecuencia + facilidad) / 2.0) * 2.0
+    nivel = impacto * probabilidad
+
+    return {
+        'impacto': impacto,
+        'probabilidad': probabilidad,
+        'nivel': nivel,
+        'clasificacion': clasificar(probabilidad, impacto)
+    }
+
+
+def redondear(valores):
+    """
+    Redondea a 2 decimales con round() de Python
+
+    np.round no redondea igual que round() en todos los casos límite; para
+    persistir exactamente los mismos valores se usa el redondeo de Python.
+    """
+    return [round(v, 2) for v in _columna(valores).tolist()]
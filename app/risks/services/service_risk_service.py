@@ -0,0 +1,113 @@
+"""
+Riesgos por Servicio de Negocio
+Relaciona los servicios con los riesgos de sus activos (Service -> Asset por
+tabla de asociación, Asset.asset_code = ActivoInformacion.codigo -> Riesgo)
+con consultas agregadas, sin recorrer los servicios ni los riesgos uno a uno.
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager, joinedload
+from models import db, Asset, service_asset_association
+from app.risks.models import Riesgo, ActivoInformacion, TratamientoRiesgo
+
+
+# Tamaño de lote para las consultas con IN
+TAMANO_LOTE = 1000
+
+
+class ServiceRiskService:
+    """Consultas de riesgos agregadas por servicio"""
+
+    @staticmethod
+    def _unir_servicios(consulta):
+        """Une una consulta sobre Riesgo con los servicios de su activo"""
+        return consulta.join(
+            ActivoInformacion, Riesgo.activo_id == ActivoInformacion.id
+        ).join(
+            Asset, Asset.asset_code == ActivoInformacion.codigo
+        ).join(
+            service_asset_association, service_asset_association.c.asset_id == Asset.id
+        )
+
+    @staticmethod
+    def estadisticas_vacias():
+        return {
+            'total': 0,
+            'high_count': 0,
+            'medium_count': 0,
+            'low_count': 0,
+            'avg_level': 0,
+            'max_level': 0
+        }
+
+    @classmethod
+    def estadisticas_por_servicio(cls, service_ids):
+        """
+        Estadísticas de riesgos de varios servicios con una consulta agrupada
+
+        Args:
+            service_ids: IDs de los servicios
+
+        Returns:
+            dict: service_id -> estadísticas (solo servicios con riesgos)
+        """
+        service_ids = sorted(set(service_ids))
+        nivel = func.coalesce(Riesgo.nivel_riesgo_efectivo, 0)
+        service_id = service_asset_association.c.service_id
+
+        estadisticas = {}
+        for inicio in range(0, len(service_ids), TAMANO_LOTE):
+            filas = cls._unir_servicios(db.session.query(
+                service_id,
+                func.count(Riesgo.id),
+                func.count(Riesgo.id).filter(Riesgo.clasificacion_efectiva.in_(['ALTO', 'MUY_ALTO'])),
+                func.count(Riesgo.id).filter(Riesgo.clasificacion_efectiva == 'MEDIO'),
+                func.count(Riesgo.id).filter(Riesgo.clasificacion_efectiva.in_(['BAJO', 'MUY_BAJO'])),
+                func.avg(nivel),
+                func.max(nivel)
+            )).filter(
+                service_id.in_(service_ids[inicio:inicio + TAMANO_LOTE])
+            ).group_by(service_id).all()
+
+            for sid, total, altos, medios, bajos, promedio, maximo in filas:
+                estadisticas[sid] = {
+                    'total': total,
+                    'high_count': altos,
+                    'medium_count': medios,
+                    'low_count': bajos,
+                    'avg_level': round(float(promedio or 0), 2),
+                    'max_level': round(float(maximo or 0), 2)
+                }
+
+        return estadisticas
+
+    @classmethod
+    def riesgos_de_servicio(cls, service_id):
+        """
+        Riesgos de un servicio ordenados por nivel efectivo descendente
+
+        Activo y amenaza se cargan en la misma consulta.
+        """
+        return cls._unir_servicios(Riesgo.query).filter(
+            service_asset_association.c.service_id == service_id
+        ).options(
+            contains_eager(Riesgo.activo),
+            joinedload(Riesgo.amenaza)
+        ).order_by(Riesgo.nivel_riesgo_efectivo.desc()).all()
+
+    @staticmethod
+    def ultimos_tratamientos(riesgo_ids):
+        """
+        Tratamiento más reciente de cada riesgo
+
+        Returns:
+            dict: riesgo_id -> TratamientoRiesgo (sin entrada si no tiene)
+        """
+        riesgo_ids = sorted(set(riesgo_ids))
+        tratamientos = {}
+        for inicio in range(0, len(riesgo_ids), TAMANO_LOTE):
+            for tratamiento in TratamientoRiesgo.query.filter(
+                TratamientoRiesgo.riesgo_id.in_(riesgo_ids[inicio:inicio + TAMANO_LOTE])
+            ).order_by(TratamientoRiesgo.created_at, TratamientoRiesgo.id).all():
+                tratamientos[tratamiento.riesgo_id] = tratamiento
+        return tratamientos
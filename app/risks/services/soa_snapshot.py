@@ -0,0 +1,86 @@
+"""
+Instantánea del SOA activo para el cálculo de riesgos
+Evita consultar SOAVersion/SOAControl una vez por control y por riesgo: la
+madurez de los controles se lee una sola vez por recálculo (o por petición)
+y se sirve desde una estructura inmutable.
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+from flask import g, has_app_context
+from models import SOAControl, SOAVersion
+
+
+ControlSOA = namedtuple('ControlSOA', ['maturity_score', 'applicability_status'])
+
+# Clave bajo la que se guarda la instantánea en el contexto de la aplicación
+_CLAVE_CONTEXTO = 'soa_snapshot'
+
+
+class SOASnapshot:
+    """Vista inmutable de los controles del SOA activo indexada por control_id"""
+
+    __slots__ = ('soa_version_id', 'controles')
+
+    def __init__(self, soa_version_id, controles):
+        self.soa_version_id = soa_version_id
+        self.controles = MappingProxyType(dict(controles))
+
+    def __bool__(self):
+        """Falso cuando no existe ninguna versión SOA activa"""
+        return self.soa_version_id is not None
+
+    def __len__(self):
+        return len(self.controles)
+
+    def get(self, control_id):
+        """Devuelve el ControlSOA de un control o None si no está en el SOA activo"""
+        return self.controles.get(control_id)
+
+    def madurez_aplicable(self, control_id):
+        """
+        Madurez (0-6) de un control aplicable del SOA activo
+
+        Returns:
+            int o None: maturity_score, o None si el control no existe o no es aplicable
+        """
+        control = self.controles.get(control_id)
+        if control is None or control.applicability_status != 'aplicable':
+            return None
+        return control.maturity_score
+
+    @classmethod
+    def construir(cls):
+        """Lee el SOA activo de la base de datos con una única consulta de controles"""
+        soa_activo = SOAVersion.query.filter_by(is_current=True).first()
+        if not soa_activo:
+            return cls(None, {})
+
+        controles = SOAControl.query.filter_by(soa_version_id=soa_activo.id).all()
+        return cls(soa_activo.id, {
+            c.control_id: ControlSOA(c.maturity_score, c.applicability_status)
+            for c in controles
+        })
+
+    @classmethod
+    def actual(cls):
+        """
+        Obtiene la instantánea vigente
+
+        Se conserva en el contexto de la aplicación, de modo que se construye
+        una vez por petición o por ejecución de un script/comando.
+        """
+        if not has_app_context():
+            return cls.construir()
+
+        snapshot = g.get(_CLAVE_CONTEXTO)
+        if snapshot is None:
+            snapshot = cls.construir()
+            setattr(g, _CLAVE_CONTEXTO, snapshot)
+        return snapshot
+
+    @staticmethod
+    def invalidar():
+        """Descarta la instantánea tras editar un SOAControl o activar una SOAVersion"""
+        if has_app_context():
+            g.pop(_CLAVE_CONTEXTO, None)
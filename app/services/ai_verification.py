@@ -1,21 +1,57 @@
 """
 AI Document Verification Service
 Verifica documentos contra controles SOA usando diferentes proveedores de IA
+
+Las llamadas reutilizan una sesión HTTP keep-alive (Ollama) o un cliente
+(OpenAI/DeepSeek) por proveedor, y los controles de un documento se
+verifican en paralelo hasta AI_MAX_CONCURRENCY llamadas simultáneas. Con
+AI_BATCH_SIZE > 1 cada llamada evalúa varios controles en un único prompt.
+
+El prompt de cada control solo incluye los fragmentos del documento y de la
+base de conocimiento más relevantes para él (búsqueda BM25), limitados por
+AI_DOCUMENT_CONTEXT_TOKENS y AI_KNOWLEDGE_CONTEXT_TOKENS.
+
+Los resultados se guardan en AIVerificationCache y se reutilizan mientras no
+cambien el documento, el control, el modelo ni la versión del prompt.
 """
 import os
+import hashlib
 import json
+import textwrap
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import PyPDF2
-import docx
+from typing import Dict, Iterator, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from flask import current_app
+from app.services.context_retrieval_service import ContextRetrievalService, PassageIndex
+from app.services.document_text_service import DocumentTextService
+
+
+# Incrementar al cambiar los prompts o la selección de contexto: invalida la caché de resultados
+PROMPT_VERSION = 1
+
+# Campos de la respuesta de la IA para cada control
+RESULT_FIELDS = """  "compliance_status": "compliant|partial|non_compliant",
+  "confidence_level": 1-5,
+  "overall_score": 0-100,
+  "summary": "breve resumen en español",
+  "covered_aspects": ["aspecto 1", "aspecto 2"],
+  "missing_aspects": ["aspecto faltante 1", "aspecto faltante 2"],
+  "evidence_quotes": ["cita 1", "cita 2"],
+  "recommendations": ["recomendación 1", "recomendación 2"],
+  "maturity_suggestion": 2-6"""
 
 
 class AIVerificationService:
     """Servicio de verificación de documentos usando IA"""
 
+    # Sesiones HTTP y clientes por proveedor, compartidos entre instancias e hilos
+    _clients = {}
+    _clients_lock = threading.Lock()
+
     def __init__(self):
         """Inicializa el servicio con la configuración"""
         self.enabled = current_app.config.get('AI_VERIFICATION_ENABLED', False)
@@ -25,6 +61,41 @@ class AIVerificationService:
         self.base_url = current_app.config.get('AI_BASE_URL', 'http://localhost:11434')
         self.timeout = current_app.config.get('AI_TIMEOUT', 120)
         self.knowledge_path = current_app.config.get('KNOWLEDGE_BASE_PATH', 'knowledge')
+        self.max_concurrency = max(1, current_app.config.get('AI_MAX_CONCURRENCY', 4))
+        self.batch_size = max(1, current_app.config.get('AI_BATCH_SIZE', 1))
+        self.document_context_tokens = current_app.config.get('AI_DOCUMENT_CONTEXT_TOKENS', 1500)
+        self.knowledge_context_tokens = current_app.config.get('AI_KNOWLEDGE_CONTEXT_TOKENS', 1000)
+
+    @property
+    def model_used(self) -> str:
+        """Proveedor y modelo con el que se verifica (proveedor:modelo)"""
+        return f"{self.provider}:{self.model}"
+
+    def _http_session(self) -> requests.Session:
+        """Sesión HTTP keep-alive compartida para el servidor de Ollama"""
+        key = ('ollama', self.base_url)
+        with self._clients_lock:
+            session = self._clients.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.max_concurrency, 10))
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._clients[key] = session
+            return session
+
+    def _openai_client(self):
+        """Cliente compartido de OpenAI o DeepSeek (API compatible con OpenAI)"""
+        from openai import OpenAI
+
+        base_url = (self.base_url or "https://api.deepseek.com") if self.provider == 'deepseek' else None
+        key = (self.provider, self.api_key, base_url)
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = OpenAI(api_key=self.api_key, base_url=base_url, timeout=self.timeout)
+                self._clients[key] = client
+            return client
 
     def is_available(self) -> Tuple[bool, str]:
         """
@@ -37,7 +108,7 @@ class AIVerificationService:
         try:
             if self.provider == 'ollama':
                 # Verificar que Ollama está corriendo
-                response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+                response = self._http_session().get(f"{self.base_url}/api/tags", timeout=5)
                 if response.status_code == 200:
                     return True, "Servicio Ollama disponible"
                 return False, "Ollama no responde correctamente"
@@ -55,68 +126,36 @@ class AIVerificationService:
 
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Extrae texto de un archivo PDF"""
-        try:
-            text = ""
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text.strip()
-        except Exception as e:
-            raise Exception(f"Error al extraer texto del PDF: {str(e)}")
+        return DocumentTextService.extract_text(file_path)
 
     def extract_text_from_docx(self, file_path: str) -> str:
         """Extrae texto de un archivo DOCX"""
-        try:
-            doc = docx.Document(file_path)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return text.strip()
-        except Exception as e:
-            raise Exception(f"Error al extraer texto del DOCX: {str(e)}")
+        return DocumentTextService.extract_text(file_path)
 
     def extract_text_from_document(self, file_path: str) -> str:
-        """Extrae texto de un documento según su extensión"""
-        if not os.path.exists(file_path):
-            raise Exception(f"Archivo no encontrado: {file_path}")
-
-        ext = file_path.lower().split('.')[-1]
-
-        if ext == 'pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif ext in ['doc', 'docx']:
-            return self.extract_text_from_docx(file_path)
-        elif ext == 'txt':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        else:
-            raise Exception(f"Formato de archivo no soportado: {ext}")
+        """Extrae texto de un documento según su extensión (con caché por contenido)"""
+        return DocumentTextService.extract_text(file_path)
 
     def load_knowledge_base(self) -> str:
         """Carga el contexto de la base de conocimiento (normas ISO, etc.)"""
-        knowledge_text = ""
-
-        if not os.path.exists(self.knowledge_path):
-            return ""
+        return DocumentTextService.knowledge_context(self.knowledge_path)
 
-        # Buscar archivos PDF de normas ISO
-        for filename in os.listdir(self.knowledge_path):
-            if filename.lower().endswith('.pdf'):
-                file_path = os.path.join(self.knowledge_path, filename)
-                try:
-                    # Extraer solo las primeras páginas para no saturar el contexto
-                    with open(file_path, 'rb') as file:
-                        pdf_reader = PyPDF2.PdfReader(file)
-                        # Limitar a las primeras 10 páginas para resumen
-                        max_pages = min(10, len(pdf_reader.pages))
-                        for i in range(max_pages):
-                            knowledge_text += pdf_reader.pages[i].extract_text() + "\n"
-                except Exception as e:
-                    current_app.logger.warning(f"No se pudo leer {filename}: {str(e)}")
+    def select_context(self, document_index: PassageIndex, knowledge_index: PassageIndex,
+                       controls: List[Dict]) -> Tuple[str, str]:
+        """
+        Fragmentos del documento y de la base de conocimiento relevantes para los controles
 
-        return knowledge_text[:10000]  # Limitar a 10k caracteres
+        Returns: (contexto del documento, contexto ISO)
+        """
+        query = ' '.join(ContextRetrievalService.control_query(control) for control in controls)
+        document_context = document_index.select(query, self.document_context_tokens)
+        iso_context = knowledge_index.select(
+            query, self.knowledge_context_tokens, label=ContextRetrievalService.knowledge_label
+        )
+        return document_context, iso_context
 
     def build_verification_prompt(self, document_text: str, control: Dict, iso_context: str) -> str:
-        """Construye el prompt para la verificación del control"""
+        """Construye el prompt para la verificación del control (con el contexto ya seleccionado)"""
         prompt = f"""Eres un auditor experto en ISO/IEC 27001. Tu tarea es verificar si un documento cumple con los requisitos de un control específico del Anexo A.
 
 CONTEXTO ISO 27001:
@@ -129,7 +168,7 @@ Descripción: {control['description']}
 Categoría: {control['category']}
 
 DOCUMENTO A ANALIZAR:
-{document_text[:5000]}
+{document_text}
 
 INSTRUCCIONES:
 Analiza el documento y determina:
@@ -141,15 +180,48 @@ Analiza el documento y determina:
 
 RESPONDE EN FORMATO JSON ESTRICTO:
 {{
-  "compliance_status": "compliant|partial|non_compliant",
-  "confidence_level": 1-5,
-  "overall_score": 0-100,
-  "summary": "breve resumen en español",
-  "covered_aspects": ["aspecto 1", "aspecto 2"],
-  "missing_aspects": ["aspecto faltante 1", "aspecto faltante 2"],
-  "evidence_quotes": ["cita 1", "cita 2"],
-  "recommendations": ["recomendación 1", "recomendación 2"],
-  "maturity_suggestion": 2-6
+{RESULT_FIELDS}
+}}
+"""
+        return prompt
+
+    def build_batch_verification_prompt(self, document_text: str, controls: List[Dict], iso_context: str) -> str:
+        """Construye el prompt que evalúa varios controles en una sola llamada (con el contexto ya seleccionado)"""
+        controls_text = "\n\n".join(
+            f"ID: {control['control_id']}\n"
+            f"Título: {control['title']}\n"
+            f"Descripción: {control['description']}\n"
+            f"Categoría: {control['category']}"
+            for control in controls
+        )
+        control_fields = textwrap.indent(f'  "control_id": "ID del control",\n{RESULT_FIELDS}', '    ')
+
+        prompt = f"""Eres un auditor experto en ISO/IEC 27001. Tu tarea es verificar si un documento cumple con los requisitos de varios controles del Anexo A, evaluando cada control por separado.
+
+CONTEXTO ISO 27001:
+{iso_context}
+
+CONTROLES A VERIFICAR:
+{controls_text}
+
+DOCUMENTO A ANALIZAR:
+{document_text}
+
+INSTRUCCIONES:
+Para cada control, analiza el documento y determina:
+1. ¿El documento cubre los requisitos del control?
+2. ¿Qué aspectos del control están cubiertos?
+3. ¿Qué aspectos faltan o son insuficientes?
+4. Proporciona citas específicas del documento como evidencia
+5. Da recomendaciones de mejora
+
+RESPONDE EN FORMATO JSON ESTRICTO, con un elemento por control:
+{{
+  "results": [
+    {{
+{control_fields}
+    }}
+  ]
 }}
 """
         return prompt
@@ -160,7 +232,7 @@ RESPONDE EN FORMATO JSON ESTRICTO:
 
         try:
             if self.provider == 'ollama':
-                response = requests.post(
+                response = self._http_session().post(
                     f"{self.base_url}/api/generate",
                     json={
                         "model": self.model,
@@ -192,32 +264,8 @@ RESPONDE EN FORMATO JSON ESTRICTO:
                     'time_taken': time.time() - start_time
                 }
 
-            elif self.provider == 'openai':
-                from openai import OpenAI
-                client = OpenAI(api_key=self.api_key)
-
-                response = client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    response_format={"type": "json_object"}
-                )
-
-                analysis = json.loads(response.choices[0].message.content)
-
-                return {
-                    'analysis': analysis,
-                    'tokens_used': response.usage.total_tokens,
-                    'time_taken': time.time() - start_time
-                }
-
-            elif self.provider == 'deepseek':
-                from openai import OpenAI
-                client = OpenAI(
-                    api_key=self.api_key,
-                    base_url=self.base_url or "https://api.deepseek.com"
-                )
-
-                response = client.chat.completions.create(
+            elif self.provider in ['openai', 'deepseek']:
+                response = self._openai_client().chat.completions.create(
                     model=self.model,
                     messages=[{"role": "user", "content": prompt}],
                     response_format={"type": "json_object"}
@@ -250,9 +298,43 @@ RESPONDE EN FORMATO JSON ESTRICTO:
         prompt = self.build_verification_prompt(document_text, control, iso_context)
         result = self.call_ai_api(prompt)
 
-        analysis = result['analysis']
+        return self._normalize_analysis(result['analysis'], result['tokens_used'], result['time_taken'])
+
+    def verify_document_against_controls(
+        self,
+        document_text: str,
+        controls: List[Dict],
+        iso_context: str
+    ) -> Dict[str, Dict]:
+        """
+        Verifica un documento contra varios controles con un único prompt
+
+        Los tokens y el tiempo de la llamada se reparten entre los controles.
+
+        Returns: Diccionario control_id -> resultados del análisis (solo los
+            controles incluidos en la respuesta)
+        """
+        if len(controls) == 1:
+            control = controls[0]
+            return {control['control_id']: self.verify_document_against_control(document_text, control, iso_context)}
+
+        prompt = self.build_batch_verification_prompt(document_text, controls, iso_context)
+        result = self.call_ai_api(prompt)
+
+        analyses = result['analysis'].get('results', [])
+        tokens_used = result['tokens_used'] // len(controls)
+        time_taken = result['time_taken'] / len(controls)
+
+        requested = {control['control_id'] for control in controls}
+        return {
+            str(analysis.get('control_id')): self._normalize_analysis(analysis, tokens_used, time_taken)
+            for analysis in analyses
+            if isinstance(analysis, dict) and str(analysis.get('control_id')) in requested
+        }
 
-        # Validar y normalizar la respuesta
+    @staticmethod
+    def _normalize_analysis(analysis: Dict, tokens_used: int, time_taken: float) -> Dict:
+        """Valida y normaliza la respuesta de la IA para un control"""
         return {
             'compliance_status': analysis.get('compliance_status', 'non_compliant'),
             'confidence_level': int(analysis.get('confidence_level', 3)),
@@ -263,17 +345,185 @@ RESPONDE EN FORMATO JSON ESTRICTO:
             'evidence_quotes': analysis.get('evidence_quotes', []),
             'recommendations': analysis.get('recommendations', []),
             'maturity_suggestion': int(analysis.get('maturity_suggestion', 2)),
+            'tokens_used': tokens_used,
+            'validation_time': time_taken
+        }
+
+    def _verify_batch(self, document_index: PassageIndex, knowledge_index: PassageIndex,
+                      controls: List[Dict]) -> Dict[str, Dict]:
+        """Selecciona el contexto de un lote de controles y lo verifica (en un hilo del pool)"""
+        document_context, iso_context = self.select_context(document_index, knowledge_index, controls)
+        return self.verify_document_against_controls(document_context, controls, iso_context)
+
+    @staticmethod
+    def _control_hash(control: Dict) -> str:
+        """SHA-256 del texto del control usado en el prompt"""
+        content = json.dumps([control['title'], control['description'], control['category']], ensure_ascii=False)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _cached_results(self, document_hash: str, controls: List[Dict]) -> Dict[str, Dict]:
+        """
+        Resultados en caché de los controles para el documento, modelo y versión del prompt
+
+        Registra el uso de cada resultado reutilizado (se confirma con save_results).
+
+        Returns: Diccionario control_id -> resultados del análisis
+        """
+        from models import AIVerificationCache
+
+        rows = AIVerificationCache.query.filter(
+            AIVerificationCache.document_hash == document_hash,
+            AIVerificationCache.ai_model == self.model_used,
+            AIVerificationCache.prompt_version == PROMPT_VERSION,
+            AIVerificationCache.control_code.in_([control['control_id'] for control in controls])
+        ).all()
+        by_key = {(row.control_code, row.control_hash): row for row in rows}
+
+        results = {}
+        now = datetime.utcnow()
+        for control in controls:
+            row = by_key.get((control['control_id'], self._control_hash(control)))
+            if row is None:
+                continue
+            row.hit_count += 1
+            row.last_hit_at = now
+            results[control['control_id']] = dict(
+                row.result,
+                tokens_used=row.tokens_used or 0,
+                validation_time=row.validation_time or 0,
+                from_cache=True
+            )
+        return results
+
+    def _store_cached_result(self, document_hash: str, control: Dict, result: Dict) -> None:
+        """
+        Guarda el resultado de un control en la caché
+
+        Se escribe en una transacción propia para conservarlo aunque la
+        verificación del resto de controles falle o se cancele.
+        """
+        from models import db, AIVerificationCache
+        from sqlalchemy.dialects.postgresql import insert
+
+        values = {
+            'result': {key: value for key, value in result.items() if key not in ('tokens_used', 'validation_time')},
             'tokens_used': result['tokens_used'],
-            'validation_time': result['time_taken']
+            'validation_time': result['validation_time'],
+            'created_at': datetime.utcnow()
+        }
+        statement = insert(AIVerificationCache.__table__).values(
+            document_hash=document_hash,
+            control_code=control['control_id'],
+            control_hash=self._control_hash(control),
+            ai_model=self.model_used,
+            prompt_version=PROMPT_VERSION,
+            hit_count=0,
+            **values
+        ).on_conflict_do_update(
+            index_elements=['document_hash', 'control_code', 'control_hash', 'ai_model', 'prompt_version'],
+            set_=values
+        )
+
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(statement)
+        except Exception as e:
+            current_app.logger.warning(f"No se pudo guardar en caché el control {control['control_id']}: {str(e)}")
+
+    def iter_verifications(self, document_text: str, controls: List, document_hash: Optional[str] = None,
+                           force: bool = False) -> Iterator[Tuple]:
+        """
+        Verifica los controles en paralelo y entrega cada resultado al terminar
+
+        Los controles se agrupan en lotes de AI_BATCH_SIZE (un prompt por lote)
+        y se ejecutan hasta AI_MAX_CONCURRENCY lotes a la vez. El documento y
+        la base de conocimiento se indexan una sola vez para todos los lotes.
+        Los hilos solo reciben diccionarios: los objetos de SQLAlchemy no
+        salen de este hilo.
+
+        Con document_hash, los controles con resultado en caché se entregan
+        primero sin llamar a la IA, y los nuevos resultados se guardan en ella.
+
+        Args:
+            controls: Controles SOA (objetos SOAControl)
+            document_hash: SHA-256 del documento, para usar la caché de resultados
+            force: Ignorar la caché y volver a verificar todos los controles
+
+        Yields:
+            (control, resultado, None) o (control, None, excepción), por orden de finalización
+        """
+        control_dicts = [
+            {
+                'control_id': control.control_id,
+                'title': control.title,
+                'description': control.description or '',
+                'category': control.category
+            }
+            for control in controls
+        ]
+        pending = list(zip(controls, control_dicts))
+
+        if document_hash and not force:
+            cached = self._cached_results(document_hash, control_dicts)
+            for control, control_dict in pending:
+                if control_dict['control_id'] in cached:
+                    yield control, cached[control_dict['control_id']], None
+            pending = [item for item in pending if item[1]['control_id'] not in cached]
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        if not batches:
+            return
+
+        document_index = PassageIndex.from_text(document_text)
+        knowledge_index = ContextRetrievalService.knowledge_index(self.knowledge_path)
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(batches)),
+            thread_name_prefix='ai-verification'
+        )
+        futures = {
+            executor.submit(
+                self._verify_batch,
+                document_index,
+                knowledge_index,
+                [control_dict for _, control_dict in batch]
+            ): batch
+            for batch in batches
         }
 
-    def verify_document(self, document, controls: List) -> Dict:
+        try:
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    for control, _ in batch:
+                        yield control, None, e
+                    continue
+
+                for control, control_dict in batch:
+                    result = results.get(control_dict['control_id'])
+                    if result is None:
+                        yield control, None, Exception("La respuesta de la IA no incluye este control")
+                    else:
+                        if document_hash:
+                            self._store_cached_result(document_hash, control_dict, result)
+                        yield control, result, None
+        finally:
+            # Si se deja de consumir (p. ej. cancelación), no lanzar los lotes pendientes
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def verify_document(self, document, controls: List, progress=None, force: bool = False) -> Dict:
         """
         Verifica un documento completo contra todos sus controles relacionados
 
         Args:
             document: Objeto Document de SQLAlchemy
             controls: Lista de controles SOA relacionados
+            progress: Callback opcional progress(porcentaje, mensaje) al terminar cada control
+            force: Volver a verificar aunque haya resultados en caché
 
         Returns:
             Diccionario con resultados agregados
@@ -292,35 +542,25 @@ RESPONDE EN FORMATO JSON ESTRICTO:
         if not document_text or len(document_text) < 100:
             raise Exception("El documento no contiene suficiente texto para analizar")
 
-        # Cargar contexto ISO
-        iso_context = self.load_knowledge_base()
+        document_hash = DocumentTextService.content_hash(document.file_path)
 
-        # Verificar contra cada control
+        # Verificar los controles en paralelo (reutilizando los resultados en caché)
         validations = []
         total_score = 0
 
-        for control in controls:
-            control_dict = {
-                'control_id': control.control_id,
-                'title': control.title,
-                'description': control.description or '',
-                'category': control.category
-            }
-
-            try:
-                validation_result = self.verify_document_against_control(
-                    document_text,
-                    control_dict,
-                    iso_context
-                )
+        for completed, (control, validation_result, error) in enumerate(
+            self.iter_verifications(document_text, controls, document_hash=document_hash, force=force), start=1
+        ):
+            if error is not None:
+                current_app.logger.error(f"Error verificando control {control.control_id}: {str(error)}")
+                # Continuar con el siguiente control
+            else:
                 validation_result['control_id'] = control.id
                 validations.append(validation_result)
                 total_score += validation_result['overall_score']
 
-            except Exception as e:
-                current_app.logger.error(f"Error verificando control {control.control_id}: {str(e)}")
-                # Continuar con el siguiente control
-                continue
+            if progress:
+                progress(int(completed * 100 / len(controls)), f"Control {control.control_id} verificado")
 
         if not validations:
             raise Exception("No se pudo verificar ningún control")
@@ -333,5 +573,81 @@ RESPONDE EN FORMATO JSON ESTRICTO:
             'validations': validations,
             'total_controls': len(controls),
             'verified_controls': len(validations),
-            'model_used': f"{self.provider}:{self.model}"
+            'cached_controls': sum(1 for validation in validations if validation.get('from_cache')),
+            'model_used': self.model_used
         }
+
+    def save_results(self, document, results: Dict, user_id: Optional[int] = None) -> None:
+        """
+        Guarda los resultados de verify_document en el documento y en
+        DocumentControlValidation (una fila por documento y control)
+
+        Args:
+            document: Objeto Document verificado
+            results: Resultado devuelto por verify_document
+            user_id: Usuario que solicitó la verificación
+        """
+        from models import db, DocumentControlValidation
+
+        # Actualizar el documento
+        document.ai_verified = True
+        document.ai_verification_date = datetime.utcnow()
+        document.ai_verification_version = document.version
+        document.ai_model_used = results['model_used']
+        document.ai_overall_score = results['overall_score']
+        document.ai_verified_by_id = user_id
+        document.ai_needs_reverification = False
+
+        # Guardar validaciones individuales por control
+        for validation_data in results['validations']:
+            control_id = validation_data['control_id']
+
+            # Buscar si ya existe una validación previa
+            existing_validation = DocumentControlValidation.query.filter_by(
+                document_id=document.id,
+                control_id=control_id
+            ).first()
+
+            if existing_validation:
+                # Actualizar existente
+                existing_validation.document_version = document.version
+                existing_validation.compliance_status = validation_data['compliance_status']
+                existing_validation.confidence_level = validation_data['confidence_level']
+                existing_validation.overall_score = validation_data['overall_score']
+                existing_validation.summary = validation_data['summary']
+                existing_validation.covered_aspects = validation_data['covered_aspects']
+                existing_validation.missing_aspects = validation_data['missing_aspects']
+                existing_validation.evidence_quotes = validation_data['evidence_quotes']
+                existing_validation.recommendations = validation_data['recommendations']
+                existing_validation.maturity_suggestion = validation_data['maturity_suggestion']
+                existing_validation.ai_model = results['model_used']
+                existing_validation.tokens_used = validation_data['tokens_used']
+                existing_validation.validation_time = validation_data['validation_time']
+                existing_validation.validated_at = datetime.utcnow()
+                existing_validation.validated_by_id = user_id
+                existing_validation.from_cache = validation_data.get('from_cache', False)
+            else:
+                # Crear nueva
+                new_validation = DocumentControlValidation(
+                    document_id=document.id,
+                    control_id=control_id,
+                    document_version=document.version,
+                    compliance_status=validation_data['compliance_status'],
+                    confidence_level=validation_data['confidence_level'],
+                    overall_score=validation_data['overall_score'],
+                    summary=validation_data['summary'],
+                    covered_aspects=validation_data['covered_aspects'],
+                    missing_aspects=validation_data['missing_aspects'],
+                    evidence_quotes=validation_data['evidence_quotes'],
+                    recommendations=validation_data['recommendations'],
+                    maturity_suggestion=validation_data['maturity_suggestion'],
+                    ai_model=results['model_used'],
+                    tokens_used=validation_data['tokens_used'],
+                    validation_time=validation_data['validation_time'],
+                    validated_at=datetime.utcnow(),
+                    validated_by_id=user_id,
+                    from_cache=validation_data.get('from_cache', False)
+                )
+                db.session.add(new_validation)
+
+        db.session.commit()
@@ -0,0 +1,393 @@
+"""
+Servicio del Log de Auditoría
+Consulta y mantenimiento de audit_logs, particionada por mes de created_at:
+
+- Listado paginado por clave (created_at, id) en lugar de OFFSET.
+- Valores de filtro (acción, tipo de entidad) desde audit_log_filter_values.
+- Creación anticipada de particiones mensuales (audit_logs_AAAA_MM); los
+  registros que caen en la partición por defecto se mueven a la suya.
+- Archivo de particiones antiguas en ficheros JSON Lines comprimidos con
+  manifiesto (filas, rango de fechas y SHA-256), que pueden buscarse y
+  verificarse sin restaurarlos.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+from sqlalchemy import text, tuple_
+from models import db, AuditLog, AuditLogFilterValue
+
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'audit_logs_'
+DEFAULT_PARTITION = 'audit_logs_default'
+PARTITION_PATTERN = re.compile(r'^audit_logs_(\d{4})_(\d{2})$')
+
+ARCHIVE_SUFFIX = '.jsonl.gz'
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Filas leídas por lote al archivar una partición
+ARCHIVE_CHUNK_SIZE = 5000
+
+
+def month_start(value):
+    """Primer día del mes de una fecha"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    """Suma meses a un primer día de mes"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}'
+
+
+class AuditLogService:
+    """Listado, particiones y archivo del log de auditoría"""
+
+    # ==================== LISTADO ====================
+
+    @staticmethod
+    def encode_cursor(log):
+        """Cursor de paginación de un registro: 'created_at_id'"""
+        return f'{log.created_at.isoformat()}_{log.id}'
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Returns:
+            tuple: (created_at, id) o None si el cursor no es válido
+        """
+        if not cursor:
+            return None
+        created_at, _, log_id = cursor.rpartition('_')
+        try:
+            return datetime.fromisoformat(created_at), int(log_id)
+        except ValueError:
+            return None
+
+    @classmethod
+    def keyset_page(cls, query, before=None, after=None, per_page=50):
+        """
+        Página del listado ordenado por (created_at, id) descendente
+
+        Args:
+            query: Consulta de AuditLog con los filtros aplicados
+            before: Cursor del último registro de la página anterior (más antiguos)
+            after: Cursor del primer registro de la página siguiente (más recientes)
+            per_page: Registros por página
+
+        Returns:
+            dict: items, older (cursor o None) y newer (cursor o None)
+        """
+        clave = tuple_(AuditLog.created_at, AuditLog.id)
+        query = query.order_by(None)
+        after = cls.decode_cursor(after)
+        before = cls.decode_cursor(before)
+
+        if after:
+            # Registros más recientes: se leen en orden ascendente y se invierten
+            items = query.filter(clave > tuple_(*after)).order_by(
+                AuditLog.created_at.asc(), AuditLog.id.asc()
+            ).limit(per_page + 1).all()
+            has_newer = len(items) > per_page
+            items = items[:per_page][::-1]
+            has_older = True
+        else:
+            if before:
+                query = query.filter(clave < tuple_(*before))
+            items = query.order_by(
+                AuditLog.created_at.desc(), AuditLog.id.desc()
+            ).limit(per_page + 1).all()
+            has_older = len(items) > per_page
+            items = items[:per_page]
+            has_newer = before is not None
+
+        return {
+            'items': items,
+            'older': cls.encode_cursor(items[-1]) if items and has_older else None,
+            'newer': cls.encode_cursor(items[0]) if items and has_newer else None
+        }
+
+    @staticmethod
+    def filter_values():
+        """
+        Valores de los desplegables de filtro
+
+        Returns:
+            dict: 'action' y 'entity_type' -> lista ordenada de valores
+        """
+        values = {field: [] for field in AuditLogFilterValue.FIELDS}
+        for field, value in db.session.query(
+            AuditLogFilterValue.field, AuditLogFilterValue.value
+        ).order_by(AuditLogFilterValue.field, AuditLogFilterValue.value):
+            values.setdefault(field, []).append(value)
+        return values
+
+    # ==================== PARTICIONES ====================
+
+    @staticmethod
+    def list_partitions():
+        """
+        Particiones mensuales existentes
+
+        Returns:
+            dict: primer día del mes -> nombre de la partición
+        """
+        names = db.session.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'audit_logs'
+        """)).scalars().all()
+
+        partitions = {}
+        for name in names:
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return partitions
+
+    @staticmethod
+    def create_partition(month):
+        """
+        Crea la partición de un mes
+
+        La tabla se crea suelta, recibe los registros de ese mes que hubiera en
+        la partición por defecto y después se adjunta a audit_logs.
+        """
+        name = partition_name(month)
+        params = {'desde': month, 'hasta': add_months(month, 1)}
+
+        db.session.execute(text(
+            f'CREATE TABLE {name} (LIKE audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        moved = db.session.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= :desde AND created_at < :hasta
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), params).rowcount
+        db.session.execute(text(
+            f'ALTER TABLE audit_logs ATTACH PARTITION {name} '
+            f"FOR VALUES FROM ('{params['desde']}') TO ('{params['hasta']}')"
+        ))
+        db.session.commit()
+
+        logger.info(f"✅ Partición {name} creada ({moved} registros movidos desde la partición por defecto)")
+        return name
+
+    @classmethod
+    def ensure_partitions(cls, months_ahead=3):
+        """
+        Crea las particiones del mes actual y de los próximos meses, y las de
+        los meses con registros en la partición por defecto
+
+        Returns:
+            list: Nombres de las particiones creadas
+        """
+        existing = cls.list_partitions()
+        current = month_start(datetime.utcnow())
+        months = {add_months(current, n) for n in range(months_ahead + 1)}
+        months.update(
+            month_start(row) for row in db.session.execute(text(
+                f"SELECT DISTINCT date_trunc('month', created_at) FROM {DEFAULT_PARTITION}"
+            )).scalars()
+        )
+
+        return [cls.create_partition(month) for month in sorted(months) if month not in existing]
+
+    # ==================== ARCHIVO ====================
+
+    @staticmethod
+    def _serialize(row):
+        values = dict(row)
+        values['created_at'] = values['created_at'].isoformat()
+        return json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+
+    @classmethod
+    def archive_partitions(cls, older_than_months, directory):
+        """
+        Archiva y elimina las particiones anteriores a older_than_months meses
+
+        Returns:
+            list: Manifiestos de las particiones archivadas
+        """
+        cutoff = add_months(month_start(datetime.utcnow()), -older_than_months)
+        partitions = cls.list_partitions()
+        return [
+            cls.archive_partition(month, directory)
+            for month in sorted(partitions) if month < cutoff
+        ]
+
+    @classmethod
+    def archive_partition(cls, month, directory):
+        """
+        Vuelca una partición a un fichero JSON Lines comprimido y la elimina
+
+        La partición solo se separa y elimina si el fichero escrito contiene
+        exactamente las filas de la partición.
+
+        Returns:
+            dict: Manifiesto del archivo
+        """
+        name = partition_name(month)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name + ARCHIVE_SUFFIX)
+        if os.path.exists(path):
+            raise FileExistsError(f'El archivo {path} ya existe')
+
+        # Sin escrituras en la partición mientras se archiva
+        db.session.execute(text(f'LOCK TABLE {name} IN SHARE MODE'))
+        expected = db.session.execute(text(f'SELECT count(*) FROM {name}')).scalar()
+
+        content_hash = hashlib.sha256()
+        rows = 0
+        first = last = None
+        result = db.session.connection().execution_options(
+            stream_results=True, yield_per=ARCHIVE_CHUNK_SIZE
+        ).execute(text(f'SELECT * FROM {name} ORDER BY created_at, id'))
+
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as output:
+            for row in result.mappings():
+                line = cls._serialize(row) + '\n'
+                output.write(line)
+                content_hash.update(line.encode('utf-8'))
+                rows += 1
+                first = first or row['created_at']
+                last = row['created_at']
+
+        if rows != expected:
+            os.remove(tmp_path)
+            db.session.rollback()
+            raise RuntimeError(f'{name}: se archivaron {rows} filas de {expected}')
+
+        os.replace(tmp_path, path)
+        manifest = {
+            'partition': name,
+            'month': month.isoformat(),
+            'rows': rows,
+            'first_created_at': first.isoformat() if first else None,
+            'last_created_at': last.isoformat() if last else None,
+            'content_sha256': content_hash.hexdigest(),
+            'file_sha256': cls._file_sha256(path),
+            'archived_at': datetime.utcnow().isoformat()
+        }
+        with open(os.path.join(directory, name + MANIFEST_SUFFIX), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        db.session.execute(text(f'ALTER TABLE audit_logs DETACH PARTITION {name}'))
+        db.session.execute(text(f'DROP TABLE {name}'))
+        db.session.commit()
+
+        logger.info(f"✅ Partición {name} archivada en {path} ({rows} registros)")
+        return manifest
+
+    @staticmethod
+    def _file_sha256(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def list_archives(directory):
+        """Manifiestos de los archivos de un directorio, por mes"""
+        if not os.path.isdir(directory):
+            return []
+        manifests = []
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(MANIFEST_SUFFIX):
+                with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+    @classmethod
+    def verify_archive(cls, directory, manifest):
+        """
+        Comprueba un archivo contra su manifiesto
+
+        Returns:
+            list: Errores encontrados (vacía si el archivo es correcto)
+        """
+        path = os.path.join(directory, manifest['partition'] + ARCHIVE_SUFFIX)
+        if not os.path.exists(path):
+            return [f'No existe {path}']
+
+        errors = []
+        if cls._file_sha256(path) != manifest['file_sha256']:
+            errors.append('SHA-256 del fichero distinto al del manifiesto')
+
+        content_hash = hashlib.sha256()
+        rows = 0
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    content_hash.update(line.encode('utf-8'))
+                    json.loads(line)
+                    rows += 1
+        except (OSError, EOFError, ValueError) as e:
+            errors.append(f'Archivo ilegible: {e}')
+            return errors
+
+        if rows != manifest['rows']:
+            errors.append(f"{rows} filas en lugar de {manifest['rows']}")
+        if content_hash.hexdigest() != manifest['content_sha256']:
+            errors.append('SHA-256 del contenido distinto al del manifiesto')
+        return errors
+
+    @staticmethod
+    def search_archives(directory, action=None, user_id=None, entity_type=None,
+                        entity_id=None, text_contains=None, date_from=None, date_to=None):
+        """
+        Busca registros en los archivos sin restaurarlos
+
+        Solo se leen los archivos cuyo rango de fechas se solapa con el pedido
+        [date_from, date_to).
+
+        Yields:
+            dict: Registros que cumplen todos los filtros, por fecha
+        """
+        date_from = date_from.isoformat() if date_from else None
+        date_to = date_to.isoformat() if date_to else None
+        needle = text_contains.lower() if text_contains else None
+
+        for manifest in AuditLogService.list_archives(directory):
+            if not manifest['rows']:
+                continue
+            if date_from and manifest['last_created_at'] < date_from:
+                continue
+            if date_to and manifest['first_created_at'] >= date_to:
+                continue
+
+            path = os.path.join(directory, manifest['partition'] + ARCHIVE_SUFFIX)
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if needle and needle not in line.lower():
+                        continue
+                    row = json.loads(line)
+                    if action and row['action'] != action:
+                        continue
+                    if user_id is not None and row['user_id'] != user_id:
+                        continue
+                    if entity_type and row['entity_type'] != entity_type:
+                        continue
+                    if entity_id is not None and row['entity_id'] != entity_id:
+                        continue
+                    if date_from and row['created_at'] < date_from:
+                        continue
+                    if date_to and row['created_at'] >= date_to:
+                        continue
+                    yield row
@@ -0,0 +1,203 @@
+"""
+Escritor de Logs de Auditoría
+Acumula los eventos de auditoría de cada petición y los escribe al terminarla
+con un único INSERT de varias filas, en una transacción propia: registrar un
+evento no confirma (ni descarta) los cambios de negocio de la sesión.
+
+Con AUDIT_LOG_ASYNC los lotes se entregan a una cola acotada que vacía un
+hilo en segundo plano. Si la cola está llena el lote se escribe en la propia
+petición, y al cerrar el proceso se escriben los lotes pendientes.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from flask import g, has_request_context
+from sqlalchemy.dialects.postgresql import insert
+from models import db, AuditLog, AuditLogFilterValue
+
+
+logger = logging.getLogger(__name__)
+
+# Filas máximas por INSERT del hilo en segundo plano
+BATCH_SIZE = 500
+
+# Segundos de espera al hilo en segundo plano durante el cierre
+SHUTDOWN_TIMEOUT = 30
+
+
+class AuditLogWriter:
+    """Buffer por petición y cola opcional de escritura de AuditLog"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._async = False
+        self._queue_size = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # Valores de filtro ya registrados por este proceso
+        self._filter_values = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self._async = app.config.get('AUDIT_LOG_ASYNC', False)
+        self._queue_size = app.config.get('AUDIT_LOG_QUEUE_SIZE', 1000)
+        app.extensions['audit_log_writer'] = self
+        app.teardown_request(self._teardown_request)
+        if self._async:
+            atexit.register(self.shutdown)
+
+    # ==================== REGISTRO ====================
+
+    def record(self, action, entity_type=None, entity_id=None, description=None,
+               old_values=None, new_values=None, user_id=None, username=None,
+               ip_address=None, user_agent=None, status='success', error_message=None):
+        """
+        Registra un evento de auditoría
+
+        Dentro de una petición el evento se guarda hasta su finalización;
+        fuera de ella (comandos CLI, trabajos programados) se escribe en el acto.
+
+        Returns:
+            dict: Valores del registro
+        """
+        row = {
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'description': description,
+            'old_values': old_values,
+            'new_values': new_values,
+            'user_id': user_id,
+            'username': username,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'status': status,
+            'error_message': error_message,
+            'created_at': datetime.utcnow()
+        }
+
+        if has_request_context():
+            g.setdefault('_audit_log_rows', []).append(row)
+        else:
+            self.write([row])
+
+        return row
+
+    def _teardown_request(self, exc=None):
+        rows = g.pop('_audit_log_rows', None)
+        if rows:
+            self.submit(rows)
+
+    # ==================== ESCRITURA ====================
+
+    def submit(self, rows):
+        """Escribe un lote directamente o lo entrega a la cola en segundo plano"""
+        if not self._async:
+            self.write(rows)
+            return
+
+        try:
+            self._worker_queue().put_nowait(rows)
+        except queue.Full:
+            # Sin espacio en la cola: escribir en la petición antes que perder eventos
+            logger.warning(f"⚠️  Cola de auditoría llena, escribiendo {len(rows)} eventos en la petición")
+            self.write(rows)
+
+    def write(self, rows):
+        """
+        Inserta las filas con un INSERT de varias filas en una transacción propia
+
+        En la misma transacción se añaden a audit_log_filter_values las
+        acciones y tipos de entidad que este proceso aún no ha registrado.
+        """
+        if not rows:
+            return
+
+        new_values = {
+            (field, row[field])
+            for row in rows
+            for field in AuditLogFilterValue.FIELDS
+            if row.get(field)
+        } - self._filter_values
+
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(AuditLog.__table__.insert(), rows)
+                if new_values:
+                    connection.execute(
+                        insert(AuditLogFilterValue.__table__).on_conflict_do_nothing(),
+                        [{'field': field, 'value': value} for field, value in new_values]
+                    )
+            self._filter_values |= new_values
+        except Exception as e:
+            logger.error(f"❌ Error escribiendo {len(rows)} eventos de auditoría: {str(e)}")
+
+    # ==================== HILO EN SEGUNDO PLANO ====================
+
+    def _worker_queue(self):
+        """Cola del proceso actual, arrancando el hilo si no existe (o tras un fork)"""
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='audit-log-writer', daemon=True
+                )
+                self._pid = os.getpid()
+                self._thread.start()
+            return self._queue
+
+    def _run(self, pending):
+        with self.app.app_context():
+            stopping = False
+            while not stopping:
+                batch = pending.get()
+                if batch is None:
+                    break
+
+                # Agrupar los lotes ya encolados en un único INSERT
+                rows = list(batch)
+                while len(rows) < BATCH_SIZE:
+                    try:
+                        batch = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    if batch is None:
+                        stopping = True
+                        break
+                    rows.extend(batch)
+
+                self.write(rows)
+
+    def shutdown(self):
+        """Escribe los eventos pendientes y detiene el hilo en segundo plano"""
+        with self._lock:
+            thread, pending = self._thread, self._queue
+            if thread is None or self._pid != os.getpid():
+                return
+            self._thread = None
+
+        pending.put(None)
+        thread.join(SHUTDOWN_TIMEOUT)
+
+        # Lotes que el hilo no llegó a escribir
+        rows = []
+        while True:
+            try:
+                batch = pending.get_nowait()
+            except queue.Empty:
+                break
+            if batch:
+                rows.extend(batch)
+        if rows:
+            with self.app.app_context():
+                self.write(rows)
+
+
+audit_log_writer = AuditLogWriter()
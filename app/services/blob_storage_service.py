@@ -0,0 +1,265 @@
+"""
+Almacenamiento de Archivos por Contenido
+Los archivos subidos por los módulos (documentos y sus versiones, evidencias
+de incidentes, tareas y auditorías, documentos de cambios y adjuntos de no
+conformidades) se guardan una sola vez en uploads/blobs, bajo su SHA-256.
+
+Cada registro conserva en file_path la ruta del blob, por lo que varios
+registros pueden compartir el mismo archivo. Eliminar un registro no borra
+el blob: garbage_collect() elimina los blobs que ya no referencia ninguno.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de bloque de lectura y escritura
+CHUNK_SIZE = 1024 * 1024
+
+# Antigüedad mínima de un blob sin referencias para eliminarlo: cubre las
+# subidas cuyo registro aún no se ha confirmado en la base de datos
+GC_GRACE_SECONDS = 3600
+
+# Sufijo de los archivos temporales de subida
+TEMP_SUFFIX = '.upload'
+
+
+class BlobStorageService:
+    """Servicio de almacenamiento de archivos direccionado por contenido"""
+
+    BLOB_DIR = 'uploads/blobs'
+
+    @classmethod
+    def get_blob_directory(cls):
+        """Obtiene el directorio de blobs, creándolo si no existe"""
+        blob_path = Path(cls.BLOB_DIR)
+        blob_path.mkdir(parents=True, exist_ok=True)
+        return blob_path
+
+    @classmethod
+    def blob_path(cls, sha256, extension=''):
+        """Ruta del blob con el hash indicado: uploads/blobs/ab/abcdef...ext"""
+        return (Path(cls.BLOB_DIR) / sha256[:2] / f'{sha256}{extension}').as_posix()
+
+    @classmethod
+    def is_blob(cls, file_path):
+        """Indica si una ruta apunta al almacén de blobs"""
+        if not file_path:
+            return False
+        return Path(file_path).as_posix().startswith(f'{cls.BLOB_DIR}/')
+
+    @staticmethod
+    def _extension(filename):
+        """Extensión en minúsculas que se conserva en el nombre del blob"""
+        return Path(filename or '').suffix.lower()
+
+    # ==================== ESCRITURA ====================
+
+    @classmethod
+    def store(cls, file, filename=None):
+        """
+        Guarda un archivo subido calculando su SHA-256 mientras se escribe
+
+        Args:
+            file: FileStorage de Werkzeug o flujo binario abierto
+            filename: Nombre original (por defecto file.filename), para la extensión
+
+        Returns:
+            dict: {'file_path', 'sha256', 'file_size'}
+        """
+        stream = getattr(file, 'stream', file)
+        filename = filename or getattr(file, 'filename', None)
+
+        fd, temp_path = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=cls.get_blob_directory())
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as dest:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    dest.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            file_path = cls.blob_path(sha256, cls._extension(filename))
+
+            if os.path.exists(file_path):
+                # Contenido ya almacenado: se reutiliza el blob existente
+                os.unlink(temp_path)
+                # Renovar la fecha para que el GC no lo elimine antes de confirmar la referencia
+                os.utime(file_path)
+            else:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                os.replace(temp_path, file_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        return {'file_path': file_path, 'sha256': sha256, 'file_size': size}
+
+    @classmethod
+    def store_path(cls, source_path):
+        """Guarda en el almacén un archivo existente en disco"""
+        with open(source_path, 'rb') as f:
+            return cls.store(f, filename=os.path.basename(source_path))
+
+    @classmethod
+    def release(cls, file_path):
+        """
+        Libera el archivo de un registro que se va a eliminar
+
+        Los blobs pueden estar compartidos y los elimina garbage_collect();
+        los archivos anteriores al almacén de blobs se eliminan en el acto.
+        """
+        from app.services.document_text_service import CACHE_SUFFIX
+
+        if not file_path or cls.is_blob(file_path):
+            return
+        for path in (file_path, f'{file_path}{CACHE_SUFFIX}'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ==================== REFERENCIAS ====================
+
+    @staticmethod
+    def reference_columns():
+        """Columnas que guardan rutas de archivos subidos"""
+        from models import Document, DocumentVersion, IncidentEvidence, NCAttachment
+        from app.models.audit import AuditDocument, AuditEvidence, AuditRecord
+        from app.models.change import ChangeDocument
+        from app.models.task import TaskEvidence
+
+        return [
+            Document.file_path,
+            DocumentVersion.file_path,
+            IncidentEvidence.file_path,
+            NCAttachment.file_path,
+            TaskEvidence.file_path,
+            ChangeDocument.file_path,
+            AuditDocument.file_path,
+            AuditEvidence.file_path,
+            AuditRecord.audit_plan_file,
+            AuditRecord.audit_report_file,
+        ]
+
+    @staticmethod
+    def _blob_hash(file_path):
+        """Hash de un blob o de un archivo derivado junto a él (p. ej. <hash>.pdf.text.json)"""
+        return Path(file_path).name.split('.', 1)[0]
+
+    @classmethod
+    def referenced_blobs(cls):
+        """Hashes de los blobs referenciados por algún registro"""
+        from models import db
+
+        referenced = set()
+        for column in cls.reference_columns():
+            paths = db.session.execute(
+                db.select(column).where(column.like(f'{cls.BLOB_DIR}/%')).distinct()
+            ).scalars()
+            referenced.update(cls._blob_hash(path) for path in paths)
+        return referenced
+
+    # ==================== RECOLECCIÓN ====================
+
+    @classmethod
+    def garbage_collect(cls, grace_seconds=GC_GRACE_SECONDS, dry_run=False):
+        """
+        Elimina los blobs sin referencias y los temporales de subidas interrumpidas
+
+        Los archivos derivados de un blob (caché de texto) se conservan o
+        eliminan junto con él.
+
+        Args:
+            grace_seconds: Antigüedad mínima para eliminar un archivo
+            dry_run: Solo informar, sin eliminar
+
+        Returns:
+            dict: {'removed': [rutas], 'freed_bytes', 'kept'}
+        """
+        blob_dir = Path(cls.BLOB_DIR)
+        result = {'removed': [], 'freed_bytes': 0, 'kept': 0}
+        if not blob_dir.exists():
+            return result
+
+        # Referencias leídas antes de recorrer el disco: un blob creado después es reciente
+        referenced = cls.referenced_blobs()
+        cutoff = time.time() - grace_seconds
+
+        for path in blob_dir.rglob('*'):
+            if not path.is_file():
+                continue
+            if cls._blob_hash(path) in referenced:
+                result['kept'] += 1
+                continue
+
+            stat = path.stat()
+            if stat.st_mtime > cutoff:
+                result['kept'] += 1
+                continue
+
+            if not dry_run:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+            result['removed'].append(path.as_posix())
+            result['freed_bytes'] += stat.st_size
+
+        logger.info(
+            f"🧹 Blobs eliminados: {len(result['removed'])} "
+            f"({result['freed_bytes']} bytes), conservados: {result['kept']}"
+        )
+        return result
+
+    @classmethod
+    def migrate_existing_files(cls):
+        """
+        Mueve al almacén de blobs los archivos referenciados desde uploads/<módulo>
+
+        Actualiza las rutas de todos los registros y elimina los archivos
+        originales una vez confirmados los cambios.
+
+        Returns:
+            dict: {'migrated': registros actualizados, 'missing': rutas inexistentes}
+        """
+        from models import db
+
+        stored = {}
+        missing = set()
+        migrated = 0
+
+        for column in cls.reference_columns():
+            table = column.table
+            rows = db.session.execute(
+                db.select(table.c.id, column).where(
+                    column.isnot(None),
+                    column != '',
+                    column.not_like(f'{cls.BLOB_DIR}/%')
+                )
+            ).all()
+
+            for row_id, file_path in rows:
+                if file_path not in stored:
+                    if not os.path.isfile(file_path):
+                        missing.add(file_path)
+                        continue
+                    stored[file_path] = cls.store_path(file_path)['file_path']
+
+                db.session.execute(
+                    table.update().where(table.c.id == row_id).values({column.name: stored[file_path]})
+                )
+                migrated += 1
+
+        db.session.commit()
+
+        for file_path in stored:
+            os.remove(file_path)
+
+        return {'migrated': migrated, 'missing': sorted(missing)}
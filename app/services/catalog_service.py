@@ -0,0 +1,287 @@
+"""
+Carga Versionada de Catálogos de Referencia
+Los catálogos (amenazas MAGERIT 3.2, controles ISO/IEC 27002:2022, relaciones
+control-amenaza y amenaza-recurso, plantillas de tareas ISO 27001) se
+distribuyen como archivos JSON en app/data/catalogs.
+
+Cada catálogo se carga con un único INSERT por lotes (executemany con
+ON CONFLICT) y se registra en CatalogVersion el checksum de su archivo: si no
+ha cambiado desde la última carga, no se vuelve a leer ni a escribir.
+
+Como en la precarga original, un catálogo solo se carga si su tabla está
+vacía: amenazas, frecuencias, relaciones y plantillas son editables desde la
+aplicación, así que sobre una tabla con datos solo se registra el checksum.
+Cargar sobre datos existentes (añadir lo que falte y actualizar los campos
+del catálogo) requiere force, que solo usan los comandos con --forzar.
+
+Los cambios quedan en la transacción de la sesión; el llamador hace commit.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+
+
+logger = logging.getLogger(__name__)
+
+# Incrementar al cambiar la forma de cargar: fuerza la recarga de todos los catálogos
+LOADER_VERSION = 1
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'catalogs')
+
+# Roles por defecto de las plantillas de tareas según su categoría
+ROLE_CISO = 'Responsable de Seguridad (CISO)'
+ROLE_ADMIN = 'Administrador del Sistema'
+ROLE_AUDITOR = 'Auditor Interno'
+
+TEMPLATE_CATEGORY_ROLES = {
+    'AUDITORIA_INTERNA': ROLE_AUDITOR,
+    'EVALUACION_RIESGOS': ROLE_CISO,
+    'REVISION_POLITICAS': ROLE_CISO,
+    'REVISION_DIRECCION': ROLE_CISO,
+    'FORMACION_CONCIENCIACION': ROLE_CISO,
+    'REVISION_PROVEEDORES': ROLE_CISO,
+    'REVISION_INCIDENTES': ROLE_CISO,
+    'CONTINUIDAD_NEGOCIO': ROLE_CISO,
+    'REVISION_LEGAL': ROLE_CISO,
+    'REVISION_CONTROLES': ROLE_CISO,
+    'MANTENIMIENTO_SEGURIDAD': ROLE_ADMIN,
+    'COPIAS_SEGURIDAD': ROLE_ADMIN,
+    'REVISION_ACCESOS': ROLE_ADMIN,
+    'ACTUALIZACION_INVENTARIOS': ROLE_ADMIN,
+    'GESTION_VULNERABILIDADES': ROLE_ADMIN,
+}
+
+
+class CatalogService:
+    """Servicio de carga de catálogos desde app/data/catalogs"""
+
+    # Catálogo -> (archivo, método de carga, tabla), en orden de dependencias
+    CATALOGS = {
+        'amenazas': ('amenazas_magerit.json', '_load_amenazas', 'amenazas'),
+        'controles_iso27002': ('controles_iso27002.json', '_load_controles', 'controles_iso27002'),
+        'controles_amenazas': ('controles_amenazas.json', '_load_controles_amenazas', 'controles_amenazas'),
+        'amenazas_recursos_tipo': ('amenazas_recursos_tipo.json', '_load_amenazas_recursos',
+                                   'amenazas_recursos_tipo'),
+        'plantillas_tareas': ('plantillas_tareas_iso27001.json', '_load_plantillas_tareas', 'task_templates'),
+    }
+
+    @classmethod
+    def read(cls, name):
+        """Filas del archivo de datos de un catálogo"""
+        filename = cls.CATALOGS[name][0]
+        with open(os.path.join(CATALOG_DIR, filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @classmethod
+    def checksum(cls, name):
+        """SHA-256 del archivo de datos y de la versión del cargador"""
+        filename = cls.CATALOGS[name][0]
+        digest = hashlib.sha256(f'{LOADER_VERSION}:'.encode())
+        with open(os.path.join(CATALOG_DIR, filename), 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    @classmethod
+    def populated(cls, name):
+        """Si la tabla del catálogo ya tiene filas"""
+        from models import db
+
+        table = db.Model.metadata.tables[cls.CATALOGS[name][2]]
+        return db.session.execute(db.select(1).select_from(table).limit(1)).first() is not None
+
+    @classmethod
+    def load_all(cls, force=False):
+        """Carga todos los catálogos cuya versión no esté instalada"""
+        return [cls.load(name, force=force) for name in cls.CATALOGS]
+
+    @classmethod
+    def load(cls, name, force=False):
+        """
+        Carga un catálogo si su archivo ha cambiado y su tabla está vacía
+
+        Si la tabla ya tiene datos solo se registra el checksum ('kept'): los
+        datos existentes pueden haber sido editados o borrados a propósito.
+
+        Args:
+            name: Nombre del catálogo (clave de CATALOGS)
+            force: Cargar aunque el checksum coincida o la tabla tenga datos
+                   (añade las filas que falten y actualiza los campos del catálogo)
+
+        Returns:
+            dict: {'name', 'status': 'loaded' | 'kept' | 'skipped', 'rows'}
+        """
+        from models import db
+        from app.models.catalog import CatalogVersion
+
+        checksum = cls.checksum(name)
+        installed = db.session.get(CatalogVersion, name)
+        if installed and installed.checksum == checksum and not force:
+            return {'name': name, 'status': 'skipped', 'rows': installed.rows}
+
+        rows = cls.read(name)
+        status = 'loaded'
+        if not force and cls.populated(name):
+            status = 'kept'
+        else:
+            getattr(cls, cls.CATALOGS[name][1])(rows)
+
+        if installed is None:
+            installed = CatalogVersion(name=name)
+            db.session.add(installed)
+        installed.checksum = checksum
+        installed.rows = len(rows)
+        installed.loaded_at = datetime.utcnow()
+        db.session.flush()
+
+        if status == 'loaded':
+            logger.info(f"📚 Catálogo {name} cargado: {len(rows)} filas")
+        else:
+            logger.info(f"📚 Catálogo {name}: la tabla ya tiene datos, se conservan")
+        return {'name': name, 'status': status, 'rows': len(rows)}
+
+    # ==================== CARGADORES ====================
+
+    @staticmethod
+    def _upsert(table, rows, keys, update_columns):
+        """
+        INSERT por lotes de las filas, actualizando las existentes por su clave
+
+        Sin update_columns las filas existentes se conservan sin cambios.
+        """
+        from models import db
+
+        if not rows:
+            return
+
+        statement = insert(table)
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=keys,
+                set_={column: statement.excluded[column] for column in update_columns}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=keys)
+
+        db.session.execute(statement, rows)
+
+    @staticmethod
+    def _amenaza_ids(rows):
+        """Filas con amenaza_id en lugar de amenaza_codigo; omite las amenazas inexistentes"""
+        from models import db
+        from app.risks.models import Amenaza
+
+        ids = dict(db.session.execute(db.select(Amenaza.codigo, Amenaza.id)).all())
+
+        resolved = []
+        missing = set()
+        for row in rows:
+            codigo = row['amenaza_codigo']
+            if codigo not in ids:
+                missing.add(codigo)
+                continue
+            resolved.append({key: value for key, value in row.items() if key != 'amenaza_codigo'}
+                            | {'amenaza_id': ids[codigo]})
+
+        if missing:
+            logger.warning(f"⚠️  Amenazas no encontradas, relaciones omitidas: {', '.join(sorted(missing))}")
+        return resolved
+
+    @classmethod
+    def _load_amenazas(cls, rows):
+        """Amenazas MAGERIT 3.2: se actualizan por código"""
+        from app.risks.models import Amenaza
+
+        rows = [
+            {
+                'codigo': row['codigo'],
+                'nombre': row['nombre'],
+                'descripcion': row['descripcion'],
+                'grupo': row['grupo'],
+                # Por defecto todas afectan todas las dimensiones
+                'afecta_confidencialidad': True,
+                'afecta_integridad': True,
+                'afecta_disponibilidad': True,
+            }
+            for row in rows
+        ]
+        cls._upsert(Amenaza.__table__, rows, ['codigo'], ['nombre', 'descripcion', 'grupo'])
+
+    @classmethod
+    def _load_controles(cls, rows):
+        """Controles ISO/IEC 27002:2022: se actualizan por código"""
+        from app.risks.models import ControlISO27002
+
+        now = datetime.utcnow()
+        rows = [
+            dict(row, tipo_control='PREVENTIVO', created_at=now, updated_at=now)
+            for row in rows
+        ]
+        cls._upsert(
+            ControlISO27002.__table__, rows, ['codigo'],
+            ['nombre', 'categoria', 'descripcion', 'updated_at']
+        )
+
+    @classmethod
+    def _load_controles_amenazas(cls, rows):
+        """Relaciones control-amenaza: las existentes se conservan (efectividad ajustable)"""
+        from app.risks.models import ControlAmenaza
+
+        cls._upsert(
+            ControlAmenaza.__table__, cls._amenaza_ids(rows), ['control_codigo', 'amenaza_id'], None
+        )
+
+    @classmethod
+    def _load_amenazas_recursos(cls, rows):
+        """Relaciones amenaza-recurso-tipo: se actualiza la frecuencia base"""
+        from app.risks.models import AmenazaRecursoTipo
+
+        cls._upsert(
+            AmenazaRecursoTipo.__table__, cls._amenaza_ids(rows),
+            ['amenaza_id', 'tipo_recurso', 'dimension_afectada'], ['frecuencia_base']
+        )
+
+    @staticmethod
+    def _load_plantillas_tareas(rows):
+        """
+        Plantillas de tareas ISO 27001: solo se añaden las que no existen (por título)
+
+        Las plantillas son editables, por lo que las existentes no se modifican.
+        """
+        from models import db, Role, User
+        from app.models.task import TaskTemplate, TaskCategory, TaskFrequency, TaskPriority
+
+        existing = set(db.session.execute(db.select(TaskTemplate.title)).scalars())
+        roles = dict(db.session.execute(db.select(Role.name, Role.id)).all())
+        admin_id = db.session.execute(
+            db.select(User.id).where(User.username == 'admin')
+        ).scalar()
+
+        now = datetime.utcnow()
+        new_rows = [
+            {
+                'title': row['title'],
+                'description': row['description'],
+                'category': TaskCategory[row['category']],
+                'frequency': TaskFrequency[row['frequency']],
+                'priority': TaskPriority[row['priority']],
+                'iso_control': row.get('iso_control'),
+                'estimated_hours': row.get('estimated_hours'),
+                'default_role_id': roles.get(TEMPLATE_CATEGORY_ROLES.get(row['category'])),
+                'notify_days_before': row.get('notify_days_before', 7),
+                'requires_evidence': row.get('requires_evidence', False),
+                'requires_approval': row.get('requires_approval', False),
+                'checklist_template': row.get('checklist_template'),
+                'is_active': True,
+                'created_by_id': admin_id,
+                'created_at': now,
+                'next_generation_at': now,
+            }
+            for row in rows
+            if row['title'] not in existing
+        ]
+        if new_rows:
+            db.session.execute(db.insert(TaskTemplate), new_rows)
@@ -0,0 +1,211 @@
+"""
+Selección de Contexto para la Verificación con IA
+Trocea el documento y la base de conocimiento ISO, los indexa con BM25 (índice
+léxico local, sin servicios externos) y, para cada control, elige los
+fragmentos más relevantes dentro de un presupuesto de tokens.
+
+El índice de la base de conocimiento se mantiene en memoria mientras no
+cambie su corpus; el del documento se construye una vez por verificación.
+"""
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from app.services.document_text_service import DocumentTextService
+
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Codificación de tiktoken usada para contar tokens
+TOKEN_ENCODING = 'cl100k_base'
+
+# Caracteres por token estimados cuando tiktoken no tiene la codificación disponible
+CHARS_PER_TOKEN = 4
+
+# Separador entre fragmentos seleccionados
+PASSAGE_SEPARATOR = '\n[...]\n'
+
+# Palabras sin valor para la búsqueda (español e inglés)
+STOPWORDS = frozenset("""
+a al algo como con cual cuando de del desde donde el ella ellos en entre es esa ese eso esta este
+esto estos fue ha han hay la las le les lo los mas más no o para pero por que qué se sea ser si sí sin
+sobre su sus también tiene un una uno unos y ya
+an and are as at be by for from has have in is it its of on or shall should that the their this
+to was which will with
+""".split())
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def tokenize(text):
+    """Términos de búsqueda de un texto: palabras en minúsculas sin las vacías"""
+    return [
+        word for word in _WORD_RE.findall(text.lower())
+        if len(word) > 1 and word not in STOPWORDS
+    ]
+
+
+def _get_encoding():
+    """Codificación de tiktoken, o False si no se puede cargar (p. ej. sin red)"""
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+            except Exception as e:
+                logger.warning(f"⚠️  tiktoken no disponible, se estiman los tokens por caracteres: {str(e)}")
+                _encoding = False
+        return _encoding
+
+
+def count_tokens(text):
+    """Número de tokens de un texto"""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text, max_tokens):
+    """Recorta un texto a max_tokens tokens"""
+    encoding = _get_encoding()
+    if encoding:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+class PassageIndex:
+    """Índice BM25 de fragmentos de texto"""
+
+    def __init__(self, passages):
+        """
+        Args:
+            passages: Fragmentos {'text', ...} en orden de aparición; el resto
+                de claves (p. ej. 'source', 'page') se conserva
+        """
+        self.passages = passages
+        self._postings = defaultdict(list)
+        self._lengths = []
+
+        for position, passage in enumerate(passages):
+            terms = Counter(tokenize(passage['text']))
+            self._lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self._postings[term].append((position, frequency))
+
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0
+        self._token_counts = [None] * len(passages)
+
+    @classmethod
+    def from_text(cls, text):
+        """Índice de un documento troceado por párrafos"""
+        return cls([{'text': chunk} for chunk in DocumentTextService.split_chunks(text)])
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query):
+        """
+        Fragmentos que contienen algún término de la consulta
+
+        Returns:
+            list: (puntuación, posición) de mayor a menor puntuación
+        """
+        scores = defaultdict(float)
+        total = len(self.passages)
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[position] / self._avg_length)
+                scores[position] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        return sorted(((score, position) for position, score in scores.items()), key=lambda item: (-item[0], item[1]))
+
+    def select(self, query, token_budget, label=None):
+        """
+        Texto de los fragmentos más relevantes para la consulta dentro del presupuesto
+
+        Los fragmentos se devuelven en su orden original. Si ninguno contiene
+        términos de la consulta se usan los primeros del texto.
+
+        Args:
+            query: Texto de la consulta (título y descripción del control)
+            token_budget: Tokens máximos del contexto
+            label: Función opcional fragmento -> cabecera (p. ej. norma y página)
+        """
+        ranked = [position for _, position in self.search(query)]
+        if not ranked:
+            ranked = range(len(self.passages))
+
+        selected = []
+        remaining = token_budget
+        for position in ranked:
+            tokens = self._passage_tokens(position, label)
+            if tokens <= remaining:
+                selected.append(position)
+                remaining -= tokens
+            elif not selected:
+                # El fragmento más relevante no cabe entero: se recorta
+                return truncate_tokens(self._passage_text(position, label), token_budget)
+            if remaining <= 0:
+                break
+
+        return PASSAGE_SEPARATOR.join(self._passage_text(position, label) for position in sorted(selected))
+
+    def _passage_text(self, position, label):
+        passage = self.passages[position]
+        if label:
+            return f"{label(passage)}\n{passage['text']}"
+        return passage['text']
+
+    def _passage_tokens(self, position, label):
+        if self._token_counts[position] is None:
+            # Incluye el separador para no exceder el presupuesto al unir los fragmentos
+            self._token_counts[position] = count_tokens(self._passage_text(position, label) + PASSAGE_SEPARATOR)
+        return self._token_counts[position]
+
+
+class ContextRetrievalService:
+    """Índices BM25 del documento y de la base de conocimiento"""
+
+    # Índice por carpeta de conocimiento: ruta -> (corpus, índice)
+    _knowledge_indexes = {}
+    _knowledge_lock = threading.Lock()
+
+    @classmethod
+    def knowledge_index(cls, knowledge_path):
+        """Índice del corpus de la base de conocimiento, reconstruido solo si cambia"""
+        corpus = DocumentTextService.knowledge_corpus(knowledge_path)
+        with cls._knowledge_lock:
+            cached = cls._knowledge_indexes.get(knowledge_path)
+            if cached and cached[0] is corpus:
+                return cached[1]
+
+        index = PassageIndex(corpus)
+        with cls._knowledge_lock:
+            cls._knowledge_indexes[knowledge_path] = (corpus, index)
+        return index
+
+    @staticmethod
+    def knowledge_label(passage):
+        """Cabecera de un fragmento de la base de conocimiento"""
+        return f"[{passage['source']}, pág. {passage['page'] + 1}]"
+
+    @staticmethod
+    def control_query(control):
+        """Consulta de búsqueda de un control SOA"""
+        return f"{control['title']} {control['description']} {control['category']}"
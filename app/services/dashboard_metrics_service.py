@@ -0,0 +1,535 @@
+"""
+Servicio de Métricas del Dashboard
+Calcula los contadores del dashboard con una consulta agregada por tabla
+(COUNT ... FILTER (WHERE ...) y GROUP BY) en lugar de un COUNT(*) por KPI,
+y guarda el resultado en una caché en memoria del proceso con TTL corto.
+
+La caché se invalida por tabla: los eventos del Engine registran qué tablas
+se modifican en cada conexión y, al confirmar la transacción, se descartan
+las secciones que dependen de ellas.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, date
+from flask import current_app
+from sqlalchemy import event, func, extract
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+from models import (db, Incident, NonConformity, SOAControl, Audit, Document, DocumentType,
+                    Asset, Service, TrainingSession, IncidentStatus, IncidentSeverity, NCStatus)
+from app.models.task import Task, PeriodicTaskStatus
+from app.models.change import Change, ChangeStatus
+from app.models.audit import (AuditFinding as Finding, AuditCorrectiveAction as CorrectiveAction,
+                              FindingStatus, AuditActionStatus)
+from app.risks.models import EvaluacionRiesgo, Riesgo, ResumenRiesgo
+
+
+# Sección de la caché -> tablas de las que depende
+SECCIONES = {
+    'soa': (SOAControl.__tablename__,),
+    'risks': (ResumenRiesgo.__tablename__, Riesgo.__tablename__, EvaluacionRiesgo.__tablename__),
+    'incidents': (Incident.__tablename__,),
+    'nonconformities': (NonConformity.__tablename__,),
+    'tasks': (Task.__tablename__,),
+    'documents': (Document.__tablename__, DocumentType.__tablename__),
+    'changes': (Change.__tablename__,),
+    'audits': (Audit.__tablename__, Finding.__tablename__, CorrectiveAction.__tablename__),
+    'assets': (Asset.__tablename__,),
+    'services': (Service.__tablename__,),
+    'training': (TrainingSession.__tablename__,),
+}
+
+# Tabla -> secciones afectadas por una escritura en ella
+_SECCIONES_POR_TABLA = {}
+for _seccion, _tablas in SECCIONES.items():
+    for _tabla in _tablas:
+        _SECCIONES_POR_TABLA.setdefault(_tabla, set()).add(_seccion)
+
+CLASIFICACIONES = ['MUY_ALTO', 'ALTO', 'MEDIO', 'BAJO', 'MUY_BAJO']
+
+# Clave de conn.info con las tablas modificadas en la transacción en curso
+_CLAVE_TABLAS = 'dashboard_metrics_tablas'
+
+
+def _enum_value(valor):
+    return valor.value if hasattr(valor, 'value') else str(valor)
+
+
+class DashboardMetricsService:
+    """Contadores agregados del dashboard con caché TTL invalidada por escritura"""
+
+    _cache = {}
+    _generaciones = {}
+    _lock = threading.Lock()
+
+    # ==================== CACHÉ ====================
+
+    @classmethod
+    def _ttl(cls):
+        return current_app.config.get('DASHBOARD_METRICS_TTL', 60)
+
+    @classmethod
+    def _cached(cls, seccion, calcular, *args):
+        """
+        Devuelve el valor en caché de (seccion, *args) o lo calcula
+
+        Si la sección se invalida mientras se calcula, el resultado se
+        devuelve pero no se guarda (podría reflejar datos anteriores).
+        """
+        clave = (seccion,) + args
+        ahora = time.monotonic()
+
+        with cls._lock:
+            entrada = cls._cache.get(clave)
+            if entrada and entrada[0] > ahora:
+                return entrada[1]
+            generacion = cls._generaciones.get(seccion, 0)
+
+        valor = calcular(*args)
+
+        with cls._lock:
+            if cls._generaciones.get(seccion, 0) == generacion:
+                cls._cache[clave] = (ahora + cls._ttl(), valor)
+        return valor
+
+    @classmethod
+    def invalidate(cls, *secciones):
+        """Descarta las secciones indicadas (todas si no se indica ninguna)"""
+        with cls._lock:
+            secciones = secciones or tuple(SECCIONES)
+            for seccion in secciones:
+                cls._generaciones[seccion] = cls._generaciones.get(seccion, 0) + 1
+            cls._cache = {
+                clave: entrada for clave, entrada in cls._cache.items()
+                if clave[0] not in secciones
+            }
+
+    @classmethod
+    def invalidate_tables(cls, tablas):
+        """Descarta las secciones que dependen de las tablas modificadas"""
+        secciones = set()
+        for tabla in tablas:
+            secciones |= _SECCIONES_POR_TABLA.get(tabla, set())
+        if secciones:
+            cls.invalidate(*secciones)
+
+    # ==================== SOA ====================
+
+    @classmethod
+    def soa(cls):
+        """Controles SOA totales, implementados y aplicables"""
+        return cls._cached('soa', cls._calcular_soa)
+
+    @staticmethod
+    def _calcular_soa():
+        implementado = SOAControl.implementation_status == 'implemented'
+        aplicable = SOAControl.applicability_status == 'aplicable'
+        fila = db.session.query(
+            func.count(SOAControl.id),
+            func.count(SOAControl.id).filter(implementado),
+            func.count(SOAControl.id).filter(aplicable),
+            func.count(SOAControl.id).filter(aplicable, implementado)
+        ).one()
+        return {
+            'total': fila[0],
+            'implemented': fila[1],
+            'applicable': fila[2],
+            'applicable_implemented': fila[3]
+        }
+
+    # ==================== RIESGOS ====================
+
+    @classmethod
+    def risks(cls):
+        """Riesgos por clasificación efectiva"""
+        return cls._cached('risks', cls._calcular_riesgos)
+
+    @staticmethod
+    def _calcular_riesgos():
+        # Resumen materializado: se refresca junto con cada escritura de riesgos
+        filas = db.session.query(
+            ResumenRiesgo.clasificacion, func.sum(ResumenRiesgo.cantidad)
+        ).group_by(ResumenRiesgo.clasificacion).all()
+        conteos = {clasificacion: int(cantidad) for clasificacion, cantidad in filas}
+
+        by_classification = {c: conteos.get(c, 0) for c in CLASIFICACIONES}
+        return {
+            'total': sum(conteos.values()),
+            'high': by_classification['MUY_ALTO'] + by_classification['ALTO'],
+            'by_classification': by_classification
+        }
+
+    # ==================== INCIDENTES ====================
+
+    @classmethod
+    def incidents(cls):
+        """Incidentes abiertos, del último mes y tiempo medio de resolución"""
+        return cls._cached('incidents', cls._calcular_incidentes)
+
+    @staticmethod
+    def _calcular_incidentes():
+        cerrados = [IncidentStatus.RESOLVED, IncidentStatus.CLOSED]
+        fila = db.session.query(
+            func.count(Incident.id).filter(~Incident.status.in_(cerrados)),
+            func.count(Incident.id).filter(Incident.created_at >= datetime.utcnow() - timedelta(days=30))
+        ).one()
+
+        # Tiempo de respuesta: solo las dos fechas, sin cargar los incidentes
+        resueltos = db.session.query(Incident.discovery_date, Incident.resolution_date).filter(
+            Incident.status.in_(cerrados),
+            Incident.resolution_date.isnot(None)
+        ).all()
+        if resueltos:
+            total_dias = sum(
+                (resolucion - descubrimiento).days
+                for descubrimiento, resolucion in resueltos
+                if descubrimiento
+            )
+            avg_response_days = round(total_dias / len(resueltos), 2)
+        else:
+            avg_response_days = 0
+
+        return {
+            'open': fila[0],
+            'last_30_days': fila[1],
+            'avg_response_days': avg_response_days
+        }
+
+    @classmethod
+    def incident_trends(cls):
+        """Incidentes por mes de los últimos 6 meses"""
+        return cls._cached('incidents', cls._calcular_tendencia_incidentes, 'trends')
+
+    @staticmethod
+    def _calcular_tendencia_incidentes(_clave):
+        today = datetime.utcnow()
+        filas = db.session.query(Incident.created_at, Incident.severity).filter(
+            Incident.created_at >= today - timedelta(days=180)
+        ).all()
+
+        months = {}
+        for i in range(6):
+            month_date = today - timedelta(days=30*i)
+            months[month_date.strftime('%Y-%m')] = {
+                'name': month_date.strftime('%b %Y'), 'count': 0, 'critical': 0
+            }
+
+        for created_at, severity in filas:
+            month_key = created_at.strftime('%Y-%m')
+            if month_key in months:
+                months[month_key]['count'] += 1
+                if severity in (IncidentSeverity.CRITICAL, IncidentSeverity.HIGH):
+                    months[month_key]['critical'] += 1
+
+        sorted_months = [m for _, m in sorted(months.items())]
+        return {
+            'labels': [m['name'] for m in sorted_months],
+            'data': [m['count'] for m in sorted_months],
+            'critical': [m['critical'] for m in sorted_months]
+        }
+
+    # ==================== NO CONFORMIDADES ====================
+
+    @classmethod
+    def nonconformities(cls):
+        """No conformidades totales, abiertas, vencidas y cerradas"""
+        return cls._cached('nonconformities', cls._calcular_no_conformidades)
+
+    @staticmethod
+    def _calcular_no_conformidades():
+        cerrada = NonConformity.status == NCStatus.CLOSED
+        fila = db.session.query(
+            func.count(NonConformity.id),
+            func.count(NonConformity.id).filter(~cerrada),
+            func.count(NonConformity.id).filter(NonConformity.overdue_condition()),
+            func.count(NonConformity.id).filter(cerrada)
+        ).one()
+        return {
+            'total': fila[0],
+            'open': fila[1],
+            'overdue': fila[2],
+            'closed': fila[3]
+        }
+
+    # ==================== TAREAS ====================
+
+    @classmethod
+    def tasks(cls, user_id=None):
+        """Tareas totales, completadas, vencidas y pendientes del usuario"""
+        return cls._cached('tasks', cls._calcular_tareas, user_id)
+
+    @staticmethod
+    def _calcular_tareas(user_id):
+        pendiente = Task.status.in_([PeriodicTaskStatus.PENDIENTE, PeriodicTaskStatus.EN_PROGRESO])
+        fila = db.session.query(
+            func.count(Task.id),
+            func.count(Task.id).filter(Task.status == PeriodicTaskStatus.COMPLETADA),
+            func.count(Task.id).filter(
+                Task.due_date < datetime.utcnow(), Task.status == PeriodicTaskStatus.VENCIDA
+            ),
+            func.count(Task.id).filter(Task.assigned_to_id == user_id, pendiente)
+        ).one()
+        return {
+            'total': fila[0],
+            'completed': fila[1],
+            'overdue': fila[2],
+            'my_pending': fila[3]
+        }
+
+    @classmethod
+    def task_trends(cls):
+        """Tareas creadas, completadas y vencidas por mes de los últimos 6 meses"""
+        return cls._cached('tasks', cls._calcular_tendencia_tareas, 'trends')
+
+    @staticmethod
+    def _calcular_tendencia_tareas(_clave):
+        today = datetime.utcnow()
+        filas = db.session.query(Task.created_at, Task.status).filter(
+            Task.created_at >= today - timedelta(days=180)
+        ).all()
+
+        months = {}
+        for i in range(6):
+            month_date = today - timedelta(days=30*i)
+            months[month_date.strftime('%Y-%m')] = {
+                'name': month_date.strftime('%b %Y'), 'created': 0, 'completed': 0, 'overdue': 0
+            }
+
+        for created_at, status in filas:
+            month_key = created_at.strftime('%Y-%m')
+            if month_key in months:
+                months[month_key]['created'] += 1
+                if status == PeriodicTaskStatus.COMPLETADA:
+                    months[month_key]['completed'] += 1
+                elif status == PeriodicTaskStatus.VENCIDA:
+                    months[month_key]['overdue'] += 1
+
+        sorted_months = [m for _, m in sorted(months.items())]
+        return {
+            'labels': [m['name'] for m in sorted_months],
+            'created': [m['created'] for m in sorted_months],
+            'completed': [m['completed'] for m in sorted_months],
+            'overdue': [m['overdue'] for m in sorted_months]
+        }
+
+    # ==================== DOCUMENTOS ====================
+
+    @classmethod
+    def documents(cls):
+        """Documentos por estado y tipo, y revisiones vencidas"""
+        return cls._cached('documents', cls._calcular_documentos)
+
+    @staticmethod
+    def _calcular_documentos():
+        por_estado = db.session.query(
+            Document.status,
+            func.count(Document.id),
+            func.count(Document.id).filter(
+                Document.next_review_date < date.today(),
+                Document.status.in_(['approved', 'review'])
+            )
+        ).group_by(Document.status).all()
+
+        por_tipo = db.session.query(
+            DocumentType.name, func.count(Document.id)
+        ).join(Document.document_type).group_by(DocumentType.name).all()
+
+        by_status = {status: count for status, count, _ in por_estado if status}
+        return {
+            'total': sum(count for _, count, _ in por_estado),
+            'overdue_for_review': sum(vencidos for _, _, vencidos in por_estado),
+            'approved': by_status.get('approved', 0),
+            'review': by_status.get('review', 0),
+            'by_status': by_status,
+            'by_type': {name: count for name, count in por_tipo if name}
+        }
+
+    # ==================== CAMBIOS ====================
+
+    @classmethod
+    def changes(cls):
+        """Cambios pendientes, aprobados este mes y tasa de éxito"""
+        return cls._cached('changes', cls._calcular_cambios)
+
+    @staticmethod
+    def _calcular_cambios():
+        pendientes = [
+            ChangeStatus.SUBMITTED,
+            ChangeStatus.UNDER_REVIEW,
+            ChangeStatus.PENDING_APPROVAL,
+            ChangeStatus.APPROVED,
+            ChangeStatus.SCHEDULED,
+            ChangeStatus.IN_PROGRESS
+        ]
+        exitosos = [ChangeStatus.IMPLEMENTED, ChangeStatus.CLOSED]
+        finalizados = exitosos + [ChangeStatus.FAILED, ChangeStatus.ROLLED_BACK]
+        first_day_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        fila = db.session.query(
+            func.count(Change.id).filter(Change.status.in_(pendientes)),
+            func.count(Change.id).filter(
+                Change.status.in_([ChangeStatus.APPROVED] + exitosos),
+                Change.updated_at >= first_day_month
+            ),
+            func.count(Change.id).filter(Change.status.in_(finalizados)),
+            func.count(Change.id).filter(Change.status.in_(exitosos))
+        ).one()
+        return {
+            'pending': fila[0],
+            'approved_this_month': fila[1],
+            'finished': fila[2],
+            'successful': fila[3]
+        }
+
+    # ==================== AUDITORÍAS ====================
+
+    @classmethod
+    def audits(cls):
+        """Auditorías del año, hallazgos abiertos/por severidad y acciones vencidas"""
+        return cls._cached('audits', cls._calcular_auditorias)
+
+    @staticmethod
+    def _calcular_auditorias():
+        today = date.today()
+        del_anio = extract('year', Audit.start_date) == today.year
+        auditorias = db.session.query(
+            func.count(Audit.id).filter(del_anio),
+            func.count(Audit.id).filter(del_anio, Audit.status.in_(['completed', 'closed']))
+        ).one()
+
+        abiertos = Finding.status.in_([FindingStatus.OPEN, FindingStatus.ACTION_PLAN_PENDING,
+                                       FindingStatus.ACTION_PLAN_APPROVED, FindingStatus.IN_TREATMENT])
+        hallazgos = db.session.query(
+            Finding.risk_level,
+            func.count(Finding.id),
+            func.count(Finding.id).filter(abiertos)
+        ).group_by(Finding.risk_level).all()
+        por_severidad = {nivel: count for nivel, count, _ in hallazgos}
+
+        acciones_vencidas = db.session.query(func.count(CorrectiveAction.id)).filter(
+            CorrectiveAction.planned_completion_date < today,
+            CorrectiveAction.status.in_([AuditActionStatus.PENDING, AuditActionStatus.IN_PROGRESS])
+        ).scalar()
+
+        return {
+            'total_this_year': auditorias[0],
+            'completed_this_year': auditorias[1],
+            'open_findings': sum(abiertos for _, _, abiertos in hallazgos),
+            'findings_by_severity': {
+                nivel: por_severidad.get(nivel, 0)
+                for nivel in ('critical', 'high', 'medium', 'low')
+            },
+            'overdue_corrective_actions': acciones_vencidas
+        }
+
+    # ==================== ACTIVOS Y SERVICIOS ====================
+
+    @classmethod
+    def assets(cls):
+        """Activos por categoría y estado, y activos críticos"""
+        return cls._cached('assets', cls._calcular_activos)
+
+    @staticmethod
+    def _calcular_activos():
+        filas = db.session.query(
+            Asset.category,
+            Asset.status,
+            func.count(Asset.id),
+            func.count(Asset.id).filter(Asset.criticality >= 8)
+        ).group_by(Asset.category, Asset.status).all()
+
+        by_category, by_status = {}, {}
+        for category, status, count, _ in filas:
+            if category:
+                key = _enum_value(category)
+                by_category[key] = by_category.get(key, 0) + count
+            if status:
+                key = _enum_value(status)
+                by_status[key] = by_status.get(key, 0) + count
+
+        return {
+            'by_category': by_category,
+            'by_status': by_status,
+            'critical_count': sum(criticos for _, _, _, criticos in filas),
+            'total': sum(count for _, _, count, _ in filas)
+        }
+
+    @classmethod
+    def services(cls):
+        """Servicios por tipo y estado, críticos y con RTO definido"""
+        return cls._cached('services', cls._calcular_servicios)
+
+    @staticmethod
+    def _calcular_servicios():
+        filas = db.session.query(
+            Service.service_type,
+            Service.status,
+            func.count(Service.id),
+            func.count(Service.id).filter(Service.criticality >= 8),
+            func.count(Service.id).filter(Service.rto.isnot(None))
+        ).group_by(Service.service_type, Service.status).all()
+
+        by_type, by_status = {}, {}
+        for service_type, status, count, _, _ in filas:
+            if service_type:
+                key = _enum_value(service_type)
+                by_type[key] = by_type.get(key, 0) + count
+            if status:
+                key = _enum_value(status)
+                by_status[key] = by_status.get(key, 0) + count
+
+        return {
+            'by_type': by_type,
+            'by_status': by_status,
+            'critical_count': sum(fila[3] for fila in filas),
+            'with_rto_rpo': sum(fila[4] for fila in filas),
+            'total': sum(fila[2] for fila in filas)
+        }
+
+    # ==================== FORMACIÓN ====================
+
+    @classmethod
+    def training(cls):
+        """Sesiones de formación próximas y del año en curso"""
+        return cls._cached('training', cls._calcular_formacion)
+
+    @staticmethod
+    def _calcular_formacion():
+        today = datetime.utcnow()
+        del_anio = extract('year', TrainingSession.date) == today.year
+        fila = db.session.query(
+            func.count(TrainingSession.id).filter(
+                TrainingSession.date >= today,
+                TrainingSession.date <= today + timedelta(days=30)
+            ),
+            func.count(TrainingSession.id).filter(del_anio, TrainingSession.status == 'COMPLETED'),
+            func.count(TrainingSession.id).filter(del_anio)
+        ).one()
+        return {
+            'upcoming_sessions': fila[0],
+            'completed_this_year': fila[1],
+            'total_this_year': fila[2]
+        }
+
+
+# ==================== INVALIDACIÓN POR ESCRITURA ====================
+
+@event.listens_for(Engine, 'after_execute')
+def _registrar_tablas_modificadas(conn, clauseelement, multiparams, params, execution_options, result):
+    """Anota en la conexión las tablas afectadas por INSERT/UPDATE/DELETE"""
+    if isinstance(clauseelement, UpdateBase):
+        tabla = getattr(clauseelement.table, 'name', None)
+        if tabla in _SECCIONES_POR_TABLA:
+            conn.info.setdefault(_CLAVE_TABLAS, set()).add(tabla)
+
+
+@event.listens_for(Engine, 'commit')
+def _invalidar_al_confirmar(conn):
+    tablas = conn.info.pop(_CLAVE_TABLAS, None)
+    if tablas:
+        DashboardMetricsService.invalidate_tables(tablas)
+
+
+@event.listens_for(Engine, 'rollback')
+def _descartar_al_revertir(conn):
+    conn.info.pop(_CLAVE_TABLAS, None)
@@ -0,0 +1,282 @@
+"""
+Extracción de Texto de Documentos
+Extrae el texto de PDF, DOCX y TXT para la verificación con IA y lo guarda
+en caché en disco, junto al propio archivo (<archivo>.text.json), con la
+clave SHA-256 del contenido + versión del extractor.
+
+Los PDF grandes se extraen por rangos de páginas en un pool de procesos.
+La base de conocimiento (normas ISO en KNOWLEDGE_BASE_PATH) se mantiene en
+memoria como corpus troceado mientras no cambie ningún archivo de la carpeta.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+import docx
+
+
+logger = logging.getLogger(__name__)
+
+# Incrementar al cambiar la extracción: invalida las cachés existentes
+EXTRACTOR_VERSION = 1
+
+# Sufijo del archivo de caché junto al documento
+CACHE_SUFFIX = '.text.json'
+
+# Páginas a partir de las cuales un PDF se extrae en paralelo
+PARALLEL_MIN_PAGES = 100
+
+# Páginas por tarea del pool de procesos
+PAGES_PER_TASK = 10
+
+# Tamaño aproximado (caracteres) de los fragmentos para la búsqueda de contexto
+CHUNK_CHARS = 800
+
+# Páginas de cada norma usadas como contexto ISO en el prompt
+KNOWLEDGE_CONTEXT_PAGES = 10
+
+# Caracteres máximos del contexto ISO
+KNOWLEDGE_CONTEXT_CHARS = 10000
+
+SUPPORTED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
+
+
+def _extract_pdf_pages(file_path, start, stop):
+    """Texto de las páginas [start, stop) de un PDF (se ejecuta en el pool de procesos)"""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
+
+class DocumentTextService:
+    """Servicio de extracción de texto con caché por contenido"""
+
+    # Corpus de conocimiento por carpeta: ruta -> (firma, fragmentos)
+    _knowledge_cache = {}
+    _knowledge_lock = threading.Lock()
+
+    # ==================== DOCUMENTOS ====================
+
+    @classmethod
+    def extract_text(cls, file_path):
+        """Texto completo de un documento"""
+        return '\n'.join(cls.extract_pages(file_path)).strip()
+
+    @classmethod
+    def extract_pages(cls, file_path):
+        """
+        Texto de cada página del documento (DOCX y TXT devuelven una sola página)
+
+        Se usa la caché si corresponde al mismo contenido y versión del
+        extractor; si el tamaño y la fecha coinciden no se vuelve a leer el archivo.
+        """
+        if not os.path.exists(file_path):
+            raise Exception(f"Archivo no encontrado: {file_path}")
+
+        ext = file_path.lower().split('.')[-1]
+        if ext not in SUPPORTED_EXTENSIONS:
+            raise Exception(f"Formato de archivo no soportado: {ext}")
+
+        stat = os.stat(file_path)
+        cached = cls._read_cache(file_path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['pages']
+
+        sha256 = cls._hash_file(file_path)
+        if cached and cached['sha256'] == sha256:
+            cls._write_cache(file_path, dict(cached, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+            return cached['pages']
+
+        if ext == 'pdf':
+            pages = cls._extract_pdf(file_path)
+        elif ext in ['doc', 'docx']:
+            pages = cls._extract_docx(file_path)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                pages = [f.read()]
+
+        cls._write_cache(file_path, {
+            'extractor_version': EXTRACTOR_VERSION,
+            'sha256': sha256,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'pages': pages
+        })
+        return pages
+
+    @classmethod
+    def content_hash(cls, file_path):
+        """SHA-256 del contenido del documento (el de la caché si el archivo no ha cambiado)"""
+        stat = os.stat(file_path)
+        cached = cls._read_cache(file_path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+        return cls._hash_file(file_path)
+
+    @classmethod
+    def _extract_pdf(cls, file_path):
+        """Extrae las páginas de un PDF, en paralelo si es grande"""
+        try:
+            with open(file_path, 'rb') as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                page_count = len(pdf_reader.pages)
+                ranges = [
+                    (start, min(start + PAGES_PER_TASK, page_count))
+                    for start in range(0, page_count, PAGES_PER_TASK)
+                ]
+                workers = min(len(ranges), cls._worker_count())
+
+                # Con pocas páginas o un solo procesador no compensa arrancar procesos
+                if page_count < PARALLEL_MIN_PAGES or workers < 2:
+                    return [page.extract_text() or '' for page in pdf_reader.pages]
+
+            # spawn: el proceso padre puede tener hilos (planificador, worker de trabajos)
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = executor.map(
+                    _extract_pdf_pages,
+                    [os.path.abspath(file_path)] * len(ranges),
+                    [start for start, _ in ranges],
+                    [stop for _, stop in ranges]
+                )
+                return [text for chunk in results for text in chunk]
+
+        except Exception as e:
+            raise Exception(f"Error al extraer texto del PDF: {str(e)}")
+
+    @staticmethod
+    def _extract_docx(file_path):
+        """Extrae el texto de un DOCX como una sola página"""
+        try:
+            doc = docx.Document(file_path)
+            return ['\n'.join(paragraph.text for paragraph in doc.paragraphs)]
+        except Exception as e:
+            raise Exception(f"Error al extraer texto del DOCX: {str(e)}")
+
+    @staticmethod
+    def _worker_count():
+        from flask import current_app, has_app_context
+
+        if has_app_context():
+            workers = current_app.config.get('TEXT_EXTRACTION_WORKERS')
+            if workers:
+                return workers
+        return os.cpu_count() or 1
+
+    # ==================== CACHÉ EN DISCO ====================
+
+    @staticmethod
+    def _cache_path(file_path):
+        return f'{file_path}{CACHE_SUFFIX}'
+
+    @classmethod
+    def _read_cache(cls, file_path):
+        """Caché del documento si existe y es de la versión actual del extractor"""
+        try:
+            with open(cls._cache_path(file_path), 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get('extractor_version') != EXTRACTOR_VERSION:
+            return None
+        return cached
+
+    @classmethod
+    def _write_cache(cls, file_path, data):
+        """Escribe la caché de forma atómica; un fallo solo impide reutilizarla"""
+        cache_path = cls._cache_path(file_path)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar la caché de texto de {file_path}: {str(e)}")
+
+    @staticmethod
+    def _hash_file(file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    # ==================== BASE DE CONOCIMIENTO ====================
+
+    @classmethod
+    def knowledge_corpus(cls, knowledge_path):
+        """
+        Corpus troceado de los PDF de la base de conocimiento
+
+        Returns:
+            list: Fragmentos {'source', 'page', 'text'} en orden de archivo y página
+        """
+        if not os.path.isdir(knowledge_path):
+            return []
+
+        signature = cls._knowledge_signature(knowledge_path)
+        with cls._knowledge_lock:
+            cached = cls._knowledge_cache.get(knowledge_path)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        corpus = []
+        for filename, _, _ in signature:
+            if not filename.lower().endswith('.pdf'):
+                continue
+            try:
+                pages = cls.extract_pages(os.path.join(knowledge_path, filename))
+            except Exception as e:
+                logger.warning(f"No se pudo leer {filename}: {str(e)}")
+                continue
+            for page_number, text in enumerate(pages):
+                corpus.extend(
+                    {'source': filename, 'page': page_number, 'text': chunk}
+                    for chunk in cls.split_chunks(text)
+                )
+
+        with cls._knowledge_lock:
+            cls._knowledge_cache[knowledge_path] = (signature, corpus)
+        return corpus
+
+    @classmethod
+    def knowledge_context(cls, knowledge_path):
+        """Contexto ISO del prompt: las primeras páginas de cada norma, limitado en tamaño"""
+        corpus = cls.knowledge_corpus(knowledge_path)
+        context = '\n'.join(
+            chunk['text'] for chunk in corpus if chunk['page'] < KNOWLEDGE_CONTEXT_PAGES
+        )
+        return context[:KNOWLEDGE_CONTEXT_CHARS]
+
+    @staticmethod
+    def _knowledge_signature(knowledge_path):
+        """(nombre, tamaño, fecha) de los archivos de la carpeta, sin las cachés de texto"""
+        signature = []
+        for entry in os.scandir(knowledge_path):
+            if entry.is_file() and not entry.name.endswith(CACHE_SUFFIX):
+                stat = entry.stat()
+                signature.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(sorted(signature))
+
+    @staticmethod
+    def split_chunks(text):
+        """Divide el texto de una página en fragmentos por párrafos de ~CHUNK_CHARS"""
+        chunks = []
+        current = []
+        length = 0
+        for paragraph in text.split('\n'):
+            if length + len(paragraph) > CHUNK_CHARS and current:
+                chunks.append('\n'.join(current))
+                current, length = [], 0
+            current.append(paragraph)
+            length += len(paragraph) + 1
+        if current and any(line.strip() for line in current):
+            chunks.append('\n'.join(current))
+        return chunks
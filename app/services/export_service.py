@@ -0,0 +1,200 @@
+"""
+Servicio de Exportación
+Canal común para exportar listados a CSV, Excel y PDF sin materializar el
+resultado completo: las filas se leen por lotes con cursores del lado del
+servidor (yield_per) y se escriben de forma incremental.
+
+- CSV: respuesta generada en streaming, lote a lote.
+- XLSX: openpyxl en modo write_only sobre un fichero temporal.
+- PDF: flowables generados bajo demanda durante el maquetado de reportlab.
+"""
+import csv
+import io
+import tempfile
+from flask import Response, send_file, stream_with_context
+
+
+# Filas leídas por lote desde la base de datos
+CHUNK_SIZE = 1000
+
+# Tamaño a partir del cual se envía el bloque CSV acumulado
+CSV_FLUSH_BYTES = 64 * 1024
+
+# Filas por tabla en los PDF (la cabecera se repite en cada página)
+PDF_TABLE_ROWS = 200
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class _FlowableStream(list):
+    """
+    Lista de flowables que se rellena desde un generador
+
+    BaseDocTemplate.build consume la lista desde el principio (flowables[0],
+    del flowables[0]); manteniendo solo unos pocos elementos cargados, el
+    documento se maqueta sin construir antes todas sus tablas.
+    """
+
+    def __init__(self, flowables, reserve=8):
+        super().__init__()
+        self._source = iter(flowables)
+        self._reserve = reserve
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._reserve:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+class ExportService:
+    """Exportación incremental de consultas a CSV, XLSX y PDF"""
+
+    @staticmethod
+    def iter_query(query, chunk_size=CHUNK_SIZE):
+        """
+        Recorre una consulta por lotes con un cursor del lado del servidor
+
+        Las relaciones que se vayan a exportar deben cargarse con joinedload
+        (muchos-a-uno) para no lanzar una consulta por fila.
+        """
+        return query.yield_per(chunk_size)
+
+    # ==================== CSV ====================
+
+    @staticmethod
+    def csv_response(rows, headers, filename):
+        """
+        Respuesta CSV generada en streaming
+
+        Args:
+            rows: Iterable de filas (listas de valores)
+            headers: Cabeceras de columna
+            filename: Nombre del fichero descargado
+        """
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            writer.writerow(headers)
+
+            for row in rows:
+                writer.writerow(row)
+                if buffer.tell() >= CSV_FLUSH_BYTES:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+
+            yield buffer.getvalue()
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/csv',
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'Content-Type': 'text/csv; charset=utf-8'
+            }
+        )
+
+    # ==================== EXCEL ====================
+
+    @staticmethod
+    def xlsx_response(rows, headers, filename, title, column_widths=None,
+                      header_color='4472C4'):
+        """
+        Respuesta XLSX escrita con openpyxl en modo write_only
+
+        En modo write_only las filas se vuelcan a disco según se añaden, por
+        lo que el ancho de columna se fija de antemano (column_widths) en
+        lugar de calcularse recorriendo todas las celdas.
+
+        Raises:
+            ImportError: si openpyxl no está instalado
+        """
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Alignment, PatternFill
+        from openpyxl.utils import get_column_letter
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(title)
+
+        for col, width in enumerate(column_widths or [], start=1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+
+        header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type='solid')
+        header_font = Font(color='FFFFFF', bold=True)
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = Alignment(horizontal='center')
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for row in rows:
+            ws.append(row)
+
+        output = tempfile.TemporaryFile()
+        wb.save(output)
+        output.seek(0)
+
+        return send_file(output, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=filename)
+
+    # ==================== PDF ====================
+
+    @staticmethod
+    def pdf_table_chunks(header, rows, col_widths, style, chunk_size=PDF_TABLE_ROWS):
+        """
+        Genera la tabla de datos como una secuencia de tablas de chunk_size filas
+
+        Evita maquetar (y partir entre páginas) una única tabla con todas las filas.
+        """
+        from reportlab.platypus import Table, TableStyle
+
+        table_style = TableStyle(style)
+        chunk = []
+
+        def build(data):
+            table = Table([header] + data, colWidths=col_widths, repeatRows=1)
+            table.setStyle(table_style)
+            return table
+
+        emitted = False
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield build(chunk)
+                emitted = True
+                chunk = []
+
+        # Sin filas se emite igualmente la cabecera
+        if chunk or not emitted:
+            yield build(chunk)
+
+    @staticmethod
+    def pdf_response(flowables, filename, pagesize=None):
+        """
+        Respuesta PDF maquetada a partir de un generador de flowables
+
+        Raises:
+            ImportError: si reportlab no está instalado
+        """
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+
+        output = tempfile.TemporaryFile()
+        doc = SimpleDocTemplate(output, pagesize=pagesize or A4)
+        doc.build(_FlowableStream(flowables))
+        output.seek(0)
+
+        return send_file(output, mimetype='application/pdf', as_attachment=True, download_name=filename)
@@ -12,6 +12,10 @@ from models import db, User
 import json
 
 
+# Días hacia atrás del análisis de recurrencia
+RECURRENCE_WINDOW_DAYS = 730
+
+
 class FindingService:
     """Servicio para gestión de hallazgos de auditoría"""
 
@@ -23,6 +27,9 @@ class FindingService:
         FindingType.OPPORTUNITY_IMPROVEMENT: 120
     }
 
+    # (huella de audit_findings, resultado) del último análisis de recurrencia
+    _recurrence_cache = None
+
     @staticmethod
     def create_finding(audit_id, data, created_by_id):
         """
@@ -399,73 +406,190 @@ class FindingService:
 
         return by_control
 
+    @classmethod
+    def get_recurrence_analysis(cls, days=RECURRENCE_WINDOW_DAYS):
+        """
+        Analiza la recurrencia de hallazgos por control
+
+        Un hallazgo es recurrente si existe un hallazgo anterior sobre el mismo
+        control. El anterior se obtiene en la base de datos con LAG sobre
+        affected_control ordenado por created_at, en una sola consulta.
+
+        El resultado se guarda en memoria hasta que se crea, cierra o modifica
+        un hallazgo (o cambia el día), y solo contiene datos planos.
+
+        Returns:
+            dict: total_findings, recurrent_count, recurrence_rate,
+                  time_between (días entre hallazgos) y recurrent_findings
+                  (un elemento por control, con sus hallazgos y estadísticas)
+        """
+        from sqlalchemy import func
+
+        cutoff = datetime.utcnow().date() - timedelta(days=days)
+
+        # Huella de la tabla: cambia al crear, cerrar, modificar o borrar hallazgos
+        fingerprint = (cutoff,) + tuple(db.session.query(
+            func.count(AuditFinding.id),
+            func.max(AuditFinding.id),
+            func.count(AuditFinding.id).filter(AuditFinding.status == FindingStatus.CLOSED),
+            func.max(AuditFinding.updated_at)
+        ).one())
+
+        cached = cls._recurrence_cache
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        analysis = cls._compute_recurrence(cutoff)
+        cls._recurrence_cache = (fingerprint, analysis)
+        return analysis
+
     @staticmethod
-    def get_recurrence_analysis():
-        """Analiza la recurrencia de hallazgos"""
-        # Obtener todos los hallazgos de los últimos 2 años
-        two_years_ago = datetime.now() - timedelta(days=730)
-        findings = AuditFinding.query.filter(
-            AuditFinding.created_at >= two_years_ago
-        ).all()
+    def _compute_recurrence(cutoff):
+        """Recurrencia de los hallazgos creados desde cutoff"""
+        from sqlalchemy import func
+
+        # Hallazgo anterior del mismo control sobre todo el histórico
+        window = {
+            'partition_by': AuditFinding.affected_control,
+            'order_by': (AuditFinding.created_at, AuditFinding.id)
+        }
+        history = db.session.query(
+            AuditFinding.id,
+            AuditFinding.finding_code,
+            AuditFinding.affected_control,
+            AuditFinding.status,
+            AuditFinding.created_at,
+            AuditRecord.audit_code,
+            func.lag(AuditFinding.created_at, type_=db.DateTime).over(**window).label('previous_created_at'),
+            func.row_number().over(**window).label('occurrence')
+        ).outerjoin(
+            AuditRecord, AuditRecord.id == AuditFinding.audit_id
+        ).subquery()
+
+        rows = db.session.query(history).filter(
+            history.c.created_at >= cutoff
+        ).order_by(history.c.affected_control, history.c.created_at, history.c.id).all()
 
-        recurrent_findings = []
+        by_control = {}
+        recurrent_count = 0
+        gaps = []
+
+        for row in rows:
+            if not row.affected_control:
+                continue
+
+            item = by_control.setdefault(row.affected_control, {
+                'affected_control': row.affected_control,
+                'findings': [],
+                'recurrences': 0,
+                'days_between': [],
+                'first_occurrence': row.occurrence
+            })
+            item['findings'].append({
+                'id': row.id,
+                'finding_code': row.finding_code,
+                'audit_code': row.audit_code,
+                'status': row.status.name if row.status else None,
+                'created_at': row.created_at
+            })
 
-        for finding in findings:
-            if finding.affected_control:
-                # Buscar hallazgos anteriores en el mismo control
-                previous = AuditFinding.query.filter(
-                    AuditFinding.affected_control == finding.affected_control,
-                    AuditFinding.created_at < finding.created_at,
-                    AuditFinding.id != finding.id
-                ).first()
-
-                if previous:
-                    recurrent_findings.append({
-                        'finding': finding,
-                        'previous_finding': previous,
-                        'control': finding.affected_control,
-                        'time_between': (finding.created_at - previous.created_at).days
-                    })
+            if row.previous_created_at is not None:
+                days_between = (row.created_at - row.previous_created_at).total_seconds() / 86400
+                item['recurrences'] += 1
+                item['days_between'].append(days_between)
+                gaps.append(days_between)
+                recurrent_count += 1
+
+        def stats(values):
+            if not values:
+                return {'avg': None, 'min': None, 'max': None}
+            return {
+                'avg': round(sum(values) / len(values), 1),
+                'min': round(min(values), 1),
+                'max': round(max(values), 1)
+            }
+
+        recurrent_findings = []
+        for item in by_control.values():
+            if not item['recurrences']:
+                continue
+            item['occurrences'] = len(item['findings'])
+            # Ocurrencias anteriores a la ventana de análisis
+            item['previous_occurrences'] = item.pop('first_occurrence') - 1
+            item['latest_finding'] = item['findings'][-1]
+            item['time_between'] = stats(item.pop('days_between'))
+            recurrent_findings.append(item)
+
+        recurrent_findings.sort(key=lambda item: (-item['occurrences'], item['affected_control']))
 
         return {
-            'total_findings': len(findings),
-            'recurrent_findings': len(recurrent_findings),
-            'recurrence_rate': round(
-                (len(recurrent_findings) / len(findings) * 100) if findings else 0,
-                2
-            ),
-            'details': recurrent_findings
+            'since': cutoff,
+            'total_findings': len(rows),
+            'recurrent_count': recurrent_count,
+            'recurrence_rate': round((recurrent_count / len(rows) * 100) if rows else 0, 2),
+            'time_between': stats(gaps),
+            'recurrent_findings': recurrent_findings
         }
 
+    # Columnas de la matriz de hallazgos exportada
+    FINDINGS_MATRIX_HEADERS = [
+        'Código', 'Auditoría', 'Tipo', 'Título', 'Control ISO 27001', 'Departamento',
+        'Responsable', 'Nivel de Riesgo', 'Estado', 'Fecha Creación', 'Causa Raíz', 'Acciones'
+    ]
+
     @staticmethod
     def export_findings_matrix(filters=None):
-        """Exporta matriz de hallazgos para Excel"""
-        query = AuditFinding.query
-
-        if filters:
-            # Aplicar filtros similares a get_findings_list
-            pass
+        """
+        Exporta matriz de hallazgos para Excel
 
-        findings = query.all()
+        Devuelve un generador de filas (en el orden de FINDINGS_MATRIX_HEADERS)
+        que lee los hallazgos por lotes, apto para
+        ExportService.csv_response/xlsx_response.
 
-        matrix = []
-        for finding in findings:
-            matrix.append({
-                'Código': finding.finding_code,
-                'Auditoría': finding.audit.audit_code if finding.audit else '',
-                'Tipo': finding.finding_type.value,
-                'Título': finding.title,
-                'Control ISO 27001': finding.affected_control or '',
-                'Departamento': finding.department or '',
-                'Responsable': finding.responsible.full_name if finding.responsible else '',
-                'Nivel de Riesgo': finding.risk_level,
-                'Estado': finding.status.value,
-                'Fecha Creación': finding.created_at.strftime('%Y-%m-%d'),
-                'Causa Raíz': finding.root_cause or '',
-                'Acciones': finding.corrective_actions.count()
-            })
+        Args:
+            filters: Diccionario con filtros (audit_id, finding_type, status,
+                     responsible_id, risk_level, affected_control, department)
+        """
+        from sqlalchemy import func
+        from sqlalchemy.orm import joinedload
+        from app.services.export_service import ExportService
+
+        # Número de acciones por hallazgo en una subconsulta agrupada
+        actions = db.session.query(
+            AuditCorrectiveAction.finding_id,
+            func.count(AuditCorrectiveAction.id).label('total')
+        ).group_by(AuditCorrectiveAction.finding_id).subquery()
+
+        query = db.session.query(
+            AuditFinding, func.coalesce(actions.c.total, 0)
+        ).outerjoin(
+            actions, actions.c.finding_id == AuditFinding.id
+        ).options(
+            joinedload(AuditFinding.audit),
+            joinedload(AuditFinding.responsible)
+        ).order_by(AuditFinding.id)
 
-        return matrix
+        if filters:
+            for field in ('audit_id', 'finding_type', 'status', 'responsible_id',
+                          'risk_level', 'affected_control', 'department'):
+                if filters.get(field):
+                    query = query.filter(getattr(AuditFinding, field) == filters[field])
+
+        for finding, actions_count in ExportService.iter_query(query):
+            yield [
+                finding.finding_code,
+                finding.audit.audit_code if finding.audit else '',
+                finding.finding_type.value,
+                finding.title,
+                finding.affected_control or '',
+                finding.department or '',
+                finding.responsible.full_name if finding.responsible else '',
+                finding.risk_level or '',
+                finding.status.value,
+                finding.created_at.strftime('%Y-%m-%d') if finding.created_at else '',
+                finding.root_cause or '',
+                actions_count
+            ]
 
     @staticmethod
     def close_finding(finding_id, closed_by_id, closure_notes=None):
@@ -0,0 +1,119 @@
+"""
+Handlers de trabajos en segundo plano
+Cada handler recibe un JobContext, informa de su progreso con
+context.progress() (punto de cancelación) y devuelve un dict con el resultado.
+"""
+from app.services.job_service import job_handler
+
+
+@job_handler('risk_generation')
+def generate_risks(context):
+    """Genera todos los riesgos de una evaluación recién creada"""
+    from app.risks.services.risk_calculation_service import RiskCalculationService
+
+    evaluacion_id = context.payload['evaluacion_id']
+    context.progress(0, 'Generando riesgos')
+    cantidad = RiskCalculationService.generar_todos_los_riesgos(evaluacion_id)
+
+    return {'message': f'Se generaron {cantidad} riesgos', 'cantidad': cantidad}
+
+
+@job_handler('risk_recalculation')
+def recalculate_risks(context):
+    """Recalcula todos los riesgos de una evaluación"""
+    from app.risks.services.risk_calculation_service import RiskCalculationService
+
+    evaluacion_id = context.payload['evaluacion_id']
+    context.progress(0, 'Recalculando riesgos')
+    cantidad = RiskCalculationService.recalcular_riesgos_evaluacion(evaluacion_id)
+
+    return {'message': f'Se recalcularon {cantidad} riesgos exitosamente', 'cantidad': cantidad}
+
+
+@job_handler('backup_create')
+def create_backup(context):
+    """Crea un backup completo del sistema"""
+    from app.services.backup_service import BackupService
+
+    result = BackupService.create_backup(
+        description=context.payload.get('description', 'Backup manual'),
+        include_files=context.payload.get('include_files', True),
+        progress=context.progress,
+        incremental=context.payload.get('incremental', False)
+    )
+    if not result['success']:
+        raise Exception(result.get('error'))
+
+    return {
+        'message': f'Backup creado exitosamente: {result["backup_name"]}',
+        'backup_name': result['backup_name'],
+        'file_size': result['file_size']
+    }
+
+
+@job_handler('backup_restore')
+def restore_backup(context):
+    """Restaura el sistema desde un backup"""
+    from app.services.backup_service import BackupService
+
+    backup_path = BackupService.get_backup_directory() / context.payload['backup_name']
+    result = BackupService.restore_backup(
+        backup_path=backup_path,
+        restore_files=context.payload.get('restore_files', True),
+        progress=context.progress
+    )
+    if not result['success']:
+        raise Exception(result.get('error'))
+
+    return {
+        'message': 'Restauración completada. Se recomienda reiniciar la aplicación.',
+        'backup_name': result.get('backup_name')
+    }
+
+
+@job_handler('ai_verification')
+def verify_document(context):
+    """Verifica un documento con IA contra sus controles SOA relacionados"""
+    from models import Document
+    from app.services.ai_verification import AIVerificationService
+
+    document = Document.query.get(context.payload['document_id'])
+    if document is None:
+        raise Exception('Documento no encontrado')
+
+    ai_service = AIVerificationService()
+    results = ai_service.verify_document(
+        document,
+        document.related_controls,
+        progress=context.progress,
+        force=context.payload.get('force', False)
+    )
+    context.progress(95, 'Guardando resultados')
+    ai_service.save_results(document, results, user_id=context.user_id)
+
+    return {
+        'message': 'Verificación completada exitosamente',
+        'overall_score': results['overall_score'],
+        'verified_controls': results['verified_controls'],
+        'cached_controls': results['cached_controls'],
+        'total_controls': results['total_controls']
+    }
+
+
+@job_handler('soa_import')
+def import_soa_controls(context):
+    """Importa controles SOA desde un CSV y recalcula los riesgos afectados"""
+    from models import SOAVersion
+    from app.blueprints.soa import import_controls_from_csv
+
+    version = SOAVersion.query.get(context.payload['version_id'])
+    if version is None:
+        raise Exception('Versión SOA no encontrada')
+
+    return import_controls_from_csv(
+        context.payload['content'],
+        version,
+        context.payload.get('overwrite_existing', False),
+        usuario_id=context.user_id,
+        progress=context.progress
+    )
@@ -0,0 +1,380 @@
+"""
+Servicio de trabajos en segundo plano
+Cola persistente sobre la tabla background_jobs de PostgreSQL. Las rutas
+encolan un trabajo y devuelven su ID; los workers del scheduler reclaman
+trabajos con SELECT ... FOR UPDATE SKIP LOCKED, de modo que varios procesos
+gunicorn pueden consumir la misma cola sin ejecutar un trabajo dos veces.
+"""
+import os
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, BackgroundJob
+
+
+logger = logging.getLogger(__name__)
+
+# Registro de handlers por tipo de trabajo
+_HANDLERS = {}
+
+
+def job_handler(job_type):
+    """
+    Decorador para registrar el handler de un tipo de trabajo
+
+    El handler recibe un JobContext y devuelve un dict JSON serializable
+    que se guarda como resultado del trabajo.
+    """
+    def decorator(func):
+        _HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+class JobCancelled(Exception):
+    """
+    El usuario ha solicitado la cancelación del trabajo
+
+    Los servicios que reciben el callback progress y capturan Exception
+    (p. ej. BackupService) deben volver a lanzarla con
+    `except JobCancelled: raise` antes de su except Exception.
+    """
+
+
+class JobContext:
+    """Contexto de ejecución que se pasa a cada handler"""
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.job_type = job.job_type
+        self.created_at = job.created_at
+        self.payload = job.payload or {}
+        self.user_id = job.created_by_id
+
+    def progress(self, percent, message=None):
+        """
+        Informa del progreso y comprueba si se ha solicitado la cancelación
+
+        Raises:
+            JobCancelled: si el usuario ha cancelado el trabajo
+        """
+        cancel_requested = JobService.report_progress(self, percent, message)
+        if cancel_requested:
+            raise JobCancelled()
+
+    def check_cancelled(self):
+        """Punto de cancelación sin modificar el progreso"""
+        if JobService.is_cancel_requested(self.job_id):
+            raise JobCancelled()
+
+
+class JobService:
+    """Servicio para encolar, consultar y ejecutar trabajos en segundo plano"""
+
+    @staticmethod
+    def _table():
+        return BackgroundJob.__table__
+
+    @staticmethod
+    def worker_name():
+        """Identificador del proceso worker (host:pid)"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    # ==================== API PARA RUTAS ====================
+
+    @staticmethod
+    def enqueue(job_type, payload=None, user_id=None):
+        """
+        Encola un trabajo nuevo
+
+        Args:
+            job_type: Tipo de trabajo registrado con @job_handler
+            payload: Parámetros JSON serializables
+            user_id: Usuario que lo solicita
+
+        Returns:
+            BackgroundJob: Trabajo creado (ya confirmado en la base de datos)
+        """
+        job = BackgroundJob(
+            job_type=job_type,
+            status=BackgroundJob.QUEUED,
+            payload=payload or {},
+            created_by_id=user_id
+        )
+        db.session.add(job)
+        db.session.commit()
+        logger.info(f"📥 Trabajo encolado: #{job.id} ({job_type})")
+        return job
+
+    @staticmethod
+    def get_job(job_id):
+        """Obtiene un trabajo por ID"""
+        return BackgroundJob.query.get(job_id)
+
+    @staticmethod
+    def get_recent_jobs(user_id=None, limit=50):
+        """Trabajos más recientes, opcionalmente filtrados por usuario"""
+        query = BackgroundJob.query
+        if user_id is not None:
+            query = query.filter_by(created_by_id=user_id)
+        return query.order_by(BackgroundJob.created_at.desc()).limit(limit).all()
+
+    @staticmethod
+    def request_cancel(job):
+        """
+        Solicita la cancelación de un trabajo
+
+        Los trabajos en cola se cancelan inmediatamente; los que están en
+        ejecución se detienen en su siguiente punto de progreso.
+
+        Returns:
+            bool: True si la solicitud se ha registrado
+        """
+        if job.is_finished:
+            return False
+
+        if job.status == BackgroundJob.QUEUED:
+            job.status = BackgroundJob.CANCELLED
+            job.finished_at = datetime.utcnow()
+        job.cancel_requested = True
+        db.session.commit()
+        return True
+
+    # ==================== API PARA HANDLERS ====================
+
+    @classmethod
+    def report_progress(cls, context, percent, message=None):
+        """
+        Actualiza progreso y latido en una transacción independiente
+
+        Se usa una conexión propia para no confirmar el trabajo parcial que
+        el handler tenga pendiente en la sesión.
+
+        Returns:
+            bool: True si se ha solicitado la cancelación
+        """
+        table = cls._table()
+        values = {
+            'progress': max(0, min(100, int(percent))),
+            'heartbeat_at': datetime.utcnow()
+        }
+        if message is not None:
+            values['progress_message'] = message[:255]
+
+        with db.engine.begin() as conn:
+            conn.execute(
+                table.update().where(table.c.id == context.job_id).values(**values)
+            )
+            cancel_requested = conn.execute(
+                db.select(table.c.cancel_requested).where(table.c.id == context.job_id)
+            ).scalar()
+        return bool(cancel_requested)
+
+    @classmethod
+    def is_cancel_requested(cls, job_id):
+        table = cls._table()
+        with db.engine.connect() as conn:
+            return bool(conn.execute(
+                db.select(table.c.cancel_requested).where(table.c.id == job_id)
+            ).scalar())
+
+    # ==================== WORKER ====================
+
+    @staticmethod
+    def claim_next(worker=None):
+        """
+        Reclama el siguiente trabajo en cola
+
+        FOR UPDATE SKIP LOCKED garantiza que dos workers concurrentes nunca
+        obtienen el mismo trabajo.
+
+        Returns:
+            BackgroundJob o None si la cola está vacía
+        """
+        job = BackgroundJob.query.filter_by(
+            status=BackgroundJob.QUEUED
+        ).order_by(
+            BackgroundJob.created_at, BackgroundJob.id
+        ).with_for_update(skip_locked=True).first()
+
+        if job is None:
+            db.session.rollback()
+            return None
+
+        now = datetime.utcnow()
+        job.status = BackgroundJob.RUNNING
+        job.started_at = now
+        job.heartbeat_at = now
+        job.attempts = (job.attempts or 0) + 1
+        job.worker = worker or JobService.worker_name()
+        db.session.commit()
+        return job
+
+    @classmethod
+    def execute(cls, job):
+        """Ejecuta un trabajo reclamado y registra su estado final"""
+        from app.services import job_handlers  # noqa: F401  Registra los handlers
+
+        context = JobContext(job)
+        handler = _HANDLERS.get(job.job_type)
+        # Cerrar la transacción de lectura: una restauración de backup
+        # necesita bloquear background_jobs en exclusiva
+        db.session.commit()
+        logger.info(f"▶️  Ejecutando trabajo #{context.job_id} ({context.job_type})")
+
+        heartbeat = cls._start_heartbeat(context)
+        try:
+            if handler is None:
+                raise ValueError(f"Tipo de trabajo desconocido: {context.job_type}")
+            result = handler(context)
+
+        except JobCancelled:
+            db.session.rollback()
+            cls._finish(context, BackgroundJob.CANCELLED, progress_message='Cancelado por el usuario')
+            logger.info(f"⏹️  Trabajo cancelado: #{context.job_id}")
+
+        except Exception as e:
+            db.session.rollback()
+            cls._finish(context, BackgroundJob.FAILED, error=str(e))
+            logger.error(f"❌ Error en trabajo #{context.job_id} ({context.job_type}): {str(e)}")
+
+        else:
+            cls._finish(context, BackgroundJob.COMPLETED, result=result, progress=100)
+            logger.info(f"✅ Trabajo completado: #{context.job_id}")
+
+        finally:
+            heartbeat.set()
+            db.session.remove()
+
+    @classmethod
+    def _start_heartbeat(cls, context):
+        """
+        Actualiza heartbeat_at cada JOB_HEARTBEAT_SECONDS mientras el handler se ejecuta
+
+        El latido no depende de que el handler llame a progress(): una etapa
+        larga sin progreso (restauración, exportación grande) sigue
+        señalando que el worker está vivo.
+
+        Returns:
+            threading.Event: se activa para detener el latido
+        """
+        table = cls._table()
+        engine = db.engine
+        interval = current_app.config.get('JOB_HEARTBEAT_SECONDS', 30)
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            table.update().where(
+                                table.c.id == context.job_id,
+                                table.c.status == BackgroundJob.RUNNING
+                            ).values(heartbeat_at=datetime.utcnow())
+                        )
+                except Exception as e:
+                    logger.warning(f"⚠️  Latido del trabajo #{context.job_id} fallido: {str(e)}")
+
+        threading.Thread(target=beat, name=f'job-heartbeat-{context.job_id}', daemon=True).start()
+        return stop
+
+    @classmethod
+    def _finish(cls, context, status, **values):
+        """
+        Registra el estado final del trabajo
+
+        La condición sobre created_at evita escribir sobre otra fila si la
+        tabla ha sido reemplazada durante el trabajo (restauración de backup);
+        la condición sobre el estado, sobrescribir un trabajo que
+        fail_stale_jobs ya dio por fallido.
+        """
+        table = cls._table()
+        values.update(status=status, finished_at=datetime.utcnow())
+        with db.engine.begin() as conn:
+            conn.execute(
+                table.update().where(
+                    table.c.id == context.job_id,
+                    table.c.created_at == context.created_at,
+                    table.c.status == BackgroundJob.RUNNING
+                ).values(**values)
+            )
+
+    @classmethod
+    def fail_stale_jobs(cls):
+        """
+        Marca como fallidos los trabajos cuyo worker dejó de dar señales
+
+        Un trabajo en ejecución sin latido durante JOB_STALE_MINUTES se
+        considera huérfano (worker reiniciado). Los trabajos de un worker de
+        este mismo host cuyo proceso sigue vivo no se marcan. No se reencola:
+        operaciones como una restauración no deben repetirse automáticamente.
+
+        Returns:
+            int: Número de trabajos marcados
+        """
+        minutes = current_app.config.get('JOB_STALE_MINUTES', 60)
+        limit = datetime.utcnow() - timedelta(minutes=minutes)
+
+        stale = db.session.query(BackgroundJob.id, BackgroundJob.worker).filter(
+            BackgroundJob.status == BackgroundJob.RUNNING,
+            BackgroundJob.heartbeat_at < limit
+        ).all()
+        job_ids = [job_id for job_id, worker in stale if not cls._worker_alive(worker)]
+
+        if not job_ids:
+            db.session.rollback()
+            return 0
+
+        count = BackgroundJob.query.filter(
+            BackgroundJob.id.in_(job_ids),
+            BackgroundJob.status == BackgroundJob.RUNNING,
+            BackgroundJob.heartbeat_at < limit
+        ).update({
+            'status': BackgroundJob.FAILED,
+            'error': 'Trabajo interrumpido: el worker dejó de responder',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def _worker_alive(worker):
+        """
+        Si el worker (host:pid) es un proceso vivo de este host
+
+        Los workers de otros hosts no se pueden comprobar: cuenta su latido.
+        """
+        host, _, pid = (worker or '').rpartition(':')
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    @classmethod
+    def run_pending(cls, max_jobs=None):
+        """
+        Procesa trabajos en cola hasta vaciarla o alcanzar max_jobs
+
+        Returns:
+            int: Número de trabajos ejecutados
+        """
+        if max_jobs is None:
+            max_jobs = current_app.config.get('JOB_WORKER_BATCH_SIZE', 5)
+
+        worker = cls.worker_name()
+        processed = 0
+        while processed < max_jobs:
+            job = cls.claim_next(worker)
+            if job is None:
+                break
+            cls.execute(job)
+            processed += 1
+        return processed
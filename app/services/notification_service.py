@@ -2,9 +2,13 @@
 Servicio de Notificaciones por Email
 Gestiona el envío de notificaciones automáticas para tareas
 """
-from datetime import datetime
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from flask import current_app, render_template, url_for
 from flask_mail import Mail, Message
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 from models import db
 from app.models.task import Task, TaskNotificationLog, PeriodicTaskStatus
 
@@ -76,8 +80,16 @@ ISO/IEC 27001:2023
             task: Instancia de Task
             days_until_due: Días hasta el vencimiento
         """
-        if not task.assigned_to:
+        notification = NotificationService._compose_task_reminder(task, days_until_due)
+        if notification is None:
             return False
+        return NotificationService._send_email(**notification)
+
+    @staticmethod
+    def _compose_task_reminder(task, days_until_due):
+        """Compone el recordatorio de una tarea (None si no tiene responsable)"""
+        if not task.assigned_to:
+            return None
 
         if days_until_due == 0:
             urgency = "VENCE HOY"
@@ -122,7 +134,7 @@ Sistema de Gestión de Seguridad de la Información
 ISO/IEC 27001:2023
         """
 
-        return NotificationService._send_email(
+        return dict(
             recipient=task.assigned_to.email,
             subject=subject,
             text_body=text_body,
@@ -139,8 +151,16 @@ ISO/IEC 27001:2023
         Args:
             task: Instancia de Task
         """
-        if not task.assigned_to:
+        notification = NotificationService._compose_task_overdue(task)
+        if notification is None:
             return False
+        return NotificationService._send_email(**notification)
+
+    @staticmethod
+    def _compose_task_overdue(task):
+        """Compone el aviso de tarea vencida (None si no tiene responsable)"""
+        if not task.assigned_to:
+            return None
 
         days_overdue = abs(task.days_until_due)
 
@@ -183,7 +203,7 @@ ISO/IEC 27001:2023
         if task.created_by and task.created_by.email != task.assigned_to.email:
             cc_emails.append(task.created_by.email)
 
-        return NotificationService._send_email(
+        return dict(
             recipient=task.assigned_to.email,
             subject=subject,
             text_body=text_body,
@@ -315,52 +335,99 @@ ISO/IEC 27001:2023
             notification_type='weekly_summary'
         )
 
+    @staticmethod
+    def get_due_notification_tasks(now=None):
+        """
+        Tareas que deben notificarse ahora, seleccionadas en SQL
+
+        Equivale a Task.should_send_notification(): tareas activas que vencen
+        dentro de 7, 3, 1 o 0 días (days_until_due) o ya vencidas, y que no
+        se han notificado hoy.
+        """
+        now = now or datetime.utcnow()
+        today = datetime(now.year, now.month, now.day)
+        tomorrow = today + timedelta(days=1)
+
+        def due_in(days):
+            return and_(
+                Task.due_date >= now + timedelta(days=days),
+                Task.due_date < now + timedelta(days=days + 1)
+            )
+
+        return Task.query.options(
+            joinedload(Task.assigned_to),
+            joinedload(Task.created_by)
+        ).filter(
+            Task.status.in_([PeriodicTaskStatus.PENDIENTE, PeriodicTaskStatus.EN_PROGRESO, PeriodicTaskStatus.VENCIDA]),
+            Task.assigned_to_id.isnot(None),
+            or_(
+                Task.due_date < now + timedelta(days=1),  # Vence hoy o vencida
+                due_in(1), due_in(3), due_in(7)
+            ),
+            or_(
+                Task.last_notification_sent.is_(None),
+                Task.last_notification_sent < today,
+                Task.last_notification_sent >= tomorrow
+            )
+        ).order_by(Task.due_date).all()
+
     @staticmethod
     def process_pending_notifications():
         """
         Procesa todas las notificaciones pendientes
         Debe ejecutarse periódicamente (cada 30 minutos)
 
+        Solo se cargan las tareas que deben notificarse; los mensajes se
+        componen en bloque y se envían con NotificationDispatcher por una
+        única conexión SMTP. Registros y marcas de envío se confirman juntos.
+
         Returns:
             dict: Resumen de notificaciones enviadas
         """
-        from app.services.task_service import TaskService
-
         sent_count = {
             'reminders': 0,
             'overdue': 0,
             'errors': 0
         }
 
-        # Obtener todas las tareas activas
-        active_tasks = Task.query.filter(
-            Task.status.in_([PeriodicTaskStatus.PENDIENTE, PeriodicTaskStatus.EN_PROGRESO, PeriodicTaskStatus.VENCIDA])
-        ).all()
+        notifications = []
+        notified_tasks = []
 
-        for task in active_tasks:
+        for task in NotificationService.get_due_notification_tasks():
             try:
-                # Verificar si debe enviarse notificación
-                if task.should_send_notification():
-                    if task.is_overdue:
-                        # Tarea vencida
-                        NotificationService.send_task_overdue_notification(task)
-                        sent_count['overdue'] += 1
-                    else:
-                        # Recordatorio normal
-                        days_until = task.days_until_due
-                        NotificationService.send_task_reminder(task, days_until)
-                        sent_count['reminders'] += 1
-
-                    # Actualizar timestamp de última notificación
-                    task.last_notification_sent = datetime.utcnow()
-                    task.notification_count += 1
-                    db.session.commit()
+                # Comprobación final en memoria (misma regla que la consulta)
+                if not task.should_send_notification():
+                    continue
+
+                if task.is_overdue:
+                    # Tarea vencida
+                    notification = NotificationService._compose_task_overdue(task)
+                    sent_count['overdue'] += 1
+                else:
+                    # Recordatorio normal
+                    notification = NotificationService._compose_task_reminder(task, task.days_until_due)
+                    sent_count['reminders'] += 1
+
+                notifications.append(notification)
+                notified_tasks.append(task)
 
             except Exception as e:
                 print(f"Error enviando notificación para tarea {task.id}: {e}")
                 sent_count['errors'] += 1
                 continue
 
+        if not notifications:
+            return sent_count
+
+        NotificationDispatcher.dispatch(notifications)
+
+        # Actualizar timestamp de última notificación
+        now = datetime.utcnow()
+        for task in notified_tasks:
+            task.last_notification_sent = now
+            task.notification_count = (task.notification_count or 0) + 1
+        db.session.commit()
+
         return sent_count
 
     @staticmethod
@@ -433,3 +500,120 @@ ISO/IEC 27001:2023
                 db.session.commit()
 
             return False
+
+
+class NotificationDispatcher:
+    """
+    Envío por lotes de notificaciones compuestas
+
+    Todos los mensajes de un lote se envían por una única conexión SMTP
+    (mail.connect(); Flask-Mail la renueva cada MAIL_MAX_EMAILS mensajes).
+    Con MAIL_DISPATCH_WORKERS > 1 el lote se reparte entre varios hilos,
+    cada uno con su propia conexión. Los registros TaskNotificationLog se
+    insertan en bloque al final.
+    """
+
+    @classmethod
+    def dispatch(cls, notifications, workers=None):
+        """
+        Envía un lote de notificaciones
+
+        Args:
+            notifications: Lista de dicts con los argumentos de _send_email
+            workers: Número de hilos de envío (por defecto MAIL_DISPATCH_WORKERS)
+
+        Returns:
+            list: (notificación, éxito, mensaje de error) por cada notificación
+
+        Los registros de envío se añaden a la sesión sin confirmar.
+        """
+        if not current_app.config.get('TASK_NOTIFICATION_ENABLED', True):
+            for notification in notifications:
+                print(f"Notificaciones deshabilitadas - no se envía: {notification['subject']}")
+            return [(notification, False, None) for notification in notifications]
+
+        if workers is None:
+            workers = current_app.config.get('MAIL_DISPATCH_WORKERS', 1)
+        workers = max(1, min(workers, len(notifications)))
+
+        # Los mensajes se construyen en el hilo principal (remitente por defecto)
+        sender = current_app.config.get('MAIL_DEFAULT_SENDER', 'sgsi@empresa.com')
+        batch = [(notification, cls._build_message(notification, sender)) for notification in notifications]
+
+        if workers == 1:
+            results = cls._send_batch(batch)
+        else:
+            app = current_app._get_current_object()
+            chunks = [batch[i::workers] for i in range(workers)]
+            results = []
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for chunk_results in executor.map(lambda chunk: cls._send_batch(chunk, app), chunks):
+                    results.extend(chunk_results)
+
+        cls._log_results(results)
+        return results
+
+    @staticmethod
+    def _build_message(notification, sender):
+        msg = Message(
+            subject=notification['subject'],
+            recipients=[notification['recipient']],
+            body=notification['text_body'],
+            html=notification.get('html_body'),
+            sender=sender
+        )
+        if notification.get('cc'):
+            msg.cc = notification['cc']
+        return msg
+
+    @staticmethod
+    def _send_batch(batch, app=None):
+        """Envía una lista de (notificación, mensaje) por una misma conexión"""
+        if app is not None:
+            with app.app_context():
+                return NotificationDispatcher._send_batch(batch)
+
+        results = []
+        pending = list(batch)
+        try:
+            with mail.connect() as connection:
+                while pending:
+                    notification, msg = pending[0]
+                    try:
+                        try:
+                            connection.send(msg)
+                        except smtplib.SMTPServerDisconnected:
+                            # El servidor cerró la conexión: reabrir y reintentar una vez
+                            connection.host = connection.configure_host()
+                            connection.send(msg)
+                        results.append((notification, True, None))
+                    except Exception as e:
+                        print(f"Error enviando email a {notification['recipient']}: {e}")
+                        results.append((notification, False, str(e)))
+                    pending.pop(0)
+
+        except Exception as e:
+            # No se pudo abrir (o reabrir) la conexión: el resto del lote falla
+            print(f"Error conectando con el servidor SMTP: {e}")
+            results.extend((notification, False, str(e)) for notification, _ in pending)
+
+        return results
+
+    @staticmethod
+    def _log_results(results):
+        """Inserta en bloque los registros de envío de las notificaciones de tareas"""
+        logs = [
+            {
+                'task_id': notification['task_id'],
+                'recipient_email': notification['recipient'],
+                'notification_type': notification.get('notification_type', 'general'),
+                'subject': notification['subject'],
+                'body': notification['text_body'][:500],  # Primeros 500 caracteres
+                'was_successful': success,
+                'error_message': error
+            }
+            for notification, success, error in results
+            if notification.get('task_id') and (success or error is not None)
+        ]
+        if logs:
+            db.session.bulk_insert_mappings(TaskNotificationLog, logs)
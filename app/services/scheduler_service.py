@@ -1,12 +1,22 @@
 """
 Servicio de Scheduler para tareas automáticas
 Gestiona la generación automática de tareas y envío de notificaciones
+
+Cada proceso (worker de gunicorn, contenedor) tiene su scheduler, pero los
+jobs programados solo se ejecutan en el proceso líder: el que consigue el
+advisory lock de PostgreSQL LEADER_LOCK_KEY en una conexión dedicada. Si el
+líder muere, su conexión se cierra, el lock se libera y otro proceso lo toma
+en su siguiente intento. El worker de trabajos en segundo plano se ejecuta
+en todos los procesos. Cada ejecución de un job programado queda registrada
+en SchedulerRun.
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 import logging
+import threading
+import time
 
 from app.services.task_service import TaskService
 from app.services.notification_service import NotificationService
@@ -16,6 +26,9 @@ from app.services.notification_service import NotificationService
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Clave del advisory lock que identifica al líder del scheduler ('ISMS')
+LEADER_LOCK_KEY = 0x49534D53
+
 
 class TaskSchedulerService:
     """Servicio para programación de tareas automáticas"""
@@ -31,6 +44,12 @@ class TaskSchedulerService:
         self.app = app
         self.is_running = False
 
+        # Liderazgo: jobs que solo ejecuta el líder y conexión que mantiene el lock
+        self.is_leader = False
+        self._leader_job_ids = []
+        self._leader_connection = None
+        self._leader_lock = threading.Lock()
+
         if app:
             self.init_app(app)
 
@@ -43,11 +62,18 @@ class TaskSchedulerService:
         """
         self.app = app
 
+        task_jobs_enabled = app.config.get('TASK_AUTO_GENERATION_ENABLED', True)
+        job_worker_enabled = app.config.get('JOB_WORKER_ENABLED', True)
+
         # Configurar jobs
-        self._configure_jobs()
+        if task_jobs_enabled:
+            self._configure_jobs()
+            self._configure_leader_jobs()
+        if job_worker_enabled:
+            self._configure_job_worker()
 
         # Iniciar scheduler si está configurado
-        if app.config.get('TASK_AUTO_GENERATION_ENABLED', True):
+        if task_jobs_enabled or job_worker_enabled:
             self.start()
 
     def _configure_jobs(self):
@@ -106,6 +132,311 @@ class TaskSchedulerService:
         )
         logger.info("✅ Job configurado: Generación de tareas mensuales (día 1, 00:00)")
 
+        # JOB 6: Particiones mensuales del log de auditoría - Todos los días a las 00:30
+        self.scheduler.add_job(
+            func=self._ensure_audit_partitions_job,
+            trigger=CronTrigger(hour=0, minute=30),
+            id='ensure_audit_log_partitions',
+            name='Crear particiones del log de auditoría',
+            replace_existing=True,
+            misfire_grace_time=3600
+        )
+        logger.info("✅ Job configurado: Particiones del log de auditoría (00:30)")
+
+        # JOB 7: Eliminar archivos sin referencias del almacén de blobs - Todos los días a las 03:00
+        self.scheduler.add_job(
+            func=self._collect_blobs_job,
+            trigger=CronTrigger(hour=3, minute=0),
+            id='collect_unreferenced_blobs',
+            name='Eliminar blobs sin referencias',
+            replace_existing=True,
+            misfire_grace_time=3600
+        )
+        logger.info("✅ Job configurado: Recolección de blobs sin referencias (03:00)")
+
+    def _configure_leader_jobs(self):
+        """
+        Registra la ejecución de los jobs programados y los reserva al líder
+
+        Sin PostgreSQL (o con SCHEDULER_LEADER_ELECTION desactivado) este
+        proceso es siempre el líder.
+        """
+        from models import db
+        from app.services.job_service import JobService
+
+        for job in self.scheduler.get_jobs():
+            self._leader_job_ids.append(job.id)
+            self.scheduler.modify_job(job.id, func=self._run_recorded, args=(job.id, job.name, job.func))
+
+        with self.app.app_context():
+            supports_locks = db.engine.dialect.name == 'postgresql'
+
+        if not self.app.config.get('SCHEDULER_LEADER_ELECTION', True) or not supports_locks:
+            self.is_leader = True
+            logger.info("👑 Elección de líder desactivada: este proceso ejecuta los jobs programados")
+            return
+
+        # En pausa hasta conseguir el liderazgo
+        for job_id in self._leader_job_ids:
+            self.scheduler.pause_job(job_id)
+
+        poll_seconds = self.app.config.get('SCHEDULER_LEADER_POLL_SECONDS', 30)
+        self.scheduler.add_job(
+            func=self._leader_election_job,
+            trigger=IntervalTrigger(seconds=poll_seconds),
+            id='scheduler_leader_election',
+            name='Elección del líder del scheduler',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.now()
+        )
+        logger.info(
+            f"✅ Job configurado: Elección del líder del scheduler (cada {poll_seconds} segundos, "
+            f"proceso {JobService.worker_name()})"
+        )
+
+    def _configure_job_worker(self):
+        """Configura el worker de la cola de trabajos en segundo plano"""
+        poll_seconds = self.app.config.get('JOB_WORKER_POLL_SECONDS', 5)
+
+        # Cada proceso gunicorn tiene su propio worker: la reclamación con
+        # SKIP LOCKED reparte los trabajos sin duplicarlos
+        self.scheduler.add_job(
+            func=self._process_background_jobs,
+            trigger=IntervalTrigger(seconds=poll_seconds),
+            id='process_background_jobs',
+            name='Procesar trabajos en segundo plano',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        logger.info(f"✅ Job configurado: Worker de trabajos en segundo plano (cada {poll_seconds} segundos)")
+
+        # Trabajos huérfanos por reinicio del worker - Cada 10 minutos
+        self.scheduler.add_job(
+            func=self._fail_stale_jobs_job,
+            trigger=IntervalTrigger(minutes=10),
+            id='fail_stale_background_jobs',
+            name='Marcar trabajos huérfanos como fallidos',
+            replace_existing=True
+        )
+
+    # ==================== LIDERAZGO ====================
+
+    def _leader_election_job(self):
+        """Job: Comprobar el liderazgo o intentar conseguirlo"""
+        with self._leader_lock:
+            try:
+                with self.app.app_context():
+                    if self.is_leader:
+                        if self._leader_connection_alive():
+                            return
+                        logger.warning("⚠️  Conexión del líder perdida: se detienen los jobs programados")
+                        self._step_down()
+
+                    if self._try_acquire_leadership():
+                        self.is_leader = True
+                        for job_id in self._leader_job_ids:
+                            self.scheduler.resume_job(job_id)
+                        logger.info("👑 Este proceso es el líder del scheduler")
+                        self._print_next_runs()
+
+            except Exception as e:
+                logger.error(f"❌ Error en la elección del líder del scheduler: {str(e)}")
+
+    def _try_acquire_leadership(self):
+        """
+        Intenta tomar el advisory lock del líder en una conexión dedicada
+
+        El lock es de sesión: se mantiene mientras la conexión siga abierta
+        y PostgreSQL lo libera al cerrarse (también si el proceso muere).
+        """
+        from models import db
+
+        connection = db.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            acquired = connection.execute(
+                db.text('SELECT pg_try_advisory_lock(:key)'), {'key': LEADER_LOCK_KEY}
+            ).scalar()
+        except Exception:
+            connection.invalidate()
+            raise
+
+        if not acquired:
+            connection.close()
+            return False
+
+        self._leader_connection = connection
+        return True
+
+    def _leader_connection_alive(self):
+        """Comprueba que la conexión que mantiene el lock sigue abierta"""
+        from models import db
+
+        try:
+            self._leader_connection.execute(db.text('SELECT 1'))
+            return True
+        except Exception:
+            return False
+
+    def _step_down(self):
+        """Deja de ser líder: pausa los jobs programados y libera el lock"""
+        self.is_leader = False
+        for job_id in self._leader_job_ids:
+            self.scheduler.pause_job(job_id)
+
+        if self._leader_connection is not None:
+            # Cerrar la conexión (sin devolverla al pool) libera el lock
+            try:
+                self._leader_connection.invalidate()
+            except Exception:
+                pass
+            self._leader_connection = None
+
+    # ==================== HISTORIAL DE EJECUCIONES ====================
+
+    def _run_recorded(self, job_id, job_name, func):
+        """Ejecuta un job programado registrando su duración y resultado en SchedulerRun"""
+        from app.models.job import SchedulerRun
+
+        run_id = self._record_run_start(job_id, job_name)
+        start = time.monotonic()
+        status, error = SchedulerRun.SUCCESS, None
+
+        try:
+            func()
+        except Exception as e:
+            # El propio job ya ha registrado el error en el log
+            status, error = SchedulerRun.FAILED, str(e)
+
+        self._record_run_end(run_id, status, error, time.monotonic() - start)
+
+    def _record_run_start(self, job_id, job_name):
+        """Inserta la ejecución en curso en una transacción propia y devuelve su ID"""
+        from models import db
+        from app.models.job import SchedulerRun
+        from app.services.job_service import JobService
+
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                return connection.execute(
+                    SchedulerRun.__table__.insert().returning(SchedulerRun.__table__.c.id),
+                    {
+                        'job_id': job_id,
+                        'job_name': job_name,
+                        'status': SchedulerRun.RUNNING,
+                        'worker': JobService.worker_name(),
+                        'started_at': datetime.utcnow()
+                    }
+                ).scalar()
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo registrar la ejecución de {job_name}: {str(e)}")
+            return None
+
+    def _record_run_end(self, run_id, status, error, duration):
+        """Completa la ejecución con su resultado y duración"""
+        from models import db
+        from app.models.job import SchedulerRun
+
+        if run_id is None:
+            return
+
+        table = SchedulerRun.__table__
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                connection.execute(
+                    table.update().where(table.c.id == run_id).values(
+                        status=status,
+                        error=error,
+                        finished_at=datetime.utcnow(),
+                        duration=duration
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo registrar el resultado de la ejecución {run_id}: {str(e)}")
+
+    def get_recent_runs(self, limit=5):
+        """
+        Últimas ejecuciones de cada job programado (de cualquier proceso)
+
+        Returns:
+            dict: job_id -> lista de SchedulerRun, de la más reciente a la más antigua
+        """
+        from models import db
+        from app.models.job import SchedulerRun
+
+        ranked = db.select(
+            SchedulerRun.id,
+            db.func.row_number().over(
+                partition_by=SchedulerRun.job_id,
+                order_by=(SchedulerRun.started_at.desc(), SchedulerRun.id.desc())
+            ).label('position')
+        ).subquery()
+
+        runs = SchedulerRun.query.join(ranked, ranked.c.id == SchedulerRun.id).filter(
+            ranked.c.position <= limit
+        ).order_by(SchedulerRun.job_id, SchedulerRun.started_at.desc(), SchedulerRun.id.desc()).all()
+
+        recent = {}
+        for run in runs:
+            recent.setdefault(run.job_id, []).append(run)
+        return recent
+
+    def _process_background_jobs(self):
+        """Job: Ejecutar trabajos en cola"""
+        from app.services.job_service import JobService
+
+        try:
+            with self.app.app_context():
+                processed = JobService.run_pending()
+                if processed > 0:
+                    logger.info(f"✅ Trabajos en segundo plano procesados: {processed}")
+
+        except Exception as e:
+            logger.error(f"❌ Error procesando trabajos en segundo plano: {str(e)}")
+
+    def _fail_stale_jobs_job(self):
+        """Job: Marcar como fallidos los trabajos sin latido"""
+        from app.services.job_service import JobService
+
+        try:
+            with self.app.app_context():
+                count = JobService.fail_stale_jobs()
+                if count > 0:
+                    logger.warning(f"⚠️  Trabajos huérfanos marcados como fallidos: {count}")
+
+        except Exception as e:
+            logger.error(f"❌ Error revisando trabajos huérfanos: {str(e)}")
+
+    def _ensure_audit_partitions_job(self):
+        """Job: Crear las particiones mensuales pendientes de audit_logs"""
+        from app.services.audit_log_service import AuditLogService
+
+        try:
+            with self.app.app_context():
+                created = AuditLogService.ensure_partitions(
+                    self.app.config.get('AUDIT_LOG_PARTITIONS_AHEAD', 3)
+                )
+                if created:
+                    logger.info(f"✅ Particiones de auditoría creadas: {', '.join(created)}")
+
+        except Exception as e:
+            logger.error(f"❌ Error creando particiones de auditoría: {str(e)}")
+            raise
+
+    def _collect_blobs_job(self):
+        """Job: Eliminar los blobs que ya no referencia ningún registro"""
+        from app.services.blob_storage_service import BlobStorageService
+
+        try:
+            with self.app.app_context():
+                BlobStorageService.garbage_collect()
+
+        except Exception as e:
+            logger.error(f"❌ Error en la recolección de blobs: {str(e)}")
+            raise
+
     def _generate_tasks_job(self):
         """Job: Generar tareas desde plantillas"""
         logger.info("🔄 Iniciando generación de tareas desde plantillas...")
@@ -120,6 +451,7 @@ class TaskSchedulerService:
 
         except Exception as e:
             logger.error(f"❌ Error generando tareas: {str(e)}")
+            raise
 
     def _update_overdue_tasks_job(self):
         """Job: Actualizar tareas vencidas"""
@@ -133,6 +465,7 @@ class TaskSchedulerService:
 
         except Exception as e:
             logger.error(f"❌ Error actualizando tareas vencidas: {str(e)}")
+            raise
 
     def _process_notifications_job(self):
         """Job: Procesar notificaciones pendientes"""
@@ -154,6 +487,7 @@ class TaskSchedulerService:
 
         except Exception as e:
             logger.error(f"❌ Error procesando notificaciones: {str(e)}")
+            raise
 
     def _send_weekly_summary_job(self):
         """Job: Enviar resumen semanal a todos los usuarios activos"""
@@ -185,6 +519,7 @@ class TaskSchedulerService:
 
         except Exception as e:
             logger.error(f"❌ Error en envío de resúmenes semanales: {str(e)}")
+            raise
 
     def _generate_monthly_tasks_job(self):
         """Job: Generar tareas mensuales (primero de cada mes)"""
@@ -198,6 +533,7 @@ class TaskSchedulerService:
 
         except Exception as e:
             logger.error(f"❌ Error generando tareas mensuales: {str(e)}")
+            raise
 
     def start(self):
         """Inicia el scheduler"""
@@ -215,6 +551,9 @@ class TaskSchedulerService:
         if self.is_running:
             self.scheduler.shutdown(wait=False)
             self.is_running = False
+            with self._leader_lock:
+                if self._leader_connection is not None:
+                    self._step_down()
             logger.info("⏹️  Scheduler de tareas detenido")
 
     def _print_next_runs(self):
@@ -225,24 +564,42 @@ class TaskSchedulerService:
             if next_run:
                 logger.info(f"   • {job.name}: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
 
-    def get_job_status(self):
+    def get_job_status(self, history_limit=5):
         """
-        Obtiene el estado de todos los jobs
+        Obtiene el estado de todos los jobs y sus últimas ejecuciones
+
+        Los jobs programados están en pausa en los procesos que no son líder;
+        su próxima ejecución se calcula igualmente a partir del disparador.
+
+        Args:
+            history_limit: Ejecuciones recientes por job programado
 
         Returns:
             dict: Estado de los jobs
         """
+        from app.services.job_service import JobService
+
+        recent_runs = self.get_recent_runs(history_limit) if self._leader_job_ids else {}
+        now = datetime.now(self.scheduler.timezone)
+
         jobs = []
         for job in self.scheduler.get_jobs():
+            next_run = job.next_run_time
+            if next_run is None and job.id in self._leader_job_ids:
+                next_run = job.trigger.get_next_fire_time(None, now)
             jobs.append({
                 'id': job.id,
                 'name': job.name,
-                'next_run': job.next_run_time.isoformat() if job.next_run_time else None,
-                'trigger': str(job.trigger)
+                'next_run': next_run.isoformat() if next_run else None,
+                'trigger': str(job.trigger),
+                'leader_only': job.id in self._leader_job_ids,
+                'recent_runs': [run.to_dict() for run in recent_runs.get(job.id, [])]
             })
 
         return {
             'is_running': self.is_running,
+            'is_leader': self.is_leader,
+            'worker': JobService.worker_name(),
             'jobs_count': len(jobs),
             'jobs': jobs
         }
@@ -257,7 +614,7 @@ class TaskSchedulerService:
         job = self.scheduler.get_job(job_id)
         if job:
             logger.info(f"▶️  Ejecutando job manualmente: {job.name}")
-            job.func()
+            job.func(*job.args, **job.kwargs)
             logger.info(f"✅ Job ejecutado: {job.name}")
         else:
             logger.error(f"❌ Job no encontrado: {job_id}")
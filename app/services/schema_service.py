@@ -0,0 +1,182 @@
+"""
+Preparación y Verificación del Esquema de Base de Datos
+La preparación (migraciones de Alembic, tablas nuevas y datos iniciales) se
+ejecuta una sola vez por despliegue con `flask preparar-bd`, desde
+entrypoint.sh, antes de arrancar gunicorn. Los workers solo comprueban al
+arrancar que la base de datos está en la última revisión de migrations/versions.
+
+Con PostgreSQL la preparación se serializa con un advisory lock, de modo que
+varios contenedores arrancando a la vez no ejecutan el DDL en paralelo.
+"""
+import logging
+
+from flask import current_app
+from sqlalchemy import inspect
+
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de la preparación del esquema ('ISMP')
+PREPARE_LOCK_KEY = 0x49534D50
+
+# Tabla que usa Alembic para guardar la revisión aplicada
+VERSION_TABLE = 'alembic_version'
+
+# Tabla que indica que la base de datos ya tiene el esquema de la aplicación
+SENTINEL_TABLE = 'users'
+
+# Revisión equivalente al esquema de las instalaciones sin versionar (creadas
+# por create_all al arrancar, antes de las migraciones 012 en adelante)
+LEGACY_REVISION = '011_convert_rto_rpo_to_days'
+
+
+class SchemaVersionError(RuntimeError):
+    """La base de datos no está en la revisión esperada por el código"""
+
+
+class SchemaService:
+    """Servicio de preparación y verificación del esquema"""
+
+    # Revisiones finales de migrations/versions, leídas una vez por proceso
+    _expected_heads = None
+
+    @staticmethod
+    def _migration_config():
+        """Configuración de Alembic de Flask-Migrate (directorio migrations)"""
+        return current_app.extensions['migrate'].migrate.get_config()
+
+    @classmethod
+    def expected_heads(cls):
+        """Revisiones finales de los scripts de migración"""
+        if cls._expected_heads is None:
+            from alembic.script import ScriptDirectory
+
+            script = ScriptDirectory.from_config(cls._migration_config())
+            cls._expected_heads = frozenset(script.get_heads())
+        return cls._expected_heads
+
+    @staticmethod
+    def current_heads(connection):
+        """Revisiones aplicadas en la base de datos (vacío si no está versionada)"""
+        from alembic.runtime.migration import MigrationContext
+
+        return frozenset(MigrationContext.configure(connection).get_current_heads())
+
+    @classmethod
+    def check_version(cls):
+        """
+        Comprueba que la base de datos está en la última revisión
+
+        Es la única comprobación que hace cada worker al arrancar: una
+        consulta a alembic_version, sin DDL ni datos iniciales.
+
+        Raises:
+            SchemaVersionError: Si la revisión no coincide
+        """
+        from models import db
+
+        with db.engine.connect() as connection:
+            current = cls.current_heads(connection)
+
+        expected = cls.expected_heads()
+        if current != expected:
+            raise SchemaVersionError(
+                f"La base de datos está en la revisión {', '.join(sorted(current)) or '(ninguna)'} "
+                f"y el código espera {', '.join(sorted(expected))}. "
+                f"Ejecuta `flask preparar-bd` antes de arrancar la aplicación."
+            )
+
+    @classmethod
+    def prepare(cls, seed=True):
+        """
+        Deja la base de datos lista para los workers (idempotente)
+
+        - Base de datos vacía: crea el esquema desde los modelos y la marca
+          en la última revisión (las migraciones parten de un esquema existente).
+        - Versionada: aplica las migraciones pendientes.
+        - Sin versionar (instalaciones creadas por create_all al arrancar):
+          la marca en LEGACY_REVISION y aplica las migraciones posteriores,
+          que añaden las columnas, índices y tablas que create_all no altera.
+
+        En todos los casos se crean las tablas de modelos sin migración y,
+        si seed es True, los datos iniciales.
+
+        Returns:
+            dict: {'action': 'created' | 'upgraded' | 'stamped', 'from', 'to'}
+        """
+        from models import db
+
+        lock = cls._acquire_prepare_lock()
+        try:
+            inspector = inspect(db.engine)
+            versioned = inspector.has_table(VERSION_TABLE)
+            empty = not inspector.has_table(SENTINEL_TABLE)
+
+            with db.engine.connect() as connection:
+                previous = cls.current_heads(connection)
+
+            if versioned and previous:
+                action = 'upgraded'
+                cls._upgrade()
+                db.create_all()
+            elif empty:
+                action = 'created'
+                db.create_all()
+                cls._stamp('head')
+            else:
+                action = 'stamped'
+                logger.warning(
+                    f"⚠️  Base de datos sin versión de Alembic: se marca en {LEGACY_REVISION} "
+                    f"y se aplican las migraciones posteriores"
+                )
+                cls._stamp(LEGACY_REVISION)
+                cls._upgrade()
+                db.create_all()
+
+            if seed:
+                from utils.seed_data import seed_initial_data
+                seed_initial_data()
+
+            with db.engine.connect() as connection:
+                current = cls.current_heads(connection)
+
+            logger.info(
+                f"✅ Esquema preparado ({action}): "
+                f"{', '.join(sorted(previous)) or '(ninguna)'} -> {', '.join(sorted(current))}"
+            )
+            return {'action': action, 'from': sorted(previous), 'to': sorted(current)}
+
+        finally:
+            if lock is not None:
+                lock.invalidate()
+
+    @staticmethod
+    def _upgrade():
+        from flask_migrate import upgrade
+        upgrade()
+
+    @staticmethod
+    def _stamp(revision):
+        from flask_migrate import stamp
+        stamp(revision=revision)
+
+    @staticmethod
+    def _acquire_prepare_lock():
+        """
+        Espera al advisory lock de la preparación (solo PostgreSQL)
+
+        Returns:
+            Connection que mantiene el lock (se libera al invalidarla) o None
+        """
+        from models import db
+
+        if db.engine.dialect.name != 'postgresql':
+            return None
+
+        connection = db.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            connection.execute(db.text('SELECT pg_advisory_lock(:key)'), {'key': PREPARE_LOCK_KEY})
+        except Exception:
+            connection.invalidate()
+            raise
+        return connection
@@ -8,7 +8,7 @@ from models import db
 from app.models.task import (
     TaskTemplate, Task, TaskEvidence, TaskComment,
     TaskHistory, TaskNotificationLog,
-    PeriodicTaskStatus, TaskPriority, TaskCategory, TaskFrequency
+    PeriodicTaskStatus, TaskPriority, TaskCategory
 )
 
 
@@ -35,6 +35,24 @@ class TaskService:
         if not template.is_active:
             raise ValueError(f"Plantilla {template_id} está inactiva")
 
+        task, history = TaskService._build_task_from_template(template, user_id, due_date)
+        db.session.add(task)
+        db.session.add(history)
+
+        db.session.commit()
+
+        return task
+
+    @staticmethod
+    def _build_task_from_template(template, user_id, due_date=None):
+        """
+        Construye (sin guardar) una tarea de la plantilla y su registro de historial
+
+        También programa la próxima generación automática de la plantilla.
+
+        Returns:
+            tuple: (Task, TaskHistory)
+        """
         # Calcular fecha de vencimiento
         if due_date is None:
             due_date = template.calculate_next_due_date()
@@ -59,8 +77,6 @@ class TaskService:
             created_by_id=user_id
         )
 
-        db.session.add(task)
-
         # Crear registro de historial
         history = TaskHistory(
             task=task,
@@ -68,11 +84,10 @@ class TaskService:
             action='created',
             details=f'Tarea creada desde plantilla "{template.title}"'
         )
-        db.session.add(history)
 
-        db.session.commit()
+        template.schedule_after(task)
 
-        return task
+        return task, history
 
     @staticmethod
     def create_manual_task(data, user_id):
@@ -448,65 +463,98 @@ class TaskService:
     @staticmethod
     def generate_tasks_from_templates(force=False):
         """
-        Genera tareas desde plantillas activas según su frecuencia
+        Genera tareas desde las plantillas activas a las que les toca
+
+        Las plantillas pendientes se obtienen en una sola consulta por su
+        next_generation_at y sus tareas se insertan en bloque: el coste depende
+        de las plantillas que vencen, no del tamaño del catálogo.
 
         Args:
-            force: Forzar generación aunque ya existan tareas
+            force: Generar desde todas las plantillas activas aunque no toque
 
         Returns:
             int: Número de tareas generadas
         """
-        templates = TaskTemplate.query.filter_by(is_active=True).all()
-        generated_count = 0
+        query = TaskTemplate.query.filter_by(is_active=True)
+        if not force:
+            # Toca generar si la próxima fecha de generación es hoy o antes
+            tomorrow = datetime.combine(datetime.utcnow().date() + timedelta(days=1), datetime.min.time())
+            query = query.filter(TaskTemplate.next_generation_at < tomorrow)
 
-        for template in templates:
-            # Verificar si toca generar tarea
-            if TaskService._should_generate_task(template) or force:
-                try:
-                    # Crear tarea desde plantilla
-                    task = TaskService.create_task_from_template(
-                        template.id,
-                        user_id=1  # Sistema
-                    )
-                    generated_count += 1
-                except Exception as e:
-                    print(f"Error generando tarea desde plantilla {template.id}: {e}")
+        templates = query.all()
+        if not templates:
+            return 0
+
+        generated_count = 0
+        try:
+            for template in templates:
+                # Las plantillas de tarea única no tienen fecha de vencimiento
+                # calculable: se retiran de la programación
+                if template.calculate_next_due_date() is None:
+                    template.next_generation_at = None
                     continue
 
+                task, history = TaskService._build_task_from_template(template, user_id=1)  # Sistema
+                db.session.add(task)
+                db.session.add(history)
+                generated_count += 1
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error generando tareas desde plantillas: {e}")
+            return 0
+
         return generated_count
 
     @staticmethod
-    def _should_generate_task(template):
+    def refresh_template_schedules(template_ids=None):
         """
-        Determina si debe generarse una tarea desde una plantilla
+        Recalcula next_generation_at a partir de la última tarea de cada plantilla
+
+        Se usa cuando cambia la frecuencia de una plantilla o se elimina una
+        de sus tareas. La última tarea de todas las plantillas se obtiene en
+        una sola consulta. No confirma la sesión.
 
         Args:
-            template: Plantilla de tarea
+            template_ids: IDs de las plantillas (por defecto, todas)
 
         Returns:
-            bool: True si debe generarse
+            int: Número de plantillas recalculadas
         """
-        if template.frequency == TaskFrequency.UNICA:
-            # Verificar si ya existe una tarea de esta plantilla
-            existing = Task.query.filter_by(template_id=template.id).first()
-            return existing is None
-
-        # Obtener la última tarea generada de esta plantilla
-        last_task = Task.query.filter_by(
-            template_id=template.id
-        ).order_by(Task.created_at.desc()).first()
-
-        if not last_task:
-            return True  # No hay tareas previas
-
-        # Calcular próxima fecha de generación
-        next_due = template.calculate_next_due_date(last_task.due_date)
+        ranked = db.select(
+            Task.template_id,
+            Task.due_date,
+            func.row_number().over(
+                partition_by=Task.template_id,
+                order_by=(Task.created_at.desc(), Task.id.desc())
+            ).label('position')
+        ).where(Task.template_id.isnot(None))
+
+        templates = TaskTemplate.query
+        if template_ids is not None:
+            ranked = ranked.where(Task.template_id.in_(template_ids))
+            templates = templates.filter(TaskTemplate.id.in_(template_ids))
+
+        ranked = ranked.subquery()
+        last_due_dates = dict(db.session.execute(
+            db.select(ranked.c.template_id, ranked.c.due_date).where(ranked.c.position == 1)
+        ).all())
 
-        if next_due is None:
-            return False
+        count = 0
+        for template in templates:
+            last_due_date = last_due_dates.get(template.id)
+            if template.calculate_next_due_date() is None:
+                # Tarea única: no se genera automáticamente
+                template.next_generation_at = None
+            elif last_due_date is None:
+                # Sin tareas previas: se genera en la próxima ejecución
+                template.next_generation_at = template.created_at or datetime.utcnow()
+            else:
+                template.next_generation_at = template.calculate_next_due_date(last_due_date)
+            count += 1
 
-        # Generar si la próxima fecha de vencimiento es hoy o antes
-        return next_due.date() <= datetime.utcnow().date()
+        return count
 
     @staticmethod
     def update_overdue_tasks():
@@ -152,6 +152,46 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         });
     });
+
+    // Background job progress panels
+    const jobPanels = document.querySelectorAll('[data-job-status-url]');
+    jobPanels.forEach(function(panel) {
+        const message = panel.querySelector('[data-job-message]');
+        const bar = panel.querySelector('[data-job-progress]');
+        const icon = panel.querySelector('[data-job-icon]');
+        const cancelButton = panel.querySelector('[data-job-cancel]');
+
+        cancelButton.addEventListener('click', function() {
+            cancelButton.disabled = true;
+            fetch(panel.getAttribute('data-job-cancel-url'), {
+                method: 'POST',
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest',
+                    'X-CSRFToken': getCSRFToken()
+                }
+            });
+        });
+
+        pollJob(panel.getAttribute('data-job-status-url'), function(job) {
+            bar.style.width = job.progress + '%';
+            bar.textContent = job.progress + '%';
+            message.textContent = job.progress_message || (job.status === 'queued' ? 'En cola...' : 'En ejecución...');
+        }).then(function(job) {
+            const classes = {completed: 'alert-success', failed: 'alert-danger', cancelled: 'alert-secondary'};
+            panel.classList.replace('alert-info', classes[job.status]);
+            icon.className = job.status === 'completed' ? 'fas fa-check-circle me-2' : 'fas fa-times-circle me-2';
+            bar.classList.remove('progress-bar-animated');
+            cancelButton.remove();
+
+            if (job.status === 'completed') {
+                message.textContent = (job.result && job.result.message) || 'Completado';
+            } else if (job.status === 'failed') {
+                message.textContent = 'Error: ' + job.error;
+            } else {
+                message.textContent = 'Cancelado';
+            }
+        });
+    });
 });
 
 // Utility functions
@@ -159,6 +199,28 @@ function getCSRFToken() {
     return document.querySelector('meta[name=csrf-token]')?.getAttribute('content') || '';
 }
 
+// Poll a background job status URL until it finishes; resolves with the final job
+function pollJob(statusUrl, onUpdate, interval = 2000) {
+    return new Promise(function(resolve, reject) {
+        function check() {
+            fetch(statusUrl, {headers: {'Accept': 'application/json'}})
+                .then(response => response.json())
+                .then(job => {
+                    if (onUpdate) {
+                        onUpdate(job);
+                    }
+                    if (job.is_finished) {
+                        resolve(job);
+                    } else {
+                        setTimeout(check, interval);
+                    }
+                })
+                .catch(reject);
+        }
+        check();
+    });
+}
+
 function showAlert(message, type = 'info') {
     const alertContainer = document.getElementById('alert-container') || document.querySelector('main');
     const alertDiv = document.createElement('div');
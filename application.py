@@ -25,6 +25,10 @@ def create_app(config_name=None):
     migrate = Migrate(app, db)
     csrf = CSRFProtect(app)
 
+    # Registro de auditoría por lotes al final de cada petición
+    from app.services.audit_log_writer import audit_log_writer
+    audit_log_writer.init_app(app)
+
     # Initialize Flask-Mail
     mail = Mail(app)
 
@@ -59,6 +63,7 @@ def create_app(config_name=None):
     from app.blueprints.assets import assets_bp
     from app.blueprints.services import services_bp
     from app.blueprints.changes import changes_bp
+    from app.blueprints.jobs import jobs_bp
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(dashboard_bp, url_prefix='/')
@@ -74,6 +79,7 @@ def create_app(config_name=None):
     app.register_blueprint(assets_bp, url_prefix='/activos')
     app.register_blueprint(services_bp, url_prefix='/servicios')
     app.register_blueprint(changes_bp, url_prefix='/cambios')
+    app.register_blueprint(jobs_bp, url_prefix='/trabajos')
 
     # Root route
     @app.route('/')
@@ -89,12 +95,13 @@ def create_app(config_name=None):
 
     # Initialize task scheduler within app context
     with app.app_context():
-        # Create all database tables
-        db.create_all()
-
-        # Seed initial data (admin user, roles, etc.)
-        from utils.seed_data import seed_initial_data
-        seed_initial_data()
+        # Migraciones y datos iniciales: una sola vez por despliegue con
+        # `flask preparar-bd` (entrypoint.sh); cada worker solo comprueba la revisión
+        from app.services.schema_service import SchemaService
+        if app.config.get('DATABASE_PREPARE_ON_STARTUP'):
+            SchemaService.prepare()
+        elif app.config.get('SCHEMA_VERSION_CHECK', True):
+            SchemaService.check_version()
 
         # Initialize task scheduler
         try:
@@ -109,6 +116,10 @@ def create_app(config_name=None):
     from app.risks.commands import init_app as init_risks_commands
     init_risks_commands(app)
 
+    # Register general CLI commands (audit log maintenance)
+    from app.commands import init_app as init_commands
+    init_commands(app)
+
     return app
 
 # Create the application instance
@@ -15,11 +15,18 @@ done
 
 echo "✓ Database is ready"
 
+# Prepare the schema once per deployment (Alembic migrations + idempotent seeds).
+# Gunicorn workers only check the schema revision at boot.
+# Concurrent containers are serialized with a PostgreSQL advisory lock.
+echo "Preparing database schema..."
+SCHEMA_VERSION_CHECK=False TASK_AUTO_GENERATION_ENABLED=False JOB_WORKER_ENABLED=False \
+    flask --app application preparar-bd
+echo "✓ Database schema is up to date"
+
 # Change ownership of any files created
 chown -R isms:isms /app
 
 # Execute the main command (Gunicorn)
-# Note: Database tables will be created automatically by application.py
 # Note: Gunicorn will run as root but will set workers to run as isms user
 echo "Starting application..."
 exec "$@"
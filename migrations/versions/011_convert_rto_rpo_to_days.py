@@ -1,7 +1,7 @@
 """Convert RTO and RPO from minutes to days
 
 Revision ID: 011_convert_rto_rpo_to_days
-Revises: 010_add_task_soa_controls_relationship
+Revises: 010_add_task_soa_controls
 Create Date: 2025-11-01
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '011_convert_rto_rpo_to_days'
-down_revision = '010_add_task_soa_controls_relationship'
+down_revision = '010_add_task_soa_controls'
 branch_labels = None
 depends_on = None
 
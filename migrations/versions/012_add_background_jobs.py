@@ -0,0 +1,53 @@
+"""Add background_jobs table
+
+Revision ID: 012_add_background_jobs
+Revises: 011_convert_rto_rpo_to_days
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012_add_background_jobs'
+down_revision = '011_convert_rto_rpo_to_days'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Crear tabla de trabajos en segundo plano
+    op.create_table('background_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('progress_message', sa.String(length=255), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Índices para la consulta de reclamación de trabajos de los workers
+    op.create_index('ix_background_jobs_job_type', 'background_jobs', ['job_type'])
+    op.create_index('idx_background_jobs_status_created', 'background_jobs', ['status', 'created_at'])
+
+
+def downgrade():
+    # Eliminar índices
+    op.drop_index('idx_background_jobs_status_created', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_job_type', table_name='background_jobs')
+
+    # Eliminar tabla
+    op.drop_table('background_jobs')
@@ -0,0 +1,87 @@
+"""Add resumen_riesgos materialized summary table
+
+Revision ID: 013_add_risk_summary
+Revises: 012_add_background_jobs
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013_add_risk_summary'
+down_revision = '012_add_background_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Crear tabla de resumen de riesgos por evaluación, clasificación,
+    # celda de la matriz y banda de nivel
+    op.create_table('resumen_riesgos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('evaluacion_id', sa.Integer(), nullable=False),
+        sa.Column('clasificacion', sa.String(length=20), nullable=False),
+        sa.Column('celda_probabilidad', sa.Integer(), nullable=False),
+        sa.Column('celda_impacto', sa.Integer(), nullable=False),
+        sa.Column('banda_nivel', sa.Integer(), nullable=False),
+        sa.Column('cantidad', sa.Integer(), nullable=False),
+        sa.Column('cantidad_con_nivel', sa.Integer(), nullable=False),
+        sa.Column('suma_nivel', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('nivel_maximo', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.ForeignKeyConstraint(['evaluacion_id'], ['evaluaciones_riesgo.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_resumen_riesgos_evaluacion', 'resumen_riesgos', ['evaluacion_id'])
+
+    # Poblar el resumen con los riesgos existentes
+    # (misma agregación que RiskSummaryService.refrescar)
+    op.execute("""
+        INSERT INTO resumen_riesgos (
+            evaluacion_id, clasificacion, celda_probabilidad, celda_impacto, banda_nivel,
+            cantidad, cantidad_con_nivel, suma_nivel, nivel_maximo
+        )
+        SELECT evaluacion_id, clasificacion, celda_probabilidad, celda_impacto, banda_nivel,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE nivel_riesgo_efectivo <> 0),
+               COALESCE(SUM(nivel_riesgo_efectivo), 0),
+               MAX(nivel_riesgo_efectivo)
+        FROM (
+            SELECT evaluacion_id,
+                   nivel_riesgo_efectivo,
+                   COALESCE(clasificacion_efectiva, 'SIN_CLASIFICAR') AS clasificacion,
+                   CASE
+                       WHEN probabilidad_efectiva IS NULL OR probabilidad_efectiva = 0 THEN 0
+                       WHEN probabilidad_efectiva < 3 THEN 1
+                       WHEN probabilidad_efectiva < 5 THEN 2
+                       WHEN probabilidad_efectiva < 7 THEN 3
+                       WHEN probabilidad_efectiva < 9 THEN 4
+                       ELSE 5
+                   END AS celda_probabilidad,
+                   CASE
+                       WHEN impacto_efectivo IS NULL OR impacto_efectivo = 0 THEN 0
+                       WHEN impacto_efectivo < 3 THEN 1
+                       WHEN impacto_efectivo < 5 THEN 2
+                       WHEN impacto_efectivo < 7 THEN 3
+                       WHEN impacto_efectivo < 9 THEN 4
+                       ELSE 5
+                   END AS celda_impacto,
+                   CASE
+                       WHEN nivel_riesgo_efectivo IS NULL OR nivel_riesgo_efectivo <= 12 THEN 0
+                       WHEN nivel_riesgo_efectivo < 20 THEN 1
+                       WHEN nivel_riesgo_efectivo < 40 THEN 2
+                       WHEN nivel_riesgo_efectivo < 60 THEN 3
+                       WHEN nivel_riesgo_efectivo < 80 THEN 4
+                       ELSE 5
+                   END AS banda_nivel
+            FROM riesgos
+        ) AS r
+        GROUP BY evaluacion_id, clasificacion, celda_probabilidad, celda_impacto, banda_nivel
+    """)
+
+
+def downgrade():
+    # Eliminar índice y tabla
+    op.drop_index('idx_resumen_riesgos_evaluacion', table_name='resumen_riesgos')
+    op.drop_table('resumen_riesgos')
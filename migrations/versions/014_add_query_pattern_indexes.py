@@ -0,0 +1,76 @@
+"""Add composite and partial indexes for the hot query predicates
+
+Revision ID: 014_add_query_pattern_indexes
+Revises: 013_add_risk_summary
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_add_query_pattern_indexes'
+down_revision = '013_add_risk_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tareas: vencidas / próximas a vencer, calendario y tareas por usuario o rol
+    op.create_index('idx_tasks_status_due_date', 'tasks', ['status', 'due_date'])
+    op.create_index('idx_tasks_assigned_to_due_date', 'tasks', ['assigned_to_id', 'due_date'])
+    op.create_index('idx_tasks_assigned_role', 'tasks', ['assigned_role_id'])
+    op.create_index('idx_tasks_open_due_date', 'tasks', ['due_date'],
+                    postgresql_where=sa.text("status IN ('PENDIENTE', 'EN_PROGRESO', 'VENCIDA')"))
+
+    # Incidentes: listado por estado/severidad y métricas por fecha de reporte
+    op.create_index('idx_incidents_reported_date', 'incidents', ['reported_date'])
+    op.create_index('idx_incidents_status_reported', 'incidents', ['status', 'reported_date'])
+    op.create_index('idx_incidents_severity_reported', 'incidents', ['severity', 'reported_date'])
+
+    # No conformidades: listado por estado y NC abiertas vencidas
+    op.create_index('idx_nonconformities_status_created', 'nonconformities', ['status', 'created_at'])
+    op.create_index('idx_nonconformities_open_target', 'nonconformities', ['target_closure_date'],
+                    postgresql_where=sa.text("status <> 'CLOSED'"))
+
+    # Riesgos: riesgos de una evaluación por nivel o clasificación y riesgos por activo
+    op.create_index('idx_riesgos_evaluacion_nivel', 'riesgos', ['evaluacion_id', 'nivel_riesgo_efectivo'])
+    op.create_index('idx_riesgos_evaluacion_clasificacion', 'riesgos', ['evaluacion_id', 'clasificacion_efectiva'])
+    op.create_index('idx_riesgos_activo', 'riesgos', ['activo_id'])
+    op.create_index('idx_tratamientos_riesgo_riesgo_created', 'tratamientos_riesgo', ['riesgo_id', 'created_at'])
+
+    # Logs de auditoría: filtros del listado ordenado por fecha
+    op.create_index('idx_audit_logs_action_created', 'audit_logs', ['action', 'created_at'])
+    op.create_index('idx_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at'])
+    op.create_index('idx_audit_logs_entity_created', 'audit_logs', ['entity_type', 'created_at'])
+
+    # Aprobaciones de cambios pendientes por aprobador
+    op.create_index('idx_change_approvals_approver_status', 'change_approvals', ['approver_id', 'status'])
+    op.create_index('idx_change_approvals_change', 'change_approvals', ['change_id'])
+
+    # Controles SOA por versión (unique_control_per_version empieza por control_id)
+    op.create_index('idx_soa_controls_version_control', 'soa_controls', ['soa_version_id', 'control_id'])
+
+
+def downgrade():
+    # Eliminar índices
+    op.drop_index('idx_soa_controls_version_control', table_name='soa_controls')
+    op.drop_index('idx_change_approvals_change', table_name='change_approvals')
+    op.drop_index('idx_change_approvals_approver_status', table_name='change_approvals')
+    op.drop_index('idx_audit_logs_entity_created', table_name='audit_logs')
+    op.drop_index('idx_audit_logs_user_created', table_name='audit_logs')
+    op.drop_index('idx_audit_logs_action_created', table_name='audit_logs')
+    op.drop_index('idx_tratamientos_riesgo_riesgo_created', table_name='tratamientos_riesgo')
+    op.drop_index('idx_riesgos_activo', table_name='riesgos')
+    op.drop_index('idx_riesgos_evaluacion_clasificacion', table_name='riesgos')
+    op.drop_index('idx_riesgos_evaluacion_nivel', table_name='riesgos')
+    op.drop_index('idx_nonconformities_open_target', table_name='nonconformities')
+    op.drop_index('idx_nonconformities_status_created', table_name='nonconformities')
+    op.drop_index('idx_incidents_severity_reported', table_name='incidents')
+    op.drop_index('idx_incidents_status_reported', table_name='incidents')
+    op.drop_index('idx_incidents_reported_date', table_name='incidents')
+    op.drop_index('idx_tasks_open_due_date', table_name='tasks')
+    op.drop_index('idx_tasks_assigned_role', table_name='tasks')
+    op.drop_index('idx_tasks_assigned_to_due_date', table_name='tasks')
+    op.drop_index('idx_tasks_status_due_date', table_name='tasks')
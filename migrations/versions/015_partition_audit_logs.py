@@ -0,0 +1,146 @@
+"""Partition audit_logs by month and add audit_log_filter_values
+
+Revision ID: 015_partition_audit_logs
+Revises: 014_add_query_pattern_indexes
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015_partition_audit_logs'
+down_revision = '014_add_query_pattern_indexes'
+branch_labels = None
+depends_on = None
+
+# Meses futuros con partición creada (AUDIT_LOG_PARTITIONS_AHEAD)
+MESES_ADELANTE = 3
+
+INDICES = [
+    ('idx_audit_logs_created_id', ['created_at', 'id']),
+    ('idx_audit_logs_action_created', ['action', 'created_at', 'id']),
+    ('idx_audit_logs_user_created', ['user_id', 'created_at', 'id']),
+    ('idx_audit_logs_entity_created', ['entity_type', 'created_at', 'id']),
+]
+
+
+def upgrade():
+    # Apartar la tabla actual conservando la secuencia de IDs
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_legacy')
+    op.execute('ALTER INDEX IF EXISTS audit_logs_pkey RENAME TO audit_logs_legacy_pkey')
+
+    # Tabla particionada por rango de created_at (la clave primaria debe incluirla)
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50),
+            entity_id INTEGER,
+            description TEXT,
+            old_values JSON,
+            new_values JSON,
+            user_id INTEGER REFERENCES users (id),
+            username VARCHAR(80),
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(255),
+            session_id VARCHAR(255),
+            status VARCHAR(20),
+            error_message TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id')
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    # Una partición por mes desde el registro más antiguo hasta MESES_ADELANTE meses
+    op.execute(f"""
+        DO $$
+        DECLARE
+            mes DATE;
+        BEGIN
+            FOR mes IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT MIN(created_at) FROM audit_logs_legacy), now())),
+                    date_trunc('month', now()) + INTERVAL '{MESES_ADELANTE} months',
+                    INTERVAL '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    'audit_logs_' || to_char(mes, 'YYYY_MM'), mes, (mes + INTERVAL '1 month')::date
+                );
+            END LOOP;
+        END $$
+    """)
+
+    # Copiar los registros y eliminar la tabla anterior
+    op.execute("""
+        INSERT INTO audit_logs (
+            id, action, entity_type, entity_id, description, old_values, new_values,
+            user_id, username, ip_address, user_agent, session_id, status, error_message, created_at
+        )
+        SELECT id, action, entity_type, entity_id, description, old_values, new_values,
+               user_id, username, ip_address, user_agent, session_id, status, error_message,
+               COALESCE(created_at, now())
+        FROM audit_logs_legacy
+    """)
+    op.execute('DROP TABLE audit_logs_legacy')
+
+    # Índices del listado por (created_at, id), con y sin filtros (se crean en cada partición)
+    for nombre, columnas in INDICES:
+        op.create_index(nombre, 'audit_logs', columnas)
+
+    # Valores distintos de los filtros del listado
+    op.create_table('audit_log_filter_values',
+        sa.Column('field', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('field', 'value')
+    )
+    op.execute("""
+        INSERT INTO audit_log_filter_values (field, value)
+        SELECT DISTINCT 'action', action FROM audit_logs WHERE action IS NOT NULL
+        UNION
+        SELECT DISTINCT 'entity_type', entity_type FROM audit_logs WHERE entity_type IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.drop_table('audit_log_filter_values')
+
+    # Volver a una tabla sin particionar con los registros no archivados
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_partitioned')
+    op.execute('ALTER INDEX audit_logs_pkey RENAME TO audit_logs_partitioned_pkey')
+    for nombre, _ in INDICES:
+        op.execute(f'ALTER INDEX {nombre} RENAME TO {nombre}_partitioned')
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50),
+            entity_id INTEGER,
+            description TEXT,
+            old_values JSON,
+            new_values JSON,
+            user_id INTEGER REFERENCES users (id),
+            username VARCHAR(80),
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(255),
+            session_id VARCHAR(255),
+            status VARCHAR(20),
+            error_message TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute('ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id')
+    op.execute('INSERT INTO audit_logs SELECT * FROM audit_logs_partitioned')
+    op.execute('DROP TABLE audit_logs_partitioned')
+
+    op.create_index('ix_audit_logs_created_at', 'audit_logs', ['created_at'])
+    op.create_index('idx_audit_logs_action_created', 'audit_logs', ['action', 'created_at'])
+    op.create_index('idx_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at'])
+    op.create_index('idx_audit_logs_entity_created', 'audit_logs', ['entity_type', 'created_at'])
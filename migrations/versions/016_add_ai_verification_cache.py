@@ -0,0 +1,46 @@
+"""Add ai_verification_cache and document_control_validations.from_cache
+
+Revision ID: 016_add_ai_verification_cache
+Revises: 015_partition_audit_logs
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016_add_ai_verification_cache'
+down_revision = '015_partition_audit_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Resultados de la verificación IA por documento, control, modelo y versión del prompt
+    op.create_table('ai_verification_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_hash', sa.String(length=64), nullable=False),
+        sa.Column('control_code', sa.String(length=20), nullable=False),
+        sa.Column('control_hash', sa.String(length=64), nullable=False),
+        sa.Column('ai_model', sa.String(length=100), nullable=False),
+        sa.Column('prompt_version', sa.Integer(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=False),
+        sa.Column('tokens_used', sa.Integer(), nullable=True),
+        sa.Column('validation_time', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('document_hash', 'control_code', 'control_hash', 'ai_model', 'prompt_version',
+                            name='uq_ai_verification_cache_key')
+    )
+
+    # Marcar las validaciones que reutilizan un resultado de la caché
+    op.add_column('document_control_validations',
+                  sa.Column('from_cache', sa.Boolean(), nullable=True, server_default=sa.false()))
+
+
+def downgrade():
+    op.drop_column('document_control_validations', 'from_cache')
+    op.drop_table('ai_verification_cache')
@@ -0,0 +1,66 @@
+"""Add task_templates.next_generation_at for sparse task generation
+
+Revision ID: 017_task_template_next_gen
+Revises: 016_add_ai_verification_cache
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '017_task_template_next_gen'
+down_revision = '016_add_ai_verification_cache'
+branch_labels = None
+depends_on = None
+
+# Días entre tareas de cada frecuencia (FREQUENCY_DELTAS; el resto, 30 días)
+DIAS_FRECUENCIA = {
+    'DIARIA': 1,
+    'SEMANAL': 7,
+    'QUINCENAL': 14,
+    'MENSUAL': 30,
+    'BIMESTRAL': 60,
+    'TRIMESTRAL': 90,
+    'CUATRIMESTRAL': 120,
+    'SEMESTRAL': 180,
+    'ANUAL': 365,
+    'BIENAL': 730,
+}
+
+
+def upgrade():
+    op.add_column('task_templates', sa.Column('next_generation_at', sa.DateTime(), nullable=True))
+
+    # Última tarea de cada plantilla
+    op.create_index('idx_tasks_template_created', 'tasks', ['template_id', 'created_at'])
+
+    # Próxima generación según la última tarea (misma regla que TaskService.refresh_template_schedules)
+    dias = ' '.join(f"WHEN '{frecuencia}' THEN {n}" for frecuencia, n in DIAS_FRECUENCIA.items())
+    op.execute(f"""
+        UPDATE task_templates t
+        SET next_generation_at = CASE
+            WHEN ultima.due_date IS NULL THEN COALESCE(t.created_at, now())
+            WHEN t.frequency = 'UNICA' THEN NULL
+            ELSE ultima.due_date + make_interval(days => CASE t.frequency::text {dias} ELSE 30 END)
+        END
+        FROM task_templates p
+        LEFT JOIN LATERAL (
+            SELECT due_date FROM tasks
+            WHERE tasks.template_id = p.id
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        ) ultima ON true
+        WHERE t.id = p.id
+    """)
+
+    # Plantillas activas pendientes de generar tarea
+    op.create_index('idx_task_templates_next_generation', 'task_templates', ['next_generation_at'],
+                    postgresql_where=sa.text('is_active'))
+
+
+def downgrade():
+    op.drop_index('idx_task_templates_next_generation', table_name='task_templates')
+    op.drop_index('idx_tasks_template_created', table_name='tasks')
+    op.drop_column('task_templates', 'next_generation_at')
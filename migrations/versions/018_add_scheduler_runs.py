@@ -0,0 +1,40 @@
+"""Add scheduler_runs execution history
+
+Revision ID: 018_add_scheduler_runs
+Revises: 017_task_template_next_gen
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '018_add_scheduler_runs'
+down_revision = '017_task_template_next_gen'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Historial de ejecuciones de los jobs programados
+    op.create_table('scheduler_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=100), nullable=False),
+        sa.Column('job_name', sa.String(length=200), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Últimas ejecuciones de cada job
+    op.create_index('idx_scheduler_runs_job_started', 'scheduler_runs', ['job_id', 'started_at'])
+
+
+def downgrade():
+    op.drop_index('idx_scheduler_runs_job_started', table_name='scheduler_runs')
+    op.drop_table('scheduler_runs')
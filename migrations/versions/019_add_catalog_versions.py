@@ -0,0 +1,31 @@
+"""Add catalog_versions for versioned catalogue loading
+
+Revision ID: 019_add_catalog_versions
+Revises: 018_add_scheduler_runs
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '019_add_catalog_versions'
+down_revision = '018_add_scheduler_runs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Checksum del archivo de datos de cada catálogo cargado
+    op.create_table('catalog_versions',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('checksum', sa.String(length=64), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('loaded_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('catalog_versions')
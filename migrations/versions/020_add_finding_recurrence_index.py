@@ -0,0 +1,25 @@
+"""Add audit_findings (affected_control, created_at) index for recurrence analysis
+
+Revision ID: 020_add_finding_recurrence_index
+Revises: 019_add_catalog_versions
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '020_add_finding_recurrence_index'
+down_revision = '019_add_catalog_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Ventana LAG/ROW_NUMBER por control ordenada por fecha
+    op.create_index('idx_audit_findings_control_created', 'audit_findings',
+                    ['affected_control', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_audit_findings_control_created', table_name='audit_findings')
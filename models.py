@@ -275,6 +275,8 @@ class SOAControl(db.Model):
     # Constraints para evitar controles duplicados por versión
     __table_args__ = (
         db.UniqueConstraint('control_id', 'soa_version_id', name='unique_control_per_version'),
+        # Los controles se consultan por versión: la restricción única empieza por control_id
+        db.Index('idx_soa_controls_version_control', 'soa_version_id', 'control_id'),
     )
 
     def __repr__(self):
@@ -490,6 +492,7 @@ class DocumentControlValidation(db.Model):
     validation_time = db.Column(db.Float)  # Segundos
     validated_at = db.Column(db.DateTime, default=datetime.utcnow)
     validated_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    from_cache = db.Column(db.Boolean, default=False)  # Resultado reutilizado de AIVerificationCache
 
     # Relationships
     document = db.relationship('Document', backref='ai_validations')
@@ -499,6 +502,39 @@ class DocumentControlValidation(db.Model):
     def __repr__(self):
         return f'<DocumentControlValidation doc:{self.document_id} ctrl:{self.control_id}>'
 
+
+class AIVerificationCache(db.Model):
+    """
+    Resultados de la verificación IA reutilizables entre ejecuciones
+
+    Un resultado se reutiliza mientras no cambie el contenido del documento,
+    el texto del control, el proveedor/modelo ni la versión del prompt.
+    """
+    __tablename__ = 'ai_verification_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_hash = db.Column(db.String(64), nullable=False)  # SHA-256 del archivo
+    control_code = db.Column(db.String(20), nullable=False)  # SOAControl.control_id (p. ej. 5.1)
+    control_hash = db.Column(db.String(64), nullable=False)  # SHA-256 del título, descripción y categoría
+    ai_model = db.Column(db.String(100), nullable=False)  # proveedor:modelo
+    prompt_version = db.Column(db.Integer, nullable=False)
+
+    result = db.Column(db.JSON, nullable=False)  # Análisis normalizado
+    tokens_used = db.Column(db.Integer)
+    validation_time = db.Column(db.Float)  # Segundos
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    hit_count = db.Column(db.Integer, default=0, nullable=False)
+    last_hit_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint('document_hash', 'control_code', 'control_hash', 'ai_model', 'prompt_version',
+                            name='uq_ai_verification_cache_key'),
+    )
+
+    def __repr__(self):
+        return f'<AIVerificationCache {self.document_hash[:12]} ctrl:{self.control_code} {self.ai_model}>'
+
 # Incident model moved to line 1158 (new comprehensive implementation)
 
 # NonConformity model moved to app/models/nonconformity.py (comprehensive implementation)
@@ -598,10 +634,16 @@ class DocumentType(db.Model):
         return f'<DocumentType {self.code}: {self.name}>'
 
 class AuditLog(db.Model):
-    """Registro de auditoría para trazabilidad completa"""
+    """
+    Registro de auditoría para trazabilidad completa
+
+    En PostgreSQL la tabla está particionada por mes de created_at (ver
+    AuditLogService); la clave primaria incluye created_at como exige el
+    particionado.
+    """
     __tablename__ = 'audit_logs'
 
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
     # Información del evento
     action = db.Column(db.String(50), nullable=False)  # login, logout, create, update, delete, view, etc.
@@ -625,11 +667,20 @@ class AuditLog(db.Model):
     # Metadata
     status = db.Column(db.String(20), default='success')  # success, failed, error
     error_message = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, primary_key=True)
 
     # Relationships
     user = db.relationship('User', backref='audit_logs', foreign_keys=[user_id])
 
+    # Listado de auditoría paginado por (created_at, id) descendente, con y sin filtros
+    __table_args__ = (
+        db.Index('idx_audit_logs_created_id', 'created_at', 'id'),
+        db.Index('idx_audit_logs_action_created', 'action', 'created_at', 'id'),
+        db.Index('idx_audit_logs_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('idx_audit_logs_entity_created', 'entity_type', 'created_at', 'id'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
     def __repr__(self):
         return f'<AuditLog {self.action} by {self.username} at {self.created_at}>'
 
@@ -637,13 +688,19 @@ class AuditLog(db.Model):
     def log_action(action, entity_type=None, entity_id=None, description=None,
                    old_values=None, new_values=None, user=None, ip_address=None,
                    user_agent=None, status='success', error_message=None):
-        """Helper para crear registros de auditoría"""
+        """
+        Helper para crear registros de auditoría
+
+        El registro se escribe al finalizar la petición en una transacción
+        propia (ver AuditLogWriter); no requiere db.session.commit().
+        """
         from flask_login import current_user
+        from app.services.audit_log_writer import audit_log_writer
 
         if user is None and current_user and current_user.is_authenticated:
             user = current_user
 
-        log = AuditLog(
+        return audit_log_writer.record(
             action=action,
             entity_type=entity_type,
             entity_id=entity_id,
@@ -658,8 +715,32 @@ class AuditLog(db.Model):
             error_message=error_message
         )
 
-        db.session.add(log)
-        return log
+
+# Partición por defecto: recoge los registros de meses sin partición propia
+# hasta que AuditLogService.ensure_partitions los mueve a la suya
+db.event.listen(
+    AuditLog.__table__, 'after_create',
+    db.DDL('CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT')
+    .execute_if(dialect='postgresql')
+)
+
+
+class AuditLogFilterValue(db.Model):
+    """
+    Valores distintos de acción y tipo de entidad del log de auditoría
+
+    Alimenta los desplegables de filtro del listado sin recorrer audit_logs;
+    AuditLogWriter añade los valores nuevos al escribir cada lote.
+    """
+    __tablename__ = 'audit_log_filter_values'
+
+    FIELDS = ('action', 'entity_type')
+
+    field = db.Column(db.String(20), primary_key=True)  # action, entity_type
+    value = db.Column(db.String(50), primary_key=True)
+
+    def __repr__(self):
+        return f'<AuditLogFilterValue {self.field}={self.value}>'
 
 """
 Modelos para la gestión de activos/inventario según ISO 27001:2023
@@ -1282,6 +1363,12 @@ class Incident(db.Model):
     notifications = db.relationship('IncidentNotification', back_populates='incident',
                                    cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('idx_incidents_reported_date', 'reported_date'),
+        db.Index('idx_incidents_status_reported', 'status', 'reported_date'),
+        db.Index('idx_incidents_severity_reported', 'severity', 'reported_date'),
+    )
+
     def __repr__(self):
         return f'<Incident {self.incident_number}: {self.title}>'
 
@@ -1737,6 +1824,13 @@ class NonConformity(db.Model):
     attachments = db.relationship('NCAttachment', back_populates='nonconformity',
                                  cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('idx_nonconformities_status_created', 'status', 'created_at'),
+        # NC abiertas con fecha objetivo (vencidas)
+        db.Index('idx_nonconformities_open_target', 'target_closure_date',
+                 postgresql_where=db.text("status <> 'CLOSED'")),
+    )
+
     def __repr__(self):
         return f'<NonConformity {self.nc_number}: {self.title}>'
 
@@ -1782,6 +1876,19 @@ class NonConformity(db.Model):
             return datetime.now().date() > self.target_closure_date
         return False
 
+    @classmethod
+    def overdue_condition(cls, today=None):
+        """Condición SQL equivalente a is_overdue() (usa idx_nonconformities_open_target)"""
+        today = today or datetime.now().date()
+        return db.and_(cls.target_closure_date < today, cls.status != NCStatus.CLOSED)
+
+    @classmethod
+    def resolution_days(cls):
+        """Expresión SQL de calculate_resolution_time(): días completos entre reporte y cierre"""
+        return db.func.floor(
+            db.func.extract('epoch', cls.closure_date - cls.reported_date) / 86400
+        )
+
     def get_progress_percentage(self):
         """Calcula porcentaje de progreso basado en acciones"""
         if not self.actions:
@@ -2141,11 +2248,17 @@ from app.models.task import (
     TaskHistory, TaskNotificationLog
 )
 
+# Import background job model
+from app.models.job import BackgroundJob, SchedulerRun
+
+# Import catalog version model
+from app.models.catalog import CatalogVersion
+
 # Import risk management models
 from app.risks.models import (
     ProcesoNegocio, ActivoInformacion, RecursoInformacion, ActivoProceso,
     ActivoRecurso, Amenaza, AmenazaRecursoTipo, ControlISO27002,
     ControlAmenaza, SalvaguardaImplantada, EvaluacionRiesgo, Riesgo,
-    HistorialRiesgo, TratamientoRiesgo, DeclaracionAplicabilidad,
+    ResumenRiesgo, HistorialRiesgo, TratamientoRiesgo, DeclaracionAplicabilidad,
     PlanTratamientoRiesgos
 )
@@ -31,31 +31,20 @@ def recalcular_todos():
         for evaluacion in evaluaciones:
             print(f"\n🔄 Evaluación {evaluacion.id}: {evaluacion.nombre}")
 
-            riesgos = Riesgo.query.filter_by(evaluacion_id=evaluacion.id).all()
-            print(f"   Riesgos a recalcular: {len(riesgos)}")
+            riesgos = Riesgo.query.filter_by(evaluacion_id=evaluacion.id).count()
+            print(f"   Riesgos a recalcular: {riesgos}")
 
-            recalculados = 0
-            errores = 0
+            try:
+                recalculados = RiskCalculationService.recalcular_riesgos_evaluacion(evaluacion.id)
+            except Exception as e:
+                db.session.rollback()
+                recalculados = 0
+                print(f"   ❌ Error en evaluación {evaluacion.id}: {e}")
 
-            for i, riesgo in enumerate(riesgos, 1):
-                try:
-                    # Mostrar progreso cada 50 riesgos
-                    if i % 50 == 0:
-                        print(f"   Progreso: {i}/{len(riesgos)} ({i*100//len(riesgos)}%)")
-
-                    RiskCalculationService.recalcular_riesgo(riesgo.id)
-                    recalculados += 1
-                except Exception as e:
-                    errores += 1
-                    if errores <= 5:  # Solo mostrar primeros 5 errores
-                        print(f"   ❌ Error en riesgo {riesgo.id}: {e}")
-
-            total_riesgos += len(riesgos)
+            total_riesgos += riesgos
             total_recalculados += recalculados
 
             print(f"   ✅ Recalculados: {recalculados}")
-            if errores > 0:
-                print(f"   ⚠️  Errores: {errores}")
 
         print("\n" + "=" * 60)
         print(f"🎉 COMPLETADO")
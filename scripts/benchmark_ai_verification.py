@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la verificación de documentos con IA
+
+Compara el tiempo de verificar un documento contra N controles:
+- Secuencial: una llamada por control, una detrás de otra (como antes)
+- Concurrente: una llamada por control, hasta --concurrencia a la vez
+- Por lotes: varios controles por prompt (--lote), también concurrente
+
+Arranca un servidor HTTP local que imita a Ollama (/api/tags y
+/api/generate) y responde tras --latencia-ms, sin necesidad de un modelo.
+Con --ollama se usa un servidor real.
+
+Uso:
+    python scripts/benchmark_ai_verification.py
+    python scripts/benchmark_ai_verification.py --controles 40 --concurrencia 4 8 --lote 5
+    python scripts/benchmark_ai_verification.py --ollama http://localhost:11434 --modelo llama3:8b
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from app.services.ai_verification import AIVerificationService
+
+
+class OllamaFalsoHandler(BaseHTTPRequestHandler):
+    """Servidor mínimo compatible con la API de Ollama usada por el servicio"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latencia = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def responder(self, datos):
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        self.responder({'models': [{'name': 'falso'}]})
+
+    def do_POST(self):
+        peticion = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.latencia)
+
+        # Los controles del prompt, en el orden en que aparecen
+        controles = re.findall(r'^ID: (\S+)$', peticion['prompt'], re.MULTILINE)
+        resultados = [
+            {
+                'control_id': control_id,
+                'compliance_status': 'partial',
+                'confidence_level': 4,
+                'overall_score': 70,
+                'summary': 'Respuesta del servidor de prueba',
+                'covered_aspects': ['aspecto 1'],
+                'missing_aspects': [],
+                'evidence_quotes': [],
+                'recommendations': [],
+                'maturity_suggestion': 3
+            }
+            for control_id in controles
+        ]
+        analisis = {'results': resultados} if len(resultados) > 1 else resultados[0]
+        self.responder({'response': json.dumps(analisis), 'eval_count': 200 * len(resultados)})
+
+
+def crear_app(base_url, modelo):
+    app = Flask(__name__)
+    app.config.update(
+        AI_VERIFICATION_ENABLED=True,
+        AI_PROVIDER='ollama',
+        AI_MODEL=modelo,
+        AI_BASE_URL=base_url,
+        AI_TIMEOUT=300
+    )
+    return app
+
+
+def generar_controles(n):
+    """Controles con los atributos de SOAControl que usa el servicio"""
+    return [
+        SimpleNamespace(
+            id=i,
+            control_id=f'A.{5 + i // 37}.{i % 37 + 1}',
+            title=f'Control de prueba {i}',
+            description='Descripción del control de prueba ' * 5,
+            category='Organizacional'
+        )
+        for i in range(n)
+    ]
+
+
+def benchmark(app, controles, texto, concurrencia, lote):
+    """Segundos en verificar todos los controles y número de resultados recibidos"""
+    app.config.update(AI_MAX_CONCURRENCY=concurrencia, AI_BATCH_SIZE=lote)
+    servicio = AIVerificationService()
+
+    inicio = time.perf_counter()
+    resultados = 0
+    for control, resultado, error in servicio.iter_verifications(texto, controles):
+        if error is not None:
+            raise RuntimeError(f'Control {control.control_id}: {error}')
+        resultados += 1
+    return time.perf_counter() - inicio, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la verificación con IA')
+    parser.add_argument('--controles', type=int, default=20)
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[4])
+    parser.add_argument('--lote', type=int, default=5, help='Controles por prompt en el modo por lotes')
+    parser.add_argument('--latencia-ms', type=float, default=200.0,
+                        help='Tiempo de respuesta del servidor local por llamada')
+    parser.add_argument('--ollama', help='URL de un servidor Ollama real')
+    parser.add_argument('--modelo', default='llama3:8b')
+    args = parser.parse_args()
+
+    if args.ollama:
+        base_url = args.ollama.rstrip('/')
+    else:
+        OllamaFalsoHandler.latencia = args.latencia_ms / 1000
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), OllamaFalsoHandler)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{servidor.server_address[1]}'
+
+    app = crear_app(base_url, args.modelo)
+    controles = generar_controles(args.controles)
+    texto = 'Política de seguridad de la información. ' * 200
+
+    print("=" * 60)
+    print("BENCHMARK VERIFICACIÓN CON IA")
+    print(f"Servidor: {base_url}"
+          + ('' if args.ollama else f" (local, latencia {args.latencia_ms} ms/llamada)"))
+    print(f"Controles: {args.controles}")
+    print("=" * 60)
+    print(f"{'Modo':<32} {'Tiempo (s)':>12} {'Controles/s':>12}")
+
+    modos = [('Secuencial', 1, 1)]
+    modos += [(f'Concurrente ({c} llamadas)', c, 1) for c in args.concurrencia]
+    modos += [(f'Lotes de {args.lote} ({c} llamadas)', c, args.lote) for c in args.concurrencia]
+
+    with app.app_context():
+        for modo, concurrencia, lote in modos:
+            segundos, resultados = benchmark(app, controles, texto, concurrencia, lote)
+            print(f"{modo:<32} {segundos:>12.3f} {resultados / segundos:>12,.1f}")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
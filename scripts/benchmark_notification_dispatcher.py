@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark del envío de notificaciones por email
+
+Compara el rendimiento (mensajes/segundo) de:
+- Envío individual con mail.send (una conexión SMTP por mensaje, como antes)
+- NotificationDispatcher con una única conexión
+- NotificationDispatcher con varios hilos de envío
+
+Por defecto arranca un servidor SMTP local de depuración que descarta los
+mensajes; --latencia-ms simula el tiempo de respuesta de un servidor remoto
+en cada comando SMTP. Con --smtp se usa un servidor externo.
+
+Uso:
+    python scripts/benchmark_notification_dispatcher.py
+    python scripts/benchmark_notification_dispatcher.py --mensajes 1000 --hilos 1 4 8
+    python scripts/benchmark_notification_dispatcher.py --smtp localhost:1025
+"""
+
+import argparse
+import os
+import socketserver
+import sys
+import threading
+import time
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from app.services.notification_service import mail, NotificationDispatcher
+
+
+class SMTPDepuracionHandler(socketserver.StreamRequestHandler):
+    """Servidor SMTP mínimo que acepta y descarta los mensajes"""
+
+    latencia = 0.0
+
+    def responder(self, linea):
+        if self.latencia:
+            time.sleep(self.latencia)
+        self.wfile.write(linea.encode() + b'\r\n')
+
+    def handle(self):
+        self.responder('220 localhost SMTP de depuración')
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            comando = linea.decode(errors='replace').strip().upper()
+
+            if comando.startswith('EHLO') or comando.startswith('HELO'):
+                self.responder('250 localhost')
+            elif comando == 'DATA':
+                self.responder('354 Fin de datos con <CRLF>.<CRLF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.responder('250 OK')
+            elif comando == 'QUIT':
+                self.responder('221 Adiós')
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.responder('250 OK')
+
+
+class SMTPDepuracion(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def crear_app(servidor, puerto):
+    app = Flask(__name__)
+    app.config.update(
+        MAIL_SERVER=servidor,
+        MAIL_PORT=puerto,
+        MAIL_USE_TLS=False,
+        MAIL_USE_SSL=False,
+        MAIL_DEFAULT_SENDER='benchmark@isms.local',
+        MAIL_MAX_EMAILS=100,
+        TASK_NOTIFICATION_ENABLED=True
+    )
+    mail.init_app(app)
+    return app
+
+
+def generar_notificaciones(n):
+    """Notificaciones sin tarea asociada (no generan registros en base de datos)"""
+    return [
+        dict(
+            recipient=f'usuario{i}@isms.local',
+            subject=f'Recordatorio: Tarea vence mañana - Tarea {i}',
+            text_body='Tienes una tarea pendiente que vence mañana.\n' * 10,
+            html_body='<p>Tienes una tarea pendiente que vence mañana.</p>' * 10,
+            task_id=None,
+            notification_type='reminder'
+        )
+        for i in range(n)
+    ]
+
+
+def medir(funcion, n):
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    return segundos, n / segundos
+
+
+def benchmark_individual(notificaciones):
+    """Referencia: un mail.send (y una conexión SMTP) por mensaje"""
+    def ejecutar():
+        for notificacion in notificaciones:
+            mail.send(NotificationDispatcher._build_message(notificacion, 'benchmark@isms.local'))
+    return medir(ejecutar, len(notificaciones))
+
+
+def benchmark_dispatcher(notificaciones, hilos):
+    def ejecutar():
+        resultados = NotificationDispatcher.dispatch(notificaciones, workers=hilos)
+        fallidos = sum(1 for _, ok, _ in resultados if not ok)
+        if fallidos:
+            raise RuntimeError(f'{fallidos} mensajes no enviados')
+    return medir(ejecutar, len(notificaciones))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del envío de notificaciones')
+    parser.add_argument('--mensajes', type=int, default=500)
+    parser.add_argument('--hilos', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--latencia-ms', type=float, default=1.0,
+                        help='Latencia por comando del servidor SMTP local')
+    parser.add_argument('--smtp', help='Servidor SMTP externo (host:puerto)')
+    args = parser.parse_args()
+
+    if args.smtp:
+        servidor, puerto = args.smtp.rsplit(':', 1)
+        puerto = int(puerto)
+    else:
+        SMTPDepuracionHandler.latencia = args.latencia_ms / 1000
+        smtpd = SMTPDepuracion(('127.0.0.1', 0), SMTPDepuracionHandler)
+        threading.Thread(target=smtpd.serve_forever, daemon=True).start()
+        servidor, puerto = smtpd.server_address
+
+    app = crear_app(servidor, puerto)
+    notificaciones = generar_notificaciones(args.mensajes)
+
+    print("=" * 60)
+    print("BENCHMARK ENVÍO DE NOTIFICACIONES")
+    print(f"Servidor SMTP: {servidor}:{puerto}"
+          + ('' if args.smtp else f" (local, latencia {args.latencia_ms} ms/comando)"))
+    print("=" * 60)
+    print(f"{'Modo':<32} {'Tiempo (s)':>12} {'Mensajes/s':>12}")
+
+    with app.app_context():
+        segundos, rendimiento = benchmark_individual(notificaciones)
+        print(f"{'mail.send por mensaje':<32} {segundos:>12.3f} {rendimiento:>12,.0f}")
+
+        for hilos in args.hilos:
+            segundos, rendimiento = benchmark_dispatcher(notificaciones, hilos)
+            modo = f"Dispatcher ({hilos} hilo{'s' if hilos > 1 else ''})"
+            print(f"{modo:<32} {segundos:>12.3f} {rendimiento:>12,.0f}")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
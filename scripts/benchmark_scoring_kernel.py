@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark del núcleo vectorizado de puntuación de riesgos
+
+Mide el rendimiento (tuplas/segundo) de scoring_kernel.puntuar para 10k,
+100k y 1M tuplas, y lo compara con el cálculo tupla a tupla de
+RiskCalculationService.puntuar_efectivo sobre una muestra.
+
+Uso:
+    python scripts/benchmark_scoring_kernel.py
+    python scripts/benchmark_scoring_kernel.py --tamanos 10000 100000 --repeticiones 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# models debe cargarse antes que app.risks para registrar los modelos en orden
+import models
+from app.risks.services import scoring_kernel
+from app.risks.services.risk_calculation_service import RiskCalculationService
+
+
+def generar_tuplas(n, semilla=42):
+    """Genera columnas aleatorias con los rangos reales de cada variable"""
+    rng = np.random.default_rng(semilla)
+    return {
+        'importancia_propia': rng.integers(0, 6, size=(n, 3)),
+        'importancia_tipologica': rng.integers(1, 6, size=n),
+        'frecuencia': rng.integers(0, 6, size=n),
+        'nivel_preventivo': rng.uniform(0, 5, size=n),
+        'nivel_reactivo': rng.uniform(0, 5, size=n),
+        'dimension': rng.choice(['C', 'I', 'D'], size=n),
+    }
+
+
+def medir(funcion, repeticiones):
+    """Devuelve el mejor tiempo de varias ejecuciones"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def benchmark_kernel(n, repeticiones):
+    columnas = generar_tuplas(n)
+    segundos = medir(lambda: scoring_kernel.puntuar(**columnas), repeticiones)
+    return segundos, n / segundos
+
+
+def benchmark_por_tupla(n, repeticiones):
+    columnas = generar_tuplas(n)
+    ip = scoring_kernel.seleccionar_dimension(columnas['importancia_propia'], columnas['dimension'])
+    filas = list(zip(
+        ip.tolist(),
+        columnas['importancia_tipologica'].tolist(),
+        columnas['frecuencia'].tolist(),
+        columnas['nivel_reactivo'].tolist(),
+        columnas['nivel_preventivo'].tolist()
+    ))
+
+    def ejecutar():
+        for ip_i, it_i, frec_i, grav_i, fac_i in filas:
+            RiskCalculationService.puntuar_efectivo(
+                ip_i, it_i, frec_i, (0, 1, grav_i), (0, 1, fac_i)
+            )
+
+    segundos = medir(ejecutar, repeticiones)
+    return segundos, n / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del núcleo de puntuación de riesgos')
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--muestra-por-tupla', type=int, default=10_000,
+                        help='Tuplas para la referencia del cálculo individual')
+    args = parser.parse_args()
+
+    # Configurar los mapeos de los modelos fuera de las mediciones
+    models.db.Model.registry.configure()
+
+    print("=" * 60)
+    print("BENCHMARK NÚCLEO DE PUNTUACIÓN DE RIESGOS")
+    print("=" * 60)
+    print(f"{'Tuplas':>12} {'Tiempo (s)':>12} {'Tuplas/s':>16}")
+
+    for n in args.tamanos:
+        segundos, rendimiento = benchmark_kernel(n, args.repeticiones)
+        print(f"{n:>12,} {segundos:>12.4f} {rendimiento:>16,.0f}")
+
+    print("-" * 60)
+    segundos, rendimiento = benchmark_por_tupla(args.muestra_por_tupla, 1)
+    print(f"Referencia tupla a tupla ({args.muestra_por_tupla:,} tuplas): "
+          f"{segundos:.4f} s, {rendimiento:,.0f} tuplas/s")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
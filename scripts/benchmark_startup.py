@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark del arranque de un worker
+
+Mide, en un intérprete nuevo por repetición (como un worker de gunicorn al
+arrancar), cuánto cuesta:
+- Importar Flask y sus extensiones, config y models
+- Importar cada blueprint, en el orden en que los registra create_app
+  (coste marginal: lo que ya importó un blueprint anterior no se vuelve a contar)
+- La factoría de la aplicación (import application: create_app + scheduler)
+
+y compara la factoría en los dos modos:
+- Verificación: solo comprueba la revisión del esquema (por defecto)
+- Preparación: migraciones, create_all y datos iniciales en cada arranque (como antes)
+
+Necesita una base de datos ya preparada (`flask preparar-bd`); la
+preparación es idempotente. Los jobs programados y el worker de trabajos se
+desactivan durante la medición.
+
+Uso:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --repeticiones 5 --modos verificacion
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODOS = {'verificacion': 'Verificación', 'preparacion': 'Preparación'}
+
+# Módulos de los blueprints en el orden de registro de application.create_app
+BLUEPRINTS = [
+    'app.blueprints.auth',
+    'app.blueprints.dashboard',
+    'app.blueprints.soa',
+    'app.risks',
+    'app.blueprints.documents',
+    'app.blueprints.incidents',
+    'app.blueprints.audits',
+    'app.blueprints.nonconformities',
+    'app.blueprints.tasks',
+    'app.blueprints.training',
+    'app.blueprints.admin',
+    'app.blueprints.assets',
+    'app.blueprints.services',
+    'app.blueprints.changes',
+    'app.blueprints.jobs',
+]
+
+# Código que ejecuta cada repetición en un intérprete nuevo
+MEDICION = '''
+import importlib, json, sys, time
+sys.path.insert(0, {raiz!r})
+tiempos = {{}}
+
+inicio = time.perf_counter()
+import flask, flask_login, flask_migrate, flask_wtf, flask_mail, flask_sqlalchemy
+tiempos['flask'] = time.perf_counter() - inicio
+
+inicio = time.perf_counter()
+import config, models
+tiempos['config + models'] = time.perf_counter() - inicio
+
+for modulo in {blueprints!r}:
+    inicio = time.perf_counter()
+    importlib.import_module(modulo)
+    tiempos[modulo] = time.perf_counter() - inicio
+
+inicio = time.perf_counter()
+import application
+tiempos['create_app'] = time.perf_counter() - inicio
+application.app.extensions['task_scheduler'].stop()
+
+print(json.dumps(tiempos))
+'''
+
+
+def medir(modo):
+    """Tiempos (segundos) de cada fase del arranque en un intérprete nuevo"""
+    entorno = dict(
+        os.environ,
+        TASK_AUTO_GENERATION_ENABLED='False',
+        JOB_WORKER_ENABLED='False',
+        DATABASE_PREPARE_ON_STARTUP='True' if modo == 'preparacion' else 'False',
+        SCHEMA_VERSION_CHECK='True'
+    )
+    salida = subprocess.run(
+        [sys.executable, '-c', MEDICION.format(raiz=RAIZ, blueprints=BLUEPRINTS)],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True
+    )
+    if salida.returncode != 0:
+        raise RuntimeError(f'Arranque fallido ({modo}):\n{salida.stderr[-2000:]}')
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del arranque de un worker')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+    args = parser.parse_args()
+
+    medianas = {}
+    for modo in args.modos:
+        repeticiones = [medir(modo) for _ in range(args.repeticiones)]
+        medianas[modo] = {fase: statistics.median(r[fase] for r in repeticiones) for fase in repeticiones[0]}
+
+    print("=" * 72)
+    print("BENCHMARK ARRANQUE DE WORKER")
+    print(f"Repeticiones: {args.repeticiones} (mediana, intérprete nuevo en cada una)")
+    print("=" * 72)
+    print(f"{'Fase':<36}" + ''.join(f"{MODOS[modo] + ' (ms)':>18}" for modo in args.modos))
+
+    fases = list(medianas[args.modos[0]])
+    for fase in fases:
+        print(f"{fase:<36}" + ''.join(f"{medianas[modo][fase] * 1000:>18.1f}" for modo in args.modos))
+
+    print("-" * 72)
+    print(f"{'Total':<36}" + ''.join(f"{sum(medianas[modo].values()) * 1000:>18.1f}" for modo in args.modos))
+    print("=" * 72)
+
+
+if __name__ == '__main__':
+    main()
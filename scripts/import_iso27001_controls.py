@@ -42,78 +42,69 @@ def import_controls_from_csv(csv_file, version_id, skip_existing=True):
     """
     Importa controles desde un archivo CSV
 
+    Todos los controles se insertan con un único INSERT por lotes en una
+    transacción; los existentes (mismo control_id en la versión) se omiten o
+    se actualizan según skip_existing.
+
     Args:
         csv_file: Ruta al archivo CSV
         version_id: ID de la versión SOA
         skip_existing: Si True, omite controles que ya existen (default: True)
     """
+    from sqlalchemy.dialects.postgresql import insert
 
     if not os.path.exists(csv_file):
         print(f"✗ Error: Archivo no encontrado: {csv_file}")
         return 0
 
-    imported = 0
-    skipped = 0
-    errors = 0
-
     with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-
-        for row in reader:
-            try:
-                control_id = row['control_id'].strip()
-
-                # Verificar si ya existe el control para esta versión
-                existing = SOAControl.query.filter_by(
-                    control_id=control_id,
-                    soa_version_id=version_id
-                ).first()
-
-                if existing:
-                    if skip_existing:
-                        print(f"  ⊗ Control ya existe: {control_id} (omitido)")
-                        skipped += 1
-                        continue
-                    else:
-                        # Actualizar control existente
-                        existing.title = row['title'].strip()
-                        existing.description = row['description'].strip()
-                        existing.category = row['category'].strip()
-                        existing.applicability_status = row.get('applicability_status', 'aplicable').strip()
-                        existing.implementation_status = row.get('implementation_status', 'not_implemented').strip()
-                        existing.updated_at = datetime.utcnow()
-                        print(f"  ↻ Control actualizado: {control_id}")
-                        imported += 1
-                        continue
-
-                # Crear nuevo control
-                control = SOAControl(
-                    control_id=control_id,
-                    title=row['title'].strip(),
-                    description=row['description'].strip(),
-                    category=row['category'].strip(),
-                    applicability_status=row.get('applicability_status', 'aplicable').strip(),
-                    implementation_status=row.get('implementation_status', 'not_implemented').strip(),
-                    soa_version_id=version_id,
-                    created_at=datetime.utcnow()
-                )
-
-                db.session.add(control)
-                print(f"  ✓ Control importado: {control_id} - {row['title'][:50]}...")
-                imported += 1
-
-            except Exception as e:
-                print(f"  ✗ Error procesando {row.get('control_id', 'unknown')}: {e}")
-                errors += 1
-                continue
+        rows = list(csv.DictReader(f))
+
+    existing = set(db.session.execute(
+        db.select(SOAControl.control_id).where(SOAControl.soa_version_id == version_id)
+    ).scalars())
+
+    now = datetime.utcnow()
+    records = [
+        {
+            'control_id': row['control_id'].strip(),
+            'title': row['title'].strip(),
+            'description': row['description'].strip(),
+            'category': row['category'].strip(),
+            'applicability_status': (row.get('applicability_status') or 'aplicable').strip(),
+            'implementation_status': (row.get('implementation_status') or 'not_implemented').strip(),
+            'soa_version_id': version_id,
+            'created_at': now,
+            'updated_at': now
+        }
+        for row in rows
+    ]
+
+    statement = insert(SOAControl.__table__)
+    if skip_existing:
+        statement = statement.on_conflict_do_nothing(index_elements=['control_id', 'soa_version_id'])
+    else:
+        # Actualizar controles existentes
+        statement = statement.on_conflict_do_update(
+            index_elements=['control_id', 'soa_version_id'],
+            set_={
+                column: statement.excluded[column]
+                for column in ('title', 'description', 'category', 'applicability_status',
+                               'implementation_status', 'updated_at')
+            }
+        )
 
+    if records:
+        db.session.execute(statement, records)
     db.session.commit()
 
+    skipped = sum(1 for record in records if record['control_id'] in existing) if skip_existing else 0
+    imported = len(records) - skipped
+
     print(f"\n{'='*60}")
     print(f"Resumen de importación:")
     print(f"  • Importados: {imported}")
     print(f"  • Omitidos: {skipped}")
-    print(f"  • Errores: {errors}")
     print(f"{'='*60}\n")
 
     return imported
@@ -139,7 +130,7 @@ def main():
         csv_file_2022 = os.path.join(
             os.path.dirname(__file__),
             '..',
-            'iso27001_2022_controls_complete.csv'
+            'iso27001_2022_93.controls.csv'
         )
 
         if os.path.exists(csv_file_2022):
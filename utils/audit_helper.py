@@ -2,8 +2,9 @@
 Helper para registro automático de auditoría
 """
 from flask import request
-from models import db, AuditLog
+from models import AuditLog
 from flask_login import current_user
+from app.services.audit_log_writer import audit_log_writer
 
 
 def get_client_ip():
@@ -34,11 +35,14 @@ def log_user_action(action, entity_type=None, entity_id=None, description=None,
         new_values: Valores nuevos (para creates y updates)
         status: Estado de la acción (success, failed, error)
         error_message: Mensaje de error si aplica
+
+    El evento se escribe al finalizar la petición, junto con el resto de
+    eventos de la misma, sin confirmar la transacción en curso.
     """
     try:
         user = current_user if current_user.is_authenticated else None
 
-        log = AuditLog(
+        return audit_log_writer.record(
             action=action,
             entity_type=entity_type,
             entity_id=entity_id,
@@ -52,15 +56,9 @@ def log_user_action(action, entity_type=None, entity_id=None, description=None,
             status=status,
             error_message=error_message
         )
-
-        db.session.add(log)
-        db.session.commit()
-
-        return log
     except Exception as e:
         # No fallar la operación principal si el log falla
         print(f"Error creating audit log: {e}")
-        db.session.rollback()
         return None
 
 
@@ -82,7 +80,7 @@ def log_login_attempt(username, success, error_message=None, user=None):
         description += f' - {error_message}'
 
     try:
-        log = AuditLog(
+        return audit_log_writer.record(
             action=action,
             entity_type='User',
             entity_id=user.id if user else None,
@@ -93,14 +91,8 @@ def log_login_attempt(username, success, error_message=None, user=None):
             status=status,
             error_message=error_message
         )
-
-        db.session.add(log)
-        db.session.commit()
-
-        return log
     except Exception as e:
         print(f"Error logging login attempt: {e}")
-        db.session.rollback()
         return None
 
 
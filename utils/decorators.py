@@ -4,7 +4,7 @@ Decoradores de seguridad y control de acceso
 from functools import wraps
 from flask import abort, flash, redirect, url_for, request
 from flask_login import current_user
-from models import db, AuditLog
+from models import AuditLog
 
 
 def role_required(*roles):
@@ -43,7 +43,6 @@ def role_required(*roles):
                     user_agent=request.user_agent.string,
                     status='failed'
                 )
-                db.session.commit()
 
                 flash('No tienes permisos para acceder a esta página', 'danger')
                 abort(403)
@@ -80,7 +79,6 @@ def module_access_required(module_name):
                     user_agent=request.user_agent.string,
                     status='failed'
                 )
-                db.session.commit()
 
                 flash(f'No tienes permisos para acceder al módulo {module_name}', 'danger')
                 abort(403)
@@ -115,7 +113,6 @@ def audit_action(action, entity_type=None):
                     ip_address=request.remote_addr,
                     user_agent=request.user_agent.string
                 )
-                db.session.commit()
             except Exception as e:
                 # No fallar si el registro de auditoría falla
                 print(f"Error logging audit action: {e}")
@@ -32,25 +32,20 @@ def seed_initial_data():
         # Seed ISO versions
         seed_iso_versions()
 
-        # Seed MAGERIT threats catalog
-        seed_amenazas()
-
-        # Seed control-threat relationships
-        seed_control_amenaza_relations()
-
-        # Seed threat-resource-type relationships
-        seed_amenaza_recurso_relations()
-
-        # Seed ISO 27001 task templates
-        seed_iso27001_task_templates()
-
         db.session.commit()
-        print("✅ Initial data seeded successfully")
 
     except Exception as e:
         db.session.rollback()
         print(f"⚠️  Warning: Error seeding initial data: {str(e)}")
         traceback.print_exc()
+        return
+
+    # Seed reference catalogs (threats, controls, relationships, task templates).
+    # Each catalog is committed on its own so a failure doesn't undo the rest.
+    if seed_catalogs():
+        print("✅ Initial data seeded successfully")
+    else:
+        print("⚠️  Initial data seeded with errors in some catalogs")
 
 
 def seed_roles():
@@ -254,196 +249,35 @@ def seed_iso_versions():
             print(f"  → Created ISO version: {version_data['title']}")
 
 
-def seed_amenazas():
-    """Create MAGERIT 3.2 threats catalog if it doesn't exist"""
-    from app.risks.models import Amenaza
-
-    # Check if threats already exist
-    existing_count = Amenaza.query.count()
-    if existing_count > 0:
-        print(f"  → Amenazas catalog already exists ({existing_count} threats)")
-        return
-
-    # Import and run the seed function in non-interactive mode
-    try:
-        from app.risks.seed_amenazas import seed_amenazas as load_amenazas
-        load_amenazas(force_reload=False, interactive=False)
-
-        # Count loaded threats by group
-        from sqlalchemy import func
-        stats = db.session.query(
-            Amenaza.grupo,
-            func.count(Amenaza.id).label('count')
-        ).group_by(Amenaza.grupo).order_by(Amenaza.grupo).all()
-
-        print("  → Created MAGERIT 3.2 threats catalog:")
-        for grupo, count in stats:
-            print(f"    • {grupo}: {count} amenazas")
-
-    except Exception as e:
-        print(f"  ⚠️  Warning: Could not load threats catalog: {str(e)}")
-        # Don't fail the entire seed process if threats can't be loaded
-        pass
-
-
-def seed_control_amenaza_relations():
-    """Create control-threat relationships if they don't exist"""
-    from app.risks.models import ControlAmenaza
-
-    # Check if relationships already exist
-    existing_count = ControlAmenaza.query.count()
-    if existing_count > 0:
-        print(f"  → Control-threat relationships already exist ({existing_count} relationships)")
-        return
-
-    # Import and run the seed function in non-interactive mode
-    try:
-        from app.risks.seed_control_amenaza import seed_control_amenaza
-        seed_control_amenaza(force_reload=False, interactive=False)
-
-        # Count loaded relationships by type
-        from sqlalchemy import func
-        stats = db.session.query(
-            ControlAmenaza.tipo_control,
-            func.count(ControlAmenaza.id).label('count')
-        ).group_by(ControlAmenaza.tipo_control).order_by(ControlAmenaza.tipo_control).all()
-
-        total = sum(count for _, count in stats)
-        print(f"  → Created {total} control-threat relationships:")
-        for tipo, count in stats:
-            print(f"    • {tipo}: {count} relationships")
-
-    except Exception as e:
-        print(f"  ⚠️  Warning: Could not load control-threat relationships: {str(e)}")
-        # Don't fail the entire seed process if relationships can't be loaded
-        pass
-
-
-def seed_amenaza_recurso_relations():
-    """Create threat-resource-type relationships if they don't exist"""
-    from app.risks.models import AmenazaRecursoTipo
-
-    existing_count = AmenazaRecursoTipo.query.count()
-
-    if existing_count > 0:
-        print(f"  → Threat-resource relationships already exist ({existing_count} relationships)")
-        return
-
-    print("  → Loading threat-resource-type relationships...")
-
-    try:
-        from app.risks.seed_amenaza_recurso import seed_amenaza_recurso
-        seed_amenaza_recurso(force_reload=False, interactive=False)
-
-        # Show statistics
-        total = AmenazaRecursoTipo.query.count()
-        print(f"  ✅ Created {total} threat-resource-type relationships")
-
-    except Exception as e:
-        print(f"  ⚠️  Warning: Could not load threat-resource relationships: {str(e)}")
-        # Don't fail the entire seed process if relationships can't be loaded
-        pass
-
-
-def seed_iso27001_task_templates():
-    """
-    Create ISO/IEC 27001:2023 periodic task templates for new installations.
-    This function loads the complete catalog of recommended periodic tasks
-    from the init_iso27001_tasks module.
+def seed_catalogs():
     """
-    from app.models.task import TaskTemplate
+    Load reference catalogs from app/data/catalogs (MAGERIT threats, ISO 27002
+    controls, control-threat and threat-resource relationships, ISO 27001 task
+    templates). A catalog is only loaded into an empty table: existing data may
+    have been edited or deleted by an administrator and is kept.
 
-    # Check if task templates already exist
-    existing_count = TaskTemplate.query.count()
-    if existing_count > 0:
-        print(f"  → Task templates already exist ({existing_count} templates)")
-        return
-
-    print("  → Loading ISO/IEC 27001:2023 task templates...")
-
-    try:
-        # Import the task templates generator
-        import sys
-        import os
-        # Add project root to path to import the init script
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        if project_root not in sys.path:
-            sys.path.insert(0, project_root)
-
-        from init_iso27001_tasks import get_task_templates_iso27001
-        from models import Role
-
-        # Get roles for assignment
-        role_ciso = Role.query.filter_by(name='Responsable de Seguridad (CISO)').first()
-        role_admin = Role.query.filter_by(name='Administrador del Sistema').first()
-        role_auditor = Role.query.filter_by(name='Auditor Interno').first()
-
-        # Get task templates
-        templates_data = get_task_templates_iso27001()
-
-        # Role mappings by category
-        from app.models.task import TaskCategory
-        role_mappings = {
-            TaskCategory.AUDITORIA_INTERNA: role_auditor.id if role_auditor else None,
-            TaskCategory.EVALUACION_RIESGOS: role_ciso.id if role_ciso else None,
-            TaskCategory.REVISION_POLITICAS: role_ciso.id if role_ciso else None,
-            TaskCategory.REVISION_DIRECCION: role_ciso.id if role_ciso else None,
-            TaskCategory.FORMACION_CONCIENCIACION: role_ciso.id if role_ciso else None,
-            TaskCategory.REVISION_PROVEEDORES: role_ciso.id if role_ciso else None,
-            TaskCategory.REVISION_INCIDENTES: role_ciso.id if role_ciso else None,
-            TaskCategory.CONTINUIDAD_NEGOCIO: role_ciso.id if role_ciso else None,
-            TaskCategory.REVISION_LEGAL: role_ciso.id if role_ciso else None,
-            TaskCategory.REVISION_CONTROLES: role_ciso.id if role_ciso else None,
-            TaskCategory.MANTENIMIENTO_SEGURIDAD: role_admin.id if role_admin else None,
-            TaskCategory.COPIAS_SEGURIDAD: role_admin.id if role_admin else None,
-            TaskCategory.REVISION_ACCESOS: role_admin.id if role_admin else None,
-            TaskCategory.ACTUALIZACION_INVENTARIOS: role_admin.id if role_admin else None,
-            TaskCategory.GESTION_VULNERABILIDADES: role_admin.id if role_admin else None,
-        }
-
-        # Create templates
-        created_count = 0
-        for template_data in templates_data:
-            # Assign default role if not specified
-            if 'default_role_id' not in template_data or template_data['default_role_id'] is None:
-                template_data['default_role_id'] = role_mappings.get(template_data['category'])
-
-            template = TaskTemplate(
-                title=template_data['title'],
-                description=template_data['description'],
-                category=template_data['category'],
-                frequency=template_data['frequency'],
-                priority=template_data['priority'],
-                iso_control=template_data.get('iso_control'),
-                estimated_hours=template_data.get('estimated_hours'),
-                default_role_id=template_data.get('default_role_id'),
-                notify_days_before=template_data.get('notify_days_before', 7),
-                requires_evidence=template_data.get('requires_evidence', False),
-                requires_approval=template_data.get('requires_approval', False),
-                checklist_template=template_data.get('checklist_template'),
-                is_active=True,
-                created_by_id=1,  # Admin user
-                created_at=datetime.utcnow()
-            )
-
-            db.session.add(template)
-            created_count += 1
-
-        # Count by frequency
-        from app.models.task import TaskFrequency
-        from sqlalchemy import func
-        stats = db.session.query(
-            TaskTemplate.frequency,
-            func.count(TaskTemplate.id).label('count')
-        ).group_by(TaskTemplate.frequency).all()
-
-        print(f"  ✅ Created {created_count} ISO 27001 task templates:")
-        for frequency, count in sorted(stats, key=lambda x: x[1], reverse=True):
-            print(f"    • {frequency.value}: {count} templates")
-
-    except Exception as e:
-        print(f"  ⚠️  Warning: Could not load ISO 27001 task templates: {str(e)}")
-        # Don't fail the entire seed process if task templates can't be loaded
-        import traceback
-        traceback.print_exc()
-        pass
+    Returns:
+        bool: True if every catalog was processed without errors
+    """
+    from app.services.catalog_service import CatalogService
+
+    ok = True
+    for name in CatalogService.CATALOGS:
+        try:
+            result = CatalogService.load(name)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            ok = False
+            print(f"  ⚠️  Warning: Could not load catalog {name}: {str(e)}")
+            traceback.print_exc()
+            continue
+
+        if result['status'] == 'loaded':
+            print(f"  → Loaded catalog {name} ({result['rows']} rows)")
+        elif result['status'] == 'kept':
+            print(f"  → Catalog {name} already has data, kept as is")
+        else:
+            print(f"  → Catalog {name} already up to date ({result['rows']} rows)")
+
+    return ok